@@ -146,7 +146,7 @@ CONFIG = SimpleNamespace(
     TOL=1e-4,  # Toleranz für Konvergenz
     ENCODING="utf-8",  # Standard-Encoding für Dateien
     CSV_DELIMITER=",",  # Trennzeichen für CSV-Dateien
-    FILTER_MINUTEN_ERSTER_BLOCK=10,  # Filter: wie viele Minuten am Anfang entfernt werden
+    FILTER_MINUTEN_ERSTER_BLOCK=10,  # Filter: wie viele Minuten am Anfang entfernt werden (nur ohne SEGMENTIERUNG)
     # Sensor-Kalibrierung basierend auf realistischen Messwerten
     # Waldstation Pfälzerwald-Hortenkopf: NO2=1-3 µg/m³, CnHm=9-17 µg/m³
     SENSOR_KALIBRIERUNG={
@@ -361,6 +361,260 @@ CONFIG = SimpleNamespace(
         }
     },
     
+    # PDF-Berichte (Sensorverläufe, Auswertungsdiagramme)
+    PDF_BERICHT={
+        'RASTER_SCHWELLE': 5000,            # Ab so vielen Punkten Linie rastern
+        'MAX_PUNKTE': 4000,                 # Min/Max-Verdichtung dichter Reihen
+        'DPI': 100,                         # Auflösung für PNG und Raster-Anteile
+        'PARALLEL': False,                  # Seiten in Worker-Prozessen rendern
+        'MAX_WORKERS': 4,                   # Anzahl Worker bei PARALLEL
+        'FIGSIZE_VERLAUF': (10, 4),         # Größe einer Sensorverlaufs-Seite
+        'FIGSIZE_RASTER': (11.7, 8.3)       # DIN A4 quer für 2x4-Raster
+    },
+
+    # Räumliche Interpolation (Karten aus GPS-Track)
+    INTERPOLATION={
+        'METHODE': 'idw',                   # 'idw' oder 'kriging'
+        'AUFLOESUNG': 200,                  # Gitterzellen je Achse
+        'NACHBARN': 8,                      # Nachbarpunkte je Gitterzelle
+        'IDW_POTENZ': 2.0,                  # Exponent der Distanzgewichtung
+        'MAX_DISTANZ_M': 150.0,             # Max. Abstand Zelle ↔ Track (m)
+        'KRIGING_REICHWEITE_M': 300.0,      # Reichweite Exponential-Variogramm
+        'KRIGING_NUGGET': 0.1,              # Nugget-Anteil (relativ zur Schwelle)
+        'RAND_GRAD': 0.01,                  # Kartenrand um den Track (Grad)
+        'KARTEN_SPALTEN': [                 # Spalten für den Karten-Batch
+            'MQ2', 'MQ3', 'MQ4', 'MQ5', 'MQ6', 'MQ7', 'MQ8', 'MQ9', 'MQ135',
+            'Temperature_DHT_C', 'Humidity_RH'
+        ],
+        'MAX_WORKERS': 4,                   # Parallele Prozesse beim Rendern
+        'CACHE_ORDNER': str(DATA_ROOT / "zwischenspeicher" / "interpolation")
+    },
+
+    # Offline-Basiskarte (vorgeschnittene Natural-Earth-Ebenen)
+    BASISKARTE={
+        # Ausschnitt Neustadt/Pfälzerwald: (lon_min, lon_max, lat_min, lat_max)
+        'AUSDEHNUNG': (7.5, 8.6, 49.0, 49.7),
+        'AUFLOESUNG': '10m',                # Natural-Earth-Maßstab
+        'VEREINFACHUNG_GRAD': 0.0005,       # Toleranz für Douglas-Peucker
+        'EBENEN': {                         # Name: (Kategorie, NE-Datensatz)
+            'borders': ('cultural', 'admin_0_boundary_lines_land'),
+            'coastline': ('physical', 'coastline'),
+            'land': ('physical', 'land'),
+        },
+        'CACHE_DATEI': str(PROJECT_ROOT / "datenbank" / "basiskarte_pfalz.npz"),
+        'ERLAUBE_DOWNLOAD': False           # Nie automatisch aus dem Netz laden
+    },
+
+    # Gemeinsame Kennzahlen aller Sensorspalten (Mittel, Varianz, Quantile, Top-k)
+    SENSORSTATISTIK={
+        'QUANTILE': (0.25, 0.5, 0.75, 0.9),  # Immer mitberechnete Quantile
+        'TOP_K': 10,                        # Indizes der k größten Werte je Spalte
+        'SKIZZE_KAPAZITAET': 2048,          # Puffer je Stufe der Quantil-Skizze
+        'CHUNK_ZEILEN': 200_000             # Zeilen je Block beim Streaming
+    },
+
+    # Vektorisierte Track-Auswertung (Distanz, Geschwindigkeit, Stopps)
+    GEODAESIE={
+        'STOPP_MAX_KMH': 3.0,               # Darunter gilt ein Punkt als Stand
+        'STOPP_MIN_DAUER_S': 60             # Mindestdauer einer Standphase
+    },
+
+    # Fahrtsegmentierung (mod_011): Warmlauf / Stand / Fahrt
+    SEGMENTIERUNG={
+        'AKTIV': True,                      # False = alter Minutenfilter in mod_010
+        'LUECKE_S': 120,                    # Zeitlücke → neuer Abschnitt (Neustart)
+        'FAHRT_MIN_KMH': 5.0,               # Ab dieser Geschwindigkeit gilt "Fahrt"
+        'STAND_MIN_DAUER_S': 60,            # Kürzere Halte (Ampel) bleiben "Fahrt"
+        'FAHRT_MIN_DAUER_S': 20,            # Kürzere "Fahrten" (GPS-Sprünge) = Stand
+        'MIN_SATS': 4,                      # Mindestanzahl Satelliten für GPS-Fix
+        'GLAETTUNG_PUNKTE': 5,              # Median-Fenster für Geschwindigkeit/MQ
+        'WARMLAUF_MIN_MIN': 2,              # Warmlauf dauert mindestens ...
+        'WARMLAUF_MAX_MIN': 15,             # ... und höchstens so viele Minuten
+        'DRIFT_FENSTER_S': 120,             # Zeitfenster für die MQ-Drift
+        'DRIFT_SCHWELLE': 0.02,             # Rel. Änderung je Minute = eingeschwungen
+        'WARMLAUF_ENTFERNEN': True          # Warmlauf-Zeilen aus bearbeitet0 entfernen
+    },
+
+    # Reverse-Geocoding für GPS2Street (utils/gps2street.py)
+    GEOCODING={
+        'BACKEND': 'lokal',                 # 'lokal' (Offline-Dienst) oder 'nominatim'
+        'LOKAL_URL': 'http://127.0.0.1:8089',
+        'LOKAL_PORT': 8089,
+        'NOMINATIM_URL': 'https://nominatim.openstreetmap.org',
+        'USER_AGENT': 'airscout-analytics/1.6 (airscout6@watchkido.de)',
+        'STRASSEN_DATEI': str(PROJECT_ROOT / "datenbank" / "GPS2Street.csv"),
+        'CACHE_DATEI': str(PROJECT_ROOT / "datenbank" / "geocoding_cache.sqlite"),
+        'RASTER_GRAD': 0.0001,              # Zellgröße der Deduplizierung (~11 m)
+        'MAX_DISTANZ_M': 25.0,              # Offline: max. Abstand zum Straßenpunkt
+        'BATCH_GROESSE': 200,               # Zellen je Batch-Anfrage / Cache-Commit
+        'MAX_PARALLEL': 8,                  # Gleichzeitige Anfragen (lokal)
+        'NOMINATIM_PARALLEL': 1,            # Nutzungsregeln: max. 1 Anfrage ...
+        'NOMINATIM_PAUSE_SEK': 1.0,         # ... pro Sekunde
+        'TIMEOUT_S': 10
+    },
+
+    # Map-Matching Track → Straßensegmente (utils/kartenabgleich.py, mod_040)
+    KARTENABGLEICH={
+        'SEGMENT_DATEI': str(PROJECT_ROOT / "datenbank" / "GPS2Street_segmente.csv"),
+        'MAX_GLIED_M': 20.0,                # Max. Abstand verbundener Straßenpunkte
+        'VEREINFACHUNG_M': 1.5,             # Douglas-Peucker-Toleranz der Linienzüge
+        'MAX_SEGMENT_M': 50.0,              # Längere Segmente werden geteilt
+        'KANDIDATEN': 8,                    # Kandidatensegmente je Trackpunkt
+        'SUCHRADIUS_M': 15.0,               # Max. Abstand Trackpunkt ↔ Segment
+        'GPS_SIGMA_M': 5.0,                 # Standardabweichung der GPS-Position
+        'BETA_M': 10.0,                     # Toleranz Sprungweite Track ↔ Straße
+        'WECHSEL_STRAFE': 3.0,              # Kosten für einen Straßenwechsel
+        'BLOCK_SCHRITTE': 4096              # Viterbi-Schritte je Übergangsblock
+    },
+
+    # Straßenstatistik über alle Fahrten (utils/strassenstatistik.py, nach mod_042)
+    STRASSENSTATISTIK={
+        'AKTIV': True,
+        'DATEI': str(DATA_ROOT / "archiv" / "strassenstatistik.sqlite"),
+        'SENSOREN': None,                   # None = alle MQ-Spalten der Fahrt
+        'PERZENTILE': (0.5, 0.9),
+        'HISTOGRAMM_MIN': 0.01,             # Log-Histogramm für Perzentile ...
+        'HISTOGRAMM_MAX': 100000.0,         # ... Wertebereich ...
+        'HISTOGRAMM_KLASSEN': 280,          # ... und Klassen (~4 % Auflösung)
+        'MAX_SCHRITT_S': 10,                # Max. Aufenthaltsdauer je Messpunkt
+        'MIN_PUNKTE': 20                    # Für Ranglisten (Karte/Bericht)
+    },
+
+    # Stadtweite Heatmap über alle Fahrten (utils/rasterkarte.py, nach mod_042)
+    RASTERKARTE={
+        'AKTIV': True,
+        'ORDNER': str(DATA_ROOT / "archiv" / "raster"),
+        'RASTER_GRAD': 0.0005,              # Zellgröße (~55 m x 35 m)
+        'SENSOREN': ('MQ2', 'MQ3', 'MQ4', 'MQ5', 'MQ6', 'MQ7', 'MQ8', 'MQ9', 'MQ135',
+                     'Radiation_CPS', 'Mic1', 'Temperature_DHT_C'),
+        'MIN_ANZAHL': 3,                    # Zellen mit weniger Werten bleiben leer
+        'FARBSKALA': 'inferno_r'
+    },
+
+    # GUI (mod_100_gui.py)
+    GUI={
+        'TAB_CACHE': 8,                     # Gerenderte Tabs im LRU-Cache
+        'WORKER': 2,                        # Hintergrund-Threads zum Laden
+        'ABFRAGE_MS': 50                    # Intervall der Ereignis-Queue
+    },
+
+    # Vorschaubilder für Bilder/PDFs in der GUI (utils/vorschau_cache.py)
+    VORSCHAU={
+        'ORDNER': str(DATA_ROOT / "cache" / "vorschau"),
+        'GROESSE': (800, 450),              # Vorschau im Tab; volle Auflösung per Zoom
+        'PDF_DPI_VORSCHAU': 60,             # Rasterung der PDF-Vorschau
+        'PDF_DPI_VOLL': 200,                # Rasterung beim Zoomen
+        'WORKER': 4,                        # Threads für die Erzeugung
+        'MAX_MB': 200,                      # Cache-Größe; älteste Dateien werden entfernt
+        'MAX_ALTER_TAGE': 30                # Länger ungenutzte Dateien werden entfernt
+    },
+
+    # Dash-Dashboard (utils/sensor_dashboard.py, utils/dashboard_daten.py)
+    DASHBOARD={
+        'ZIEL_PUNKTE': 4000,                # Max. Punkte je Liniendiagramm (Min/Max je Bucket)
+        'KARTE_PUNKTE': 3000,               # Max. Punkte auf der Karte
+        'CACHE_GROESSE': 256                # Gecachte Ausschnitte (Sensor x Zeitfenster)
+    },
+
+    # Fahrtenkatalog mit spaltenweiser Ablage (utils/fahrtenkatalog.py, nach mod_042)
+    FAHRTENKATALOG={
+        'AKTIV': True,
+        'ORDNER': str(DATA_ROOT / "archiv" / "fahrten"),
+        'EINLESEN_MUSTER': str(DATA_ROOT / "bearbeitet3" / "feature_*_umgerechnet_ema.csv"),
+        'MAX_FAHRTEN': 4                    # Gleichzeitig geöffnete Fahrten im Dashboard
+    },
+
+    # Live-Erfassung und Wiedergabe (utils/live_ingest.py)
+    LIVE={
+        'INTERVALL_S': 0.5,                 # Abfrageintervall Datei/Socket
+        'PUFFER_ZEILEN': 200_000,           # Ringpuffer fürs Dashboard
+        'DETEKTOR_SPALTEN': ('MQ2', 'MQ3', 'MQ4', 'MQ5', 'MQ6', 'MQ7', 'MQ8', 'MQ9', 'MQ135',
+                             'Radiation_CPS'),
+        'WIEDERGABE_TEMPO': 1.0,            # 10 = zehnfach beschleunigt, 0 = ohne Pause
+        'PORT': 5055,                       # Standardport für tcp://
+        'DASHBOARD_INTERVALL_MS': 2000      # Aktualisierung der Live-Ansicht
+    },
+
+    # Echtzeit-Alarme auf dem Live-Strom (utils/alarme.py)
+    ALARME={
+        'AKTIV': True,
+        'SENKEN': ('konsole', 'datei'),     # 'konsole', 'datei', 'webhook', 'desktop'
+        'DATEI': str(DATA_ROOT / "alarme" / "alarme.jsonl"),
+        'WEBHOOK_URL': 'http://127.0.0.1:5056/alarm',
+        'WEBHOOK_PORT': 5056,               # Lokaler Stand-in-Empfänger
+        'TIMEOUT_S': 2,
+        'SPERRZEIT_S': 60,                  # Mindestabstand zweier Alarme einer Regel
+        'ANLAUF_S': 30,                     # Keine Alarme, solange EMA/z-Score einschwingen
+        'VERLAUF': 1000,                    # Jüngste Alarme im Speicher der AlarmMaschine
+        # typ: schwelle | anstieg | relativ | koinzidenz; 'sensoren' = eine Regel je Sensor;
+        # dauer_s: Bedingung muss so lange ununterbrochen erfüllt sein
+        'REGELN': [
+            {'typ': 'schwelle', 'name': 'CO_Warnung', 'sensor': 'MQ7', 'grenze': 450,
+             'rueckstellung': 430, 'dauer_s': 10, 'stufe': 'kritisch',
+             'text': "Kritischer CO-Wert erkannt"},
+            {'typ': 'relativ', 'name': 'Gasereignis', 'faktor': 1.5,  # wie detect_gas_events
+             'sensoren': ('MQ2', 'MQ3', 'MQ4', 'MQ5', 'MQ6', 'MQ7', 'MQ8', 'MQ9', 'MQ135'),
+             'text': "Gasereignis: Wert über Grundlinie"},
+            {'typ': 'koinzidenz', 'name': 'Gasfahne', 'min_anzahl': 4, 'fenster_s': 10,
+             'bedingungen': {f'{s}_z': 5.0 for s in ('MQ2', 'MQ3', 'MQ4', 'MQ5', 'MQ6',
+                                                      'MQ7', 'MQ8', 'MQ9', 'MQ135')},
+             'text': "Mehrere Gassensoren gleichzeitig auffällig"},
+            {'typ': 'schwelle', 'name': 'Strahlungsspitze', 'sensor': 'Radiation_CPS', 'grenze': 5,
+             'stufe': 'kritisch', 'text': "Strahlungsspitze"},
+            {'typ': 'anstieg', 'name': 'Strahlungsanstieg', 'sensor': 'Radiation_CPS',
+             'grenze_pro_s': 1.0, 'fenster_s': 5, 'text': "Schneller Anstieg der Strahlung"},
+        ]
+    },
+
+    # Anhängemodus für wachsende Logdateien (mod_000_pipeline.py --anhang, utils/anhangmodus.py)
+    ANHANGMODUS={
+        'ZUSTAND_ORDNER': str(DATA_ROOT / "zwischenspeicher" / "anhang"),
+        'KONTEXT_S': 300,                   # Bereits ausgegebene Zeilen als Rückblick (Segmentierung)
+        'HORIZONT_S': 120,                  # Jüngste Zeilen warten, bis Stand/Fahrt feststeht
+        'STRASSEN_KONTEXT': 50,             # Vorherige GPS-Punkte fürs Map-Matching
+        'ML_MIN_ZEILEN': 200                # Isolation Forest erst ab so vielen Zeilen anlernen
+    },
+
+    # Berichts-Engine für den CSV-Analysebericht (mod_020)
+    CSV_BERICHT={
+        'PROBE_BYTES': 64 * 1024,           # Stichprobe für die Trennzeichen-Erkennung
+        'WORKER': 4,                        # Abschnitte parallel (Threads)
+        'CACHE': True,                      # Abschnitte je Datei-Hash zwischenspeichern
+        'CACHE_ORDNER': str(DATA_ROOT / "zwischenspeicher" / "csv_bericht"),
+        'BEISPIELWERTE': 5,                 # Zufällige Beispielwerte je Spalte
+        # Numerische Kennungen (z.B. Segment_ID aus mod_011): ohne Korrelationen/PCA/Feature Selection
+        'KENNUNG_SPALTEN': r'(?i)(^|_)id$',
+        # Näherungsmodus (blockweise, konstanter Speicher) für große Archive
+        'NAEHERUNG_AB_MB': 512,             # Ab dieser Dateigröße automatisch
+        'CHUNK_ZEILEN': 50_000,             # Zeilen je Block (bestimmt den Spitzenspeicher)
+        'STICHPROBE': 50_000,               # Reservoir-Stichprobe (Beispiele, erweiterte Analysen)
+        'HLL_PRAEZISION': 12,               # HyperLogLog: 2^12 Register, ±1.6 % Standardfehler
+        'BLOOM_BITS': 1 << 27               # Bloom-Filter für Duplikate (16 MB)
+    },
+
+    # Clusteranalyse (K-Means mit automatischer Wahl von k, mod_020)
+    CLUSTERING={
+        'MAX_K': 8,                         # Größte Clusterzahl im Suchbereich
+        'METHODE': 'silhouette',            # 'silhouette' oder 'ellbogen'
+        'STICHPROBE': 5_000,                # Zeilen je Sensorverlauf / Punkte für die Silhouette
+        'MINIBATCH_AB': 10_000,             # Ab so vielen Punkten MiniBatchKMeans
+        'BATCH_GROESSE': 1024,              # Batch-Größe für MiniBatchKMeans
+        'WORKER': 4                         # Kandidaten für k parallel (Threads)
+    },
+
+    # Archivweite Hauptkomponentenanalyse (utils/archiv_pca.py, nach dem Fahrtenkatalog)
+    ARCHIV_PCA={
+        'AKTIV': True,
+        'DATEI': str(DATA_ROOT / "archiv" / "pca_modell.pkl"),
+        'BATCH_ZEILEN': 50_000,             # Zeilen je partial_fit
+        # Nicht in die PCA: IDs, Zeitteile, GPS, abgeleitete Spalten aus mod_041/042
+        # (Umrechnungen der MQ-Rohwerte, Markierungen) – nur Rohsensoren, damit
+        # das Modell auch auf bearbeitet0 (ohne diese Spalten) anwendbar ist
+        'AUSSCHLUSS': r'(?i)^(Jahr|Monat|Tag|Wochentag|Stunde|Minute|Sekunde|millisec'
+                      r'|SecSinceMidnight.*|Segment_.*|GPS_.*|Unnamed.*|index|.*_id)$'
+                      r'|_(ppm|ugm3|intensity|zscore|outlier|event|ema)$|^ml_anomaly'
+    },
+
     # Projekt-Analyse Konfiguration
     PROJEKT_ANALYSE={
         'OUTPUT_DIR': str(DATA_ROOT / "fertig"),     # Ausgabeordner
@@ -11,6 +11,8 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from matplotlib.backends.backend_pdf import PdfPages
 from config import CONFIG
+from utils.pdf_bericht import AchsenRaster
+from utils.csv_bericht import BASISABSCHNITTE, fuehre_abschnitte_aus, naeherung_aktiv, profiliere
 missing_libs = []
 ADVANCED_LIBS_AVAILABLE = True
 
@@ -320,12 +322,66 @@ def advanced_statistics_analysis(df):
     
     return analysis_results
 
-def csv_info_extractor(csv_filepath):
+def csv_info_naeherung(csv_filepath):
+    """
+    Näherungsmodus für große Archive: Abschnitte 1-9 kommen blockweise mit
+    konstantem Speicher aus der Berichts-Engine (utils/csv_bericht.py, samt
+    Fehlergrenzen), die erweiterten Statistiken laufen auf der
+    Reservoir-Stichprobe. Die PDF-Auswertung entfällt, weil sie die ganze
+    Datei laden würde.
+    """
+    kontext = profiliere(csv_filepath, naeherung=True)
+    profil = kontext.profil
+    abschnitte = fuehre_abschnitte_aus(kontext, BASISABSCHNITTE)
+
+    info_content = ["="*80,
+                    f"CSV ANALYSE REPORT - {os.path.basename(csv_filepath)}",
+                    f"Erstellt am: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}",
+                    "="*80]
+    for name in BASISABSCHNITTE:
+        info_content.extend(abschnitte[name][0])
+
+    info_content.append("\n" + "="*80)
+    info_content.append("🚀 ERWEITERTE STATISTISCHE ANALYSEN")
+    info_content.append(f"   (Stichprobe von {len(kontext.df):,} Zeilen)")
+    info_content.append("="*80)
+    info_content.extend(advanced_statistics_analysis(kontext.df))
+
+    groesse = profil['zeilen'] * len(profil['dtypes'])
+    info_content.append("\n📈 10. ZUSAMMENFASSUNG")
+    info_content.append("-" * 40)
+    data_quality = (groesse - profil['nullen'].sum()) / groesse * 100 if groesse else 100.0
+    info_content.append(f"✅ Datenqualität: {data_quality:.1f}% vollständig")
+    info_content.append(
+        f"📊 Datentypen: {len(profil['numerisch'])} numerisch, "
+        f"{len(profil['kategorisch'])} kategorisch"
+    )
+    uniqueness = (1 - profil['duplikate']/profil['zeilen']) * 100 if profil['zeilen'] else 100.0
+    info_content.append(
+        f"🔍 Einzigartigkeit: ≈{uniqueness:.1f}% eindeutige Zeilen"
+    )
+
+    abs_info_filename = os.path.abspath(f"{os.path.splitext(csv_filepath)[0]}_info.txt")
+    with open(abs_info_filename, "w", encoding="utf-8") as f:
+        for line in info_content:
+            f.write(line + "\n")
+    print("Analyse abgeschlossen (Näherungsmodus)!")
+    print(f"Info-TXT erstellt: {abs_info_filename}")
+    print("⚠️ PDF-Auswertung im Näherungsmodus übersprungen")
+    return abs_info_filename
+
+
+def csv_info_extractor(csv_filepath, naeherung=None):
     """
     Extrahiert alle wichtigen Informationen aus einer CSV-Datei
     und speichert sie in eine _info.txt-Datei und erstellt zusätzlich eine PDF-Auswertung.
+    Große Dateien (ab CSV_BERICHT['NAEHERUNG_AB_MB']) gehen an csv_info_naeherung;
+    naeherung=True/False erzwingt den Modus.
     """
     try:
+        if naeherung_aktiv(csv_filepath, naeherung):
+            return csv_info_naeherung(csv_filepath)
+
         # CSV-Datei robuster laden mit verschiedenen Methoden
         df = None
         
@@ -732,11 +788,15 @@ def erstelle_auswertungsdiagramme(csv_path: str, gps_auswertung: Optional[List[s
         pbar.update(1)
 
         # Hilfsfunktion: Plots in 8er-Gruppen auf DIN A4 (2x4) Subplots
+        # Ein Raster für alle Seiten: Achsen werden pro Seite nur geleert
+        raster = AchsenRaster(2, 4)
+        raster_schwelle = CONFIG.PDF_BERICHT['RASTER_SCHWELLE']
+
         def plot_grid(plots, titles, kind="line", x=None, y=None, xlabel=None, ylabel=None):
             n = len(plots)
+            fig = raster.fig
             for i in range(0, n, 8):
-                fig, axes = plt.subplots(2, 4, figsize=(11.7, 8.3))  # DIN A4 quer
-                axes = axes.flatten()
+                axes = raster.neue_seite()
                 for j in range(8):
                     ax = axes[j]
                     idx = i + j
@@ -750,12 +810,14 @@ def erstelle_auswertungsdiagramme(csv_path: str, gps_auswertung: Optional[List[s
                             sns.boxplot(x=plots[idx].dropna(), ax=ax)
                         elif kind == "scatter":
                             xcol, ycol = x[idx], y[idx]
-                            ax.scatter(df[xcol], df[ycol], alpha=0.6)
+                            ax.scatter(df[xcol], df[ycol], alpha=0.6,
+                                       rasterized=len(df) > raster_schwelle)
                             ax.set_xlabel(xcol)
                             ax.set_ylabel(ycol)
                         elif kind == "line":
                             xvals, yvals = x[idx], y[idx]
-                            ax.plot(xvals, yvals, marker=".", linestyle="-", alpha=0.7)
+                            ax.plot(xvals, yvals, marker=".", linestyle="-", alpha=0.7,
+                                    rasterized=len(yvals) > raster_schwelle)
                             if xlabel: ax.set_xlabel(xlabel)
                             if ylabel: ax.set_ylabel(ylabel)
                         elif kind == "bar":
@@ -765,9 +827,8 @@ def erstelle_auswertungsdiagramme(csv_path: str, gps_auswertung: Optional[List[s
                     except Exception as e:
                         ax.text(0.5, 0.5, f"Fehler: {e}", ha="center", va="center", fontsize=8)
                         ax.axis('off')
-                plt.tight_layout()
+                fig.tight_layout()
                 pdf.savefig(fig)
-                plt.close(fig)
 
         # ========== 2. Histogramme für numerische Spalten ===========
         numeric_cols = df.select_dtypes(include=[np.number]).columns
@@ -21,6 +21,9 @@ Datum: 2025-07-21
 
 import pandas as pd
 from typing import List
+from utils.geodaesie import streckenmetriken, zeit_in_sekunden
+
+
 def gps_auswertung(df: pd.DataFrame) -> List[str]:
     """
     Führt eine spezielle GPS-Auswertung durch: Streckenberechnung, Geschwindigkeit, Heatmap.
@@ -52,31 +55,19 @@ def gps_auswertung(df: pd.DataFrame) -> List[str]:
         ergebnisse.append("❌ Keine GPS-Koordinaten gefunden (lat/lon)")
         return ergebnisse
 
-    from math import radians, sin, cos, sqrt, atan2
-    def haversine(lat1, lon1, lat2, lon2):
-        R = 6371.0
-        dlat = radians(lat2 - lat1)
-        dlon = radians(lon2 - lon1)
-        a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1 - a))
-        return R * c
-
-    lat = pd.to_numeric(df[lat_col], errors='coerce').values
-    lon = pd.to_numeric(df[lon_col], errors='coerce').values
-    strecke_km = 0.0
-    for i in range(1, len(lat)):
-        if not (pd.isna(lat[i-1]) or pd.isna(lon[i-1]) or pd.isna(lat[i]) or pd.isna(lon[i])):
-            strecke_km += haversine(lat[i-1], lon[i-1], lat[i], lon[i])
-    ergebnisse.append(f"🗺️ Gesamte Strecke: {strecke_km:.3f} km")
+    lat = pd.to_numeric(df[lat_col], errors='coerce').to_numpy(dtype=float)
+    lon = pd.to_numeric(df[lon_col], errors='coerce').to_numpy(dtype=float)
+    metriken = streckenmetriken(lat, lon)
+    ergebnisse.append(f"🗺️ Gesamte Strecke: {metriken['strecke_km']:.3f} km")
 
     if zeit_col:
         try:
-            zeit = pd.to_datetime(df[zeit_col], errors='coerce')
-            zeiten_s = (zeit - zeit.iloc[0]).dt.total_seconds().values
-            gesamtzeit_h = (zeiten_s[-1] - zeiten_s[0]) / 3600 if len(zeiten_s) > 1 else 0
-            if gesamtzeit_h > 0:
-                v_avg = strecke_km / gesamtzeit_h
-                ergebnisse.append(f"🚗 Durchschnittsgeschwindigkeit: {v_avg:.2f} km/h")
+            metriken = streckenmetriken(lat, lon, zeit_in_sekunden(df[zeit_col]))
+            if metriken['dauer_h'] > 0:
+                ergebnisse.append(f"🚗 Durchschnittsgeschwindigkeit: {metriken['v_mittel_kmh']:.2f} km/h")
+                ergebnisse.append(f"🏁 Höchstgeschwindigkeit (Segment): {metriken['v_max_kmh']:.2f} km/h")
+                ergebnisse.append(f"🅿️ Stopps: {metriken['stopps']} "
+                                  f"(gesamt {metriken['stoppdauer_s'] / 60:.1f} min)")
             else:
                 ergebnisse.append("⚠️ Zeitspanne zu kurz oder nur ein Zeitwert")
         except Exception as e:
@@ -16,6 +16,12 @@ Bedingungen für die automatische Ausführung eines Moduls:
 
 Jedes Modul ist für einen klar abgegrenzten Verarbeitungsschritt zuständig (Laden, Analyse, Feature Engineering, Visualisierung, Reporting etc.).
 Die Pipeline ist so konzipiert, dass sie leicht um weitere Module erweitert werden kann.
+
+Anhängemodus für wachsende Logdateien:
+    python mod_000_pipeline.py --anhang <rohdatei> [--abschluss]
+    - mod_010 bis mod_042 verarbeiten nur die seit dem letzten Lauf angehängten Zeilen
+      (utils/anhangmodus.py) und hängen sie an die Dateien in bearbeitet0..3 an.
+    - bearbeitet0..3 werden erst mit --abschluss in den Ergebnisordner verschoben.
 """
 
 
@@ -34,11 +40,18 @@ except ImportError:
 from mod_010_laden_reinigen import laden_und_reinigen
 from mod_020_csv_analyzer import csv_info_extractor
 
-def main():
+# Im Anhängemodus übernimmt utils/anhangmodus.py diese Module
+ANHANG_MODULE = ("mod_010", "mod_011", "mod_040", "mod_041", "mod_042")
+
+def main(anhang=None, abschluss=False):
+    """
+    :param anhang: Rohdatei für den Anhängemodus (Standard: Gesamtlauf)
+    :param abschluss: Anhängemodus: Fahrt ist beendet
+    """
 
     modulverzeichnis = os.path.dirname(os.path.abspath(__file__))
-    # Vor dem Start: Ordner bearbeitet0 bis bearbeitet3 bereinigen
-    zu_bereinigen = [
+    # Vor dem Start: Ordner bearbeitet0 bis bearbeitet3 bereinigen (nicht im Anhängemodus)
+    zu_bereinigen = [] if anhang else [
         os.path.join(CONFIG.DATA_ROOT, "bearbeitet0"),
         os.path.join(CONFIG.DATA_ROOT, "bearbeitet1"),
         os.path.join(CONFIG.DATA_ROOT, "bearbeitet2"),
@@ -62,6 +75,12 @@ def main():
 
     print("Starte sequentielle Pipeline:")
 
+    if anhang:
+        from utils.anhangmodus import anhaengen
+        print(f"\n--- Anhängemodus: {anhang} ---")
+        anhaengen(anhang, abschluss=abschluss)
+        alle_module = [m for m in alle_module if not m.startswith(ANHANG_MODULE)]
+
     for modulname in alle_module:
         time.sleep(3)
         modulpfad = os.path.join(modulverzeichnis, modulname)
@@ -80,6 +99,10 @@ def main():
 
     print("\nPipeline vollständig abgeschlossen.")
 
+    # Anhängemodus: bearbeitet0..3 werden beim nächsten Lauf fortgeschrieben
+    if anhang and not abschluss:
+        return
+
 
 
 
@@ -152,4 +175,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import sys
+    if "--anhang" in sys.argv:
+        main(anhang=sys.argv[sys.argv.index("--anhang") + 1], abschluss="--abschluss" in sys.argv)
+    else:
+        main()
\ No newline at end of file
@@ -1,9 +1,9 @@
 """mod_010_laden_reinigen.py
 Lädt die erste CSV aus 'data/bearbeitet', bereinigt sie und speichert das Ergebnis in 'data/bearbeitet0'.
 Gibt das bereinigte DataFrame zurück.
+Anhängemodus (utils/anhangmodus.py): lies_anhang/reinige_anhang verarbeiten nur neu angehängte Zeilen.
 """
 
-import re
 import io
 import os
 import glob
@@ -18,6 +18,8 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from config import CONFIG
 import matplotlib.pyplot as plt
 import airScout_analytics.context as context
+from utils.rohformat import KOPFZEILE, normalisiere_zeile, bereinige_messdaten, fahrtname
+from utils.live_ingest import ZeilenParser
 
 
 
@@ -38,7 +40,7 @@ def laden_und_reinigen() -> pd.DataFrame:
 
 
     # 2. Finde die Headerzeile explizit, überspringe Schritt wenn nicht vorhanden
-    header_name = "SecSinceMidnight-MS,Temperature_DHT_C,Humidity_RH,Light_Level,Light_Percent,GPS_Lat,GPS_Lon,GPS_Alt,GPS_Speed,GPS_Course,GPS_Sats,MQ2,MQ3,MQ4,MQ5,MQ6,MQ7,MQ8,MQ9,MQ135,Mic1,Mic2,Radiation_CPS,DateTime,GPS_DateTime"
+    header_name = KOPFZEILE
     with open(csv_path, encoding='utf-8') as f:
         lines = f.readlines()
 
@@ -54,53 +56,15 @@ def laden_und_reinigen() -> pd.DataFrame:
         header_row = 0
 
     # 3. Ersetze ; durch , und entferne ' MESZ' und ' UTC' in den Datenzeilen (ab Header)
-    daten_lines = []
-    for zeile in lines[header_row:]:
-        zeile = zeile.replace(';', ',')
-        zeile = zeile.replace(' MESZ', '')
-        zeile = zeile.replace(' UTC', '')
-        daten_lines.append(zeile)
+    daten_lines = [normalisiere_zeile(zeile) for zeile in lines[header_row:]]
 
     # Lese die Daten direkt in ein DataFrame ein
     tmp_csv = io.StringIO(''.join(daten_lines))
     df = pd.read_csv(tmp_csv)
 
-    # Spalten DateTime und GPS_DateTime in datetime konvertieren (früh, damit Filter funktionieren)
-    for spalte in ['DateTime', 'GPS_DateTime']:
-        if spalte in df.columns:
-            df[spalte] = pd.to_datetime(df[spalte], errors='coerce')
-
-    # Filtere die ersten X Minuten (aus config) direkt aus dem DataFrame
-    if 'DateTime' in df.columns:
-        min_zeit = df['DateTime'].min()
-        grenze = min_zeit + pd.Timedelta(minutes=CONFIG.FILTER_MINUTEN_ERSTER_BLOCK)
-        df = df[df['DateTime'] > grenze]
-
-    # Entferne Zeilen ohne GPS-Daten (GPS_Lat, GPS_Lon, GPS_Alt == '--' oder leer)
-    gps_spalten = ['GPS_Lat', 'GPS_Lon', 'GPS_Alt']
-    for spalte in gps_spalten:
-        if spalte in df.columns:
-            df = df[~df[spalte].astype(str).isin(['--', '', 'nan', 'NaN'])]
-
-    # Werte in der Spalte 'GPS_Course' mit mehr als 3 Ziffern auf 0 setzen
-    if 'GPS_Course' in df.columns:
-        def kurs_korrigieren(x):
-            try:
-                # Prüfe, ob Wert eine Zahl ist und mehr als 3 Ziffern hat
-                if pd.notna(x) and str(x).isdigit() and len(str(int(float(x)))) > 3:
-                    return 0
-                return x
-            except Exception:
-                return x
-        df['GPS_Course'] = df['GPS_Course'].apply(kurs_korrigieren)
-
-    # Entferne alle Zeilen, in denen GPS_Lon < 8 ist
-    if 'GPS_Lon' in df.columns:
-        df['GPS_Lon'] = pd.to_numeric(df['GPS_Lon'], errors='coerce')
-        vorher = len(df)
-        df = df[df['GPS_Lon'] >= 8]
-        nachher = len(df)
-        print(f"Gefiltert: {vorher - nachher} Zeilen mit GPS_Lon < 8 entfernt.")
+    # Zeitumwandlung, Warmlauffilter, GPS-Filter und Kurskorrektur (utils/rohformat.py,
+    # gemeinsam mit der Live-Erfassung)
+    df = bereinige_messdaten(df)
 
     # Entferne die letzte Zeile vor dem Abspeichern (z.B. fehlerhafte Messungen am Dateiende)
     if len(df) > 3:
@@ -112,25 +76,38 @@ def laden_und_reinigen() -> pd.DataFrame:
     zielordner = os.path.join(projekt_root, "data", "bearbeitet0")
     os.makedirs(zielordner, exist_ok=True)
 
-    # Extrahiere Zeitstempel aus dem alten Dateinamen
-    basename = os.path.basename(csv_path)
-    match = re.search(r'(\d{4})_(\d{2})(\d{2})(\d{2})(\d{2})', basename)
-    if match:
-        jahr, monat, tag, stunde, minute = match.groups()
-        neuer_name = f"{jahr}_{monat}_{tag}_{stunde}_{minute}.csv"
-    else:
-        # Fallback: nimm alles nach dem letzten Unterstrich und hänge .csv an
-        neuer_name = basename.split('_')[-1].replace('.csv', '') + ".csv"
+    # Extrahiere Zeitstempel aus dem alten Dateinamen (utils/rohformat.py, auch im Anhängemodus)
+    neuer_name = fahrtname(csv_path) + ".csv"
     ziel_path = os.path.join(zielordner, neuer_name)
 
     # Dateinamen ohne .csv-Endung extrahieren und global speichern
-    context.filename_ohne_ext = os.path.splitext(neuer_name)[0]
+    import inspect
+    setze_dateinamen(os.path.splitext(neuer_name)[0], aufrufer=inspect.stack()[1].filename)
+
+    # Schreibe bereinigtes DataFrame als CSV
+    df.to_csv(ziel_path, index=False, encoding='utf-8', lineterminator='\n')
+
+    # Anzeigeoptionen für bessere Terminaldarstellung
+    pd.set_option('display.width', 120)
+    pd.set_option('display.max_columns', 10)
+
+    return df
+
+def setze_dateinamen(filename_ohne_ext: str, aufrufer: str | None = None) -> None:
+    """
+    Setzt context.filename_ohne_ext und schreibt ihn nach context.py, damit die
+    folgenden Module (auch im Anhängemodus) die Fahrt finden.
+
+    :param filename_ohne_ext: Fahrtname, z.B. ``2025_07_15_05_47``
+    :param aufrufer: Datei des Aufrufers für das Protokoll (Standard: direkter Aufrufer)
+    """
+    import datetime, inspect
+    context.filename_ohne_ext = filename_ohne_ext
     print("Datei name:", context.filename_ohne_ext)
 
     # Schreibe den Wert als Python-Variable in src/airScout_analytics/context.py
     context_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "context.py")
-    import datetime, inspect
-    aufrufer = inspect.stack()[1].filename
+    aufrufer = aufrufer or inspect.stack()[1].filename
     zeit = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     log_path = os.path.join(os.path.dirname(context_path), "context_log.txt")
     with open(context_path, "w", encoding="utf-8") as f:
@@ -138,14 +115,45 @@ def laden_und_reinigen() -> pd.DataFrame:
     with open(log_path, "a", encoding="utf-8") as logf:
         logf.write(f"[{zeit}] filename_ohne_ext gesetzt auf '{context.filename_ohne_ext}' durch {aufrufer}\n")
 
-    # Schreibe bereinigtes DataFrame als CSV
-    df.to_csv(ziel_path, index=False, encoding='utf-8', lineterminator='\n')
 
-    # Anzeigeoptionen für bessere Terminaldarstellung
-    pd.set_option('display.width', 120)
-    pd.set_option('display.max_columns', 10)
+def lies_anhang(rohdatei: str, zustand: dict) -> str:
+    """
+    Anhängemodus: liest die seit dem letzten Lauf angehängten vollständigen
+    Zeilen der Rohdatei ab dem Byte-Versatz ``zustand['versatz']``.
+
+    :param rohdatei: Wachsende Logdatei des Loggers
+    :param zustand: Zustand dieser Stufe (wird fortgeschrieben)
+    :returns: Neuer Text (nur ganze Zeilen)
+    """
+    with open(rohdatei, 'rb') as f:
+        f.seek(zustand.get('versatz', 0))
+        daten = f.read()
+    ende = daten.rfind(b'\n') + 1
+    zustand['versatz'] = zustand.get('versatz', 0) + ende
+    return daten[:ende].decode('utf-8', errors='replace')
+
+
+def reinige_anhang(text: str, zustand: dict, abschluss: bool = False) -> pd.DataFrame:
+    """
+    Anhängemodus: bereinigt neu angehängten Text wie :func:`laden_und_reinigen`.
+    Kopfzeile und Fahrtbeginn merkt sich der ZeilenParser; die jeweils letzte
+    Zeile wird zurückgehalten und – wie im Gesamtlauf – am Ende verworfen.
+
+    :param text: Neuer Text aus :func:`lies_anhang`
+    :param zustand: Zustand dieser Stufe (wird fortgeschrieben)
+    :param abschluss: Fahrt ist beendet
+    :returns: Bereinigte neue Zeilen
+    """
+    parser = zustand.setdefault('parser', ZeilenParser())
+    df = parser.fuettere(text)
+    if zustand.get('letzte_zeile') is not None:
+        df = pd.concat([zustand['letzte_zeile'], df], ignore_index=True)
+    if abschluss or not len(df):
+        zustand['letzte_zeile'] = None
+        return df.iloc[:-1] if len(df) else df
+    zustand['letzte_zeile'] = df.iloc[-1:]
+    return df.iloc[:-1].reset_index(drop=True)
 
-    return df
 
 def main() -> None:
     """
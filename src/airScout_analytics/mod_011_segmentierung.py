@@ -0,0 +1,167 @@
+"""mod_011_segmentierung.py
+Zerlegt die bereinigte Fahrt aus 'data/bearbeitet0' in Warmlauf-, Stand- und Fahrtsegmente.
+- Ergänzt die Spalten Segment_ID und Segment_Typ und schreibt die Datei zurück nach 'data/bearbeitet0'
+- Entfernt optional die Warmlauf-Zeilen (ersetzt den pauschalen FILTER_MINUTEN_ERSTER_BLOCK)
+- Speichert eine Segmentübersicht in 'data/ergebnisse/{dateiname}/segmente_{dateiname}.csv'
+- Anhängemodus (utils/anhangmodus.py): segmentiere_anhang segmentiert nur neu angehängte Zeilen
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+import warnings
+warnings.filterwarnings("ignore", category=FutureWarning)
+warnings.filterwarnings("ignore", category=UserWarning)
+warnings.filterwarnings("ignore", category=Warning)
+# Kompatibler Import für Direktaufruf und als Modul
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import CONFIG
+import context
+from utils.segmentierung import WARMLAUF, segmentiere_fahrt, segment_uebersicht
+
+
+def segmentierung() -> pd.DataFrame | None:
+    """
+    Segmentiert die aktuelle Fahrt (context.filename_ohne_ext) und speichert das Ergebnis.
+
+    :returns: Segmentiertes DataFrame oder None, wenn keine Datei gefunden wurde
+    """
+    einstellungen = CONFIG.SEGMENTIERUNG
+    if not einstellungen['AKTIV']:
+        print("Segmentierung deaktiviert (CONFIG.SEGMENTIERUNG['AKTIV']).")
+        return None
+
+    fn = context.filename_ohne_ext
+    csv_path = os.path.join(CONFIG.DATA_ROOT, "bearbeitet0", f"{fn}.csv")
+    if not os.path.exists(csv_path):
+        print(f"❌ Datei für Segmentierung nicht gefunden: {csv_path}")
+        return None
+
+    df = pd.read_csv(csv_path)
+    df = segmentiere_fahrt(df)
+    uebersicht = segment_uebersicht(df)
+
+    zaehlung = df['Segment_Typ'].value_counts()
+    print(f"Segmente: {len(uebersicht)} | " +
+          " | ".join(f"{typ}: {anzahl} Zeilen" for typ, anzahl in zaehlung.items()))
+
+    if einstellungen['WARMLAUF_ENTFERNEN']:
+        vorher = len(df)
+        df = df[df['Segment_Typ'] != WARMLAUF]
+        print(f"Gefiltert: {vorher - len(df)} Warmlauf-Zeilen entfernt.")
+
+    df.to_csv(csv_path, index=False, encoding='utf-8', lineterminator='\n')
+
+    unterordner = os.path.join(CONFIG.DATA_ROOT, "ergebnisse", fn)
+    os.makedirs(unterordner, exist_ok=True)
+    uebersicht_path = os.path.join(unterordner, f"segmente_{fn}.csv")
+    uebersicht.to_csv(uebersicht_path, index=False, encoding='utf-8')
+    print(f"✅ Segmentübersicht gespeichert: {uebersicht_path}")
+    return df
+
+
+def _zeit_ns(df: pd.DataFrame) -> np.ndarray:
+    """DateTime als aufsteigende int64-Nanosekunden (Lücken vorwärts gefüllt)."""
+    zeit = pd.to_datetime(df['DateTime'], errors='coerce').ffill().bfill()
+    return np.maximum.accumulate(zeit.to_numpy(dtype='datetime64[ns]').astype(np.int64))
+
+
+def segmentiere_anhang(neu: pd.DataFrame, zustand: dict,
+                       abschluss: bool = False) -> tuple[pd.DataFrame, pd.DataFrame | None]:
+    """
+    Anhängemodus: segmentiert neu angehängte Zeilen wie :func:`segmentierung`.
+
+    Segmentiert wird Rückblick (ANHANGMODUS['KONTEXT_S']) + noch offene + neue
+    Zeilen; ausgegeben werden nur Zeilen, die älter als ANHANGMODUS['HORIZONT_S']
+    sind (deren Typ steht fest). Segment_ID und Segmentübersicht werden über
+    alle Läufe fortgeführt.
+
+    :param neu: Bereinigte neue Zeilen (mod_010)
+    :param zustand: Zustand dieser Stufe (wird fortgeschrieben)
+    :param abschluss: Fahrt ist beendet – alle offenen Zeilen ausgeben
+    :returns: (segmentierte Zeilen, Segmentübersicht der ganzen Fahrt bis jetzt)
+    """
+    e = CONFIG.ANHANGMODUS
+    s = CONFIG.SEGMENTIERUNG
+    if not s['AKTIV']:
+        return neu, None
+    kontext = zustand.get('kontext')
+    basis = (kontext.drop(columns=['Segment_ID', 'Segment_Typ'])
+             if kontext is not None else neu.iloc[0:0])
+    gesamt = pd.concat([basis, zustand.get('offen'), neu], ignore_index=True)
+    if not len(gesamt) or len(gesamt) == len(basis):
+        return gesamt.iloc[0:0], zustand.get('uebersicht')
+    fortsetzung = None
+    if len(basis):
+        erste = pd.Timestamp(int(_zeit_ns(basis)[0]))
+        beginn = max(b for b in zustand['abschnittsbeginne'] if b <= erste)
+        fortsetzung = {'seit_abschnittsbeginn_s': (erste - beginn).total_seconds(),
+                       'warm': kontext['Segment_Typ'].iloc[0] != WARMLAUF}
+    segmentiert = segmentiere_fahrt(gesamt, fortsetzung=fortsetzung)
+
+    zeit = _zeit_ns(gesamt)
+    if abschluss:
+        ende = len(gesamt)
+    else:
+        grenze = zeit[-1] - int(e['HORIZONT_S'] * 1e9)
+        ende = max(len(basis), int(np.searchsorted(zeit, grenze, side='right')))
+    ausgabe = segmentiert.iloc[len(basis):ende].reset_index(drop=True)
+    zustand['offen'] = gesamt.iloc[ende:].reset_index(drop=True)
+    if not len(ausgabe):
+        return ausgabe, zustand.get('uebersicht')
+
+    # Segment_ID über alle Läufe fortzählen (neues Segment bei Lücke oder Typwechsel)
+    t = zeit[len(basis):ende]
+    letzte_zeit = zustand.get('letzte_zeit')
+    vorher_t = np.concatenate([[t[0] if letzte_zeit is None else letzte_zeit], t[:-1]])
+    luecke = (t - vorher_t) > s['LUECKE_S'] * 1e9
+    if letzte_zeit is None:
+        luecke[0] = True
+    typ = ausgabe['Segment_Typ'].to_numpy()
+    vorher_typ = np.concatenate([[zustand.get('letzter_typ')], typ[:-1]])
+    wechsel = luecke | (typ != vorher_typ)
+    ausgabe['Segment_ID'] = zustand.get('letzte_id', -1) + np.cumsum(wechsel)
+    zustand['abschnittsbeginne'] = (zustand.get('abschnittsbeginne', [])
+                                    + [pd.Timestamp(int(x)) for x in t[luecke]])
+    zustand['letzte_id'] = int(ausgabe['Segment_ID'].iloc[-1])
+    zustand['letzter_typ'] = typ[-1]
+    zustand['letzte_zeit'] = int(t[-1])
+
+    # Laufende Segmentübersicht (Schritt vom letzten ausgegebenen Punkt zählt mit);
+    # Teilstücke eines Segments aus verschiedenen Läufen werden zusammengefasst
+    if zustand.get('letzte_segmentzeile') is not None:
+        teil = segment_uebersicht(pd.concat([zustand['letzte_segmentzeile'], ausgabe], ignore_index=True))
+        teil.loc[0, 'Punkte'] -= 1
+    else:
+        teil = segment_uebersicht(ausgabe)
+    uebersicht = pd.concat([zustand.get('uebersicht'), teil])
+    uebersicht = uebersicht.groupby('Segment_ID', sort=True).agg(
+        {'Segment_Typ': 'first', 'Start': 'min', 'Ende': 'max', 'Dauer_s': 'max',
+         'Punkte': 'sum', 'Strecke_km': 'sum'}).reset_index()
+    uebersicht['Dauer_s'] = (uebersicht['Ende'] - uebersicht['Start']).dt.total_seconds()
+    uebersicht['Strecke_km'] = uebersicht['Strecke_km'].round(3)
+    zustand['uebersicht'] = uebersicht
+    zustand['letzte_segmentzeile'] = ausgabe.iloc[-1:]
+
+    kontext = pd.concat([kontext, ausgabe], ignore_index=True)
+    zeit_k = _zeit_ns(kontext)
+    kontext = kontext.iloc[np.searchsorted(zeit_k, zeit_k[-1] - int(e['KONTEXT_S'] * 1e9)):]
+    zustand['kontext'] = kontext.reset_index(drop=True)
+
+    if s['WARMLAUF_ENTFERNEN']:
+        ausgabe = ausgabe[ausgabe['Segment_Typ'] != WARMLAUF].reset_index(drop=True)
+    return ausgabe, uebersicht
+
+
+def main() -> None:
+    """
+    Pipeline-kompatibler Einstiegspunkt: Führt segmentierung() aus und zeigt die Segmente.
+    """
+    df = segmentierung()
+    if df is not None:
+        print(df.groupby(['Segment_ID', 'Segment_Typ']).size().to_string())
+
+
+if __name__ == "__main__":
+    main()
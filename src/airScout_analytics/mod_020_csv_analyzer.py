@@ -5,13 +5,14 @@ import re
 import warnings
 import numpy as np
 import pandas as pd
-from datetime import datetime
-from sklearn.cluster import KMeans
 from sklearn.decomposition import PCA
 from sklearn.preprocessing import StandardScaler
 from sklearn.feature_selection import SelectKBest, f_regression, mutual_info_regression
 from scipy import stats
 from config import CONFIG
+from utils.archiv_pca import ArchivPCA, pca_spalten
+from utils.clusteranalyse import gruppen, sensormatrix, waehle_k
+from utils.csv_bericht import erstelle_bericht, messgroessen
 
 warnings.filterwarnings("ignore", category=FutureWarning)
 warnings.filterwarnings("ignore", category=UserWarning)
@@ -47,9 +48,9 @@ MQ-Gassensoren).
 
 Hauptfunktionen:
 ----------------
-- **csv_info_extractor**: Robust geladenes Einlesen von CSV-Dateien mit
-  automatischer Trennzeichenerkennung, Erzeugung eines ausführlichen
-  Analyse-Reports als TXT-Datei. Der Report enthält u.a.:
+- **csv_info_extractor**: Erzeugt über die Berichts-Engine
+  (utils/csv_bericht.py) einen ausführlichen Analyse-Report als TXT-Datei.
+  Der Report enthält u.a.:
     - Grundlegende Informationen (Shape, Dateigröße, Datentypen)
     - Beispielwerte pro Spalte
     - Head/Tail der Daten
@@ -60,14 +61,15 @@ Hauptfunktionen:
     - Zusammenfassung und Empfehlungen
 - **erweiterte_sensor_analyse**: Führt verschiedene ML-Analysen auf
   Sensordaten durch:
-    - Clustering von MQ-Sensoren (KMeans)
+    - Clustering von MQ-Sensoren (KMeans, k per Silhouette/Ellbogen)
     - Hauptkomponentenanalyse (PCA)
     - Zeitreihenanalyse (Trends, Variabilität)
     - Auswahl unabhängiger Sensoren (Feature Selection)
 - **mq_sensor_clustering**: Gruppiert MQ-Sensoren nach Ähnlichkeit ihres
   Verhaltens.
 - **hauptkomponenten_analyse**: Reduziert die Dimensionalität der
-  Sensordaten und identifiziert die wichtigsten Sensoren pro Komponente.
+  Sensordaten und identifiziert die wichtigsten Sensoren pro Komponente
+  (mit dem Archiv-Modell aus utils/archiv_pca.py, falls vorhanden).
 - **zeitreihen_veraenderungs_analyse**: Analysiert Trends und Variabilität
   der Sensorwerte über die Zeit.
 - **unabhaengige_sensoren_waehlen**: Identifiziert und empfiehlt möglichst
@@ -75,8 +77,9 @@ Hauptfunktionen:
 
 Besonderheiten:
 ---------------
-- Automatische und robuste CSV-Parsing-Strategien (verschiedene
-  Trennzeichen, Fehlerbehandlung)
+- Trennzeichen wird einmal an einer Stichprobe erkannt, die Datei nur
+  einmal gelesen; Report-Abschnitte laufen parallel und werden je
+  Datei-Hash zwischengespeichert
 - Speicherung der Analyseberichte an mehreren Zielorten mit Zeitstempel
 - Umfangreiche Ausgaben für Debugging und Nachvollziehbarkeit
 - Konfigurierbare Schwellenwerte und Analyseparameter über ein zentrales
@@ -100,355 +103,17 @@ Abhängigkeiten:
 warnings.filterwarnings('ignore')
 
 
-def csv_info_extractor(csv_filepath):
+def csv_info_extractor(csv_filepath, naeherung=None):
     """
     Extrahiert alle wichtigen Informationen aus einer CSV-Datei
-    und speichert sie in eine _info.txt-Datei
+    und speichert sie in eine _info.txt-Datei.
+    Große Dateien (ab CSV_BERICHT['NAEHERUNG_AB_MB']) werden im Näherungsmodus
+    mit konstantem Speicher analysiert; naeherung=True/False erzwingt den Modus.
     """
     try:
-        # CSV-Datei robuster laden mit verschiedenen Methoden
-        df = None
-        
-        # Methode 1: Standard CSV-Laden (Komma-separiert)
-        try:
-            df = pd.read_csv(csv_filepath, sep=',')
-            print("✅ CSV mit Komma-Trennung geladen")
-        except pd.errors.ParserError:
-            print("⚠️ Komma-Parser fehlgeschlagen, versuche alternative Methoden...")
-            # Methode 2: Standard ohne explizites Trennzeichen
-            try:
-                df = pd.read_csv(csv_filepath)
-                print("✅ CSV mit Standard-Einstellungen geladen")
-            except pd.errors.ParserError:
-                # Methode 3: Mit Semikolon als Trennzeichen
-                try:
-                    df = pd.read_csv(csv_filepath, sep=';')
-                    print("✅ CSV mit Semikolon-Trennung geladen")
-                except pd.errors.ParserError:
-                    # Methode 4: Automatische Trennzeichen-Erkennung
-                    try:
-                        df = pd.read_csv(csv_filepath, sep=None, engine='python')
-                        print("✅ CSV mit automatischer Trennzeichen-Erkennung geladen")
-                    except pd.errors.ParserError:
-                        # Methode 5: Mit error_bad_lines=False (ignoriert problematische Zeilen)
-                        try:
-                            df = pd.read_csv(csv_filepath, on_bad_lines='skip')
-                            print("✅ CSV geladen (problematische Zeilen übersprungen)")
-                        except pd.errors.ParserError:
-                            # Methode 6: Als Text einlesen und erste Zeilen analysieren
-                            print("🔍 Analysiere Datei-Struktur manuell...")
-                        with open(csv_filepath, 'r', encoding='utf-8') as f:
-                            lines = f.readlines()[:10]  # Erste 10 Zeilen
-                        print("📋 Erste 10 Zeilen der Datei:")
-                        for i, line in enumerate(lines):
-                            print(f"  {i+1:2d}: {line.strip()}")
-                        # Häufigste Trennzeichen ermitteln
-                        separators = [',', ';', '\t', '|', ' ']
-                        sep_counts = {}
-                        for sep in separators:
-                            count = sum(line.count(sep) for line in lines)
-                            if count > 0:
-                                sep_counts[sep] = count
-                        if sep_counts:
-                            best_sep = max(sep_counts, key=sep_counts.get)
-                            print(f"🎯 Erkanntes Trennzeichen: '{best_sep}' ({sep_counts[best_sep]} Vorkommen)")
-                            try:
-                                df = pd.read_csv(csv_filepath, sep=best_sep, on_bad_lines='skip')
-                                print("✅ CSV mit erkanntem Trennzeichen geladen")
-                            except:
-                                raise Exception("Alle CSV-Parsing-Methoden fehlgeschlagen")
-                        else:
-                            raise Exception("Kein gültiges Trennzeichen erkannt")
-
-        # Nach erfolgreichem Laden: DateTime und GPS_DateTime in datetime konvertieren
-        if df is not None:
-            for spalte in ['DateTime', 'GPS_DateTime']:
-                if spalte in df.columns:
-                    df[spalte] = pd.to_datetime(df[spalte], errors='coerce')
-        
-        if df is None:
-            raise Exception("CSV-Datei konnte nicht geladen werden")
-        
-        # Output-Dateiname erstellen (immer .txt-Endung!)
-        base_name = os.path.splitext(csv_filepath)[0]
-        info_filename = f"{base_name}_info.txt"
-        
-        # Info-String aufbauen
-        info_content = []
-        info_content.append("="*80)
-        filename = os.path.basename(csv_filepath)
-        info_content.append(f"CSV ANALYSE REPORT - {filename}")
-        timestamp = datetime.now().strftime('%d.%m.%Y %H:%M:%S')
-        info_content.append(f"Erstellt am: {timestamp}")
-        info_content.append("="*80)
-        
-        # 1. GRUNDLEGENDE INFORMATIONEN
-        info_content.append("\n🔍 1. GRUNDLEGENDE INFORMATIONEN")
-        info_content.append("-" * 40)
-        info_content.append(
-            f"📊 Shape: {df.shape[0]} Zeilen × {df.shape[1]} Spalten"
-        )
-        file_size_kb = os.path.getsize(csv_filepath) / 1024
-        info_content.append(f"💾 Dateigröße: {file_size_kb:.1f} KB")
-        info_content.append(f"🔢 Gesamt-Datenpunkte: {df.size:,}")
-        
-        # 2. SPALTEN MIT DATENTYPEN
-        info_content.append("\n📋 2. SPALTEN MIT DATENTYPEN")
-        info_content.append("-" * 40)
-        for i, (col, dtype) in enumerate(df.dtypes.items(), 1):
-            # 5 zufällige unterschiedliche Beispielwerte anzeigen
-            unique_values = df[col].dropna().unique()
-            if len(unique_values) > 0:
-                sample_size = min(5, len(unique_values))
-                sample_values = np.random.choice(unique_values,
-                                                 size=sample_size,
-                                                 replace=False)
-                sample_str = ", ".join([
-                    str(val)[:25] + "..." if len(str(val)) > 25
-                    else str(val) for val in sample_values
-                ])
-                info_content.append(
-                    f"{i:2d}. {col:<25} → {str(dtype):<12} | "
-                    f"Beispiele: {sample_str}"
-                )
-            else:
-                info_content.append(
-                    f"{i:2d}. {col:<25} → {str(dtype):<12} | "
-                    f"Beispiele: (keine Werte)"
-                )
-        
-        # 3. ERSTE 5 ZEILEN (HEAD)
-        info_content.append("\n👀 3. ERSTE 5 ZEILEN (HEAD)")
-        info_content.append("-" * 40)
-        head_str = df.head().to_string(max_cols=None, max_colwidth=25)
-        info_content.append(head_str)
-        
-        # LETZTE 5 ZEILEN (TAIL)
-        info_content.append("\n👁️ LETZTE 5 ZEILEN (TAIL)")
-        info_content.append("-" * 40)
-        tail_str = df.tail().to_string(max_cols=None, max_colwidth=25)
-        info_content.append(tail_str)
-        
-        # 4. INFO() EQUIVALENT
-        info_content.append("\n📊 4. DATAFRAME INFO")
-        info_content.append("-" * 40)
-        info_content.append(f"RangeIndex: {len(df)} entries, 0 to {len(df)-1}")
-        info_content.append(f"Data columns (total {len(df.columns)} columns):")
-        
-        for i, col in enumerate(df.columns):
-            non_null_count = df[col].count()
-            dtype = df[col].dtype
-            info_content.append(
-                f" {i:2d}  {col:<20} {non_null_count:>6} non-null  "
-                f"{str(dtype)}"
-            )
-        
-        memory_usage = df.memory_usage(deep=True).sum()
-        info_content.append(f"Memory usage: {memory_usage / 1024:.1f} KB")
-        
-        # 5. NULL VALUES
-        info_content.append("\n❌ 5. NULL VALUES (FEHLENDE WERTE)")
-        info_content.append("-" * 40)
-        null_counts = df.isnull().sum()
-        total_nulls = null_counts.sum()
-        
-        if total_nulls == 0:
-            info_content.append("✅ Keine fehlenden Werte gefunden!")
-        else:
-            info_content.append(f"🚨 Gesamt fehlende Werte: {total_nulls:,}")
-            info_content.append("")
-            for col, null_count in null_counts.items():
-                if null_count > 0:
-                    percentage = (null_count / len(df)) * 100
-                    # Zeilennummern mit NULL-Werten finden
-                    null_rows = df[df[col].isnull()].index.tolist()
-                    
-                    # Nur erste 10 Zeilennummern anzeigen, falls zu viele
-                    if len(null_rows) <= 10:
-                        rows_str = ", ".join(map(str, null_rows))
-                    else:
-                        first_10 = ", ".join(map(str, null_rows[:10]))
-                        rows_str = (f"{first_10}, ... "
-                                    f"(+{len(null_rows)-10} weitere)")
-                    
-                    info_content.append(
-                        f"{col:<25}: {null_count:>6} ({percentage:.1f}%) | "
-                        f"Zeilen: {rows_str}"
-                    )
-                    
-                    # Zeige 2 Beispielzeilen mit NULL-Werten
-                    sample_null_rows = null_rows[:2]  # Erste 2 Zeilen mit NULL
-                    if sample_null_rows:
-                        info_content.append(
-                            f"   📋 Beispiel-Zeilen mit NULL in '{col}':"
-                        )
-                        for row_idx in sample_null_rows:
-                            row_data = df.iloc[row_idx]
-                            # Zeige nur die ersten 5 Spalten für Übersicht
-                            row_preview = []
-                            for i, (col_name, value) in enumerate(
-                                row_data.items()
-                            ):
-                                if i >= 5:  # Nur erste 5 Spalten
-                                    row_preview.append("...")
-                                    break
-                                if pd.isna(value):
-                                    row_preview.append(f"{col_name}=NULL")
-                                else:
-                                    val_str = str(value)[:20]
-                                    if len(str(value)) > 20:
-                                        val_str += "..."
-                                    row_preview.append(f"{col_name}={val_str}")
-                            
-                            info_content.append(
-                                f"      Zeile {row_idx}: "
-                                f"{' | '.join(row_preview)}"
-                            )
-                        info_content.append("")  # Leerzeile nach Beispielen
-        
-        # 6. NUMERISCHE STATISTIKEN
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
-        if len(numeric_cols) > 0:
-            info_content.append("\n🔢 6. NUMERISCHE STATISTIKEN")
-            info_content.append("-" * 40)
-            desc = df[numeric_cols].describe()
-            desc_str = desc.to_string()
-            info_content.append(desc_str)
-        
-        # 7. KATEGORISCHE SPALTEN ANALYSE
-        categorical_cols = df.select_dtypes(include=['object']).columns
-        if len(categorical_cols) > 0:
-            info_content.append("\n📝 7. KATEGORISCHE SPALTEN ANALYSE")
-            info_content.append("-" * 40)
-            for col in categorical_cols:
-                unique_count = df[col].nunique()
-                mode_values = df[col].mode()
-                most_common = (mode_values.iloc[0] if len(mode_values) > 0
-                               else "N/A")
-                info_content.append(
-                    f"{col:<25}: {unique_count:>4} eindeutige Werte, "
-                    f"häufigster: '{most_common}'"
-                )
-        
-        # 8. ZUSÄTZLICHE WICHTIGE INFORMATIONEN
-        info_content.append("\n⭐ 8. ZUSÄTZLICHE INFORMATIONEN")
-        info_content.append("-" * 40)
-        
-        # Duplikate
-        duplicate_count = df.duplicated().sum()
-        info_content.append(f"🔁 Duplikate: {duplicate_count}")
-        
-        # Komplett leere Zeilen
-        empty_rows = df.isnull().all(axis=1).sum()
-        info_content.append(f"📭 Komplett leere Zeilen: {empty_rows}")
-        
-        # Spalten mit nur einem Wert
-        single_value_cols = [col for col in df.columns if df[col].nunique() <= 1]
-        if single_value_cols:
-            info_content.append(f"⚠️  Spalten mit nur einem Wert: {', '.join(single_value_cols)}")
-        
-        # Korrelationen (nur für numerische Spalten)
-        if len(numeric_cols) > 1:
-            info_content.append("\n🔗 9. KORRELATIONEN (NUMERISCHE SPALTEN)")
-            info_content.append("-" * 40)
-            corr_matrix = df[numeric_cols].corr()
-            
-            # Höchste Korrelationen finden
-            high_corr_pairs = []
-            korrelationsschwelle = getattr(CONFIG, 'KORRELATIONSSCHWELLE_HOCH', 0.7)
-            for i in range(len(corr_matrix.columns)):
-                for j in range(i+1, len(corr_matrix.columns)):
-                    corr_val = corr_matrix.iloc[i, j]
-                    if abs(corr_val) > korrelationsschwelle:  # Hohe Korrelation (Schwelle aus config)
-                        col1, col2 = corr_matrix.columns[i], corr_matrix.columns[j]
-                        high_corr_pairs.append(f"{col1} ↔ {col2}: {corr_val:.3f}")
-            
-            if high_corr_pairs:
-                info_content.append("🔥 Hohe Korrelationen (|r| > 0.7):")
-                for pair in high_corr_pairs:
-                    info_content.append(f"  {pair}")
-            else:
-                info_content.append("✅ Keine sehr hohen Korrelationen gefunden")
-        
-        # 10. ERWEITERTE SENSOR-ANALYSEN (NEU!)
-        erweiterte_ergebnisse = {}
-        if len(numeric_cols) >= 2:
-            info_content.append("\n🔬 10. ERWEITERTE SENSOR-ANALYSEN")
-            info_content.append("-" * 40)
-            
-            try:
-                base_name = os.path.splitext(csv_filepath)[0]
-                erweiterte_ergebnisse = erweiterte_sensor_analyse(df, base_name)
-                
-                # Cluster-Ergebnisse in Info einbauen
-                if 'mq_cluster' in erweiterte_ergebnisse:
-                    cluster_info = erweiterte_ergebnisse['mq_cluster']
-                    if 'sensor_gruppen' in cluster_info:
-                        info_content.append("🎯 MQ-Sensor Clustering:")
-                        for gruppe, sensoren in cluster_info['sensor_gruppen'].items():
-                            info_content.append(f"   {gruppe}: {', '.join(sensoren)}")
-                
-                # PCA-Ergebnisse
-                if 'pca_analyse' in erweiterte_ergebnisse:
-                    pca_info = erweiterte_ergebnisse['pca_analyse'] 
-                    if 'erklaerte_varianz' in pca_info:
-                        info_content.append("\n📊 Hauptkomponentenanalyse:")
-                        for i, varianz in enumerate(pca_info['erklaerte_varianz']):
-                            info_content.append(f"   Komponente {i+1}: {varianz:.1%} Varianz")
-                
-                # Zeitreihen-Ergebnisse
-                if 'zeitreihen_analyse' in erweiterte_ergebnisse:
-                    zeit_info = erweiterte_ergebnisse['zeitreihen_analyse']
-                    if 'variable_sensoren' in zeit_info:
-                        info_content.append(f"\n⏰ Variable Sensoren: {len(zeit_info['variable_sensoren'])}")
-                        for sensor in zeit_info['variable_sensoren'][:3]:
-                            info_content.append(f"   {sensor} (hoch variabel)")
-                
-                # Feature Selection
-                if 'feature_selection' in erweiterte_ergebnisse:
-                    feature_info = erweiterte_ergebnisse['feature_selection']
-                    if 'empfohlene_sensoren' in feature_info:
-                        info_content.append(f"\n🎯 Empfohlene unabhängige Sensoren:")
-                        for sensor in feature_info['empfohlene_sensoren'][:5]:
-                            info_content.append(f"   {sensor}")
-                            
-            except Exception as e:
-                info_content.append(f"⚠️ Erweiterte Analyse fehlgeschlagen: {str(e)}")
-                print(f"⚠️ Erweiterte Analyse-Fehler: {e}")
-
-        # 11. ZUSAMMENFASSUNG
-        info_content.append("\n📈 11. ZUSAMMENFASSUNG")
-        info_content.append("-" * 40)
-        data_quality = ((df.size - total_nulls) / df.size * 100)
-        info_content.append(f"✅ Datenqualität: {data_quality:.1f}% vollständig")
-        info_content.append(
-            f"📊 Datentypen: {len(numeric_cols)} numerisch, "
-            f"{len(categorical_cols)} kategorisch"
-        )
-        uniqueness = (1 - duplicate_count/len(df)) * 100
-        info_content.append(
-            f"🔍 Einzigartigkeit: {uniqueness:.1f}% eindeutige Zeilen"
-        )
-        
-        # Erweiterte Analyse Zusammenfassung
-        if erweiterte_ergebnisse:
-            info_content.append(f"🔬 Erweiterte Analysen: {len(erweiterte_ergebnisse)} Module")
-            
-            # Empfehlungen basierend auf Analysen
-            empfehlungen = []
-            if 'mq_cluster' in erweiterte_ergebnisse:
-                cluster_anzahl = erweiterte_ergebnisse['mq_cluster'].get('cluster_anzahl', 0)
-                empfehlungen.append(f"{cluster_anzahl} MQ-Sensor-Gruppen identifiziert")
-            
-            if 'feature_selection' in erweiterte_ergebnisse:
-                unabhaengige = len(erweiterte_ergebnisse['feature_selection'].get('unabhaengige_sensoren', []))
-                empfehlungen.append(f"{unabhaengige} unabhängige Sensoren empfohlen")
-            
-            if empfehlungen:
-                info_content.append("💡 Analyse-Empfehlungen:")
-                for emp in empfehlungen:
-                    info_content.append(f"   • {emp}")
-        
+        # Trennzeichen einmal erkennen, Spaltenprofile in einem Durchlauf,
+        # Abschnitte parallel und je Datei-Hash zwischengespeichert
+        info_content = erstelle_bericht(csv_filepath, naeherung=naeherung)
 
         # Speichern nur noch in den beiden Zielorten im ergebnisse-Ordner
         # (Kein Speichern mehr im Originalpfad)
@@ -550,8 +215,8 @@ def erweiterte_sensor_analyse(df: pd.DataFrame, output_pfad: str) -> dict:
     print("\n🔬 ERWEITERTE SENSOR-ANALYSE")
     print("=" * 50)
     
-    # Numerische Spalten identifizieren
-    numerische_spalten = df.select_dtypes(include=[np.number]).columns.tolist()
+    # Numerische Spalten identifizieren (ohne Kennungen wie Segment_ID)
+    numerische_spalten = messgroessen(df.select_dtypes(include=[np.number]).columns.tolist())
     if len(numerische_spalten) < 2:
         print("❌ Nicht genügend numerische Spalten für erweiterte Analyse")
         return {}
@@ -584,9 +249,10 @@ def mq_sensor_clustering(df: pd.DataFrame, mq_spalten: list, output_pfad: str) -
     """
     Führt Clusteranalyse der MQ-Sensoren durch.
     
-    **Methode KMeans()** gruppiert Sensoren basierend auf ihrem Verhalten
-    **Argument n_clusters** bestimmt die Anzahl der Gruppen
-    **StandardScaler()** normalisiert die Sensor-Werte für bessere Vergleichbarkeit
+    **Sensoren als Punkte**: Jeder Sensor ist ein Punkt, dessen Merkmale sein
+    standardisierter Verlauf über eine Zeilenstichprobe sind (utils/clusteranalyse.py)
+    **Methode waehle_k()** lernt KMeans (bzw. MiniBatchKMeans bei vielen Punkten)
+    für alle k parallel an und wählt k per Silhouette oder Ellbogen-Kriterium
     **Rückgabewert** ist ein Dictionary mit Cluster-Informationen und Gruppierungen
     
     :param df: DataFrame mit Sensordaten
@@ -601,47 +267,30 @@ def mq_sensor_clustering(df: pd.DataFrame, mq_spalten: list, output_pfad: str) -
     print("\n🎯 1. CLUSTERANALYSE DER MQ-SENSOREN")
     print("-" * 40)
     
-    # Daten für Clustering vorbereiten
-    mq_daten = df[mq_spalten].dropna()
-    if len(mq_daten) < 10:
+    # Standardisierte Sensorverläufe einmal aufbauen, für alle k wiederverwendet
+    matrix = sensormatrix(df, mq_spalten)
+    if matrix.shape[1] < 10:
         print("⚠️ Zu wenige Datenpunkte für Clustering")
         return {}
     
-    # Daten standardisieren (wichtig für K-Means!)
-    scaler = StandardScaler()
-    mq_standardisiert = scaler.fit_transform(mq_daten)
-    
-    # Optimale Cluster-Anzahl mit Elbow-Methode finden
-    max_cluster = min(8, len(mq_spalten))
-    inertien = []
-    
-    for k in range(2, max_cluster + 1):
-        kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-        kmeans.fit(mq_standardisiert)
-        inertien.append(kmeans.inertia_)
-    
-    # Optimale Anzahl wählen (vereinfacht: mittlerer Wert)
-    optimale_cluster = len(inertien) // 2 + 2
-    
-    # Finales Clustering
-    kmeans_final = KMeans(n_clusters=optimale_cluster, random_state=42, n_init=10)
-    cluster_labels = kmeans_final.fit_predict(mq_standardisiert)
-    
-    # Ergebnisse zusammenstellen
-    cluster_info = {}
-    for cluster_id in range(optimale_cluster):
-        sensoren_in_cluster = [mq_spalten[i] for i, label in enumerate(cluster_labels) 
-                              if label == cluster_id]
-        cluster_info[f"Gruppe_{cluster_id + 1}"] = sensoren_in_cluster
+    # Alle k parallel anlernen und per Silhouette/Ellbogen auswählen
+    auswahl = waehle_k(matrix)
+    cluster_info = gruppen(mq_spalten, auswahl['labels'])
     
-    print(f"✅ {optimale_cluster} Sensor-Gruppen identifiziert:")
+    bewertung = auswahl['silhouette'].get(auswahl['k'])
+    kriterium = (f"Silhouette {bewertung:.2f}" if auswahl['methode'] == 'silhouette'
+                 else "Ellbogen-Kriterium")
+    print(f"✅ {len(cluster_info)} Sensor-Gruppen identifiziert ({kriterium}):")
     for gruppe, sensoren in cluster_info.items():
         print(f"   {gruppe}: {', '.join(sensoren)}")
     
     return {
-        'cluster_anzahl': optimale_cluster,
+        'cluster_anzahl': auswahl['k'],
         'sensor_gruppen': cluster_info,
-        'cluster_zentren': kmeans_final.cluster_centers_
+        'cluster_zentren': auswahl['zentren'],
+        'auswahl_methode': auswahl['methode'],
+        'inertien': auswahl['inertien'],
+        'silhouette': auswahl['silhouette']
     }
 
 
@@ -649,8 +298,12 @@ def hauptkomponenten_analyse(df: pd.DataFrame, numerische_spalten: list, output_
     """
     Führt PCA (Hauptkomponentenanalyse) durch zur Dimensionsreduktion.
     
-    **Methode PCA()** reduziert die Anzahl der Sensor-Dimensionen auf die wichtigsten
-    **Argument n_components** bestimmt, auf wie viele Hauptkomponenten reduziert wird
+    **Messspalten** sind die Rohsensor-Spalten ohne IDs, Zeitteile, GPS und
+    abgeleitete Spalten wie ``_ppm``/``_ugm3`` (utils/archiv_pca.py: pca_spalten)
+    **Archiv-Modell** (ArchivPCA) wird verwendet, wenn es gespeichert ist und die
+    Fahrt alle seine Messspalten enthält – die Fahrt wird dann nur projiziert,
+    die Ladungen sind über alle Fahrten gleich
+    **Methode PCA()** lernt sonst nur auf dieser Fahrt an
     **explained_variance_ratio_** zeigt, wie viel Varianz jede Komponente erklärt
     **Rückgabewert** ist ein Dictionary mit den Hauptkomponenten und deren Wichtigkeit
     
@@ -666,42 +319,49 @@ def hauptkomponenten_analyse(df: pd.DataFrame, numerische_spalten: list, output_
     print("\n📊 2. HAUPTKOMPONENTENANALYSE (PCA)")
     print("-" * 40)
     
-    # Daten vorbereiten
-    sensor_daten = df[numerische_spalten].dropna()
-    if len(sensor_daten) < 10:
-        print("⚠️ Zu wenige Datenpunkte für PCA")
-        return {}
-    
-    # Daten standardisieren
-    scaler = StandardScaler()
-    daten_standardisiert = scaler.fit_transform(sensor_daten)
-    
-    # PCA auf konfigurierbare Anzahl Komponenten reduzieren
-    pca_komponenten_anzahl = getattr(CONFIG, 'PCA_KOMPONENTEN_ANZAHL', 3)
-    komponenten_anzahl = min(pca_komponenten_anzahl, len(numerische_spalten))
-    pca = PCA(n_components=komponenten_anzahl)
-    hauptkomponenten = pca.fit_transform(daten_standardisiert)
+    # Archiv-Modell: nur projizieren
+    modell = ArchivPCA.laden()
+    if modell is not None and all(s in df.columns for s in modell.spalten):
+        hauptkomponenten = modell.projiziere(df)
+        if np.isnan(hauptkomponenten).all():
+            print("⚠️ Zu wenige Datenpunkte für PCA")
+            return {}
+        komponenten_anzahl = modell.komponenten
+        erklaerte_varianz = modell.pca.explained_variance_ratio_
+        wichtige_sensoren = modell.wichtige_sensoren()
+        quelle = f"Archiv ({len(modell.fahrten)} Fahrten)"
+    else:
+        # Daten vorbereiten (nur Messspalten)
+        mess_spalten = pca_spalten(numerische_spalten)
+        sensor_daten = df[mess_spalten].dropna()
+        if len(sensor_daten) < 10 or len(mess_spalten) < 2:
+            print("⚠️ Zu wenige Datenpunkte für PCA")
+            return {}
+        
+        # Daten standardisieren
+        scaler = StandardScaler()
+        daten_standardisiert = scaler.fit_transform(sensor_daten)
+        
+        # PCA auf konfigurierbare Anzahl Komponenten reduzieren
+        pca_komponenten_anzahl = getattr(CONFIG, 'PCA_KOMPONENTEN_ANZAHL', 3)
+        komponenten_anzahl = min(pca_komponenten_anzahl, len(mess_spalten))
+        pca = PCA(n_components=komponenten_anzahl)
+        hauptkomponenten = pca.fit_transform(daten_standardisiert)
+        erklaerte_varianz = pca.explained_variance_ratio_
+        
+        # Wichtigste Sensoren pro Komponente (betragsgrößte Ladungen)
+        wichtige_sensoren = {}
+        for i in range(komponenten_anzahl):
+            wichtigkeits_indices = np.argsort(np.abs(pca.components_[i]))[::-1]
+            wichtige_sensoren[f"Komponente_{i+1}"] = [mess_spalten[idx] for idx in wichtigkeits_indices[:3]]
+        quelle = "diese Fahrt"
     
-    # Erklärte Varianz berechnen
-    erklaerte_varianz = pca.explained_variance_ratio_
     kumulierte_varianz = np.cumsum(erklaerte_varianz)
     
-    print(f"✅ {komponenten_anzahl} Hauptkomponenten extrahiert:")
+    print(f"✅ {komponenten_anzahl} Hauptkomponenten extrahiert ({quelle}):")
     for i, (varianz, kumuliert) in enumerate(zip(erklaerte_varianz, kumulierte_varianz)):
         print(f"   Komponente {i+1}: {varianz:.1%} Varianz ({kumuliert:.1%} kumuliert)")
-    
-    # Wichtigste Sensoren pro Komponente identifizieren
-    komponenten_matrix = pca.components_
-    wichtige_sensoren = {}
-    
-    for i in range(komponenten_anzahl):
-        # Absolute Werte der Ladungen für diese Komponente
-        ladungen = np.abs(komponenten_matrix[i])
-        # Sortiere Sensoren nach Wichtigkeit
-        wichtigkeits_indices = np.argsort(ladungen)[::-1]
-        top_sensoren = [numerische_spalten[idx] for idx in wichtigkeits_indices[:3]]
-        wichtige_sensoren[f"Komponente_{i+1}"] = top_sensoren
-        
+    for i, top_sensoren in enumerate(wichtige_sensoren.values()):
         print(f"   Top 3 Sensoren Komp. {i+1}: {', '.join(top_sensoren)}")
     
     return {
@@ -709,7 +369,8 @@ def hauptkomponenten_analyse(df: pd.DataFrame, numerische_spalten: list, output_
         'erklaerte_varianz': erklaerte_varianz.tolist(),
         'kumulierte_varianz': kumulierte_varianz.tolist(),
         'wichtige_sensoren': wichtige_sensoren,
-        'transformierte_daten': hauptkomponenten
+        'transformierte_daten': hauptkomponenten,
+        'quelle': quelle
     }
 
 
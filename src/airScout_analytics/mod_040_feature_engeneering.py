@@ -4,20 +4,26 @@ Feature Engineering für Gassensor-Daten:
 - Lädt die erste CSV aus 'data/bearbeitet0' in ein DataFrame
 - Erstellt Zeit-Features (Jahr, Monat, Tag, Wochentag, Stunde, Minute, Sekunde, millisec) aus GPS_DateTime und SecSinceMidnight-MS
 - Speichert das Ergebnis als CSV in 'data/ergebnisse/{dateiname}/feature_{dateiname}.csv', als TXT in 'data/ergebnisse', und als CSV in 'data/bearbeitet2'
+- Anhängemodus (utils/anhangmodus.py): features_anhang ergänzt die Features nur für neu angehängte Zeilen
 """
 
 # Kompatibler Import für Direktaufruf und als Modul
 import sys
 import os
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import re
+import io
+import locale
+import contextlib
 import warnings
 warnings.filterwarnings("ignore", category=FutureWarning)
 warnings.filterwarnings("ignore", category=UserWarning)
 warnings.filterwarnings("ignore", category=Warning)
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from config import CONFIG
+from utils.kartenabgleich import StrassenSegmente, ordne_strassen_zu
 
 def feature_engineering():
 
@@ -34,60 +40,8 @@ def feature_engineering():
 
     featureengeneering = pd.read_csv(csv_path)
 
-    # Robust: Spalten-Mapping für verschiedene Namensvarianten
-    spalten_mapping = {
-        'DateTime_MESZ': 'DateTime',
-        'DateTime_UTC': 'GPS_DateTime',
-        'SecSinceMidnightMS': 'SecSinceMidnight-MS',
-        'SecSinceMidnightMS': 'SecSinceMidnight-MS',
-        # ggf. weitere Zuordnungen ergänzen
-    }
-    # Nur Spalten umbenennen, die auch existieren
-    vorhandene_mappings = {k: v for k, v in spalten_mapping.items() if k in featureengeneering.columns}
-    if vorhandene_mappings:
-        featureengeneering.rename(columns=vorhandene_mappings, inplace=True)
-
-
-    # 2. Neue Zeitspalten aus GPS_DateTime und SecSinceMidnight-MS
-    if 'GPS_DateTime' in featureengeneering.columns:
-        featureengeneering['GPS_DateTime'] = pd.to_datetime(featureengeneering['GPS_DateTime'], errors='coerce')
-        featureengeneering['Jahr'] = featureengeneering['GPS_DateTime'].dt.year
-        featureengeneering['Monat'] = featureengeneering['GPS_DateTime'].dt.month
-        featureengeneering['Tag'] = featureengeneering['GPS_DateTime'].dt.day
-        # Wochentag als ausgeschriebener Name (z.B. Montag)
-        try:
-            featureengeneering['Wochentag'] = featureengeneering['GPS_DateTime'].dt.day_name(locale='de_DE')
-        except TypeError:
-            # Fallback falls locale nicht unterstützt wird (z.B. auf Windows ohne de_DE)
-            wochentage = ['Montag', 'Dienstag', 'Mittwoch', 'Donnerstag', 'Freitag', 'Samstag', 'Sonntag']
-            featureengeneering['Wochentag'] = featureengeneering['GPS_DateTime'].dt.weekday.apply(lambda x: wochentage[x] if pd.notna(x) else None)
-        featureengeneering['Stunde'] = featureengeneering['GPS_DateTime'].dt.hour
-        featureengeneering['Minute'] = featureengeneering['GPS_DateTime'].dt.minute
-        featureengeneering['Sekunde'] = featureengeneering['GPS_DateTime'].dt.second
-        # Cast Zeitspalten explizit auf Int32
-        for spalte in ['Jahr', 'Monat', 'Tag', 'Stunde', 'Minute', 'Sekunde', 'millisec']:
-            if spalte in featureengeneering.columns:
-                featureengeneering[spalte] = featureengeneering[spalte].astype('Int32')
-    else:
-        print('Spalte GPS_DateTime nicht gefunden!')
-
-
-    # Millisekunden aus SecSinceMidnight-MS extrahieren
-    if 'SecSinceMidnight-MS' in featureengeneering.columns:
-        def extract_millisec(val):
-            try:
-                # Format: Sekunden-Millisekunden, z.B. 12345-678
-                if pd.isna(val):
-                    return None
-                parts = str(val).split('-')
-                if len(parts) == 2 and parts[1].isdigit():
-                    return int(parts[1])
-                return None
-            except Exception:
-                return None
-        featureengeneering['millisec'] = featureengeneering['SecSinceMidnight-MS'].apply(extract_millisec)
-    else:
-        print('Spalte SecSinceMidnight-MS nicht gefunden!')
+    # Zeit-Features (auch vom Anhängemodus genutzt)
+    featureengeneering = zeitfeatures_einfügen(featureengeneering)
 
     # Straßennamen-Feature einfügen (vor dem Speichern)
     featureengeneering = strassennamen_einfügen(featureengeneering)
@@ -129,11 +83,77 @@ def feature_engineering():
     return featureengeneering
 
 
+def zeitfeatures_einfügen(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Vereinheitlicht die Spaltennamen und ergänzt Jahr, Monat, Tag, Wochentag,
+    Stunde, Minute, Sekunde (aus GPS_DateTime) und millisec (aus SecSinceMidnight-MS).
+
+    :param df: Bereinigte Fahrt
+    :return: DataFrame mit den Zeitspalten
+    """
+    # Robust: Spalten-Mapping für verschiedene Namensvarianten
+    spalten_mapping = {
+        'DateTime_MESZ': 'DateTime',
+        'DateTime_UTC': 'GPS_DateTime',
+        'SecSinceMidnightMS': 'SecSinceMidnight-MS',
+        'SecSinceMidnightMS': 'SecSinceMidnight-MS',
+        # ggf. weitere Zuordnungen ergänzen
+    }
+    # Nur Spalten umbenennen, die auch existieren
+    vorhandene_mappings = {k: v for k, v in spalten_mapping.items() if k in df.columns}
+    if vorhandene_mappings:
+        df.rename(columns=vorhandene_mappings, inplace=True)
+
+
+    # 2. Neue Zeitspalten aus GPS_DateTime und SecSinceMidnight-MS
+    if 'GPS_DateTime' in df.columns:
+        df['GPS_DateTime'] = pd.to_datetime(df['GPS_DateTime'], errors='coerce')
+        df['Jahr'] = df['GPS_DateTime'].dt.year
+        df['Monat'] = df['GPS_DateTime'].dt.month
+        df['Tag'] = df['GPS_DateTime'].dt.day
+        # Wochentag als ausgeschriebener Name (z.B. Montag)
+        try:
+            df['Wochentag'] = df['GPS_DateTime'].dt.day_name(locale='de_DE')
+        except (TypeError, locale.Error):
+            # Fallback falls locale nicht unterstützt wird (z.B. auf Windows oder Linux ohne de_DE)
+            wochentage = ['Montag', 'Dienstag', 'Mittwoch', 'Donnerstag', 'Freitag', 'Samstag', 'Sonntag']
+            df['Wochentag'] = df['GPS_DateTime'].dt.weekday.apply(lambda x: wochentage[x] if pd.notna(x) else None)
+        df['Stunde'] = df['GPS_DateTime'].dt.hour
+        df['Minute'] = df['GPS_DateTime'].dt.minute
+        df['Sekunde'] = df['GPS_DateTime'].dt.second
+        # Cast Zeitspalten explizit auf Int32
+        for spalte in ['Jahr', 'Monat', 'Tag', 'Stunde', 'Minute', 'Sekunde', 'millisec']:
+            if spalte in df.columns:
+                df[spalte] = df[spalte].astype('Int32')
+    else:
+        print('Spalte GPS_DateTime nicht gefunden!')
+
+
+    # Millisekunden aus SecSinceMidnight-MS extrahieren
+    if 'SecSinceMidnight-MS' in df.columns:
+        def extract_millisec(val):
+            try:
+                # Format: Sekunden-Millisekunden, z.B. 12345-678
+                if pd.isna(val):
+                    return None
+                parts = str(val).split('-')
+                if len(parts) == 2 and parts[1].isdigit():
+                    return int(parts[1])
+                return None
+            except Exception:
+                return None
+        df['millisec'] = df['SecSinceMidnight-MS'].apply(extract_millisec)
+    else:
+        print('Spalte SecSinceMidnight-MS nicht gefunden!')
+
+    return df
+
+
 def strassennamen_einfügen(df: pd.DataFrame) -> pd.DataFrame:
     """
     Fügt eine Spalte 'street' in das DataFrame ein, basierend auf GPS-Koordinaten.
-    Vergleicht GPS_Lat und GPS_Lon mit datenbank/GPS2Street.csv und trägt den Straßennamen ein.
-    Falls keine Übereinstimmung: 'Unbekannt'.
+    Ordnet den Track per Map-Matching (Viterbi) den Straßensegmenten aus
+    datenbank/GPS2Street.csv zu. Falls keine Straße in der Nähe: 'Unbekannt'.
 
     :param df: DataFrame mit Spalten 'GPS_Lat' und 'GPS_Lon'
     :return: DataFrame mit neuer Spalte 'street'
@@ -143,7 +163,7 @@ def strassennamen_einfügen(df: pd.DataFrame) -> pd.DataFrame:
         print(f"[Warnung] GPS2Street.csv nicht gefunden: {gps2street_path}")
         df['street'] = 'Unbekannt'
         return df
-    streets = pd.read_csv(gps2street_path)
+    streets = pd.read_csv(gps2street_path, nrows=0)
     # Prüfe, ob alle benötigten Spalten vorhanden sind
     benoetigte_spalten = {'GPS_Lat', 'GPS_Lon', 'street'}
     fehlende = benoetigte_spalten - set(streets.columns)
@@ -151,52 +171,39 @@ def strassennamen_einfügen(df: pd.DataFrame) -> pd.DataFrame:
         print(f"[Fehler] Die folgenden Spalten fehlen in GPS2Street.csv: {fehlende}")
         df['street'] = 'Unbekannt'
         return df
-    streets = streets.dropna(subset=['GPS_Lat', 'GPS_Lon', 'street'])
-    # Erstelle Lookup-Dict für exakte Zuordnung
-    lookup = {(round(row['GPS_Lat'], 6), round(row['GPS_Lon'], 6)): row['street'] for _, row in streets.iterrows()}
-
-    # Hilfsfunktion: Haversine-Distanz in Metern
-    from math import radians, sin, cos, sqrt, atan2
-    def haversine(lat1, lon1, lat2, lon2):
-        R = 6371000  # Erdradius in Metern
-        phi1, phi2 = radians(lat1), radians(lat2)
-        dphi = radians(lat2 - lat1)
-        dlambda = radians(lon2 - lon1)
-        a = sin(dphi/2)**2 + cos(phi1)*cos(phi2)*sin(dlambda/2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1 - a))
-        return R * c
-
-    # Liste aller bekannten Koordinaten
-    street_coords = streets[['GPS_Lat', 'GPS_Lon']].values
-    street_names = streets['street'].values
-
-
-    def finde_strasse_unscharf(lat, lon, radius=10.0):
-        key = (round(lat, 6), round(lon, 6))
-        # Erst exaktes Matching
-        if key in lookup:
-            return lookup[key]
-        # Sonst: Nächstgelegene Straße im Umkreis suchen
-        min_dist = float('inf')
-        best_street = 'Unbekannt'
-        for (lat2, lon2), name in zip(street_coords, street_names):
-            dist = haversine(lat, lon, lat2, lon2)
-            if dist < min_dist:
-                min_dist = dist
-                best_street = name
-        if min_dist <= radius:
-            return best_street
-        return 'Unbekannt'
-
-    if 'GPS_Lat' in df.columns and 'GPS_Lon' in df.columns:
-        df['street'] = [
-            finde_strasse_unscharf(lat, lon)
-            if pd.notna(lat) and pd.notna(lon) else 'Unbekannt'
-            for lat, lon in zip(df['GPS_Lat'], df['GPS_Lon'])
-        ]
-    else:
+    if 'GPS_Lat' not in df.columns or 'GPS_Lon' not in df.columns:
         df['street'] = 'Unbekannt'
+        return df
+
+    # Map-Matching gegen den Segmentindex (wird bei Bedarf aus GPS2Street.csv erstellt)
+    segmente = StrassenSegmente.laden(gps2street_path)
+    lat = pd.to_numeric(df['GPS_Lat'], errors='coerce').to_numpy(dtype=float)
+    lon = pd.to_numeric(df['GPS_Lon'], errors='coerce').to_numpy(dtype=float)
+    df['street'] = ordne_strassen_zu(lat, lon, segmente)
+
+    return df
 
+
+def features_anhang(df: pd.DataFrame, zustand: dict) -> pd.DataFrame:
+    """
+    Anhängemodus: Zeit-Features und Straßennamen für neu angehängte Zeilen.
+
+    Das Map-Matching sieht zusätzlich die letzten ANHANGMODUS['STRASSEN_KONTEXT']
+    GPS-Punkte des vorherigen Laufs, damit der Track an der Nahtstelle nicht neu beginnt.
+
+    :param df: Segmentierte neue Zeilen (mod_011)
+    :param zustand: Zustand dieser Stufe (wird fortgeschrieben)
+    :return: DataFrame mit Zeitspalten und 'street'
+    """
+    df = zeitfeatures_einfügen(df.copy())
+    if 'GPS_Lat' not in df.columns or 'GPS_Lon' not in df.columns:
+        return strassennamen_einfügen(df)
+    kontext = zustand.get('strassen_kontext', pd.DataFrame(columns=['GPS_Lat', 'GPS_Lon']))
+    gps = pd.concat([kontext, df[['GPS_Lat', 'GPS_Lon']]], ignore_index=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        gps = strassennamen_einfügen(gps)
+    df['street'] = gps['street'].to_numpy()[len(kontext):]
+    zustand['strassen_kontext'] = gps[['GPS_Lat', 'GPS_Lon']].tail(CONFIG.ANHANGMODUS['STRASSEN_KONTEXT'])
     return df
 
 
@@ -127,6 +127,43 @@ def convert_to_ugm3(ppm_value: float, sensor_name: str) -> float:
     return round(ugm3_value, 2)
 
 
+def add_conversion_columns(df: pd.DataFrame, verbose: bool = True) -> list:
+    """
+    Ergänzt für jeden vorhandenen MQ-Sensor die Spalten ``{sensor}_ppm`` und ``{sensor}_ugm3``.
+    Zeilenweise Umrechnung, daher auch für angehängte Blöcke geeignet (Anhängemodus).
+
+    :param df: DataFrame mit MQ-Rohwerten (wird direkt ergänzt)
+    :type df: pd.DataFrame
+    :param verbose: Fortschritt ausgeben
+    :type verbose: bool
+    :returns: Liste der umgerechneten Sensoren (leer, falls keine gefunden)
+    :rtype: list
+    """
+    # Prüfe welche MQ-Sensoren in der Datei vorhanden sind
+    available_sensors = [col for col in df.columns if col in R0_VALUES]
+    if verbose:
+        print(f"Gefundene Sensoren: {available_sensors}")
+
+    # Neue Spalten für jeden Sensor erzeugen
+    for sensor in available_sensors:
+        ppm_col = f"{sensor}_ppm"
+        ugm3_col = f"{sensor}_ugm3"
+
+        if verbose:
+            print(f"Verarbeite Sensor {sensor}...")
+
+        # ppm-Werte berechnen
+        df[ppm_col] = df[sensor].apply(
+            lambda x: convert_to_ppm(x, sensor)
+        )
+
+        # µg/m³-Werte berechnen
+        df[ugm3_col] = df[ppm_col].apply(
+            lambda x: convert_to_ugm3(x, sensor)
+        )
+    return available_sensors
+
+
 def process_csv_file(input_file: Path, output_file: Path) -> bool:
     """
     Verarbeitet eine CSV-Datei und fügt ppm- und µg/m³-Spalten hinzu.
@@ -143,31 +180,10 @@ def process_csv_file(input_file: Path, output_file: Path) -> bool:
         print(f"Lade Datei: {input_file}")
         df = pd.read_csv(input_file, comment='#')
         
-        # Prüfe welche MQ-Sensoren in der Datei vorhanden sind
-        available_sensors = [col for col in df.columns if col in R0_VALUES]
-        print(f"Gefundene Sensoren: {available_sensors}")
-        
-        if not available_sensors:
+        if not add_conversion_columns(df):
             print("Keine MQ-Sensoren in der Datei gefunden!")
             return False
         
-        # Neue Spalten für jeden Sensor erzeugen
-        for sensor in available_sensors:
-            ppm_col = f"{sensor}_ppm"
-            ugm3_col = f"{sensor}_ugm3"
-            
-            print(f"Verarbeite Sensor {sensor}...")
-            
-            # ppm-Werte berechnen
-            df[ppm_col] = df[sensor].apply(
-                lambda x: convert_to_ppm(x, sensor)
-            )
-            
-            # µg/m³-Werte berechnen
-            df[ugm3_col] = df[ppm_col].apply(
-                lambda x: convert_to_ugm3(x, sensor)
-            )
-        
         # Stelle sicher, dass der Ausgabeordner existiert
         output_file.parent.mkdir(parents=True, exist_ok=True)
         
@@ -77,6 +77,8 @@ Features:
 - Gas-Ereignis-Warnungen mit Moving Average + Thresholding
 - ML-Anomalieerkennung mit Isolation Forest
 - Speichert Ergebnisse als "_ema.csv"
+- Anhängemodus (utils/anhangmodus.py): analysiere_anhang setzt EMA, z-Scores,
+  Gas-Ereignisse und Isolation Forest für neu angehängte Zeilen fort
 """
 
 import os
@@ -89,8 +91,13 @@ from sklearn.preprocessing import StandardScaler
 import warnings
 import sys
 import io
+import contextlib
 from config import CONFIG
 import context
+from utils.sensorstatistik import berechne_momente, StreamingSensorStatistik
+from utils.strassenstatistik import aktualisiere_strassenstatistik
+from utils.rasterkarte import aktualisiere_rasterkarte
+from utils.fahrtenkatalog import aktualisiere_fahrtenkatalog, fahrt_aus_pfad
 
 
 # Projektpfade definieren
@@ -100,21 +107,52 @@ DATA_BEARBEITET_PATH = PROJECT_ROOT / "data" / "bearbeitet3"
 ERGEBNISSE_PATH = PROJECT_ROOT / "data" / "ergebnisse"
 
 
-def apply_ema_smoothing(df, sensor_groups):
+# Nur diese Spalten werden geglättet (auch vom Anhängemodus genutzt)
+EMA_COLUMNS = [
+    "Temperature_DHT_C", "Humidity_RH", "Light_Level", "Light_Percent",
+    "MQ2", "MQ3", "MQ4", "MQ5", "MQ6", "MQ7", "MQ8", "MQ9", "MQ135",
+    "Mic1", "Mic2"
+]
+
+# Von der Rundung ausgenommene Spalten und Spaltenendungen
+ROUNDING_EXCLUDED = [
+    "GPS_Lat", "GPS_Lon", "GPS_Alt", "GPS_Speed", "GPS_Course", "GPS_Sats",
+    "Radiation_CPS"
+]
+ROUNDING_EXCLUDED_SUFFIXES = ["_zscore", "_outlier", "_event", "_intensity", "_anomaly", "_score"]
+
+
+def _ema_fortsetzen(werte, sensor, zustand):
+    """
+    EMA (adjust=False) eines Blocks, exakt fortgesetzt: letzter EMA-Wert und
+    Anzahl folgender NaN des vorherigen Blocks werden vorangestellt.
+    """
+    vorher = zustand.get(sensor)
+    davor = [] if vorher is None else [vorher[0]] + [np.nan] * vorher[1]
+    reihe = pd.concat([pd.Series(davor, dtype=float), werte], ignore_index=True)
+    ema = reihe.ewm(span=EMA_SPAN, adjust=False).mean().to_numpy()[len(davor):]
+    gueltig = np.flatnonzero(werte.notna().to_numpy())
+    if len(gueltig):
+        zustand[sensor] = (float(ema[gueltig[-1]]), len(werte) - 1 - int(gueltig[-1]))
+    elif vorher is not None:
+        zustand[sensor] = (vorher[0], vorher[1] + len(werte))
+    return ema
+
+
+def apply_ema_smoothing(df, sensor_groups, zustand=None):
     """
     Wendet Exponential Moving Average auf alle Sensorspalten an
     (bestimmte Spalten wie GPS, Radiation_CPS, *_zscore, *_outlier etc. werden explizit ausgeschlossen)
+
+    Mit ``zustand`` (Anhängemodus) wird die EMA des vorherigen Blocks exakt fortgesetzt.
     """
     df_ema = df.copy()
-    # Nur diese Spalten werden geglättet
-    zu_glätten = [
-        "Temperature_DHT_C", "Humidity_RH", "Light_Level", "Light_Percent",
-        "MQ2", "MQ3", "MQ4", "MQ5", "MQ6", "MQ7", "MQ8", "MQ9", "MQ135",
-        "Mic1", "Mic2"
-    ]
+    zu_glätten = EMA_COLUMNS
     print(f"  → EMA-Glättung für diese Spalten: {zu_glätten}")
     for sensor in zu_glätten:
-        if sensor in df.columns:
+        if sensor in df.columns and zustand is not None:
+            df_ema[sensor] = _ema_fortsetzen(pd.to_numeric(df[sensor], errors='coerce'), sensor, zustand)
+        elif sensor in df.columns:
             ema_col = f"{sensor}_ema"
             df_ema[ema_col] = df[sensor].ewm(span=EMA_SPAN, adjust=False).mean()
             # Ersetze ursprüngliche Spalte mit EMA-Werten
@@ -123,13 +161,15 @@ def apply_ema_smoothing(df, sensor_groups):
     return df_ema
 
 
-def calculate_zscore_analysis(df, sensor_groups):
+def calculate_zscore_analysis(df, sensor_groups, statistik=None):
     """
     Berechnet Z-Score-Analyse für Sensordaten
     
     Args:
         df: DataFrame mit Sensordaten
         sensor_groups: Dictionary mit Sensorspalten
+        statistik: Vorgegebene Sensorstatistik (Anhängemodus: laufende Werte
+            der bisherigen Fahrt); Standard: aus df berechnet
     
     Returns:
         DataFrame: DataFrame mit Z-Score-Spalten
@@ -140,11 +180,14 @@ def calculate_zscore_analysis(df, sensor_groups):
     
     outlier_counts = {}
     
+    # Mittelwert/Std aller Sensoren in einem Durchlauf (ohne Quantile, kein Sortieren)
+    if statistik is None:
+        statistik = berechne_momente(df, sensor_groups['all_sensors'])
     for sensor in sensor_groups['all_sensors']:
         if sensor in df.columns:
             # Berechne Z-Score
-            mean_val = df[sensor].mean()
-            std_val = df[sensor].std()
+            mean_val = statistik.wert('mittelwert', sensor)
+            std_val = statistik.wert('std', sensor)
             
             if std_val > 0:
                 df_zscore[f"{sensor}_zscore"] = (df[sensor] - mean_val) / std_val
@@ -209,13 +252,16 @@ def detect_gas_events(df, sensor_groups):
     return df_events
 
 
-def detect_anomalies_ml(df, sensor_groups):
+def detect_anomalies_ml(df, sensor_groups, zustand=None, statistik=None):
     """
     Erkennt Anomalien mit Isolation Forest ML-Algorithmus
     
     Args:
         df: DataFrame mit Sensordaten
         sensor_groups: Dictionary mit Sensorspalten
+        zustand: Anhängemodus – Scaler und Isolation Forest werden beim ersten
+            Aufruf angelernt, hier abgelegt und danach nur noch angewendet
+        statistik: Mittelwerte für fehlende Werte (Standard: aus df berechnet)
     
     Returns:
         DataFrame: DataFrame mit Anomalie-Spalten
@@ -227,27 +273,38 @@ def detect_anomalies_ml(df, sensor_groups):
     # Bereite Daten für ML vor
     sensor_data = df[sensor_groups['all_sensors']].copy()
     
-    # Entferne NaN-Werte
-    sensor_data = sensor_data.fillna(sensor_data.mean())
+    # Entferne NaN-Werte (Mittelwerte je Sensor, ein Durchlauf ohne Sortieren)
+    if statistik is None:
+        statistik = berechne_momente(df, sensor_groups['all_sensors'])
+    sensor_data = sensor_data.fillna(
+        pd.Series(statistik.mittelwert, index=statistik.spalten))
     
     if len(sensor_data.columns) == 0:
         print("    Keine gültigen Sensordaten für ML gefunden")
         return df_anomaly
     
     try:
-        # Standardisiere Daten
-        scaler = StandardScaler()
-        sensor_scaled = scaler.fit_transform(sensor_data)
-        
-        # Trainiere Isolation Forest
-        iso_forest = IsolationForest(
-            contamination=ANOMALY_CONTAMINATION,
-            random_state=ML_RANDOM_STATE,
-            n_estimators=ML_N_ESTIMATORS
-        )
-        
-        # Erkenne Anomalien (-1 = Anomalie, 1 = Normal)
-        anomaly_labels = iso_forest.fit_predict(sensor_scaled)
+        if zustand is not None and 'modell' in zustand:
+            # Anhängemodus: bereits angelerntes Modell nur anwenden
+            scaler, iso_forest = zustand['scaler'], zustand['modell']
+            sensor_scaled = scaler.transform(sensor_data)
+            anomaly_labels = iso_forest.predict(sensor_scaled)
+        else:
+            # Standardisiere Daten
+            scaler = StandardScaler()
+            sensor_scaled = scaler.fit_transform(sensor_data)
+
+            # Trainiere Isolation Forest
+            iso_forest = IsolationForest(
+                contamination=ANOMALY_CONTAMINATION,
+                random_state=ML_RANDOM_STATE,
+                n_estimators=ML_N_ESTIMATORS
+            )
+
+            # Erkenne Anomalien (-1 = Anomalie, 1 = Normal)
+            anomaly_labels = iso_forest.fit_predict(sensor_scaled)
+            if zustand is not None:
+                zustand['scaler'], zustand['modell'] = scaler, iso_forest
         anomaly_scores = iso_forest.score_samples(sensor_scaled)
         
         # Füge Ergebnisse zum DataFrame hinzu
@@ -266,10 +323,67 @@ def detect_anomalies_ml(df, sensor_groups):
     return df_anomaly
 
 
-def process_csv_file(input_file, output_file):
+def analysiere_anhang(df, zustand, abschluss=False):
+    """
+    Anhängemodus: EMA, z-Score, Gas-Ereignisse und ML-Anomalien für neu
+    angehängte Zeilen (Schritte 3–6 von :func:`process_csv_file`).
+
+    - EMA: exakt fortgesetzt
+    - z-Score: laufende Statistik der Fahrt bis einschließlich dieser Zeilen
+      (ältere Zeilen werden nicht neu bewertet)
+    - Gas-Ereignisse: das zentrierte Fenster sieht die Randzeilen des
+      vorherigen Blocks; die letzten GAS_EVENT_WINDOW Zeilen werden bis zum
+      nächsten Lauf zurückgehalten
+    - Isolation Forest: einmal auf den ersten ANHANGMODUS['ML_MIN_ZEILEN']
+      Zeilen angelernt, bis dahin werden die Zeilen zurückgehalten
+
+    Args:
+        df: Umgerechnete neue Zeilen (mod_041)
+        zustand: Zustand dieser Stufe (wird fortgeschrieben)
+        abschluss: Fahrt ist beendet – alle zurückgehaltenen Zeilen ausgeben
+
+    Returns:
+        DataFrame: Fertig analysierte Zeilen (ungerundet)
+    """
+    sensor_groups = identify_sensor_columns(df)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if len(df):
+            df = apply_ema_smoothing(df, sensor_groups, zustand=zustand.setdefault('ema', {}))
+            if zustand.get('statistik') is None:
+                zustand['statistik'] = StreamingSensorStatistik(sensor_groups['all_sensors'], top_k=0)
+            zustand['statistik'].aktualisiere(df)
+            df = calculate_zscore_analysis(df, sensor_groups, statistik=zustand['statistik'].ergebnis())
+
+        # Zentriertes Fenster: vorne die letzten Zeilen des Vorlaufs, hinten Zeilen zurückhalten
+        vorlauf = zustand.get('event_vorlauf')
+        puffer = pd.concat([vorlauf, zustand.get('event_offen'), df], ignore_index=True)
+        if not len(puffer):
+            return puffer
+        sensor_groups = identify_sensor_columns(puffer)
+        mit_events = detect_gas_events(puffer, sensor_groups)
+        start = 0 if vorlauf is None else len(vorlauf)
+        ende = len(puffer) if abschluss else max(start, len(puffer) - GAS_EVENT_WINDOW)
+        ausgabe = mit_events.iloc[start:ende].reset_index(drop=True)
+        zustand['event_vorlauf'] = puffer.iloc[:ende].tail(GAS_EVENT_WINDOW)
+        zustand['event_offen'] = puffer.iloc[ende:]
+
+        # Isolation Forest erst anlernen, wenn genug Zeilen vorliegen
+        ausgabe = pd.concat([zustand.pop('ml_offen', None), ausgabe], ignore_index=True)
+        if ('modell' not in zustand and len(ausgabe) < CONFIG.ANHANGMODUS['ML_MIN_ZEILEN']
+                and not abschluss):
+            zustand['ml_offen'] = ausgabe
+            return ausgabe.iloc[0:0]
+        if len(ausgabe):
+            ausgabe = detect_anomalies_ml(ausgabe, sensor_groups, zustand=zustand,
+                                          statistik=zustand['statistik'])
+    return ausgabe
+
+
+def process_csv_file(input_file, output_file, fahrt=None):
     """
     Verarbeitet eine CSV-Datei mit vollständiger Sensoranalyse
     (bestimmte Spalten wie GPS, Radiation_CPS, *_zscore, *_outlier etc. werden explizit von der Rundung ausgenommen)
+    Mit ``fahrt`` wird die Fahrt zusätzlich in die Straßenstatistik, die Raster-Heatmap und den Fahrtenkatalog über alle Fahrten eingerechnet.
     """
     log_lines = []
     def log(msg):
@@ -301,21 +415,7 @@ def process_csv_file(input_file, output_file):
         # 7. Stelle sicher, dass Ausgabeordner existiert
         output_file.parent.mkdir(parents=True, exist_ok=True)
         # 8. Bestimmte Spalten (GPS, Radiation_CPS, *_zscore, *_outlier etc.) von Glättung und Rundung ausnehmen
-        ausnahme_spalten = [
-            "GPS_Lat", "GPS_Lon", "GPS_Alt", "GPS_Speed", "GPS_Course", "GPS_Sats",
-            "Radiation_CPS"
-        ]
-        ausnahme_spalten += [col for col in df_processed.columns if any(
-            col.endswith(suffix) for suffix in ["_zscore", "_outlier", "_event", "_intensity", "_anomaly", "_score"]
-        )]
-        ausnahme_spalten = [col for col in ausnahme_spalten if col in df_processed.columns]
-        original_werte = df_processed[ausnahme_spalten].copy() if ausnahme_spalten else None
-        if ausnahme_spalten:
-            df_gerundet = df_processed.round(3)
-            for col in ausnahme_spalten:
-                df_gerundet[col] = original_werte[col]
-        else:
-            df_gerundet = df_processed.round(3)
+        df_gerundet = round_results(df_processed)
         # Speichere die finale Version in bearbeitet3
         try:
             df_gerundet.to_csv(output_file, index=False)
@@ -324,6 +424,12 @@ def process_csv_file(input_file, output_file):
                 log(f"  → Fehler: Datei wurde nicht gespeichert! Pfad: {output_file}")
         except Exception as e:
             log(f"  → Fehler beim Speichern in bearbeitet3: {e}")
+        # Straßenstatistik, Raster-Heatmap und Fahrtenkatalog über alle Fahrten fortschreiben
+        if fahrt and 'street' in df_processed.columns:
+            aktualisiere_strassenstatistik(fahrt, df_processed)
+        if fahrt:
+            aktualisiere_rasterkarte(fahrt, df_processed)
+            aktualisiere_fahrtenkatalog(fahrt, df_gerundet, quelle=str(output_file))
         # 9. Zusammenfassung
         print_analysis_summary(df_processed, sensor_groups)
         log("Analyse abgeschlossen.")
@@ -335,6 +441,21 @@ def process_csv_file(input_file, output_file):
         return False
 
 
+def round_results(df):
+    """
+    Rundet auf 3 Nachkommastellen; GPS, Radiation_CPS und die Analysespalten
+    (*_zscore, *_outlier, *_event, ...) bleiben unverändert.
+    """
+    ausnahme_spalten = ROUNDING_EXCLUDED + [col for col in df.columns if any(
+        col.endswith(suffix) for suffix in ROUNDING_EXCLUDED_SUFFIXES
+    )]
+    ausnahme_spalten = [col for col in ausnahme_spalten if col in df.columns]
+    df_gerundet = df.round(3)
+    for col in ausnahme_spalten:
+        df_gerundet[col] = df[col]
+    return df_gerundet
+
+
 def print_analysis_summary(df, sensor_groups):
     """
     Druckt eine Zusammenfassung der Analyse-Ergebnisse
@@ -392,7 +513,7 @@ def process_all_csv_files():
             print("Features: EMA, Z-Score, Gas-Events, ML-Anomalien")
             print("=" * 70)
             if input_file.exists():
-                ok = process_csv_file(input_file, output_file)
+                ok = process_csv_file(input_file, output_file, fahrt=fahrt_aus_pfad(input_file))
                 print(f"[LOG] Existiert Ausgabedatei nach Verarbeitung? {output_file.exists()}")
                 if ok and output_file.exists():
                     successful += 1
@@ -460,7 +581,7 @@ def process_single_csv_file():
             sys.stdout = orig_stdout
             logf.write(log_stream.getvalue())
             return
-        ok = process_csv_file(input_file, output_file)
+        ok = process_csv_file(input_file, output_file, fahrt=context.filename_ohne_ext)
         print(f"[LOG] Verarbeitung abgeschlossen. Rückgabewert: {ok}")
         print(f"[LOG] Existiert Ausgabedatei nach Verarbeitung? {output_file.exists()}")
         if ok and output_file.exists():
@@ -12,14 +12,13 @@ import os
 import sys
 import glob
 import time
+import shutil
 import pandas as pd
 import matplotlib.pyplot as plt
 import folium
 import plotly.graph_objects as go
 from selenium import webdriver
 from folium.plugins import TimestampedGeoJson
-from folium.plugins import MarkerCluster
-from matplotlib.backends.backend_pdf import PdfPages
 import warnings
 import numpy as np
 from pyproj import Transformer
@@ -31,6 +30,11 @@ warnings.filterwarnings("ignore", category=Warning)
 # === Projektkontext vorbereiten ===
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from config import CONFIG
+from utils.pdf_bericht import schreibe_sensor_pdf
+from utils.kartenmarker import luftwert_ebene, strassen_ebene
+from utils.strassenstatistik import StrassenStatistik
+from utils.kartenabgleich import StrassenSegmente
+from utils.rasterkarte import RasterArchiv, heatmap_karte
 
 # === Plot-Funktionen ===
 
@@ -276,35 +280,19 @@ def plot_luftkarte(df, ergebnisse_dir, unterordner, filename_ohne_ext):
     map_center = [49.3477, 8.1399]  # Zentrum Neustadt
     sensor_map = folium.Map(location=map_center, zoom_start=13, control_scale=True)
 
-    def get_color(value):
-        if value < 100:
-            return 'green'
-        elif value < 200:
-            return 'orange'
-        else:
-            return 'red'
-
-    marker_cluster = MarkerCluster().add_to(sensor_map)
+    # Punkte als kompaktes Array – Marker und Popups baut der Browser
+    luftwert_ebene(df, name="Messpunkte dieser Fahrt").add_to(sensor_map)
 
-    for _, row in df.iterrows():
-        lat, lon = row['GPS_Lat'], row['GPS_Lon']
-        mq135 = row.get('MQ135', 0)
-        popup_text = (
-            f"<b>Datum:</b> {row['DateTime']}<br>"
-            f"<b>Temperatur:</b> {row.get('Temperature_DHT_C', '?')} °C<br>"
-            f"<b>Luftfeuchte:</b> {row.get('Humidity_RH', '?')} %<br>"
-            f"<b>MQ135 Luftqualität:</b> {mq135} µg/m³<br>"
-            f"<b>Radioaktivität:</b> {row.get('Radiation_CPS', '?')} CPS"
-        )
-        folium.CircleMarker(
-            location=(lat, lon),
-            radius=5,
-            color=get_color(mq135),
-            fill=True,
-            fill_color=get_color(mq135),
-            fill_opacity=0.7,
-            popup=folium.Popup(popup_text, max_width=300)
-        ).add_to(marker_cluster)
+    # Straßen nach MQ135 über alle bisherigen Fahrten (Aggregatspeicher, kein Neueinlesen)
+    if os.path.exists(CONFIG.STRASSENSTATISTIK['DATEI']):
+        speicher = StrassenStatistik()
+        try:
+            tabelle = speicher.tabelle(['MQ135'], perzentile=[])
+        finally:
+            speicher.schliesse()
+        tabelle = tabelle[tabelle['punkte'] >= CONFIG.STRASSENSTATISTIK['MIN_PUNKTE']]
+        strassen_ebene(tabelle, StrassenSegmente.laden().segmente, 'MQ135').add_to(sensor_map)
+        folium.LayerControl(collapsed=False).add_to(sensor_map)
 
     # === Legende ===
     legend_html = '''
@@ -342,6 +330,14 @@ def plot_luftkarte(df, ergebnisse_dir, unterordner, filename_ohne_ext):
     sensor_map.save(output_file)
     print(f"✅ Karte gespeichert: {output_file}")
 
+def plot_stadt_heatmap(df, ergebnisse_dir, unterordner, filename_ohne_ext):
+    """
+    Stadtweite MQ135-Heatmap über alle Fahrten aus dem Raster-Akkumulator.
+    """
+    archiv = RasterArchiv()
+    output_file = os.path.join(unterordner, f"stadt_heatmap_mq135_{filename_ohne_ext}.html")
+    heatmap_karte(archiv.gesamt(), 'MQ135', 'mittel', output_file)
+
 def plot_sensorverläufe_mit_pdf(df, ergebnisse_dir, unterordner, filename_ohne_ext):
     """
     Erstellt Liniendiagramme für viele Sensorwerte.
@@ -357,32 +353,15 @@ def plot_sensorverläufe_mit_pdf(df, ergebnisse_dir, unterordner, filename_ohne_
     os.makedirs(unterordner, exist_ok=True)
 
     pdf_path = os.path.join(unterordner, f"{filename_ohne_ext}_sensorplots.pdf")
-    with PdfPages(pdf_path) as pdf:
-        for sensor in sensor_spalten:
-            if sensor not in df.columns:
-                print(f"⚠️ Spalte '{sensor}' nicht gefunden – übersprungen.")
-                continue
-
-            try:
-                plt.figure(figsize=(10, 4))
-                df[sensor].plot(title=f'{sensor} Verlauf')
-                plt.ylabel(sensor)
-                plt.xlabel('Index')
-                plt.grid(True)
-
-                # PNG speichern
-                pfad1 = os.path.join(ergebnisse_dir, f"{sensor}_{filename_ohne_ext}.png")
-                pfad2 = os.path.join(unterordner, f"{filename_ohne_ext}_{sensor}.png")
-                plt.savefig(pfad1)
-                plt.savefig(pfad2)
-
-                # PDF-Seite hinzufügen
-                pdf.savefig()
-                plt.close()
-
-                print(f"✅ Diagramm gespeichert: {sensor}")
-            except Exception as e:
-                print(f"❌ Fehler bei {sensor}: {e}")
+    # Eine Figure für alle Seiten, PNGs werden einmal gerendert und kopiert
+    png_pfade = {
+        sensor: [
+            os.path.join(ergebnisse_dir, f"{sensor}_{filename_ohne_ext}.png"),
+            os.path.join(unterordner, f"{filename_ohne_ext}_{sensor}.png"),
+        ]
+        for sensor in sensor_spalten
+    }
+    schreibe_sensor_pdf(df, sensor_spalten, pdf_path, png_pfade)
 
     print(f"\n📄 PDF mit allen Diagrammen gespeichert unter:\n{pdf_path}")
 
@@ -428,17 +407,16 @@ def plot_sensoren_zeitverlauf(df, ergebnisse_dir, unterordner, filename_ohne_ext
              linewidth=3, color='red')
     ax2.plot(zeit, df['Humidity_RH'], label='Luftfeuchtigkeit (%)', 
              linewidth=3, color='blue')
-    ax2.set_ylim(0, 80, 5)  # Fixe Skala 0-80 für beide Werte
+    ax2.set_ylim(0, 80)  # Fixe Skala 0-80 für beide Werte
     ax2.set_ylabel('Temperatur (°C) / Luftfeuchtigkeit (%)')
     
     # Radiation_CPS als senkrechte Linien plotten (auf Hauptachse)
-    rad_lines = []
-    for t, rad in zip(zeit, df['Radiation_CPS']):
-        if rad > 0:
-            line = ax1.plot([t, t], [min_val, min_val + 0.1*(max_val-min_val)], 
-                          color='green', linewidth=1, alpha=0.7)
-            if not rad_lines:  # Nur erste Linie für Legende
-                rad_lines = line
+    # Ein einziger vlines-Aufruf (LineCollection) statt einer Linie pro Ereignis
+    rad_zeiten = zeit[(df['Radiation_CPS'] > 0).to_numpy()]
+    if len(rad_zeiten):
+        ax1.vlines(rad_zeiten, min_val, min_val + 0.1*(max_val-min_val),
+                   color='green', linewidth=1, alpha=0.7, label='Radiation (CPS)',
+                   rasterized=len(rad_zeiten) > CONFIG.PDF_BERICHT['RASTER_SCHWELLE'])
     
     # Achsen anpassen
     ax1.set_xlabel('Zeit')
@@ -452,9 +430,6 @@ def plot_sensoren_zeitverlauf(df, ergebnisse_dir, unterordner, filename_ohne_ext
     # Kombinierte Legende
     lines1, labels1 = ax1.get_legend_handles_labels()
     lines2, labels2 = ax2.get_legend_handles_labels()
-    if rad_lines:
-        lines1.extend(rad_lines)
-        labels1.append('Radiation (CPS)')
     
     ax1.legend(lines1 + lines2, labels1 + labels2, 
               bbox_to_anchor=(1.25, 1), loc='upper left')
@@ -465,7 +440,7 @@ def plot_sensoren_zeitverlauf(df, ergebnisse_dir, unterordner, filename_ohne_ext
     pfad1a = os.path.join(ergebnisse_dir, f"sensorverlauf_{filename_ohne_ext}.png")
     pfad1b = os.path.join(unterordner, f"{filename_ohne_ext}_sensorverlauf.png")
     plt.savefig(pfad1a, dpi=300, bbox_inches='tight')
-    plt.savefig(pfad1b, dpi=300, bbox_inches='tight')
+    shutil.copyfile(pfad1a, pfad1b)
     plt.close()
 
 
@@ -575,6 +550,7 @@ def erstelle_plots(df, filename_ohne_ext):
     plotfunktionen = [
         plot_temperaturverlauf,
         plot_luftkarte,
+        plot_stadt_heatmap,
         plot_sensorverläufe_mit_pdf,
         plot_zeitslider_radioaktiv,
         plot_zeitslider_lautstaerke,
@@ -1,7 +1,8 @@
 
 
 """
-Modul zur Erstellung einer interpolierten Luftqualitätskarte (MQ135) auf Basis von GPS-Daten.
+Modul zur Erstellung interpolierter Karten (MQ135, weitere MQ-Sensoren, Temperatur,
+Luftfeuchtigkeit) auf Basis von GPS-Daten.
 
 Dieses Modul wird von der Pipeline automatisch aufgerufen, sofern eine main()-Funktion vorhanden ist.
 Die Karte wird als PNG in den Ergebnisordnern gespeichert.
@@ -10,89 +11,165 @@ Die Karte wird als PNG in den Ergebnisordnern gespeichert.
 import pandas as pd
 import matplotlib.pyplot as plt
 import cartopy.crs as ccrs
-import cartopy.feature as cfeature
-from scipy.interpolate import griddata
 import numpy as np
 import os
 import glob
 import sys
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import airScout_analytics.context as context
+from config import CONFIG
+from utils.interpolation import lade_oder_erstelle_interpolation
+from utils.kartengrundlage import zeichne_basiskarte
 import warnings
 warnings.filterwarnings("ignore", category=FutureWarning)
 warnings.filterwarnings("ignore", category=UserWarning)
 warnings.filterwarnings("ignore", category=Warning)
 
 
-def main() -> None:
-    """
-    Erstellt eine interpolierte Luftqualitätskarte (MQ135) und speichert sie als PNG.
-
-    :raises ValueError: Wenn context.filename_ohne_ext nicht gesetzt ist.
-    :raises FileNotFoundError: Wenn keine passende CSV-Datei gefunden wird.
-    """
-    # Immer die erste CSV aus 'data/bearbeitet3' verwenden
-    bearbeitet3_ordner = os.path.join("data", "bearbeitet3")
-    suchmuster = os.path.join(bearbeitet3_ordner, "*.csv")
-    treffer = glob.glob(suchmuster)
-    if not treffer:
-        raise FileNotFoundError(
-            f"Keine CSV-Datei gefunden im Ordner: {bearbeitet3_ordner}")
-    pfad = treffer[0]
-    # Ordnername und Plots werden aus context.filename_ohne_ext gebildet
-    df = pd.read_csv(pfad)
-    df = df.dropna(subset=['GPS_Lat', 'GPS_Lon', 'MQ135'])
-
-    # === Daten extrahieren ===
-    lats = df['GPS_Lat'].values
-    lons = df['GPS_Lon'].values
-    values = df['MQ135'].values  # z.B. MQ135 (Luftqualität)
+# Titel und Farbleisten-Beschriftung je Spalte (sonst Spaltenname)
+KARTEN_TITEL = {
+    'MQ135': ('Luftqualität MQ135', 'MQ135 (Luftqualität in Rohwerten)'),
+    'Temperature_DHT_C': ('Temperatur', 'Temperatur (°C)'),
+    'Humidity_RH': ('Luftfeuchtigkeit', 'Luftfeuchtigkeit (%)'),
+}
 
-    # === Gitter zur Interpolation ===
-    lon_grid = np.linspace(lons.min(), lons.max(), 200)
-    lat_grid = np.linspace(lats.min(), lats.max(), 200)
-    lon_mesh, lat_mesh = np.meshgrid(lon_grid, lat_grid)
 
-    # === Interpolation (z.B. IDW oder linear) ===
-    grid_values = griddata((lons, lats), values, (lon_mesh, lat_mesh), method='linear')
+def zeichne_karte(spalte: str, gitter: np.ndarray, lon_achse: np.ndarray,
+                  lat_achse: np.ndarray, lons: np.ndarray, lats: np.ndarray,
+                  wertebereich: Tuple[float, float], pfade: List[str]) -> str:
+    """
+    Zeichnet ein bereits interpoliertes Gitter als Karte und speichert es als PNG.
+
+    Die Funktion benötigt nur fertige Arrays und kann daher in Worker-Prozessen
+    laufen. Das PNG wird einmal gerendert und in weitere Zielpfade kopiert.
+
+    :param spalte: Name der Messgröße
+    :param gitter: Interpoliertes Gitter (ny, nx), NaN = keine Daten
+    :param lon_achse: Längengrade der Gitterspalten
+    :param lat_achse: Breitengrade der Gitterzeilen
+    :param lons: Längengrade der Messpunkte
+    :param lats: Breitengrade der Messpunkte
+    :param wertebereich: (min, max) der Farbskala
+    :param pfade: Zielpfade der PNG-Datei
+    :returns: Name der Spalte
+    """
+    titel, beschriftung = KARTEN_TITEL.get(spalte, (spalte, f"{spalte} (Rohwerte)"))
+    lon_mesh, lat_mesh = np.meshgrid(lon_achse, lat_achse)
 
     # === Karte zeichnen ===
     fig = plt.figure(figsize=(10, 10))
     ax = plt.axes(projection=ccrs.PlateCarree())
 
-    # Kartenfeatures
-    ax.add_feature(cfeature.BORDERS, linestyle=':', alpha=0.5)
-    ax.add_feature(cfeature.COASTLINE, alpha=0.3)
-    ax.add_feature(cfeature.LAND, edgecolor='black', alpha=0.1)
-    ax.set_extent([lons.min() - 0.01, lons.max() + 0.01,
-                   lats.min() - 0.01, lats.max() + 0.01], crs=ccrs.PlateCarree())
+    # Kartenfeatures (Grenzen, Küsten, Land) aus dem Offline-Cache
+    zeichne_basiskarte(ax)
+    rand = CONFIG.INTERPOLATION['RAND_GRAD']
+    ax.set_extent([lons.min() - rand, lons.max() + rand,
+                   lats.min() - rand, lats.max() + rand], crs=ccrs.PlateCarree())
 
-    # Farbkarte
-    cf = ax.contourf(lon_mesh, lat_mesh, grid_values,
-                     levels=np.linspace(values.min(), values.max(), 100),
-                     cmap='plasma', alpha=0.7)
+    # Farbkarte (Rasterbild statt 100-stufiger Konturberechnung)
+    cf = ax.pcolormesh(lon_mesh, lat_mesh, np.ma.masked_invalid(gitter),
+                       vmin=wertebereich[0], vmax=wertebereich[1], shading='auto',
+                       cmap='plasma', alpha=0.7, rasterized=True,
+                       transform=ccrs.PlateCarree())
 
     # Farbleiste
     cbar = plt.colorbar(cf, orientation='horizontal', pad=0.05)
-    cbar.set_label('MQ135 (Luftqualität in Rohwerten)')
+    cbar.set_label(beschriftung)
 
     # Punkte anzeigen
-    ax.scatter(lons, lats, color='black', s=5, alpha=0.5, label='Messpunkte')
-    plt.title('Luftqualität MQ135 – Prognosekarte')
-    plt.legend()
+    ax.scatter(lons, lats, color='black', s=5, alpha=0.5, label='Messpunkte',
+               rasterized=True, transform=ccrs.PlateCarree())
+    plt.title(f'{titel} – Prognosekarte')
+    # Feste Position: loc='best' prüft jeden Messpunkt auf Überdeckung
+    plt.legend(loc='upper right')
+
+    plt.savefig(pfade[0])
+    for pfad in pfade[1:]:
+        shutil.copyfile(pfade[0], pfad)
+    plt.close(fig)
+    return spalte
+
 
-    # === Speichern als PNG in ergebnisse und Unterordner ===
+def _zeichne_karte_auftrag(auftrag: tuple) -> str:
+    """Worker-Einstieg für :func:`zeichne_karte` (ein Tupel als Argument)."""
+    return zeichne_karte(*auftrag)
+
+
+def erstelle_karten(df: pd.DataFrame, spalten: List[str], filename_ohne_ext: str,
+                    parallel: bool = True) -> List[str]:
+    """
+    Erstellt interpolierte Karten für mehrere Spalten einer Fahrt.
+
+    Die Interpolationsgewichte werden einmal pro Fahrt berechnet (bzw. aus dem
+    Cache geladen) und per einer Matrixmultiplikation auf alle Spalten
+    angewendet. Die fertigen Gitter werden anschließend parallel gerendert.
+
+    :param df: DataFrame mit GPS_Lat, GPS_Lon und den Wertespalten
+    :param spalten: Zu kartierende Spalten (fehlende werden übersprungen)
+    :param filename_ohne_ext: Name der Fahrt für Dateinamen und Cache
+    :param parallel: Karten in Worker-Prozessen rendern
+    :returns: Liste der erstellten Spalten
+    """
+    df = df.dropna(subset=['GPS_Lat', 'GPS_Lon']).reset_index(drop=True)
+    lats = df['GPS_Lat'].to_numpy(dtype=float)
+    lons = df['GPS_Lon'].to_numpy(dtype=float)
+
+    # === Interpolation (IDW/Kriging, Gewichte pro Fahrt gecacht) ===
+    interpolation = lade_oder_erstelle_interpolation(lons, lats, filename_ohne_ext)
+    gitter = interpolation.interpoliere_spalten(df, spalten)
+
+    # === Speicherorte in ergebnisse und Unterordner ===
     ergebnisse_dir = os.path.join("data", "ergebnisse")
-    unterordner = os.path.join(ergebnisse_dir, context.filename_ohne_ext)
+    unterordner = os.path.join(ergebnisse_dir, filename_ohne_ext)
     os.makedirs(ergebnisse_dir, exist_ok=True)
     os.makedirs(unterordner, exist_ok=True)
 
-    pfad1 = os.path.join(ergebnisse_dir, f"karte_mq135_{context.filename_ohne_ext}.png")
-    pfad2 = os.path.join(unterordner, f"{context.filename_ohne_ext}_karte_mq135.png")
-    plt.savefig(pfad1)
-    plt.savefig(pfad2)
-    plt.close()
-    print(f"Karte gespeichert unter: {pfad1} und {pfad2}")
+    auftraege = []
+    for spalte, werte_gitter in gitter.items():
+        werte = pd.to_numeric(df[spalte], errors='coerce')
+        if werte.notna().sum() == 0:
+            print(f"⚠️ Spalte '{spalte}' enthält keine Werte – übersprungen.")
+            continue
+        name = spalte.lower()
+        pfade = [os.path.join(ergebnisse_dir, f"karte_{name}_{filename_ohne_ext}.png"),
+                 os.path.join(unterordner, f"{filename_ohne_ext}_karte_{name}.png")]
+        auftraege.append((spalte, werte_gitter, interpolation.lon_achse,
+                          interpolation.lat_achse, lons, lats,
+                          (werte.min(), werte.max()), pfade))
+
+    worker = min(CONFIG.INTERPOLATION['MAX_WORKERS'], len(auftraege))
+    if parallel and worker > 1:
+        with ProcessPoolExecutor(max_workers=worker) as pool:
+            erstellt = list(pool.map(_zeichne_karte_auftrag, auftraege))
+    else:
+        erstellt = [_zeichne_karte_auftrag(a) for a in auftraege]
+    for auftrag in auftraege:
+        print(f"Karte gespeichert unter: {' und '.join(auftrag[-1])}")
+    return erstellt
+
+
+def main() -> None:
+    """
+    Erstellt interpolierte Karten (MQ135 sowie alle Spalten aus
+    CONFIG.INTERPOLATION['KARTEN_SPALTEN']) und speichert sie als PNG.
+
+    :raises ValueError: Wenn context.filename_ohne_ext nicht gesetzt ist.
+    :raises FileNotFoundError: Wenn keine passende CSV-Datei gefunden wird.
+    """
+    # Immer die erste CSV aus 'data/bearbeitet3' verwenden
+    bearbeitet3_ordner = os.path.join("data", "bearbeitet3")
+    suchmuster = os.path.join(bearbeitet3_ordner, "*.csv")
+    treffer = glob.glob(suchmuster)
+    if not treffer:
+        raise FileNotFoundError(
+            f"Keine CSV-Datei gefunden im Ordner: {bearbeitet3_ordner}")
+    pfad = treffer[0]
+    # Ordnername und Plots werden aus context.filename_ohne_ext gebildet
+    df = pd.read_csv(pfad)
+    erstelle_karten(df, CONFIG.INTERPOLATION['KARTEN_SPALTEN'], context.filename_ohne_ext)
 
 
 if __name__ == "__main__":
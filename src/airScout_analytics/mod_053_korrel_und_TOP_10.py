@@ -15,6 +15,7 @@ warnings.filterwarnings("ignore", category=FutureWarning)
 warnings.filterwarnings("ignore", category=UserWarning)
 warnings.filterwarnings("ignore", category=Warning)
 from context import filename_ohne_ext
+from utils.sensorstatistik import sensorstatistik_fuer_lauf
 
 def main():
     # === Automatische Auswahl der ersten CSV aus bearbeitet3 ===
@@ -135,9 +136,10 @@ def main():
     else:
         print("Keine geeignete Zeitspalte (DateTime oder GPS_DateTime) für das Umweltwerte-Diagramm gefunden.")
     # === MQ135 Luftqualitätsbewertung und Top-10%-Karte ===
-    mq135_werte = df["MQ135"].dropna()
-    q1 = mq135_werte.quantile(0.25)
-    q3 = mq135_werte.quantile(0.75)
+    # Quartile und 90%-Schwellen aller Gassensoren in einem Durchlauf
+    statistik = sensorstatistik_fuer_lauf(df, "top10", gassensoren, quantile=[0.25, 0.75, 0.9])
+    q1 = statistik.quantil(0.25, "MQ135")
+    q3 = statistik.quantil(0.75, "MQ135")
     def luftqualitaet_index(wert: float) -> str:
         if wert < q1:
             return "Gut"
@@ -152,6 +154,7 @@ def main():
         print(df[["DateTime", "MQ135", "Luftqualitaet"]].tail())
         try:
             import folium
+            from utils.kartenmarker import sensor_top_ebene
             sensor_colors = {
                 "MQ2": "red",
                 "MQ3": "orange",
@@ -179,30 +182,30 @@ def main():
                 lat_mittel = df_gps["GPS_Lat"].mean()
                 lon_mittel = df_gps["GPS_Lon"].mean()
                 m = folium.Map(location=[lat_mittel, lon_mittel], zoom_start=12)
-                for sensor, farbe in sensor_colors.items():
-                    if sensor in df.columns:
-                        df_valid = df[df[sensor].notna() & df["GPS_Lat"].notna() & df["GPS_Lon"].notna()]
-                        if not df_valid.empty:
-                            threshold = df_valid[sensor].quantile(0.9)
-                            top10 = df_valid[df_valid[sensor] >= threshold]
-                            for _, row in top10.iterrows():
-                                popup_text = f"Sensor: {sensor}<br>Gas: {sensor_gas[sensor]}<br>Wert: {row[sensor]}<br>Datum/Zeit: {row['DateTime']}"
-                                folium.Marker(
-                                    location=[row["GPS_Lat"], row["GPS_Lon"]],
-                                    popup=popup_text,
-                                    icon=folium.Icon(color=farbe)
-                                ).add_to(m)
+                # Top-10% je Sensor vektorisiert sammeln; Marker/Popups baut der Browser
+                teile = []
+                for sensor in sensor_colors:
+                    if sensor in df_gps.columns:
+                        top10 = df_gps[df_gps[sensor] >= statistik.quantil(0.9, sensor)]
+                        teile.append(pd.DataFrame({"GPS_Lat": top10["GPS_Lat"], "GPS_Lon": top10["GPS_Lon"],
+                                                   "sensor": sensor, "wert": top10[sensor],
+                                                   "DateTime": top10["DateTime"]}))
                 radio_cols = [col for col in ["Radioaktivität", "Radioaktivitaet"] if col in df.columns]
-                if radio_cols:
-                    for radio_col in radio_cols:
-                        df_radio = df[(df[radio_col].notna()) & (df[radio_col] > 0) & df["GPS_Lat"].notna() & df["GPS_Lon"].notna()]
-                        for _, row in df_radio.iterrows():
-                            popup_text = f"Radioaktivität: {row[radio_col]}<br>Datum/Zeit: {row['DateTime']}"
-                            folium.Marker(
-                                location=[row["GPS_Lat"], row["GPS_Lon"]],
-                                popup=popup_text,
-                                icon=folium.Icon(color="lightgray", icon="radiation", prefix="fa")
-                            ).add_to(m)
+                for radio_col in radio_cols:
+                    df_radio = df_gps[df_gps[radio_col] > 0]
+                    teile.append(pd.DataFrame({"GPS_Lat": df_radio["GPS_Lat"], "GPS_Lon": df_radio["GPS_Lon"],
+                                               "sensor": radio_col, "wert": df_radio[radio_col],
+                                               "DateTime": df_radio["DateTime"]}))
+                marker_sensoren = {
+                    sensor: {"name": sensor, "gas": sensor_gas[sensor], "farbe": farbe,
+                             "icon": "info-sign", "prefix": "glyphicon"}
+                    for sensor, farbe in sensor_colors.items()
+                }
+                for radio_col in radio_cols:
+                    marker_sensoren[radio_col] = {"name": None, "gas": None, "farbe": "lightgray",
+                                                  "icon": "radiation", "prefix": "fa"}
+                if teile:
+                    sensor_top_ebene(pd.concat(teile, ignore_index=True), marker_sensoren).add_to(m)
                 legend_html = '<div style="position: fixed; bottom: 50px; left: 50px; width: 450px; height: 260px; z-index:9999; font-size:14px; background: white; border:2px solid grey; padding: 10px;">'
                 legend_html += '<b>Legende: Sensorfarben und Gase</b><br>'
                 for sensor, farbe in sensor_colors.items():
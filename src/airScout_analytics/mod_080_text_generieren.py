@@ -19,6 +19,8 @@ from typing import Optional
 # Für Google Gemini SDK
 import google.generativeai as genai
 
+from utils.strassenstatistik import strassenstatistik_text
+
 def lade_gemini_api_key(env_pfad: str = ".env") -> Optional[str]:
     """
     Liest den Gemini API-Key aus einer .env-Datei im Hauptverzeichnis.
@@ -62,6 +64,11 @@ def generiere_luftqualitaetsbericht_von_gemini(prompt_txt_pfad: str) -> str:
     else:
         prompt_text = basis_prompt
 
+    # 3. Straßenstatistik über alle Fahrten aus dem Aggregatspeicher anhängen
+    strassen_text = strassenstatistik_text()
+    if strassen_text:
+        prompt_text += "\n\n" + strassen_text
+
     try:
         print("\n--- Prompt an Gemini ---\n")
         print(prompt_text)
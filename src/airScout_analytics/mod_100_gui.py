@@ -7,13 +7,16 @@ import tkinter as tk
 from tkinter import ttk
 import os
 import glob
-from PIL import Image, ImageTk
-try:
-    from pdf2image import convert_from_path
-    PDF_SUPPORT = True
-except ImportError:
-    PDF_SUPPORT = False
+import queue
+import threading
+import contextlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PIL import ImageTk
 from context import filename_ohne_ext
+from config import CONFIG
+from utils.csv_zeilenindex import CsvZeilenIndex
+from utils.vorschau_cache import PDF_SUPPORT, VorschauCache
 # --- Tab-Konfigurationen ---
 # Für jeden Haupttab 20 individuelle Variablen für Name, Beschriftung, Datei
 
@@ -59,142 +62,341 @@ TAB3_LABELS = [f"Tab 3 - Ansicht {i+1}" for i in range(29)]
 TAB3_FILES = [os.path.join("..", "..", "data", "bearbeitet", f"Infos{i+1}.txt") for i in range(20)]
 
 
-def show_txt_in_tab(frame, filepath):
-    for widget in frame.winfo_children():
-        widget.destroy()
+# Bildformate, die unterstützt werden
+IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
+PDF_EXTS = ('.pdf',)
+HTML_EXTS = ('.html', '.htm')
+MAX_IMAGE_SIZE = CONFIG.VORSCHAU['GROESSE']  # Vorschaugröße im Tab (Zoom lädt volle Auflösung)
+CSV_EXTS = ('.csv',)
+# Vorschauen (verkleinerte Bilder, gerasterte PDF-Seiten) werden auf der Platte gecacht
+VORSCHAU_CACHE = VorschauCache()
+
+
+class CsvTabelle(tk.Frame):
+    """
+    Virtualisierte Tabellenansicht für große CSV-Dateien.
+
+    Es existieren nur so viele Treeview-Zeilen, wie sichtbar sind; beim
+    Scrollen werden sie mit dem passenden Ausschnitt aus dem
+    :class:`CsvZeilenIndex` neu befüllt. Sprung zu Zeile oder Uhrzeit und
+    ein Spaltenfilter stehen in der Werkzeugleiste.
+
+    :param master: Eltern-Widget
+    :param index: Zeilenindex der Datei (wird beim Zerstören geschlossen)
+    """
+
+    def __init__(self, master, index):
+        super().__init__(master)
+        # Der Index gehört ab hier der Tabelle und wird mit ihr geschlossen
+        self._offen = contextlib.ExitStack()
+        self.index = self._offen.enter_context(index)
+        self.start = 0
+        self.sichtbar = 30
+        self.spalten = list(range(len(index.spalten)))
+
+        leiste = tk.Frame(self)
+        leiste.pack(side=tk.TOP, fill=tk.X, pady=2)
+        tk.Label(leiste, text=f"{os.path.basename(index.pfad)} – {len(index):,} Zeilen".replace(',', '.')
+                 ).pack(side=tk.LEFT, padx=5)
+        self.zeile_eingabe = self._eingabe(leiste, "Zeile:", 8, self._springe_zeile)
+        self.zeit_eingabe = self._eingabe(leiste, "Zeit:", 19, self._springe_zeit)
+        self.filter_eingabe = self._eingabe(leiste, "Spalten:", 30, self._filter_anwenden)
+        self.status = tk.Label(leiste, fg="#777")
+        self.status.pack(side=tk.LEFT, padx=5)
+
+        tabelle = tk.Frame(self)
+        tabelle.pack(expand=True, fill=tk.BOTH)
+        self.tree = ttk.Treeview(tabelle, show="headings", selectmode="browse")
+        self.y_scroll = tk.Scrollbar(tabelle, orient=tk.VERTICAL, command=self._yview)
+        x_scroll = tk.Scrollbar(tabelle, orient=tk.HORIZONTAL, command=self.tree.xview)
+        self.tree.configure(xscrollcommand=x_scroll.set)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.y_scroll.grid(row=0, column=1, sticky="ns")
+        x_scroll.grid(row=1, column=0, sticky="ew")
+        tabelle.grid_rowconfigure(0, weight=1)
+        tabelle.grid_columnconfigure(0, weight=1)
+
+        self.tree.bind("<Configure>", self._groesse_geaendert)
+        self.tree.bind("<MouseWheel>", lambda e: self._scrolle(-3 if e.delta > 0 else 3))
+        self.tree.bind("<Button-4>", lambda e: self._scrolle(-3))
+        self.tree.bind("<Button-5>", lambda e: self._scrolle(3))
+        self.bind("<Destroy>", lambda e: e.widget is self and self._offen.close())
+        self._spalten_setzen()
+
+    @staticmethod
+    def _eingabe(leiste, text, breite, befehl):
+        tk.Label(leiste, text=text).pack(side=tk.LEFT, padx=(10, 2))
+        eingabe = tk.Entry(leiste, width=breite)
+        eingabe.pack(side=tk.LEFT)
+        eingabe.bind("<Return>", lambda e: befehl())
+        return eingabe
+
+    def _spalten_setzen(self):
+        namen = [self.index.spalten[i] for i in self.spalten]
+        self.tree.configure(columns=[str(i) for i in range(len(namen))])
+        for i, name in enumerate(namen):
+            self.tree.heading(str(i), text=name)
+            self.tree.column(str(i), width=max(80, 9 * len(name)), stretch=False)
+        self._zeichnen()
+
+    def _zeichnen(self):
+        """Befüllt nur die sichtbaren Zeilen neu."""
+        self.start = max(0, min(self.start, len(self.index) - self.sichtbar))
+        self.tree.delete(*self.tree.get_children())
+        for nummer, felder in enumerate(self.index.zeilen(self.start, self.sichtbar, self.spalten)):
+            self.tree.insert("", tk.END, iid=str(self.start + nummer), values=felder)
+        gesamt = max(len(self.index), 1)
+        self.y_scroll.set(self.start / gesamt, min(1.0, (self.start + self.sichtbar) / gesamt))
+
+    def _groesse_geaendert(self, event):
+        zeilenhoehe = 20
+        sichtbar = max(5, event.height // zeilenhoehe - 1)
+        if sichtbar != self.sichtbar:
+            self.sichtbar = sichtbar
+            self._zeichnen()
+
+    def _scrolle(self, zeilen):
+        self.start += zeilen
+        self._zeichnen()
+
+    def _yview(self, *args):
+        if args[0] == 'moveto':
+            self.start = int(float(args[1]) * len(self.index))
+        elif args[0] == 'scroll':
+            schritt = int(args[1]) * (self.sichtbar if args[2] == 'pages' else 1)
+            self.start += schritt
+        self._zeichnen()
+
+    def _markiere(self, zeile):
+        self.start = zeile - self.sichtbar // 2
+        self._zeichnen()
+        if self.tree.exists(str(zeile)):
+            self.tree.selection_set(str(zeile))
+            self.tree.see(str(zeile))
+
+    def _springe_zeile(self):
+        try:
+            zeile = int(self.zeile_eingabe.get()) - 1
+        except ValueError:
+            self.status.configure(text="Ungültige Zeilennummer")
+            return
+        zeile = max(0, min(zeile, len(self.index) - 1))
+        self.status.configure(text=f"Zeile {zeile + 1}")
+        self._markiere(zeile)
+
+    def _springe_zeit(self):
+        zeile = self.index.suche_zeit(self.zeit_eingabe.get())
+        if zeile is None:
+            self.status.configure(text="Zeit nicht gefunden (Format z.B. 2025-07-21 05:10:00)")
+            return
+        self.status.configure(text=f"Zeile {zeile + 1}")
+        self._markiere(zeile)
+
+    def _filter_anwenden(self):
+        spalten = self.index.filtere_spalten(self.filter_eingabe.get())
+        if not spalten:
+            self.status.configure(text="Keine Spalte passt zum Filter")
+            return
+        self.spalten = spalten
+        self.status.configure(text=f"{len(spalten)} von {len(self.index.spalten)} Spalten")
+        self._spalten_setzen()
+
+
+class BildAnsicht(tk.Frame):
+    """
+    Bildanzeige mit sofort sichtbarer Vorschau und Zoom auf volle Auflösung.
+
+    Die volle Auflösung (bzw. die hoch gerasterte PDF-Seite) wird erst beim
+    ersten Zoom in einem Hintergrund-Thread geladen.
+
+    :param master: Eltern-Widget
+    :param abs_path: Bild- oder PDF-Datei
+    :param vorschau: Vorschau aus dem :class:`VorschauCache`
+    """
+
+    def __init__(self, master, abs_path, vorschau):
+        super().__init__(master)
+        self.abs_path = abs_path
+        self._bilder = {'vorschau': vorschau}
+        self._photo = None
+        self._ergebnis = queue.Queue()
+        self._abholen_id = None
+        self.stufe = 'vorschau'
+
+        leiste = tk.Frame(self)
+        leiste.pack(side=tk.TOP, fill=tk.X, pady=2)
+        self.zoom_button = tk.Button(leiste, text="🔍 Volle Auflösung", command=self._umschalten)
+        self.zoom_button.pack(side=tk.LEFT, padx=5)
+        self.status = tk.Label(leiste, fg="#777", text=os.path.basename(abs_path))
+        self.status.pack(side=tk.LEFT, padx=5)
+
+        flaeche = tk.Frame(self)
+        flaeche.pack(expand=True, fill=tk.BOTH)
+        self.canvas = tk.Canvas(flaeche, highlightthickness=0)
+        y_scroll = tk.Scrollbar(flaeche, orient=tk.VERTICAL, command=self.canvas.yview)
+        x_scroll = tk.Scrollbar(flaeche, orient=tk.HORIZONTAL, command=self.canvas.xview)
+        self.canvas.configure(yscrollcommand=y_scroll.set, xscrollcommand=x_scroll.set)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        y_scroll.grid(row=0, column=1, sticky="ns")
+        x_scroll.grid(row=1, column=0, sticky="ew")
+        flaeche.grid_rowconfigure(0, weight=1)
+        flaeche.grid_columnconfigure(0, weight=1)
+        self.canvas.bind("<Double-Button-1>", lambda e: self._umschalten())
+        self._anzeigen('vorschau')
+
+    def _anzeigen(self, stufe):
+        self.stufe = stufe
+        self._photo = ImageTk.PhotoImage(self._bilder[stufe])  # Referenz halten!
+        self.canvas.delete("all")
+        self.canvas.create_image(0, 0, image=self._photo, anchor="nw")
+        self.canvas.configure(scrollregion=(0, 0, self._photo.width(), self._photo.height()))
+        self.zoom_button.configure(text="🔍 Volle Auflösung" if stufe == 'vorschau' else "🔎 Vorschau")
+
+    def _umschalten(self):
+        if self.stufe == 'voll':
+            self._anzeigen('vorschau')
+            return
+        if 'voll' in self._bilder:
+            self._anzeigen('voll')
+            return
+        self.zoom_button.configure(state=tk.DISABLED)
+        self.status.configure(text="⏳ Volle Auflösung wird geladen …")
+        threading.Thread(target=self._lade_vollbild, daemon=True).start()
+        self._abholen_id = self.after(50, self._vollbild_abholen)
+
+    def destroy(self):
+        # Ausstehendes Abholen abbrechen, sonst läuft after() auf ein zerstörtes Widget
+        if self._abholen_id is not None:
+            self.after_cancel(self._abholen_id)
+            self._abholen_id = None
+        super().destroy()
+
+    def _lade_vollbild(self):
+        # Kein Tk-Aufruf im Thread: Ergebnis über die Queue übergeben
+        try:
+            self._ergebnis.put(VORSCHAU_CACHE.vollbild(self.abs_path))
+        except Exception as e:
+            self._ergebnis.put(e)
+
+    def _vollbild_abholen(self):
+        self._abholen_id = None
+        if not self.winfo_exists():
+            return
+        try:
+            ergebnis = self._ergebnis.get_nowait()
+        except queue.Empty:
+            self._abholen_id = self.after(50, self._vollbild_abholen)
+            return
+        self.zoom_button.configure(state=tk.NORMAL)
+        if isinstance(ergebnis, Exception):
+            self.status.configure(text=f"Fehler beim Laden: {ergebnis}")
+            return
+        self._bilder['voll'] = ergebnis
+        self.status.configure(text=f"{os.path.basename(self.abs_path)} – "
+                                   f"{ergebnis.width} x {ergebnis.height} px")
+        self._anzeigen('voll')
+
+
+def _text_anzeigen(frame, content):
+    """
+    Zeigt Text mit Scrollbalken im Frame an.
+    """
+    text_frame = tk.Frame(frame)
+    text_frame.pack(expand=True, fill=tk.BOTH)
+    text = tk.Text(text_frame, height=30, width=120, wrap=tk.NONE)
+    y_scroll = tk.Scrollbar(text_frame, orient=tk.VERTICAL, command=text.yview)
+    x_scroll = tk.Scrollbar(text_frame, orient=tk.HORIZONTAL, command=text.xview)
+    text.configure(yscrollcommand=y_scroll.set, xscrollcommand=x_scroll.set)
+    text.insert(tk.END, content)
+    text.grid(row=0, column=0, sticky="nsew")
+    y_scroll.grid(row=0, column=1, sticky="ns")
+    x_scroll.grid(row=1, column=0, sticky="ew")
+    text_frame.grid_rowconfigure(0, weight=1)
+    text_frame.grid_columnconfigure(0, weight=1)
+
+
+def lade_tab_inhalt(filepath):
+    """
+    Lädt den Inhalt eines Tabs ohne Tk-Aufrufe (läuft im Hintergrund-Thread).
+
+    :param filepath: Pfad relativ zum Skriptverzeichnis, Platzhalter * und ? erlaubt
+    :returns: Tuple (art, abs_path, daten) mit art 'text', 'tabelle', 'bild',
+        'pdf', 'html' oder 'fehler'; bei 'bild'/'pdf' ist daten die Vorschau,
+        bei 'tabelle' ein CsvZeilenIndex
+    """
     # Relativen Pfad in absoluten Pfad umwandeln (relativ zum Skriptverzeichnis)
     abs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), filepath))
     # Wildcard-Unterstützung: bei *.csv oder *.txt erste passende Datei nehmen
     if '*' in abs_path or '?' in abs_path:
         matches = glob.glob(abs_path)
-        if matches:
-            abs_path = matches[0]
-        else:
-            content = f"Keine Datei gefunden für Muster: {abs_path}"
-            text_frame = tk.Frame(frame)
-            text_frame.pack(expand=True, fill=tk.BOTH)
-            text = tk.Text(text_frame, height=30, width=120, wrap=tk.NONE)
-            y_scroll = tk.Scrollbar(text_frame, orient=tk.VERTICAL, command=text.yview)
-            x_scroll = tk.Scrollbar(text_frame, orient=tk.HORIZONTAL, command=text.xview)
-            text.configure(yscrollcommand=y_scroll.set, xscrollcommand=x_scroll.set)
-            text.insert(tk.END, content)
-            text.grid(row=0, column=0, sticky="nsew")
-            y_scroll.grid(row=0, column=1, sticky="ns")
-            x_scroll.grid(row=1, column=0, sticky="ew")
-            text_frame.grid_rowconfigure(0, weight=1)
-            text_frame.grid_columnconfigure(0, weight=1)
-            return
-    # Bildformate, die unterstützt werden
-    image_exts = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
-    pdf_exts = ('.pdf',)
-    html_exts = ('.html', '.htm')
-    MAX_IMAGE_SIZE = (1920, 1080)  # Größere Darstellung für Bilder
-    # Prüfe, ob Bilddatei und zeige in eigenem Frame
-    if abs_path.lower().endswith(image_exts):
+        if not matches:
+            return 'fehler', abs_path, f"Keine Datei gefunden für Muster: {abs_path}"
+        abs_path = matches[0]
+    pfad_klein = abs_path.lower()
+    if pfad_klein.endswith(IMAGE_EXTS):
         try:
             print(f"[LOG] Versuche Bild zu laden: {abs_path}")
-            img = Image.open(abs_path)
-            print(f"[LOG] Bild erfolgreich geöffnet: {abs_path}")
-            # Bild ggf. skalieren, falls größer als MAX_IMAGE_SIZE
-            img.thumbnail(MAX_IMAGE_SIZE)
-            photo = ImageTk.PhotoImage(img)
-            image_frame = tk.Frame(frame)
-            image_frame.pack(expand=True, fill=tk.BOTH)
-            label = tk.Label(image_frame, image=photo)
-            label.image = photo  # Referenz halten!
-            if not hasattr(image_frame, 'image_refs'):
-                image_frame.image_refs = []
-            image_frame.image_refs.append(photo)
-            print(f"[LOG] Bildreferenz am Frame gespeichert: {abs_path}")
-            label.pack(expand=True, fill=tk.BOTH)
+            # Verkleinerte Vorschau (max. MAX_IMAGE_SIZE) aus dem Cache
+            return 'bild', abs_path, VORSCHAU_CACHE.vorschau(abs_path)
         except Exception as e:
             print(f"[ERROR] Fehler beim Laden des Bildes: {e}\nPfad: {abs_path}")
-            content = f"Fehler beim Laden des Bildes: {e}\nPfad: {abs_path}"
-            text = tk.Text(frame, height=30, width=120)
-            text.insert(tk.END, content)
-            text.pack(expand=True, fill=tk.BOTH)
-        return
-    # HTML-Anzeige
-    if abs_path.lower().endswith(html_exts) and HTML_SUPPORT:
+            return 'fehler', abs_path, f"Fehler beim Laden des Bildes: {e}\nPfad: {abs_path}"
+    if pfad_klein.endswith(HTML_EXTS) and HTML_SUPPORT:
+        return 'html', abs_path, None
+    if pfad_klein.endswith(CSV_EXTS):
+        # Nur Zeilenindex erstellen; gelesen wird später der sichtbare Ausschnitt
         try:
-            html_frame = HtmlFrame(frame, horizontal_scrollbar=True, messages_enabled=False)
-            html_frame.load_file(abs_path)
-            html_frame.pack(expand=True, fill=tk.BOTH)
+            return 'tabelle', abs_path, CsvZeilenIndex(abs_path)
         except Exception as e:
-            content = f"Fehler beim Anzeigen der HTML-Datei: {e}\nPfad: {abs_path}"
-            text_frame = tk.Frame(frame)
-            text_frame.pack(expand=True, fill=tk.BOTH)
-            text = tk.Text(text_frame, height=30, width=120, wrap=tk.NONE)
-            y_scroll = tk.Scrollbar(text_frame, orient=tk.VERTICAL, command=text.yview)
-            x_scroll = tk.Scrollbar(text_frame, orient=tk.HORIZONTAL, command=text.xview)
-            text.configure(yscrollcommand=y_scroll.set, xscrollcommand=x_scroll.set)
-            text.insert(tk.END, content)
-            text.grid(row=0, column=0, sticky="nsew")
-            y_scroll.grid(row=0, column=1, sticky="ns")
-            x_scroll.grid(row=1, column=0, sticky="ew")
-            text_frame.grid_rowconfigure(0, weight=1)
-            text_frame.grid_columnconfigure(0, weight=1)
-    elif abs_path.lower().endswith(image_exts):
+            return 'fehler', abs_path, f"Fehler beim Indizieren der CSV-Datei: {e}\nPfad: {abs_path}"
+    if pfad_klein.endswith(PDF_EXTS):
+        if not PDF_SUPPORT:
+            return 'fehler', abs_path, ("PDF-Anzeige benötigt das Paket 'pdf2image' und ein installiertes Poppler.\n"
+                                        f"Dateipfad: {abs_path}")
         try:
-            print(f"[LOG] Versuche Bild (unskaliert) zu laden: {abs_path}")
-            img = Image.open(abs_path)
-            print(f"[LOG] Bild erfolgreich geöffnet: {abs_path}")
-            photo = ImageTk.PhotoImage(img)
-            label = tk.Label(frame, image=photo)
-            label.image = photo  # Referenz halten!
-            if not hasattr(frame, 'image_refs'):
-                frame.image_refs = []
-            frame.image_refs.append(photo)
-            print(f"[LOG] Bildreferenz am Frame gespeichert: {abs_path}")
-            label.pack(expand=True, fill=tk.BOTH)
+            # Erste Seite mit niedriger Auflösung gerastert, aus dem Cache
+            return 'pdf', abs_path, VORSCHAU_CACHE.vorschau(abs_path)
         except Exception as e:
-            print(f"[ERROR] Fehler beim Laden des Bildes: {e}\nPfad: {abs_path}")
-            content = f"Fehler beim Laden des Bildes: {e}\nPfad: {abs_path}"
-            text = tk.Text(frame, height=30, width=120)
-            text.insert(tk.END, content)
-            text.pack(expand=True, fill=tk.BOTH)
-    elif abs_path.lower().endswith(pdf_exts):
-        if PDF_SUPPORT:
-            try:
-                images = convert_from_path(abs_path, first_page=1, last_page=1, fmt='png')
-                if images:
-                    img = images[0]
-                    img.thumbnail((1200, 700))
-                    photo = ImageTk.PhotoImage(img)
-                    label = tk.Label(frame, image=photo)
-                    label.image = photo
-                    label.pack(expand=True, fill=tk.BOTH)
-                else:
-                    raise Exception("Keine Seite im PDF gefunden")
-            except Exception as e:
-                content = f"Fehler beim Anzeigen der PDF-Datei: {e}\nPfad: {abs_path}"
-                text = tk.Text(frame, height=30, width=120)
-                text.insert(tk.END, content)
-                text.pack(expand=True, fill=tk.BOTH)
-        else:
-            content = ("PDF-Anzeige benötigt das Paket 'pdf2image' und ein installiertes Poppler.\n"
-                       f"Dateipfad: {abs_path}")
-            text = tk.Text(frame, height=30, width=120)
-            text.insert(tk.END, content)
-            text.pack(expand=True, fill=tk.BOTH)
-    else:
+            return 'fehler', abs_path, f"Fehler beim Anzeigen der PDF-Datei: {e}\nPfad: {abs_path}"
+    try:
+        with open(abs_path, encoding="utf-8") as f:
+            return 'text', abs_path, f.read()
+    except Exception as e:
+        return 'fehler', abs_path, f"Fehler beim Laden der Datei: {e}\nPfad: {abs_path}"
+
+
+def zeige_tab_inhalt(frame, inhalt):
+    """
+    Baut die Widgets für einen geladenen Tab-Inhalt (nur im Tk-Hauptthread).
+
+    :param frame: Ziel-Frame
+    :param inhalt: Rückgabe von :func:`lade_tab_inhalt`
+    """
+    art, abs_path, daten = inhalt
+    if art in ('bild', 'pdf'):
+        BildAnsicht(frame, abs_path, daten).pack(expand=True, fill=tk.BOTH)
+        return
+    if art == 'html':
         try:
-            with open(abs_path, encoding="utf-8") as f:
-                content = f.read()
+            html_frame = HtmlFrame(frame, horizontal_scrollbar=True, messages_enabled=False)
+            html_frame.load_file(abs_path)
+            html_frame.pack(expand=True, fill=tk.BOTH)
         except Exception as e:
-            content = f"Fehler beim Laden der Datei: {e}\nPfad: {abs_path}"
-        text_frame = tk.Frame(frame)
-        text_frame.pack(expand=True, fill=tk.BOTH)
-        text = tk.Text(text_frame, height=30, width=120, wrap=tk.NONE)
-        y_scroll = tk.Scrollbar(text_frame, orient=tk.VERTICAL, command=text.yview)
-        x_scroll = tk.Scrollbar(text_frame, orient=tk.HORIZONTAL, command=text.xview)
-        text.configure(yscrollcommand=y_scroll.set, xscrollcommand=x_scroll.set)
-        text.insert(tk.END, content)
-        text.grid(row=0, column=0, sticky="nsew")
-        y_scroll.grid(row=0, column=1, sticky="ns")
-        x_scroll.grid(row=1, column=0, sticky="ew")
-        text_frame.grid_rowconfigure(0, weight=1)
-        text_frame.grid_columnconfigure(0, weight=1)
+            _text_anzeigen(frame, f"Fehler beim Anzeigen der HTML-Datei: {e}\nPfad: {abs_path}")
+        return
+    if art == 'tabelle':
+        CsvTabelle(frame, daten).pack(expand=True, fill=tk.BOTH)
+        return
+    _text_anzeigen(frame, daten)
+
+
+def show_txt_in_tab(frame, filepath):
+    """
+    Lädt und zeigt eine Datei synchron im Frame an (ältere Aufrufer).
+    """
+    for widget in frame.winfo_children():
+        widget.destroy()
+    zeige_tab_inhalt(frame, lade_tab_inhalt(filepath))
 
 
 class MultiTabGUI(tk.Tk):
@@ -208,7 +410,13 @@ class MultiTabGUI(tk.Tk):
         beenden_button = tk.Button(button_frame, text="Beenden", command=self.beenden, bg="#d9534f", fg="white", font=("Arial", 12, "bold"))
         beenden_button.pack(side=tk.RIGHT, padx=10, pady=10)
         self.protocol("WM_DELETE_WINDOW", self.on_close)
+        # Tab-Inhalte werden im Hintergrund geladen und per Queue an Tk übergeben
+        self._tabs = {}
+        self._gerendert = OrderedDict()
+        self._ereignisse = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=CONFIG.GUI['WORKER'], thread_name_prefix="tab")
         self.create_tabs()
+        self.after(CONFIG.GUI['ABFRAGE_MS'], self._verarbeite_ereignisse)
 
     def on_close(self):
         """
@@ -216,56 +424,128 @@ class MultiTabGUI(tk.Tk):
         """
         import tkinter.messagebox as mbox
         if mbox.askokcancel("Beenden", "Möchten Sie die Anwendung wirklich beenden?"):
-            self.quit()
+            self.beenden()
 
     def beenden(self):
         """
         Beendet die GUI-Anwendung sauber.
         :returns: None
         """
-        # TODO: Hier könnten noch Aufräumarbeiten ergänzt werden
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        VORSCHAU_CACHE.beende()
         self.quit()
 
     def create_tabs(self):
+        """
+        Legt alle Tabs mit Platzhalter an. Inhalte werden erst bei der ersten
+        Auswahl im Hintergrund geladen (siehe :meth:`_tab_gewaehlt`).
+        """
         main_notebook = ttk.Notebook(self)
         main_notebook.pack(fill=tk.BOTH, expand=True)
 
-        # Haupttab 1
-        tab1 = ttk.Notebook(main_notebook)
-        main_notebook.add(tab1, text="Datenanalyse")
-        for i in range(20):
-            frame = ttk.Frame(tab1)
-            tab1.add(frame, text=TAB1_TAB_NAMES[i])
-            label = tk.Label(frame, text=TAB1_LABELS[i], font=("Arial", 12, "bold"))
-            label.pack(pady=5)
-            show_txt_in_tab(frame, TAB1_FILES[i])
-
-        # Haupttab 2
-        tab2 = ttk.Notebook(main_notebook)
-        main_notebook.add(tab2, text="Präsentation")
-        for i in range(20):
-            frame = ttk.Frame(tab2)
-            tab2.add(frame, text=TAB2_TAB_NAMES[i])
-            label = tk.Label(frame, text=TAB2_LABELS[i], font=("Arial", 12, "bold"))
-            label.pack(pady=5)
-            show_txt_in_tab(frame, TAB2_FILES[i])
-
-        # Haupttab 3
-        tab3 = ttk.Notebook(main_notebook)
-        main_notebook.add(tab3, text="Zusammenfassung")
-        for i in range(20):
-            frame = ttk.Frame(tab3)
-            tab3.add(frame, text=TAB3_TAB_NAMES[i])
-            label = tk.Label(frame, text=TAB3_LABELS[i], font=("Arial", 12, "bold"))
-            label.pack(pady=5)
-            show_txt_in_tab(frame, TAB3_FILES[i])
+        haupttabs = [
+            ("Datenanalyse", TAB1_TAB_NAMES, TAB1_LABELS, TAB1_FILES),
+            ("Präsentation", TAB2_TAB_NAMES, TAB2_LABELS, TAB2_FILES),
+            ("Zusammenfassung", TAB3_TAB_NAMES, TAB3_LABELS, TAB3_FILES),
+        ]
+        for titel, namen, labels, dateien in haupttabs:
+            notebook = ttk.Notebook(main_notebook)
+            main_notebook.add(notebook, text=titel)
+            for i in range(20):
+                frame = ttk.Frame(notebook)
+                notebook.add(frame, text=namen[i])
+                label = tk.Label(frame, text=labels[i], font=("Arial", 12, "bold"))
+                label.pack(pady=5)
+                inhalt = tk.Frame(frame)
+                inhalt.pack(expand=True, fill=tk.BOTH)
+                self._tabs[str(frame)] = {'inhalt': inhalt, 'datei': dateien[i], 'zustand': None}
+                self._platzhalter(inhalt)
+            notebook.bind("<<NotebookTabChanged>>", self._tab_gewaehlt)
+        main_notebook.bind("<<NotebookTabChanged>>", self._haupttab_gewaehlt)
+        # Vorschauen aller Bild-/PDF-Tabs vorab erzeugen, damit sie sofort erscheinen
+        basis = os.path.dirname(__file__)
+        VORSCHAU_CACHE.erzeuge_im_hintergrund(
+            os.path.abspath(os.path.join(basis, tab['datei'])) for tab in self._tabs.values())
+        # Der beim Start sichtbare Tab wird sofort geladen
+        erster = self.nametowidget(main_notebook.select())
+        self.after_idle(self._lade_tab, erster.select())
+
+    @staticmethod
+    def _platzhalter(inhalt):
+        for widget in inhalt.winfo_children():
+            widget.destroy()
+        tk.Label(inhalt, text="⏳ Wird beim Öffnen geladen …", fg="#777",
+                 font=("Arial", 11, "italic")).pack(pady=40)
+
+    def _haupttab_gewaehlt(self, event):
+        # Der sichtbare Untertab des neuen Haupttabs soll ebenfalls laden
+        notebook = self.nametowidget(event.widget.select())
+        if notebook.select():
+            self._lade_tab(notebook.select())
+
+    def _tab_gewaehlt(self, event):
+        if event.widget.select():
+            self._lade_tab(event.widget.select())
+
+    def _lade_tab(self, schluessel):
+        """
+        Startet das Laden eines Tabs im Hintergrund bzw. frischt seine
+        Position im LRU-Cache auf.
+        """
+        tab = self._tabs.get(str(schluessel))
+        if tab is None:
+            return
+        if tab['zustand'] == 'fertig':
+            self._gerendert.move_to_end(str(schluessel))
+            return
+        if tab['zustand'] == 'laedt':
+            return
+        tab['zustand'] = 'laedt'
+        for widget in tab['inhalt'].winfo_children():
+            widget.destroy()
+        tk.Label(tab['inhalt'], text="⏳ Wird geladen …", fg="#777",
+                 font=("Arial", 11, "italic")).pack(pady=40)
+        self._pool.submit(self._lade_im_hintergrund, str(schluessel), tab['datei'])
+
+    def _lade_im_hintergrund(self, schluessel, datei):
+        # Kein Tk-Aufruf im Worker: Ergebnis über die Ereignis-Queue übergeben
+        try:
+            inhalt = lade_tab_inhalt(datei)
+        except Exception as e:
+            inhalt = ('fehler', datei, f"Fehler beim Laden: {e}")
+        self._ereignisse.put((schluessel, inhalt))
+
+    def _verarbeite_ereignisse(self):
+        """
+        Übernimmt fertig geladene Inhalte aus der Queue in Tk (Hauptthread).
+        """
+        try:
+            while True:
+                schluessel, inhalt = self._ereignisse.get_nowait()
+                tab = self._tabs[schluessel]
+                for widget in tab['inhalt'].winfo_children():
+                    widget.destroy()
+                try:
+                    zeige_tab_inhalt(tab['inhalt'], inhalt)
+                except Exception as e:
+                    _text_anzeigen(tab['inhalt'], f"Fehler bei der Anzeige: {e}")
+                tab['zustand'] = 'fertig'
+                self._gerendert[schluessel] = True
+                self._gerendert.move_to_end(schluessel)
+                # LRU: älteste gerenderte Tabs wieder freigeben
+                while len(self._gerendert) > CONFIG.GUI['TAB_CACHE']:
+                    alt, _ = self._gerendert.popitem(last=False)
+                    self._tabs[alt]['zustand'] = None
+                    self._platzhalter(self._tabs[alt]['inhalt'])
+        except queue.Empty:
+            pass
+        self.after(CONFIG.GUI['ABFRAGE_MS'], self._verarbeite_ereignisse)
 
 
 def main() -> None:
     """
     Pipeline-kompatibler Einstiegspunkt: Startet die MultiTab-GUI.
     """
-    import threading
     if threading.current_thread() is not threading.main_thread():
         print("[FEHLER] Die GUI muss im Hauptthread gestartet werden! Bitte als eigenen Prozess ausführen.")
         return
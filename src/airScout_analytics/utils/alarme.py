@@ -0,0 +1,612 @@
+"""
+alarme.py
+=========
+
+Echtzeit-Alarme für Gasereignisse und Strahlungsspitzen auf dem Live-Strom.
+
+``detect_gas_events`` (mod_042) und die CO-Warnung in ``generiere_text``
+(mod_080) werten erst die fertige Fahrt aus und schreiben nur auf stdout.
+Die AlarmMaschine meldet sich dagegen als Verbraucher bei der
+Live-Erfassung an (utils/live_ingest.py) und prüft jeden neuen Block gegen
+konfigurierbare Regeln. Jede Regel arbeitet vektorisiert auf dem ganzen
+Block und trägt nur wenige Zahlen von Block zu Block weiter (Zustand O(1)),
+daher hält die Auswertung auch bei 200 Hz Schritt. Alarme werden entprellt
+(Auslösung nur an der steigenden Flanke, Sperrzeit je Regel) und von einem
+eigenen Thread an die Senken verteilt, damit eine langsame Senke die
+Erfassung nicht aufhält.
+
+Regeltypen:
+- ``schwelle``: Wert über (bzw. unter) einer Grenze, optional mit Rückstellwert (Hysterese)
+- ``anstieg``: Änderungsrate je Sekunde über ein Zeitfenster
+- ``relativ``: Wert über Faktor x Grundlinie (EMA), wie ``detect_gas_events``
+- ``koinzidenz``: mindestens k Bedingungen innerhalb eines Zeitfensters erfüllt
+- ``dauer_s`` (alle Typen): Bedingung muss so lange ununterbrochen erfüllt sein
+
+Features:
+- Regel und Unterklassen, regeln_aus_config (CONFIG.ALARME['REGELN'])
+- AlarmMaschine: verarbeite(block) für LiveErfassung.abonnenten oder fertige DataFrames
+- Senken: KonsolenSenke, DateiSenke (JSON-Zeilen), WebhookSenke, DesktopSenke
+- starte_webhook_dienst: lokaler Stand-in-Empfänger für die WebhookSenke
+- CLI: ``python utils/alarme.py <datei|tcp://host:port>``
+       ``python utils/alarme.py webhook [port]``
+
+Abhängigkeiten:
+---------------
+- numpy, pandas
+- Standardbibliothek: threading, queue, urllib, http.server
+- Optional: plyer (Desktop-Benachrichtigung, sonst notify-send)
+- config.CONFIG (ALARME, EMA_ANALYSE)
+
+Autor: Frank Albrecht
+"""
+import os
+import sys
+import json
+import time
+import queue
+import shutil
+import threading
+import subprocess
+import urllib.request
+from abc import ABC, abstractmethod
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import CONFIG
+from utils.live_ingest import EmaZDetektor
+
+try:
+    from plyer import notification
+    PLYER_SUPPORT = True
+except ImportError:
+    PLYER_SUPPORT = False
+
+# Startwert für "noch nie erfüllt" (weit genug von int64-Grenzen entfernt)
+_NIE = np.int64(-(2 ** 62))
+
+
+def _fortschreiben(gesetzt: np.ndarray, werte: np.ndarray, vorher):
+    """
+    Trägt an jeder Position den zuletzt gesetzten Wert weiter.
+
+    Arbeitet über Indizes statt Zeitstempel, damit Zeitsprünge des Loggers
+    (DateTime springt zurück) das Ergebnis nicht verfälschen.
+
+    :param gesetzt: Positionen mit neuem Wert
+    :param werte: Werte an diesen Positionen
+    :param vorher: Wert vor dem ersten gesetzten Eintrag (Zustand des letzten Blocks)
+    """
+    index = np.maximum.accumulate(np.where(gesetzt, np.arange(len(gesetzt)), -1))
+    return np.where(index >= 0, werte[np.maximum(index, 0)], vorher)
+
+
+class Alarm:
+    """
+    Ein ausgelöster Alarm.
+
+    :param regel: Name der Regel
+    :param zeit: Messzeitpunkt der Auslösung
+    :param wert: Auslösender Wert (Messwert, Rate, Faktor oder Anzahl)
+    :param text: Meldungstext
+    :param stufe: ``warnung`` oder ``kritisch``
+    :param sensoren: Beteiligte Spalten
+    """
+
+    def __init__(self, regel: str, zeit: pd.Timestamp, wert: float, text: str,
+                 stufe: str, sensoren: Sequence[str]) -> None:
+        self.regel = regel
+        self.zeit = zeit
+        self.wert = wert
+        self.text = text
+        self.stufe = stufe
+        self.sensoren = list(sensoren)
+        self.erkannt = time.time()
+
+    def __str__(self) -> str:
+        symbol = '🔴' if self.stufe == 'kritisch' else '⚠️'
+        return f"{symbol} {self.zeit:%H:%M:%S} {self.regel}: {self.text} ({self.wert:.4g})"
+
+    def als_dict(self) -> Dict:
+        return {'regel': self.regel, 'zeit': self.zeit.isoformat(sep=' '), 'wert': self.wert,
+                'text': self.text, 'stufe': self.stufe, 'sensoren': self.sensoren,
+                'erkannt': self.erkannt}
+
+
+class Regel(ABC):
+    """
+    Basisklasse: Entprellung und Mindestdauer für eine vektorisierte Bedingung.
+
+    Unterklassen liefern in ``_bedingung`` je Zeile, ob die Bedingung erfüllt
+    ist, und den zugehörigen Wert. Ein Alarm entsteht nur, wenn die
+    Bedingung ``dauer_s`` lang ununterbrochen erfüllt ist, beim Übergang von
+    nicht erfüllt zu erfüllt und frühestens ``sperrzeit_s`` nach dem letzten
+    Alarm dieser Regel.
+
+    :param name: Regelname (erscheint im Alarm)
+    :param text: Meldungstext
+    :param stufe: ``warnung`` oder ``kritisch``
+    :param dauer_s: Mindestdauer der Bedingung in Sekunden
+    :param sperrzeit_s: Mindestabstand zweier Alarme (Standard aus CONFIG.ALARME)
+    """
+
+    typ = ''
+
+    def __init__(self, name: str, text: Optional[str] = None, stufe: str = 'warnung',
+                 dauer_s: float = 0.0, sperrzeit_s: Optional[float] = None) -> None:
+        self.name = name
+        self.text = text or name
+        self.stufe = stufe
+        self._dauer_ns = int(dauer_s * 1e9)
+        sperrzeit_s = CONFIG.ALARME['SPERRZEIT_S'] if sperrzeit_s is None else sperrzeit_s
+        self._sperre_ns = int(sperrzeit_s * 1e9)
+        self._seit: Optional[int] = None     # Beginn der laufenden Erfüllung (ns)
+        self._erfuellt = False               # Zustand nach Mindestdauer (außerhalb der Anlaufphase)
+        self._letzter_alarm: Optional[int] = None
+
+    @property
+    @abstractmethod
+    def spalten(self) -> List[str]:
+        """Benötigte Spalten des Blocks."""
+
+    @abstractmethod
+    def _bedingung(self, zeit: np.ndarray, spalten: Mapping[str, np.ndarray]
+                   ) -> Tuple[np.ndarray, np.ndarray]:
+        """Je Zeile: Bedingung erfüllt (bool-Array) und zugehöriger Wert."""
+
+    def pruefe(self, zeit: np.ndarray, spalten: Mapping[str, np.ndarray],
+               ab: Optional[int] = None) -> List[Alarm]:
+        """
+        Prüft einen Block und aktualisiert den Zustand.
+
+        Vor ``ab`` (Anlaufphase) wird der Zustand nur mitgeführt: es gibt
+        keine Flanke und keine Sperrzeit. Ist die Bedingung beim Ende der
+        Anlaufphase noch erfüllt, zählt die erste Zeile danach als Flanke.
+
+        :param zeit: Zeitstempel in ns (int64, Eingangsreihenfolge)
+        :param spalten: Spaltenname -> float-Array
+        :param ab: Alarme erst ab diesem Zeitpunkt (ns)
+        :returns: Neue Alarme
+        """
+        if not len(zeit):
+            return []
+        bedingung, wert = self._bedingung(zeit, spalten)
+        anfang = bedingung & ~np.r_[self._seit is not None, bedingung[:-1]]
+        seit = _fortschreiben(anfang, zeit, self._seit if self._seit is not None else 0)
+        erfuellt = bedingung & (zeit - seit >= self._dauer_ns)
+        if ab is not None:
+            erfuellt &= zeit >= ab
+        flanke = erfuellt & ~np.r_[self._erfuellt, erfuellt[:-1]]
+
+        alarme = []
+        for i in np.flatnonzero(flanke):
+            t = int(zeit[i])
+            if self._letzter_alarm is not None and abs(t - self._letzter_alarm) < self._sperre_ns:
+                continue
+            self._letzter_alarm = t
+            alarme.append(Alarm(self.name, pd.Timestamp(t), float(wert[i]), self.text,
+                                self.stufe, self.spalten))
+        self._seit = int(seit[-1]) if bedingung[-1] else None
+        self._erfuellt = bool(erfuellt[-1])
+        return alarme
+
+
+class SchwellenRegel(Regel):
+    """
+    Wert über (``ueber=True``) bzw. unter einer Grenze.
+
+    Mit ``rueckstellung`` gilt die Bedingung als erfüllt, bis der Wert den
+    Rückstellwert wieder unterschreitet (bzw. überschreitet) – Hysterese
+    gegen Flattern um die Grenze. Fehlende Werte ändern den Zustand nicht.
+
+    :param sensor: Spalte (auch abgeleitete wie ``MQ2_z`` oder ``MQ7_ema``)
+    :param grenze: Auslösewert
+    :param rueckstellung: Optionaler Rückstellwert
+    :param ueber: True = Alarm über der Grenze, False = unter der Grenze
+    """
+
+    typ = 'schwelle'
+
+    def __init__(self, name: str, sensor: str, grenze: float, rueckstellung: Optional[float] = None,
+                 ueber: bool = True, **kwargs) -> None:
+        super().__init__(name, **kwargs)
+        self.sensor = sensor
+        self.grenze = grenze
+        self.rueckstellung = grenze if rueckstellung is None else rueckstellung
+        self.ueber = ueber
+        self._zustand = False
+
+    @property
+    def spalten(self) -> List[str]:
+        return [self.sensor]
+
+    def _bedingung(self, zeit, spalten):
+        x = spalten[self.sensor]
+        if self.ueber:
+            ein, aus = x > self.grenze, x <= self.rueckstellung
+        else:
+            ein, aus = x < self.grenze, x >= self.rueckstellung
+        bedingung = _fortschreiben(ein | aus, ein, self._zustand).astype(bool)
+        self._zustand = bool(bedingung[-1])
+        return bedingung, x
+
+
+class AnstiegsRegel(Regel):
+    """
+    Änderungsrate über ein Zeitfenster.
+
+    Verglichen wird mit einem Bezugspunkt, der höchstens alle ``fenster_s``
+    Sekunden weiterrückt – so bleibt die Rate auch bei 200 Hz aussagekräftig
+    (zwischen zwei Zeilen im Abstand von 5 ms ist jede Rate Rauschen). Die
+    zuletzt berechnete Rate gilt bis zur nächsten Auswertung.
+
+    :param sensor: Spalte
+    :param grenze_pro_s: Auslösende Rate in Einheiten je Sekunde (Betrag)
+    :param fenster_s: Mindestabstand zum Bezugspunkt in Sekunden
+    :param richtung: ``steigend``, ``fallend`` oder ``beide``
+    """
+
+    typ = 'anstieg'
+
+    def __init__(self, name: str, sensor: str, grenze_pro_s: float, fenster_s: float = 5.0,
+                 richtung: str = 'steigend', **kwargs) -> None:
+        super().__init__(name, **kwargs)
+        self.sensor = sensor
+        self.grenze_pro_s = abs(grenze_pro_s)
+        self.richtung = richtung
+        self._fenster_ns = int(fenster_s * 1e9)
+        self._bezug: Optional[Tuple[float, int]] = None
+        self._zustand = False
+        self._rate = np.nan
+
+    @property
+    def spalten(self) -> List[str]:
+        return [self.sensor]
+
+    def _bedingung(self, zeit, spalten):
+        x = spalten[self.sensor]
+        gueltig = np.flatnonzero(~np.isnan(x))
+        # Laufendes Maximum: nach einem Zeitsprung rückwärts wird gewartet
+        hoechste = np.maximum.accumulate(zeit[gueltig]) if len(gueltig) else zeit[:0]
+        ausgewertet = np.zeros(len(x), dtype=bool)
+        rate = np.full(len(x), np.nan)
+        pos = 0
+        # Je Block nur wenige Durchläufe: einer je Fenster
+        while pos < len(gueltig):
+            if self._bezug is None:
+                i = gueltig[pos]
+                self._bezug = (x[i], int(zeit[i]))
+                pos += 1
+                continue
+            k = pos + int(np.searchsorted(hoechste[pos:], self._bezug[1] + self._fenster_ns))
+            if k >= len(gueltig):
+                break
+            i = gueltig[k]
+            rate[i] = (x[i] - self._bezug[0]) / ((zeit[i] - self._bezug[1]) / 1e9)
+            ausgewertet[i] = True
+            self._bezug = (x[i], int(zeit[i]))
+            pos = k + 1
+
+        if self.richtung == 'fallend':
+            ueber = rate <= -self.grenze_pro_s
+        elif self.richtung == 'beide':
+            ueber = np.abs(rate) >= self.grenze_pro_s
+        else:
+            ueber = rate >= self.grenze_pro_s
+        bedingung = _fortschreiben(ausgewertet, ueber, self._zustand).astype(bool)
+        rate = _fortschreiben(ausgewertet, rate, self._rate)
+        self._zustand, self._rate = bool(bedingung[-1]), rate[-1]
+        return bedingung, rate
+
+
+class RelativRegel(Regel):
+    """
+    Wert über ``faktor`` x Grundlinie – die Streaming-Variante von ``detect_gas_events``.
+
+    Als Grundlinie dient die EMA der vorherigen Zeile (Spalte ``<sensor>_ema``
+    des EmaZDetektors), so dass der aktuelle Ausschlag sie nicht mit anhebt.
+
+    :param sensor: Sensorspalte
+    :param faktor: Schwellenfaktor (Standard: CONFIG.EMA_ANALYSE['GAS_THRESHOLD_MULTIPLIER'])
+    """
+
+    typ = 'relativ'
+
+    def __init__(self, name: str, sensor: str, faktor: Optional[float] = None, **kwargs) -> None:
+        super().__init__(name, **kwargs)
+        self.sensor = sensor
+        self.faktor = faktor or CONFIG.EMA_ANALYSE['GAS_THRESHOLD_MULTIPLIER']
+        self._basis = np.nan
+
+    @property
+    def spalten(self) -> List[str]:
+        return [self.sensor, f"{self.sensor}_ema"]
+
+    def _bedingung(self, zeit, spalten):
+        x, ema = spalten[self.sensor], spalten[f"{self.sensor}_ema"]
+        basis = np.r_[self._basis, ema[:-1]]
+        self._basis = ema[-1]
+        verhaeltnis = np.full(len(x), np.nan)
+        np.divide(x, basis, out=verhaeltnis, where=basis > 0)
+        return verhaeltnis > self.faktor, verhaeltnis
+
+
+class KoinzidenzRegel(Regel):
+    """
+    Mindestens ``min_anzahl`` Bedingungen innerhalb von ``fenster_s`` erfüllt.
+
+    Je Bedingung wird nur der letzte Zeitpunkt der Überschreitung gemerkt.
+
+    :param bedingungen: Spalte -> Grenze (Überschreitung)
+    :param min_anzahl: Benötigte gleichzeitig auffällige Spalten
+    :param fenster_s: Zeitfenster in Sekunden
+    """
+
+    typ = 'koinzidenz'
+
+    def __init__(self, name: str, bedingungen: Mapping[str, float], min_anzahl: int = 2,
+                 fenster_s: float = 10.0, **kwargs) -> None:
+        super().__init__(name, **kwargs)
+        self.bedingungen = dict(bedingungen)
+        self.min_anzahl = min_anzahl
+        self._fenster_ns = int(fenster_s * 1e9)
+        self._zuletzt = np.full(len(self.bedingungen), _NIE, dtype=np.int64)
+
+    @property
+    def spalten(self) -> List[str]:
+        return list(self.bedingungen)
+
+    def _bedingung(self, zeit, spalten):
+        anzahl = np.zeros(len(zeit), dtype=np.int64)
+        for j, (spalte, grenze) in enumerate(self.bedingungen.items()):
+            zuletzt = _fortschreiben(spalten[spalte] > grenze, zeit, self._zuletzt[j])
+            self._zuletzt[j] = zuletzt[-1]
+            anzahl += (zuletzt != _NIE) & (np.abs(zeit - zuletzt) <= self._fenster_ns)
+        return anzahl >= self.min_anzahl, anzahl
+
+
+REGELTYPEN = {k.typ: k for k in (SchwellenRegel, AnstiegsRegel, RelativRegel, KoinzidenzRegel)}
+
+
+def regeln_aus_config(definitionen: Optional[Sequence[Dict]] = None) -> List[Regel]:
+    """
+    Erzeugt Regeln aus Definitionen wie in CONFIG.ALARME['REGELN'].
+
+    Mit ``sensoren`` statt ``sensor`` entsteht je Sensor eine Regel
+    ``<name>_<sensor>``.
+    """
+    regeln = []
+    for definition in (CONFIG.ALARME['REGELN'] if definitionen is None else definitionen):
+        parameter = dict(definition)
+        klasse = REGELTYPEN[parameter.pop('typ')]
+        sensoren = parameter.pop('sensoren', None)
+        if sensoren is None:
+            regeln.append(klasse(**parameter))
+            continue
+        name = parameter.pop('name')
+        for sensor in sensoren:
+            regeln.append(klasse(name=f"{name}_{sensor}", sensor=sensor, **parameter))
+    return regeln
+
+
+class KonsolenSenke:
+    """Gibt Alarme auf stdout aus."""
+
+    def sende(self, alarm: Alarm) -> None:
+        print(alarm)
+
+
+class DateiSenke:
+    """
+    Hängt Alarme als JSON-Zeilen an eine Datei an.
+
+    :param pfad: Zieldatei (Standard aus CONFIG.ALARME)
+    """
+
+    def __init__(self, pfad: Optional[str] = None) -> None:
+        self.pfad = pfad or CONFIG.ALARME['DATEI']
+        os.makedirs(os.path.dirname(os.path.abspath(self.pfad)), exist_ok=True)
+
+    def sende(self, alarm: Alarm) -> None:
+        with open(self.pfad, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(alarm.als_dict(), ensure_ascii=False) + '\n')
+
+
+class WebhookSenke:
+    """
+    Sendet Alarme als JSON per HTTP-POST.
+
+    :param url: Ziel (Standard: lokaler Stand-in aus CONFIG.ALARME)
+    """
+
+    def __init__(self, url: Optional[str] = None) -> None:
+        self.url = url or CONFIG.ALARME['WEBHOOK_URL']
+
+    def sende(self, alarm: Alarm) -> None:
+        anfrage = urllib.request.Request(
+            self.url, data=json.dumps(alarm.als_dict(), ensure_ascii=False).encode('utf-8'),
+            headers={'Content-Type': 'application/json; charset=utf-8'}, method='POST')
+        with urllib.request.urlopen(anfrage, timeout=CONFIG.ALARME['TIMEOUT_S']) as antwort:
+            antwort.read()
+
+
+class DesktopSenke:
+    """
+    Desktop-Benachrichtigung über plyer oder ``notify-send``; ohne beides auf stdout.
+    """
+
+    def __init__(self) -> None:
+        self._notify_send = shutil.which('notify-send')
+        if not PLYER_SUPPORT and not self._notify_send:
+            print("⚠️ Desktop-Benachrichtigung nicht verfügbar (plyer/notify-send) – Ausgabe auf stdout.")
+
+    def sende(self, alarm: Alarm) -> None:
+        titel = f"AirScout: {alarm.regel}"
+        if PLYER_SUPPORT:
+            notification.notify(title=titel, message=str(alarm), timeout=10)
+        elif self._notify_send:
+            dringlichkeit = 'critical' if alarm.stufe == 'kritisch' else 'normal'
+            subprocess.run([self._notify_send, '-u', dringlichkeit, titel, str(alarm)],
+                           check=False, timeout=CONFIG.ALARME['TIMEOUT_S'])
+        else:
+            print(alarm)
+
+
+SENKEN = {'konsole': KonsolenSenke, 'datei': DateiSenke, 'webhook': WebhookSenke,
+          'desktop': DesktopSenke}
+
+
+class AlarmMaschine:
+    """
+    Prüft Blöcke gegen alle Regeln und verteilt Alarme an die Senken.
+
+    Anmeldung an der Live-Erfassung: ``erfassung.abonnenten.append(maschine.verarbeite)``.
+    Fehlen dem Block benötigte ``_ema``/``_z``-Spalten (z.B. bei einem fertigen
+    DataFrame), berechnet ein eigener EmaZDetektor sie fortlaufend. In den
+    ersten ANLAUF_S Sekunden werden die Regeln nur mitgeführt (EMA und z-Score
+    schwingen noch ein): es entstehen keine Alarme und keine Sperrzeiten; eine
+    Überschreitung, die über das Ende der Anlaufphase anhält, meldet sich dann.
+
+    :param regeln: Regeln (Standard: CONFIG.ALARME['REGELN'])
+    :param senken: Objekte mit ``sende(alarm)`` (Standard: CONFIG.ALARME['SENKEN'])
+    """
+
+    def __init__(self, regeln: Optional[List[Regel]] = None, senken: Optional[list] = None) -> None:
+        self.regeln = regeln_aus_config() if regeln is None else list(regeln)
+        if senken is None:
+            senken = [SENKEN[name]() for name in CONFIG.ALARME['SENKEN']]
+        self.senken = list(senken)
+        self.spalten = list(dict.fromkeys(s for r in self.regeln for s in r.spalten))
+        # Nur die jüngsten Alarme im Speicher (Dashboard); vollständig in der DateiSenke
+        self.alarme: Deque[Alarm] = deque(maxlen=CONFIG.ALARME['VERLAUF'])
+        self.zeilen = 0
+        self.rechenzeit = 0.0
+        self._anlauf_bis: Optional[int] = None
+        self._detektor: Optional[EmaZDetektor] = None
+        self._warteschlange: 'queue.Queue[Optional[Alarm]]' = queue.Queue()
+        self._verteiler = threading.Thread(target=self._verteile, name="alarm-senken", daemon=True)
+        self._verteiler.start()
+
+    def _verteile(self) -> None:
+        while True:
+            alarm = self._warteschlange.get()
+            if alarm is None:
+                return
+            for senke in self.senken:
+                try:
+                    senke.sende(alarm)
+                except Exception as e:
+                    print(f"❌ Alarm-Senke {type(senke).__name__} fehlgeschlagen: {e}")
+
+    def _abgeleitete(self, block: pd.DataFrame) -> pd.DataFrame:
+        fehlend = [s for s in self.spalten if s not in block.columns]
+        basis = [s.rsplit('_', 1)[0] for s in fehlend if s.endswith(('_ema', '_z'))]
+        if not basis:
+            return block
+        if self._detektor is None:
+            self._detektor = EmaZDetektor(list(dict.fromkeys(basis)))
+        return self._detektor.verarbeite(block)
+
+    def verarbeite(self, block: pd.DataFrame) -> List[Alarm]:
+        """
+        Prüft einen Block (Zeilen in Eingangsreihenfolge) und gibt neue Alarme weiter.
+
+        :param block: DataFrame mit ``DateTime`` und den Regelspalten
+        :returns: Neue Alarme, zeitlich sortiert
+        """
+        start = time.perf_counter()
+        block = self._abgeleitete(block)
+        zeit = pd.to_datetime(block['DateTime'], errors='coerce').to_numpy('datetime64[ns]')
+        gueltig = ~np.isnat(zeit)
+        zeit = zeit[gueltig].view(np.int64)
+        spalten = {s: (pd.to_numeric(block[s], errors='coerce').to_numpy(float)[gueltig]
+                       if s in block.columns else np.full(len(zeit), np.nan))
+                   for s in self.spalten}
+        if self._anlauf_bis is None and len(zeit):
+            self._anlauf_bis = int(zeit.min()) + int(CONFIG.ALARME['ANLAUF_S'] * 1e9)
+        neu = []
+        for regel in self.regeln:
+            neu.extend(regel.pruefe(zeit, spalten, ab=self._anlauf_bis))
+        neu.sort(key=lambda a: a.zeit)
+        for alarm in neu:
+            self._warteschlange.put(alarm)
+        self.alarme.extend(neu)
+        self.zeilen += len(zeit)
+        self.rechenzeit += time.perf_counter() - start
+        return neu
+
+    def beende(self) -> None:
+        """Stellt ausstehende Alarme noch zu und beendet den Verteiler."""
+        self._warteschlange.put(None)
+        self._verteiler.join(timeout=CONFIG.ALARME['TIMEOUT_S'] * 5)
+
+
+def starte_webhook_dienst(port: Optional[int] = None, im_hintergrund: bool = False) -> ThreadingHTTPServer:
+    """
+    Lokaler Stand-in-Empfänger für die WebhookSenke.
+
+    ``POST /alarm`` mit einem Alarm als JSON; eingehende Alarme werden
+    ausgegeben und in ``server.empfangen`` gesammelt.
+
+    :param port: TCP-Port (Standard aus CONFIG.ALARME)
+    :param im_hintergrund: True = in einem Daemon-Thread starten und zurückkehren
+    :returns: Laufender Server (``shutdown()`` zum Beenden)
+    """
+    empfangen: List[Dict] = []
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != '/alarm':
+                self.send_error(404)
+                return
+            laenge = int(self.headers.get('Content-Length', 0))
+            try:
+                alarm = json.loads(self.rfile.read(laenge) or b'{}')
+            except ValueError:
+                self.send_error(400, 'kein JSON')
+                return
+            empfangen.append(alarm)
+            print(f"📨 Webhook: {alarm.get('zeit')} {alarm.get('regel')}: {alarm.get('text')}")
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    port = port or CONFIG.ALARME['WEBHOOK_PORT']
+    server = ThreadingHTTPServer(('127.0.0.1', port), _Handler)
+    server.empfangen = empfangen
+    print(f"✅ Alarm-Webhook (Stand-in) läuft auf http://127.0.0.1:{port}/alarm")
+    if im_hintergrund:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    else:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.shutdown()
+    return server
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == 'webhook':
+        starte_webhook_dienst(int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    elif len(sys.argv) >= 2:
+        from utils.live_ingest import LiveErfassung, oeffne_quelle
+        maschine = AlarmMaschine()
+        erfassung = LiveErfassung(oeffne_quelle(sys.argv[1]))
+        erfassung.abonnenten.append(maschine.verarbeite)
+        erfassung.starte()
+        print(f"✅ {len(maschine.regeln)} Alarmregeln aktiv")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            erfassung.stoppe()
+            maschine.beende()
+    else:
+        print("Aufruf: python utils/alarme.py <datei|tcp://host:port>\n"
+              "       python utils/alarme.py webhook [port]")
@@ -0,0 +1,222 @@
+"""
+anhangmodus.py
+==============
+
+Anhängemodus der Pipeline (mod_010 bis mod_042) für wachsende Logdateien.
+
+Wird eine Fahrt fortgesetzt (z.B. nach einer Regenpause), verarbeitete die
+Pipeline bisher die ganze Datei neu. Im Anhängemodus wird nur der seit dem
+letzten Lauf angehängte Teil der Rohdatei gelesen (Byte-Versatz) und durch
+die Anhängefunktionen der Module geschickt; deren Zustand wird zwischen den
+Läufen gespeichert und die Ergebnisse an die gewohnten Dateien in
+``data/bearbeitet0..3`` sowie die Segmentübersicht in ``data/ergebnisse/{fahrt}``
+angehängt. Der Aufwand je Lauf hängt damit nur von den neuen Zeilen ab.
+Aufruf über die Pipeline: ``python mod_000_pipeline.py --anhang <rohdatei> [--abschluss]``.
+
+Stufen und weitergetragener Zustand:
+- mod_010 lies_anhang/reinige_anhang: Byte-Versatz, ZeilenParser, zurückgehaltene letzte Zeile
+- mod_011 segmentiere_anhang: Rückblick, offene Zeilen, Abschnittsbeginne, laufende Segmentübersicht
+- mod_040 features_anhang: letzte GPS-Punkte fürs Map-Matching
+- mod_041 add_conversion_columns: zustandslos
+- mod_042 analysiere_anhang: EMA-Endwerte, laufende Statistik, Fenster der Gas-Ereignisse,
+  angelernter Isolation Forest
+
+Straßenstatistik und Fahrtenkatalog speichern ganze Fahrten und werden daher
+erst mit ``abschluss`` aktualisiert, die Rasterkarte bei jedem Lauf.
+
+Features:
+- AnhangVerarbeitung: Zustand einer Fahrt, Ausgabedateien, ein Lauf über alle Stufen
+- anhaengen: neue Zeilen einer Rohdatei verarbeiten (Zustand laden/speichern)
+- CLI: ``python utils/anhangmodus.py <rohdatei> [--abschluss] [--neu]``
+
+Abhängigkeiten:
+---------------
+- pandas
+- mod_010, mod_011, mod_040, mod_041, mod_042 (Anhängefunktionen)
+- utils.rohformat, utils.rasterkarte, utils.strassenstatistik, utils.fahrtenkatalog
+- config.CONFIG (ANHANGMODUS, RASTERKARTE)
+
+Autor: Frank Albrecht
+"""
+import io
+import os
+import sys
+import time
+import pickle
+import importlib
+import contextlib
+from typing import Dict
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import CONFIG
+import context
+from utils.rohformat import fahrtname
+from utils.rasterkarte import RasterArchiv
+from utils.strassenstatistik import aktualisiere_strassenstatistik
+from utils.fahrtenkatalog import aktualisiere_fahrtenkatalog
+import mod_010_laden_reinigen as mod_010
+import mod_011_segmentierung as mod_011
+import mod_040_feature_engeneering as mod_040
+import mod_042_glaetten_der_sensorwerte as mod_042
+
+# Dateiname enthält 'µ' – nur über importlib importierbar
+mod_041 = importlib.import_module('mod_041_f_e_wert_ppm_µgm3')
+
+
+def _anhaengen_csv(pfad: str, df: pd.DataFrame, neu: bool) -> None:
+    """
+    Schreibt ``df`` neu (mit Kopfzeile) oder hängt es in der Spaltenfolge der
+    vorhandenen Datei an.
+    """
+    os.makedirs(os.path.dirname(pfad), exist_ok=True)
+    if neu or not os.path.exists(pfad):
+        df.to_csv(pfad, index=False, encoding='utf-8', lineterminator='\n')
+        return
+    spalten = pd.read_csv(pfad, nrows=0).columns
+    df.reindex(columns=spalten).to_csv(pfad, mode='a', header=False, index=False,
+                                       encoding='utf-8', lineterminator='\n')
+
+
+class AnhangVerarbeitung:
+    """
+    Zustand einer Fahrt im Anhängemodus; wird nach jedem Lauf gepickelt.
+
+    :param rohdatei: Wachsende Logdatei des Loggers
+    """
+
+    def __init__(self, rohdatei: str) -> None:
+        self.rohdatei = os.path.abspath(rohdatei)
+        self.fahrt = fahrtname(rohdatei)
+        daten = str(CONFIG.DATA_ROOT)
+        self.zustand_pfad = os.path.join(CONFIG.ANHANGMODUS['ZUSTAND_ORDNER'], f"{self.fahrt}.pkl")
+        # Dieselben Dateien wie im Gesamtlauf von mod_010 bis mod_042
+        self.ausgaben = {
+            'bearbeitet0': os.path.join(daten, "bearbeitet0", f"{self.fahrt}.csv"),
+            'bearbeitet1': os.path.join(daten, "bearbeitet1", f"feature_{self.fahrt}.csv"),
+            'bearbeitet2': os.path.join(daten, "bearbeitet2", f"feature_{self.fahrt}_umgerechnet.csv"),
+            'bearbeitet3': os.path.join(daten, "bearbeitet3", f"feature_{self.fahrt}_umgerechnet_ema.csv"),
+            'segmente': os.path.join(daten, "ergebnisse", self.fahrt, f"segmente_{self.fahrt}.csv"),
+        }
+        self.zustand = {'010': {}, '011': {}, '040': {}, '042': {}}
+        self.geschrieben = set()
+        self.laeufe = 0
+
+    @classmethod
+    def laden(cls, rohdatei: str, neu: bool = False) -> 'AnhangVerarbeitung':
+        """
+        Lädt den gespeicherten Zustand der Fahrt oder beginnt neu (``neu``, kein
+        Zustand vorhanden oder Rohdatei kürzer als beim letzten Lauf).
+        """
+        verarbeitung = cls(rohdatei)
+        if neu or not os.path.exists(verarbeitung.zustand_pfad):
+            return verarbeitung
+        with open(verarbeitung.zustand_pfad, 'rb') as f:
+            gespeichert = pickle.load(f)
+        if os.path.getsize(rohdatei) < gespeichert.zustand['010'].get('versatz', 0):
+            print(f"⚠️ {rohdatei} ist kürzer als beim letzten Lauf – beginne neu.")
+            return verarbeitung
+        return gespeichert
+
+    def speichern(self) -> None:
+        """Schreibt den Zustand atomar (temporäre Datei + Umbenennen)."""
+        os.makedirs(os.path.dirname(self.zustand_pfad), exist_ok=True)
+        tmp = self.zustand_pfad + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.zustand_pfad)
+
+    def _schreibe(self, stufe: str, df: pd.DataFrame) -> None:
+        # Erster Schreibvorgang einer Fahrt ersetzt eine vorhandene Datei (z.B. aus dem Gesamtlauf)
+        if len(df):
+            _anhaengen_csv(self.ausgaben[stufe], df, neu=stufe not in self.geschrieben)
+            self.geschrieben.add(stufe)
+
+    def verarbeite(self, abschluss: bool = False) -> Dict[str, int]:
+        """
+        Verarbeitet die seit dem letzten Lauf angehängten Zeilen und hängt die
+        Ergebnisse an.
+
+        :param abschluss: Fahrt ist beendet – zurückgehaltene Zeilen ausgeben,
+            Straßenstatistik und Fahrtenkatalog aktualisieren
+        :returns: Anzahl neuer Zeilen je Stufe
+        """
+        # Folgende Module (mod_020, mod_050 …) finden die Fahrt über context
+        with contextlib.redirect_stdout(io.StringIO()):
+            mod_010.setze_dateinamen(self.fahrt)
+        context.filename_ohne_ext = self.fahrt
+
+        text = mod_010.lies_anhang(self.rohdatei, self.zustand['010'])
+        zaehlung = {'roh': text.count('\n')}
+        df = mod_010.reinige_anhang(text, self.zustand['010'], abschluss)
+        df, uebersicht = mod_011.segmentiere_anhang(df, self.zustand['011'], abschluss)
+        self._schreibe('bearbeitet0', df)
+        zaehlung['bearbeitet0'] = len(df)
+        if uebersicht is not None:
+            os.makedirs(os.path.dirname(self.ausgaben['segmente']), exist_ok=True)
+            uebersicht.to_csv(self.ausgaben['segmente'], index=False, encoding='utf-8')
+
+        if len(df):
+            df = mod_040.features_anhang(df, self.zustand['040'])
+            self._schreibe('bearbeitet1', df)
+            with contextlib.redirect_stdout(io.StringIO()):
+                mod_041.add_conversion_columns(df, verbose=False)
+            self._schreibe('bearbeitet2', df)
+        zaehlung['bearbeitet1'] = zaehlung['bearbeitet2'] = len(df)
+
+        df = mod_042.analysiere_anhang(df, self.zustand['042'], abschluss)
+        self._schreibe('bearbeitet3', mod_042.round_results(df))
+        zaehlung['bearbeitet3'] = len(df)
+
+        # Rasterkarte: Beitrag der neuen Zeilen einrechnen (erster Lauf ersetzt die Fahrt)
+        if len(df) and CONFIG.RASTERKARTE['AKTIV']:
+            archiv = RasterArchiv()
+            if 'raster' in self.geschrieben:
+                archiv.ergaenze_fahrt(self.fahrt, df)
+            else:
+                archiv.fuege_fahrt_hinzu(self.fahrt, df)
+                self.geschrieben.add('raster')
+        if abschluss and os.path.exists(self.ausgaben['bearbeitet3']):
+            fertig = pd.read_csv(self.ausgaben['bearbeitet3'])
+            if 'street' in fertig.columns:
+                aktualisiere_strassenstatistik(self.fahrt, fertig)
+            aktualisiere_fahrtenkatalog(self.fahrt, fertig, quelle=self.ausgaben['bearbeitet3'])
+        self.laeufe += 1
+        return zaehlung
+
+
+def anhaengen(rohdatei: str, abschluss: bool = False, neu: bool = False) -> Dict[str, int]:
+    """
+    Verarbeitet die neuen Zeilen einer wachsenden Rohdatei im Anhängemodus.
+
+    :param rohdatei: Logdatei des Loggers
+    :param abschluss: Fahrt beenden (Zustand wird danach gelöscht)
+    :param neu: Gespeicherten Zustand ignorieren und von vorn beginnen
+    :returns: Anzahl neuer Zeilen je Stufe
+    :example:
+
+        >>> anhaengen('data/roh/airscout_..._2025_07211358.CSV')
+        {'roh': 412, 'bearbeitet0': 350, 'bearbeitet1': 350, 'bearbeitet2': 350, 'bearbeitet3': 345}
+
+    """
+    beginn = time.perf_counter()
+    verarbeitung = AnhangVerarbeitung.laden(rohdatei, neu=neu)
+    zaehlung = verarbeitung.verarbeite(abschluss)
+    if abschluss:
+        if os.path.exists(verarbeitung.zustand_pfad):
+            os.remove(verarbeitung.zustand_pfad)
+    else:
+        verarbeitung.speichern()
+    print(f"✅ Anhängemodus {verarbeitung.fahrt} (Lauf {verarbeitung.laeufe}): "
+          + ", ".join(f"{stufe} +{anzahl}" for stufe, anzahl in zaehlung.items())
+          + f" in {time.perf_counter() - beginn:.2f} s")
+    return zaehlung
+
+
+if __name__ == "__main__":
+    argumente = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if len(argumente) != 1:
+        print("Aufruf: python utils/anhangmodus.py <rohdatei> [--abschluss] [--neu]")
+        sys.exit(1)
+    anhaengen(argumente[0], abschluss='--abschluss' in sys.argv, neu='--neu' in sys.argv)
@@ -0,0 +1,267 @@
+"""
+archiv_pca.py
+=============
+
+Hauptkomponentenanalyse über das gesamte Fahrtenarchiv (IncrementalPCA).
+
+mod_020 hat die PCA bisher für jede Fahrt neu auf deren ``dropna()``-Matrix
+angelernt – mit allen numerischen Spalten, also auch Segment-IDs, Zeitteilen
+(Jahr … millisec) und GPS. Die Ladungen waren dadurch von Fahrt zu Fahrt
+verschieden. Hier wird ein Modell blockweise über alle Fahrten im
+Fahrtenkatalog angelernt (die Spalten liegen dort als ``.npy`` und werden
+Fahrt für Fahrt eingeblendet, nie das ganze Archiv auf einmal), gespeichert
+und für neue Fahrten nur noch angewendet.
+
+Ablauf:
+- Durchlauf 1: StandardScaler.partial_fit über alle Blöcke
+- Durchlauf 2: IncrementalPCA.partial_fit auf den standardisierten Blöcken
+- neue Fahrten (aus mod_042) werden mit eingefrorener Standardisierung
+  nachgelernt; ``lernen`` baut das Modell vollständig neu auf
+
+Features:
+- pca_spalten: Rohsensor-Spalten ohne IDs, Zeitteile, GPS und abgeleitete Spalten
+- ArchivPCA: lerne, ergaenze, projiziere, ladungen, wichtige_sensoren, speichern/laden
+- ergaenze_archiv_pca: Aufruf nach dem Ablegen einer Fahrt im Fahrtenkatalog
+- CLI: ``python utils/archiv_pca.py lernen``
+
+Abhängigkeiten:
+---------------
+- numpy, pandas, scikit-learn
+- utils.fahrtenkatalog
+- config.CONFIG (ARCHIV_PCA, PCA_KOMPONENTEN_ANZAHL)
+
+Autor: Frank Albrecht
+"""
+import os
+import re
+import sys
+import pickle
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sklearn.decomposition import IncrementalPCA
+from sklearn.preprocessing import StandardScaler
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import CONFIG
+from utils.fahrtenkatalog import FahrtenKatalog
+
+
+def pca_spalten(spalten: Sequence[str]) -> List[str]:
+    """
+    Filtert die Spalten, die in die PCA eingehen: nur Rohsensoren, also alles
+    außer IDs, Zeitteilen, GPS und den in mod_041/mod_042 abgeleiteten Spalten
+    (``_ppm``, ``_ugm3``, ``_intensity``, Markierungen; Muster
+    ARCHIV_PCA['AUSSCHLUSS']). Die Katalogfahrten stammen aus bearbeitet3,
+    mod_020 analysiert bearbeitet0 – das Modell muss auf beiden anwendbar sein.
+
+    :param spalten: Kandidaten (z.B. alle numerischen Spalten)
+    :returns: Messspalten in ursprünglicher Reihenfolge
+    """
+    ausschluss = re.compile(CONFIG.ARCHIV_PCA['AUSSCHLUSS'])
+    return [s for s in spalten if not ausschluss.search(str(s))]
+
+
+class ArchivPCA:
+    """
+    Standardisierung und IncrementalPCA über feste Messspalten.
+
+    :param spalten: Messspalten (Reihenfolge der Ladungen)
+    :param komponenten: Anzahl Komponenten (Standard: CONFIG.PCA_KOMPONENTEN_ANZAHL)
+    """
+
+    def __init__(self, spalten: Sequence[str], komponenten: Optional[int] = None) -> None:
+        self.spalten = list(spalten)
+        komponenten = komponenten or getattr(CONFIG, 'PCA_KOMPONENTEN_ANZAHL', 3)
+        self.komponenten = min(komponenten, len(self.spalten))
+        self.scaler = StandardScaler()
+        self.pca = IncrementalPCA(n_components=self.komponenten)
+        self.fahrten: List[str] = []
+        self.zeilen = 0
+
+    # ------------------------------------------------------------------ Daten
+
+    def _matrix(self, daten) -> Optional[np.ndarray]:
+        """Messmatrix (nur vollständige Zeilen) aus DataFrame oder Katalog-Spalten."""
+        if any(s not in daten for s in self.spalten):
+            return None
+        if isinstance(daten, pd.DataFrame):
+            matrix = daten[self.spalten].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        else:
+            matrix = np.column_stack([np.asarray(daten[s], dtype=float) for s in self.spalten])
+        return matrix[~np.isnan(matrix).any(axis=1)]
+
+    def _bloecke(self, katalog: FahrtenKatalog, fahrten: Sequence[str]) -> Iterator[np.ndarray]:
+        """
+        Blöcke von mindestens ARCHIV_PCA['BATCH_ZEILEN'] Zeilen; kurze Fahrten
+        werden zusammengefasst, weil IncrementalPCA je Block mindestens
+        ``komponenten`` Zeilen braucht.
+        """
+        groesse = CONFIG.ARCHIV_PCA['BATCH_ZEILEN']
+        puffer, anzahl = [], 0
+        for fahrt in fahrten:
+            matrix = self._matrix(katalog.spalten(fahrt))
+            if matrix is None:
+                print(f"⚠️ Archiv-PCA: Fahrt {fahrt} fehlen Messspalten – übersprungen.")
+                continue
+            for start in range(0, len(matrix), groesse):
+                puffer.append(matrix[start:start + groesse])
+                anzahl += len(puffer[-1])
+                if anzahl >= groesse:
+                    yield np.concatenate(puffer)
+                    puffer, anzahl = [], 0
+        if anzahl >= self.komponenten:
+            yield np.concatenate(puffer)
+
+    # ------------------------------------------------------------------ Anlernen
+
+    @classmethod
+    def lerne(cls, katalog: Optional[FahrtenKatalog] = None,
+              fahrten: Optional[Sequence[str]] = None) -> Optional['ArchivPCA']:
+        """
+        Lernt ein neues Modell über alle (oder die angegebenen) Fahrten.
+
+        Es gehen die Messspalten ein, die in allen Fahrten vorhanden sind.
+
+        :param katalog: Fahrtenkatalog (Standard: CONFIG.FAHRTENKATALOG['ORDNER'])
+        :param fahrten: Fahrtnamen (Standard: alle im Katalog)
+        :returns: Angelerntes Modell oder None bei zu wenigen Daten
+        """
+        katalog = katalog or FahrtenKatalog()
+        if fahrten is None:
+            fahrten = sorted(katalog.fahrten()['fahrt'])
+        if not fahrten:
+            print("⚠️ Archiv-PCA: Fahrtenkatalog ist leer.")
+            return None
+        gemeinsam = set.intersection(*(set(katalog.spalten(f)) for f in fahrten))
+        spalten = pca_spalten([s for s in katalog.spalten(fahrten[0]) if s in gemeinsam])
+        if len(spalten) < 2:
+            print("⚠️ Archiv-PCA: Zu wenige gemeinsame Messspalten.")
+            return None
+
+        modell = cls(spalten)
+        for block in modell._bloecke(katalog, fahrten):
+            modell.scaler.partial_fit(block)
+        if not hasattr(modell.scaler, 'mean_'):
+            print("⚠️ Archiv-PCA: Zu wenige vollständige Zeilen.")
+            return None
+        for block in modell._bloecke(katalog, fahrten):
+            modell.pca.partial_fit(modell.scaler.transform(block))
+            modell.zeilen += len(block)
+        modell.fahrten = list(fahrten)
+        print(f"✅ Archiv-PCA angelernt: {len(fahrten)} Fahrten, {modell.zeilen} Zeilen, "
+              f"{len(spalten)} Messspalten, {modell.komponenten} Komponenten")
+        return modell
+
+    def ergaenze(self, fahrt: str, daten) -> bool:
+        """
+        Lernt eine neue Fahrt nach. Die Standardisierung bleibt dabei
+        eingefroren, damit bereits eingerechnete Blöcke gültig bleiben.
+
+        :param fahrt: Fahrtname (bereits enthaltene Fahrten werden übersprungen)
+        :param daten: DataFrame oder Spalten-Zuordnung der Fahrt
+        :returns: True, wenn die Fahrt eingerechnet wurde
+        """
+        if fahrt in self.fahrten:
+            return False
+        matrix = self._matrix(daten)
+        if matrix is None or len(matrix) < self.komponenten:
+            return False
+        groesse = CONFIG.ARCHIV_PCA['BATCH_ZEILEN']
+        for start in range(0, len(matrix), groesse):
+            block = matrix[start:start + groesse]
+            if len(block) >= self.komponenten:
+                self.pca.partial_fit(self.scaler.transform(block))
+                self.zeilen += len(block)
+        self.fahrten.append(fahrt)
+        return True
+
+    # ------------------------------------------------------------------ Anwenden
+
+    def projiziere(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Projiziert eine Fahrt auf die Archiv-Komponenten.
+
+        :param df: Fahrt mit allen Messspalten des Modells
+        :returns: Array (Zeilen × Komponenten); unvollständige Zeilen sind NaN
+        :raises KeyError: Wenn Messspalten fehlen
+        """
+        fehlend = [s for s in self.spalten if s not in df.columns]
+        if fehlend:
+            raise KeyError(f"Messspalten fehlen: {', '.join(fehlend)}")
+        matrix = df[self.spalten].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        vollstaendig = ~np.isnan(matrix).any(axis=1)
+        ergebnis = np.full((len(matrix), self.komponenten), np.nan)
+        if vollstaendig.any():
+            ergebnis[vollstaendig] = self.pca.transform(self.scaler.transform(matrix[vollstaendig]))
+        return ergebnis
+
+    def ladungen(self) -> pd.DataFrame:
+        """Ladungen als DataFrame (Komponenten × Messspalten)."""
+        return pd.DataFrame(self.pca.components_, columns=self.spalten,
+                            index=[f"Komponente_{i + 1}" for i in range(self.komponenten)])
+
+    def wichtige_sensoren(self, anzahl: int = 3) -> Dict[str, List[str]]:
+        """Messspalten mit den betragsgrößten Ladungen je Komponente."""
+        return {name: zeile.abs().nlargest(anzahl).index.tolist()
+                for name, zeile in self.ladungen().iterrows()}
+
+    # ------------------------------------------------------------------ Ablage
+
+    def speichern(self, pfad: Optional[str] = None) -> None:
+        """Schreibt das Modell atomar (temporäre Datei + Umbenennen)."""
+        pfad = pfad or CONFIG.ARCHIV_PCA['DATEI']
+        os.makedirs(os.path.dirname(pfad), exist_ok=True)
+        tmp = pfad + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, pfad)
+
+    @staticmethod
+    def laden(pfad: Optional[str] = None) -> Optional['ArchivPCA']:
+        """
+        :returns: Gespeichertes Modell oder None, wenn keines vorhanden ist oder
+            es Spalten enthält, die pca_spalten inzwischen ausschließt (dann wird
+            es beim nächsten ergaenze_archiv_pca neu angelernt)
+        """
+        pfad = pfad or CONFIG.ARCHIV_PCA['DATEI']
+        try:
+            with open(pfad, 'rb') as f:
+                modell = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if pca_spalten(modell.spalten) != modell.spalten:
+            print("⚠️ Archiv-PCA: Gespeichertes Modell enthält abgeleitete Spalten – wird neu angelernt.")
+            return None
+        return modell
+
+
+def ergaenze_archiv_pca(fahrt: str, df: pd.DataFrame) -> bool:
+    """
+    Rechnet eine fertige Fahrt in das gespeicherte Archiv-Modell ein; gibt es
+    noch keines, wird es über den ganzen Fahrtenkatalog angelernt.
+    """
+    if not CONFIG.ARCHIV_PCA['AKTIV']:
+        return False
+    modell = ArchivPCA.laden()
+    if modell is None:
+        modell = ArchivPCA.lerne()
+        if modell is None:
+            return False
+    elif not modell.ergaenze(fahrt, df):
+        return False
+    modell.speichern()
+    return True
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == 'lernen':
+        modell = ArchivPCA.lerne()
+        if modell is not None:
+            modell.speichern()
+            print(f"💾 Modell gespeichert: {CONFIG.ARCHIV_PCA['DATEI']}")
+            for komponente, sensoren in modell.wichtige_sensoren().items():
+                print(f"   {komponente}: {', '.join(sensoren)}")
+    else:
+        print("Aufruf: python utils/archiv_pca.py lernen")
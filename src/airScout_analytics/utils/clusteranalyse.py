@@ -0,0 +1,162 @@
+"""
+clusteranalyse.py
+=================
+
+K-Means mit automatischer Wahl der Clusterzahl für die Sensoranalyse (mod_020).
+
+Bisher wurde für jedes k nacheinander ein vollständiges KMeans(n_init=10)
+angelernt, danach für das gewählte k noch einmal, und gewählt wurde schlicht
+der mittlere Wert des Suchbereichs. Hier wird die standardisierte Matrix
+einmal aufgebaut und für alle k wiederverwendet, die Kandidaten laufen
+parallel, und k wird per Silhouette (auf einer Stichprobe) oder per
+Ellbogen-Kriterium aus den Inertien bestimmt. Das Modell des gewählten k wird
+direkt übernommen. Ab CLUSTERING['MINIBATCH_AB'] Punkten wird MiniBatchKMeans
+verwendet.
+
+Features:
+- sensormatrix: Sensoren als Punkte (standardisierte Verläufe über eine Zeilenstichprobe)
+- ellbogen_k: Knick der Inertie-Kurve (größter Abstand zur Sehne)
+- waehle_k: alle k parallel anlernen, per Silhouette/Ellbogen auswählen
+- gruppen: Namen nach Cluster-Label zusammenfassen
+
+Abhängigkeiten:
+---------------
+- numpy, pandas, scikit-learn
+- config.CONFIG (CLUSTERING, SEED)
+
+Autor: Frank Albrecht
+"""
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import CONFIG
+
+
+def sensormatrix(df: pd.DataFrame, spalten: Sequence[str],
+                 max_zeilen: Optional[int] = None) -> np.ndarray:
+    """
+    Baut die Punktmatrix für das Clustern von Sensoren: eine Zeile je Sensor,
+    eine Spalte je (gemeinsam gültiger) Messzeile.
+
+    Jeder Sensor wird über die Zeilen z-standardisiert, sodass der euklidische
+    Abstand zweier Sensoren nur noch von ihrer Korrelation abhängt
+    (``||a - b||² = 2n(1 - r)``). Lange Fahrten werden auf höchstens
+    ``max_zeilen`` gleichmäßig verteilte Zeilen ausgedünnt.
+
+    :param df: Sensordaten
+    :param spalten: Sensorspalten
+    :param max_zeilen: Höchstzahl Zeilen (Standard: CLUSTERING['STICHPROBE'])
+    :returns: Array (Sensoren × Zeilen)
+    """
+    max_zeilen = max_zeilen or CONFIG.CLUSTERING['STICHPROBE']
+    werte = df[list(spalten)].apply(pd.to_numeric, errors='coerce').dropna().to_numpy(dtype=float)
+    if len(werte) > max_zeilen:
+        werte = werte[np.linspace(0, len(werte) - 1, max_zeilen).astype(np.intp)]
+    std = werte.std(axis=0)
+    std[std == 0] = 1.0
+    return ((werte - werte.mean(axis=0)) / std).T
+
+
+def ellbogen_k(k_werte: Sequence[int], inertien: Sequence[float]) -> int:
+    """
+    Wählt k am Knick der Inertie-Kurve: beide Achsen auf [0, 1] normiert,
+    gewählt wird der Punkt mit dem größten Abstand unter der Sehne vom
+    ersten zum letzten Kandidaten.
+
+    :param k_werte: Aufsteigende Kandidaten
+    :param inertien: Inertie je Kandidat
+    :returns: Gewähltes k
+    """
+    k = np.asarray(k_werte, dtype=float)
+    y = np.asarray(inertien, dtype=float)
+    if len(k) < 3 or y[0] == y[-1]:
+        return int(k[0])
+    x = (k - k[0]) / (k[-1] - k[0])
+    y = (y - y[-1]) / (y[0] - y[-1])
+    # Sehne von (0, 1) nach (1, 0): Abstand ∝ 1 - x - y
+    return int(k[np.argmax(1 - x - y)])
+
+
+def _modell(k: int, punkte: int):
+    cfg = CONFIG.CLUSTERING
+    if punkte >= cfg['MINIBATCH_AB']:
+        return MiniBatchKMeans(n_clusters=k, batch_size=cfg['BATCH_GROESSE'],
+                               n_init=3, random_state=CONFIG.SEED)
+    return KMeans(n_clusters=k, n_init=10, random_state=CONFIG.SEED)
+
+
+def waehle_k(matrix: np.ndarray, k_werte: Optional[Sequence[int]] = None,
+             methode: Optional[str] = None, worker: Optional[int] = None) -> Dict:
+    """
+    Lernt K-Means für alle Kandidaten parallel an und wählt k.
+
+    Die Silhouette wird für alle k auf derselben Stichprobe von höchstens
+    CLUSTERING['STICHPROBE'] Punkten berechnet. Ist sie nicht bestimmbar
+    (k ≥ Anzahl Punkte), wird auf das Ellbogen-Kriterium ausgewichen.
+
+    :param matrix: Punkte × Merkmale (bereits standardisiert)
+    :param k_werte: Kandidaten (Standard: 2 … CLUSTERING['MAX_K'], höchstens Punkte - 1)
+    :param methode: 'silhouette' oder 'ellbogen' (Standard: CLUSTERING['METHODE'])
+    :param worker: Parallele Threads (Standard: CLUSTERING['WORKER'])
+    :returns: Dictionary mit k, labels, zentren, inertien, silhouette, methode
+    """
+    cfg = CONFIG.CLUSTERING
+    n = len(matrix)
+    if k_werte is None:
+        k_werte = range(2, max(min(cfg['MAX_K'], n - 1), 2) + 1)
+    k_werte = [k for k in k_werte if 2 <= k <= n]
+    if not k_werte:
+        raise ValueError(f"Zu wenige Punkte für Clustering: {n}")
+    methode = methode or cfg['METHODE']
+
+    rng = np.random.default_rng(CONFIG.SEED)
+    stichprobe = np.sort(rng.choice(n, cfg['STICHPROBE'], replace=False)) if n > cfg['STICHPROBE'] else None
+    probe = matrix if stichprobe is None else matrix[stichprobe]
+
+    def anlernen(k: int):
+        modell = _modell(k, n).fit(matrix)
+        labels = modell.labels_ if stichprobe is None else modell.labels_[stichprobe]
+        silhouette = None
+        if 2 <= len(np.unique(labels)) <= len(probe) - 1:
+            silhouette = float(silhouette_score(probe, labels))
+        return modell, silhouette
+
+    with ThreadPoolExecutor(max_workers=worker or cfg['WORKER']) as pool:
+        modelle = dict(zip(k_werte, pool.map(anlernen, k_werte)))
+
+    inertien = {k: float(m.inertia_) for k, (m, _) in modelle.items()}
+    silhouetten = {k: s for k, (_, s) in modelle.items() if s is not None}
+    if methode == 'silhouette' and silhouetten:
+        gewaehlt = max(silhouetten, key=silhouetten.get)
+    else:
+        methode = 'ellbogen'
+        gewaehlt = ellbogen_k(k_werte, [inertien[k] for k in k_werte])
+
+    modell = modelle[gewaehlt][0]
+    return {
+        'k': gewaehlt,
+        'labels': modell.labels_,
+        'zentren': modell.cluster_centers_,
+        'inertien': inertien,
+        'silhouette': silhouetten,
+        'methode': methode,
+    }
+
+
+def gruppen(namen: Sequence[str], labels: np.ndarray) -> Dict[str, List[str]]:
+    """
+    Fasst Namen nach Cluster-Label zusammen, nummeriert nach erstem Auftreten.
+
+    :returns: {'Gruppe_1': [...], ...}
+    """
+    reihenfolge = list(dict.fromkeys(labels.tolist()))
+    return {f"Gruppe_{i + 1}": [name for name, label in zip(namen, labels) if label == cluster]
+            for i, cluster in enumerate(reihenfolge)}
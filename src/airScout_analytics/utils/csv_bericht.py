@@ -0,0 +1,789 @@
+"""
+csv_bericht.py
+==============
+
+Berichts-Engine für den CSV-Analysebericht von mod_020 (``csv_info_extractor``).
+
+Bisher wurde die Datei über eine Kaskade von bis zu sechs ``read_csv``-Versuchen
+geladen und danach für Datentypen, Beispielwerte, Nullwerte, Statistik,
+Korrelationen und Duplikate jeweils erneut komplett durchlaufen. Die Engine
+erkennt das Trennzeichen einmal an einer kleinen Stichprobe vom Dateianfang,
+liest die Datei genau einmal und berechnet alle Spaltenprofile (Nullmaske,
+eindeutige Werte, häufigster Wert, Duplikate, leere Zeilen) in einem
+vektorisierten Durchlauf. Die Abschnitte des Berichts sind voneinander
+unabhängige Aufgaben, laufen parallel in einem Thread-Pool und werden je
+Datei-Hash zwischengespeichert. Ist eine Datei unverändert, wird sie gar nicht
+erst geparst.
+
+Große Archive (ab NAEHERUNG_AB_MB) werden im Näherungsmodus blockweise mit
+konstantem Speicher gelesen: eindeutige Werte über HyperLogLog, Quantile über
+die QuantilSkizze, Duplikate über einen Bloom-Filter, Beispielwerte und
+erweiterte Analysen aus einer Reservoir-Stichprobe. Der Bericht weist die
+Fehlergrenzen aus.
+
+Features:
+- erkenne_trennzeichen: Trennzeichen aus einer Stichprobe (konstante Anzahl je Zeile)
+- lade_csv: einmaliges Einlesen mit erkanntem Trennzeichen
+- spaltenprofile: alle Spaltenprofile in einem Durchlauf
+- NaeherungsProfil / naeherungsprofil: Spaltenprofile blockweise mit Skizzen
+- profiliere / fuehre_abschnitte_aus: Profil erstellen, Abschnitte parallel berechnen
+- messgroessen: numerische Spalten ohne Kennungen (für Korrelationen und ML-Analysen)
+- erstelle_bericht: Berichtszeilen aus Cache bzw. parallel berechneten Abschnitten
+
+Abhängigkeiten:
+---------------
+- numpy, pandas
+- mod_020_csv_analyzer (erweiterte Sensor-Analysen, verzögert importiert)
+- utils.sensorstatistik, utils.skizzen
+- config.CONFIG (CSV_BERICHT, KORRELATIONSSCHWELLE_HOCH, SEED)
+
+Autor: Frank Albrecht
+"""
+import os
+import re
+import sys
+import pickle
+import hashlib
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import CONFIG
+from utils.sensorstatistik import StreamingSensorStatistik, sensorstatistik_fuer_lauf
+from utils.skizzen import BloomFilter, HyperLogLog, Reservoir, werte_hash
+
+# Bei Änderungen an Inhalt oder Format der Abschnitte erhöhen (macht den Cache ungültig)
+_VERSION = 5
+
+_KANDIDATEN = (',', ';', '\t', '|')
+
+# to_string(max_colwidth=...) setzt pandas-Optionen global; Textausgabe daher nicht parallel
+_DARSTELLUNG = threading.Lock()
+
+
+def erkenne_trennzeichen(pfad: str, probe_bytes: Optional[int] = None) -> str:
+    """
+    Erkennt das Trennzeichen anhand der ersten Bytes der Datei.
+
+    Bevorzugt wird das Zeichen, das in allen vollständigen Zeilen der
+    Stichprobe gleich oft (und mindestens einmal) vorkommt; bei mehreren das
+    häufigste. Sonst entscheidet die Gesamtzahl, Standard ist ','.
+
+    :param pfad: Pfad zur CSV-Datei
+    :param probe_bytes: Größe der Stichprobe (Standard: CSV_BERICHT['PROBE_BYTES'])
+    :returns: Trennzeichen
+    """
+    probe_bytes = probe_bytes or CONFIG.CSV_BERICHT['PROBE_BYTES']
+    with open(pfad, 'r', encoding='utf-8', errors='replace') as f:
+        probe = f.read(probe_bytes)
+        abgeschnitten = bool(f.read(1))
+    zeilen = probe.splitlines()
+    if abgeschnitten and len(zeilen) > 1:
+        zeilen = zeilen[:-1]  # letzte Zeile ist evtl. unvollständig
+    zeilen = [z for z in zeilen if z.strip()]
+    if not zeilen:
+        return ','
+
+    zaehler = {sep: np.array([z.count(sep) for z in zeilen]) for sep in _KANDIDATEN}
+    konstant = {sep: n[0] for sep, n in zaehler.items() if n[0] > 0 and (n == n[0]).all()}
+    if konstant:
+        return max(konstant, key=konstant.get)
+    gesamt = {sep: n.sum() for sep, n in zaehler.items()}
+    bester = max(gesamt, key=gesamt.get)
+    return bester if gesamt[bester] > 0 else ','
+
+
+def lade_csv(pfad: str) -> pd.DataFrame:
+    """
+    Liest die CSV-Datei einmal mit dem erkannten Trennzeichen ein. Nur wenn
+    das fehlschlägt, werden problematische Zeilen übersprungen.
+
+    :param pfad: Pfad zur CSV-Datei
+    :returns: DataFrame, DateTime/GPS_DateTime als datetime
+    :raises pd.errors.EmptyDataError: Datei ist leer
+    """
+    sep = erkenne_trennzeichen(pfad)
+    try:
+        df = pd.read_csv(pfad, sep=sep)
+        print(f"✅ CSV geladen (Trennzeichen {sep!r})")
+    except pd.errors.ParserError:
+        df = pd.read_csv(pfad, sep=sep, on_bad_lines='skip')
+        print(f"⚠️ CSV geladen (Trennzeichen {sep!r}, problematische Zeilen übersprungen)")
+
+    for spalte in ['DateTime', 'GPS_DateTime']:
+        if spalte in df.columns:
+            df[spalte] = pd.to_datetime(df[spalte], errors='coerce')
+    return df
+
+
+def _vorschau(block: pd.DataFrame, position: int, nullmaske: np.ndarray) -> str:
+    """Erste fünf Spalten einer Zeile für die Nullwert-Beispiele."""
+    teile = [f"{name}=NULL" if nullmaske[position, s] else f"{name}={_kurz(block.iat[position, s], 20)}"
+             for s, name in enumerate(block.columns[:5])]
+    if len(block.columns) > 5:
+        teile.append("...")
+    return ' | '.join(teile)
+
+
+def _null_beispiele(block: pd.DataFrame, nullmaske: np.ndarray, profil: Dict) -> None:
+    """Ergänzt je Spalte die ersten zehn Nullzeilen und zwei Zeilenvorschauen."""
+    for j in np.flatnonzero(nullmaske.any(axis=0)):
+        spalte = block.columns[j]
+        bisher = profil['null_zeilen'].get(spalte, np.empty(0, dtype=np.int64))
+        if len(bisher) >= 10:
+            continue
+        positionen = np.flatnonzero(nullmaske[:, j])[:10 - len(bisher)]
+        profil['null_zeilen'][spalte] = np.concatenate([bisher, block.index.to_numpy()[positionen]])
+        vorschau = profil['null_vorschau'].setdefault(spalte, [])
+        for position in positionen[:2 - len(vorschau)]:
+            vorschau.append((block.index[position], _vorschau(block, position, nullmaske)))
+
+
+def _leeres_profil(df: pd.DataFrame) -> Dict:
+    return {'null_zeilen': {}, 'null_vorschau': {}, 'naeherung': None,
+            'kopf': df.head(), 'ende': df.tail()}
+
+
+def spaltenprofile(df: pd.DataFrame) -> Dict:
+    """
+    Berechnet die Profile aller Spalten in einem Durchlauf (exakt).
+
+    Die Nullmaske entsteht einmal für den ganzen Frame. Die numerischen
+    Spalten werden als eine Matrix spaltenweise sortiert (eindeutige Werte
+    über die Differenzen benachbarter Werte), alle übrigen Spalten je einmal
+    faktorisiert (eindeutige Werte, häufigster Wert). Duplikate werden über
+    einen Hash je Zeile gezählt.
+
+    :param df: Eingelesene CSV
+    :returns: Profil-Dict (Schlüssel wie :meth:`NaeherungsProfil.ergebnis`)
+    """
+    nullmaske = df.isna().to_numpy()
+    numerisch = df.select_dtypes(include=[np.number]).columns.tolist()
+    eindeutig = {}
+    haeufigster = {}
+
+    if numerisch:
+        matrix = df[numerisch].to_numpy(dtype=float)
+        sortiert = np.sort(matrix, axis=0)  # NaN landen am Ende
+        neu = np.ones(sortiert.shape, dtype=bool)
+        neu[1:] = sortiert[1:] != sortiert[:-1]
+        neu &= ~np.isnan(sortiert)
+        for j, spalte in enumerate(numerisch):
+            werte = sortiert[neu[:, j], j]
+            if df[spalte].dtype.kind in 'iu':
+                werte = werte.astype(df[spalte].dtype)
+            eindeutig[spalte] = werte
+
+    for spalte in df.columns.difference(numerisch, sort=False):
+        codes, werte = pd.factorize(df[spalte])
+        eindeutig[spalte] = werte
+        if len(werte) == 0:
+            continue
+        anzahl = np.bincount(codes[codes >= 0], minlength=len(werte))
+        kandidaten = list(werte[anzahl == anzahl.max()])
+        try:
+            haeufigster[spalte] = min(kandidaten)  # wie mode(): kleinster bei Gleichstand
+        except TypeError:
+            haeufigster[spalte] = kandidaten[0]
+
+    profil = _leeres_profil(df)
+    _null_beispiele(df, nullmaske, profil)
+    profil.update({
+        'zeilen': len(df),
+        'dtypes': df.dtypes,
+        'nullen': nullmaske.sum(axis=0),
+        'eindeutig': eindeutig,
+        'anzahl_eindeutig': {spalte: len(werte) for spalte, werte in eindeutig.items()},
+        'haeufigster': haeufigster,
+        'numerisch': numerisch,
+        'kategorisch': df.select_dtypes(include=['object']).columns.tolist(),
+        'leere_zeilen': int(nullmaske.all(axis=1).sum()) if df.shape[1] else 0,
+        'duplikate': int(pd.util.hash_pandas_object(df, index=False).duplicated().sum()),
+        'speicher': int(df.memory_usage(deep=True).sum()),
+    })
+    return profil
+
+
+def _dtype_vereinen(a, b):
+    if a == b:
+        return a
+    if a.kind in 'biuf' and b.kind in 'biuf':
+        return np.result_type(a, b)
+    return np.dtype(object)
+
+
+class NaeherungsProfil:
+    """
+    Spaltenprofile im Näherungsmodus: blockweise, mit konstantem Speicher.
+
+    Exakt bleiben Zeilenzahl, Nullwerte (samt Beispielzeilen), leere Zeilen,
+    Min/Max/Mittel/Streuung und die Korrelationen (paarweise Summen wie
+    ``DataFrame.corr``). Geschätzt werden eindeutige Werte (HyperLogLog),
+    Quantile (QuantilSkizze), Duplikate (Bloom-Filter); Beispielwerte,
+    häufigste Werte und die erweiterten Analysen stammen aus einer
+    Reservoir-Stichprobe.
+
+    :param erwartete_zeilen: Schätzung der Zeilenzahl (Wahl der Bloom-Hashes)
+    """
+
+    def __init__(self, erwartete_zeilen: Optional[int] = None) -> None:
+        self.erwartete_zeilen = erwartete_zeilen
+        self.profil = None
+
+    def _beginne(self, block: pd.DataFrame) -> None:
+        self.spalten = list(block.columns)
+        self.numerisch = block.select_dtypes(include=[np.number]).columns.tolist()
+        self.dtypes = dict(block.dtypes)
+        self.nullen = np.zeros(len(self.spalten), dtype=np.int64)
+        self.leere_zeilen = 0
+        self.duplikate = 0
+        self.speicher = 0
+        self.hll = {spalte: HyperLogLog() for spalte in self.spalten}
+        self.bloom = BloomFilter(erwartete_zeilen=self.erwartete_zeilen)
+        self.reservoir = Reservoir()
+        self.statistik = StreamingSensorStatistik(self.numerisch)
+        k = len(self.numerisch)
+        self._verschiebung = None
+        self._n, self._sx, self._sxx, self._sxy = (np.zeros((k, k)) for _ in range(4))
+        self.profil = _leeres_profil(block)
+
+    def aktualisiere(self, block: pd.DataFrame) -> None:
+        """
+        Rechnet einen Block ein (Index = globale Zeilennummer, wie bei ``chunksize``).
+        """
+        if self.profil is None:
+            self._beginne(block)
+        block = block.reindex(columns=self.spalten)
+        for spalte, dtype in block.dtypes.items():
+            self.dtypes[spalte] = _dtype_vereinen(self.dtypes[spalte], dtype)
+
+        nullmaske = block.isna().to_numpy()
+        self.nullen += nullmaske.sum(axis=0)
+        self.leere_zeilen += int(nullmaske.all(axis=1).sum())
+        _null_beispiele(block, nullmaske, self.profil)
+        self.profil['ende'] = pd.concat([self.profil['ende'], block.tail()]).tail()
+        self.speicher += int(block.memory_usage(deep=True, index=False).sum())
+
+        for j, spalte in enumerate(self.spalten):
+            self.hll[spalte].aktualisiere(werte_hash(block[spalte].to_numpy()[~nullmaske[:, j]]))
+        gleich = block.astype({s: np.float64 for s in block.columns if block[s].dtype.kind in 'biu'})
+        zeilen_hash = pd.util.hash_pandas_object(gleich, index=False).to_numpy()
+        self.duplikate += int(self.bloom.pruefe_und_fuege_ein(zeilen_hash).sum())
+        self.reservoir.aktualisiere(block)
+
+        if self.numerisch:
+            self.statistik.aktualisiere(block)
+            matrix = block[self.numerisch].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+            gueltig = ~np.isnan(matrix)
+            if self._verschiebung is None:
+                # Verschieben um die Mittel des ersten Blocks hält die Summen numerisch stabil
+                with np.errstate(invalid='ignore'):
+                    self._verschiebung = np.nan_to_num(np.nanmean(matrix, axis=0))
+            x = np.where(gueltig, matrix - self._verschiebung, 0.0)
+            m = gueltig.astype(float)
+            self._n += m.T @ m
+            self._sx += x.T @ m
+            self._sxx += (x * x).T @ m
+            self._sxy += x.T @ x
+
+    def _korrelation(self) -> pd.DataFrame:
+        n, sx, sxx, sxy = self._n, self._sx, self._sxx, self._sxy
+        with np.errstate(invalid='ignore', divide='ignore'):
+            kov = n * sxy - sx * sx.T
+            var = n * sxx - sx * sx
+            r = kov / np.sqrt(var * var.T)
+        r = np.where(n > 1, np.clip(r, -1.0, 1.0), np.nan)
+        return pd.DataFrame(r, index=self.numerisch, columns=self.numerisch)
+
+    def ergebnis(self) -> Dict:
+        """
+        :returns: Profil-Dict wie :func:`spaltenprofile`, zusätzlich 'stichprobe',
+                  'statistik', 'korrelation' und die Fehlergrenzen unter 'naeherung'
+        """
+        stichprobe = self.reservoir.stichprobe()
+        dtypes = pd.Series(self.dtypes)
+        # Spaltenarten wie im exakten Modus über select_dtypes bestimmen
+        leer = pd.DataFrame({s: pd.Series(dtype=d) for s, d in self.dtypes.items()})
+        numerisch = [s for s in self.numerisch if s in leer.select_dtypes(include=[np.number]).columns]
+        kategorisch = leer.select_dtypes(include=['object']).columns.tolist()
+        haeufigster = {}
+        for spalte in kategorisch:
+            modus = stichprobe[spalte].mode()
+            if len(modus):
+                haeufigster[spalte] = modus.iloc[0]
+
+        zeilen = self.reservoir.gesehen
+        kapazitaet = self.statistik.skizze.kapazitaet
+        hll = next(iter(self.hll.values()))
+        self.profil.update({
+            'zeilen': zeilen,
+            'dtypes': dtypes,
+            'nullen': self.nullen,
+            'eindeutig': {s: stichprobe[s].dropna().unique() for s in self.spalten},
+            'anzahl_eindeutig': {s: skizze.schaetzung() for s, skizze in self.hll.items()},
+            'haeufigster': haeufigster,
+            'numerisch': numerisch,
+            'kategorisch': kategorisch,
+            'leere_zeilen': self.leere_zeilen,
+            'duplikate': self.duplikate,
+            'speicher': self.speicher,
+            'stichprobe': stichprobe,
+            'statistik': self.statistik.ergebnis() if numerisch else None,
+            'korrelation': self._korrelation().loc[numerisch, numerisch],
+            'naeherung': {
+                'stichprobe': len(stichprobe),
+                'hll_fehler': hll.fehler,
+                'quantil_rangfehler': max(np.log2(max(zeilen, 1) / kapazitaet), 1.0) / kapazitaet,
+                'bloom_fehlalarme': self.bloom.erwartete_fehlalarme(),
+            },
+        })
+        return self.profil
+
+
+def naeherungsprofil(pfad: str) -> Dict:
+    """
+    Streamt eine (große) CSV blockweise durch das :class:`NaeherungsProfil`.
+    Der Speicherbedarf hängt nur von Blockgröße, Stichprobe und Skizzen ab.
+
+    :param pfad: Pfad zur CSV-Datei
+    :returns: Profil-Dict
+    """
+    sep = erkenne_trennzeichen(pfad)
+    probe_bytes = CONFIG.CSV_BERICHT['PROBE_BYTES']
+    with open(pfad, 'rb') as f:
+        probe_zeilen = f.read(probe_bytes).count(b'\n')
+    erwartet = int(os.path.getsize(pfad) / probe_bytes * probe_zeilen) if probe_zeilen else None
+
+    sammler = NaeherungsProfil(erwartet)
+    for block in pd.read_csv(pfad, sep=sep, on_bad_lines='skip',
+                             chunksize=CONFIG.CSV_BERICHT['CHUNK_ZEILEN']):
+        for spalte in ['DateTime', 'GPS_DateTime']:
+            if spalte in block.columns:
+                block[spalte] = pd.to_datetime(block[spalte], errors='coerce')
+        sammler.aktualisiere(block)
+    if sammler.profil is None:
+        raise pd.errors.EmptyDataError("Keine Datenzeilen gefunden")
+    print(f"✅ CSV im Näherungsmodus gelesen (Trennzeichen {sep!r}, {sammler.reservoir.gesehen:,} Zeilen)")
+    return sammler.ergebnis()
+
+
+class BerichtsKontext:
+    """
+    Gemeinsame, nur gelesene Eingaben aller Abschnitte. ``df`` ist die ganze
+    Datei bzw. im Näherungsmodus die Stichprobe.
+    """
+
+    def __init__(self, pfad: str, df: pd.DataFrame, profil: Dict) -> None:
+        self.pfad = pfad
+        self.df = df
+        self.profil = profil
+
+
+def naeherung_aktiv(pfad: str, naeherung: Optional[bool] = None) -> bool:
+    """
+    :param naeherung: Erzwingen (True/False); None wählt nach Dateigröße (CSV_BERICHT['NAEHERUNG_AB_MB'])
+    """
+    if naeherung is not None:
+        return naeherung
+    return os.path.getsize(pfad) >= CONFIG.CSV_BERICHT['NAEHERUNG_AB_MB'] * 1024 * 1024
+
+
+def profiliere(pfad: str, naeherung: Optional[bool] = None) -> BerichtsKontext:
+    """
+    Liest die Datei exakt (ganz) oder im Näherungsmodus (blockweise) und
+    profiliert alle Spalten.
+
+    :param pfad: Pfad zur CSV-Datei
+    :param naeherung: siehe :func:`naeherung_aktiv`
+    :returns: BerichtsKontext
+    """
+    if naeherung_aktiv(pfad, naeherung):
+        profil = naeherungsprofil(pfad)
+        return BerichtsKontext(pfad, profil['stichprobe'], profil)
+    df = lade_csv(pfad)
+    return BerichtsKontext(pfad, df, spaltenprofile(df))
+
+
+def _kurz(wert, laenge: int) -> str:
+    text = str(wert)
+    return text[:laenge] + "..." if len(text) > laenge else text
+
+
+# === Abschnitte: je (zeilen, ergebnis); ergebnis None = Abschnitt entfällt ===
+
+def _abschnitt_grundlagen(k: BerichtsKontext):
+    p = k.profil
+    anzahl, spalten = p['zeilen'], len(p['dtypes'])
+    zeilen = ["\n🔍 1. GRUNDLEGENDE INFORMATIONEN", "-" * 40,
+              f"📊 Shape: {anzahl} Zeilen × {spalten} Spalten",
+              f"💾 Dateigröße: {os.path.getsize(k.pfad) / 1024:.1f} KB",
+              f"🔢 Gesamt-Datenpunkte: {anzahl * spalten:,}"]
+    n = p['naeherung']
+    if n:
+        zeilen += ["⚗️ Näherungsmodus (blockweise, konstanter Speicher):",
+                   "   • exakt: Zeilen, Nullwerte, leere Zeilen, Anzahl/Mittel/Std/Min/Max, Korrelationen",
+                   f"   • eindeutige Werte: HyperLogLog, ±{2 * n['hll_fehler']:.1%} (2σ)",
+                   f"   • Quantile: Quantil-Skizze, Rangfehler ≤ {n['quantil_rangfehler']:.2%}",
+                   f"   • Duplikate: Bloom-Filter, ≤ {n['bloom_fehlalarme']:.1f} Fehlalarme erwartet "
+                   f"(echte Duplikate werden nie übersehen)",
+                   f"   • Beispielwerte, häufigste Werte, erweiterte Analysen: "
+                   f"Stichprobe von {n['stichprobe']:,} Zeilen"]
+    return zeilen, {'zeilen': anzahl, 'groesse': anzahl * spalten}
+
+
+def _abschnitt_spalten(k: BerichtsKontext):
+    anzahl = CONFIG.CSV_BERICHT['BEISPIELWERTE']
+    rng = np.random.default_rng(CONFIG.SEED)
+    zeilen = ["\n📋 2. SPALTEN MIT DATENTYPEN", "-" * 40]
+    for i, (spalte, dtype) in enumerate(k.profil['dtypes'].items(), 1):
+        werte = k.profil['eindeutig'][spalte]
+        if len(werte) > 0:
+            auswahl = werte[rng.choice(len(werte), size=min(anzahl, len(werte)), replace=False)]
+            beispiele = ", ".join(_kurz(w, 25) for w in auswahl)
+        else:
+            beispiele = "(keine Werte)"
+        zeilen.append(f"{i:2d}. {spalte:<25} → {str(dtype):<12} | Beispiele: {beispiele}")
+    return zeilen, {}
+
+
+def _abschnitt_kopf(k: BerichtsKontext):
+    with _DARSTELLUNG:
+        kopf = k.profil['kopf'].to_string(max_cols=None, max_colwidth=25)
+        ende = k.profil['ende'].to_string(max_cols=None, max_colwidth=25)
+    zeilen = ["\n👀 3. ERSTE 5 ZEILEN (HEAD)", "-" * 40, kopf,
+              "\n👁️ LETZTE 5 ZEILEN (TAIL)", "-" * 40, ende]
+    return zeilen, {}
+
+
+def _abschnitt_info(k: BerichtsKontext):
+    p = k.profil
+    anzahl = p['zeilen']
+    zeilen = ["\n📊 4. DATAFRAME INFO", "-" * 40,
+              f"RangeIndex: {anzahl} entries, 0 to {anzahl-1}",
+              f"Data columns (total {len(p['dtypes'])} columns):"]
+    nicht_null = anzahl - p['nullen']
+    for i, (spalte, dtype) in enumerate(p['dtypes'].items()):
+        zeilen.append(f" {i:2d}  {spalte:<20} {nicht_null[i]:>6} non-null  {str(dtype)}")
+    zusatz = " (Summe der Blöcke)" if p['naeherung'] else ""
+    zeilen.append(f"Memory usage: {p['speicher'] / 1024:.1f} KB{zusatz}")
+    return zeilen, {}
+
+
+def _abschnitt_nullwerte(k: BerichtsKontext):
+    p = k.profil
+    nullen = p['nullen']
+    gesamt = int(nullen.sum())
+    zeilen = ["\n❌ 5. NULL VALUES (FEHLENDE WERTE)", "-" * 40]
+    if gesamt == 0:
+        zeilen.append("✅ Keine fehlenden Werte gefunden!")
+        return zeilen, {'nullen': 0}
+
+    zeilen += [f"🚨 Gesamt fehlende Werte: {gesamt:,}", ""]
+    for j in np.flatnonzero(nullen):
+        spalte = p['dtypes'].index[j]
+        zeilen_str = ", ".join(map(str, p['null_zeilen'][spalte]))
+        if nullen[j] > 10:
+            zeilen_str += f", ... (+{nullen[j]-10} weitere)"
+        zeilen.append(f"{spalte:<25}: {nullen[j]:>6} ({nullen[j] / p['zeilen'] * 100:.1f}%) | "
+                      f"Zeilen: {zeilen_str}")
+        zeilen.append(f"   📋 Beispiel-Zeilen mit NULL in '{spalte}':")
+        zeilen += [f"      Zeile {zeile}: {vorschau}" for zeile, vorschau in p['null_vorschau'][spalte]]
+        zeilen.append("")
+    return zeilen, {'nullen': gesamt}
+
+
+def _abschnitt_numerisch(k: BerichtsKontext):
+    numerisch = k.profil['numerisch']
+    if not numerisch:
+        return [], {}
+    statistik = k.profil.get('statistik') or sensorstatistik_fuer_lauf(k.df, 'roh', numerisch)
+    beschreibung = statistik.beschreibung()
+    with _DARSTELLUNG:
+        text = beschreibung.to_string()
+    return ["\n🔢 6. NUMERISCHE STATISTIKEN", "-" * 40, text], {}
+
+
+def _abschnitt_kategorisch(k: BerichtsKontext):
+    p = k.profil
+    if not p['kategorisch']:
+        return [], {}
+    ungefaehr = "≈" if p['naeherung'] else ""
+    zeilen = ["\n📝 7. KATEGORISCHE SPALTEN ANALYSE", "-" * 40]
+    for spalte in p['kategorisch']:
+        zeilen.append(f"{spalte:<25}: {ungefaehr}{p['anzahl_eindeutig'][spalte]:>4} eindeutige Werte, "
+                      f"häufigster: '{p['haeufigster'].get(spalte, 'N/A')}'")
+    return zeilen, {}
+
+
+def _abschnitt_zusatz(k: BerichtsKontext):
+    p = k.profil
+    duplikate = f"🔁 Duplikate: {p['duplikate']}"
+    if p['naeherung']:
+        duplikate = f"🔁 Duplikate: ≈{p['duplikate']} (Bloom-Filter, ≤ {p['naeherung']['bloom_fehlalarme']:.1f} Fehlalarme erwartet)"
+    zeilen = ["\n⭐ 8. ZUSÄTZLICHE INFORMATIONEN", "-" * 40, duplikate,
+              f"📭 Komplett leere Zeilen: {p['leere_zeilen']}"]
+    einwertig = [s for s in p['dtypes'].index if p['anzahl_eindeutig'][s] <= 1]
+    if einwertig:
+        zeilen.append(f"⚠️  Spalten mit nur einem Wert: {', '.join(einwertig)}")
+    return zeilen, {'duplikate': p['duplikate']}
+
+
+def messgroessen(numerisch: List[str]) -> List[str]:
+    """
+    Numerische Spalten ohne Kennungen (CONFIG.CSV_BERICHT['KENNUNG_SPALTEN']).
+
+    Eine fortlaufende ID wie ``Segment_ID`` ist eine Zahl, aber keine Messgröße:
+    sie korreliert nur mit der Zeit und verzerrt Korrelationen, PCA und
+    Feature Selection.
+
+    :param numerisch: Numerische Spaltennamen
+    :returns: Spalten ohne Kennungen (Reihenfolge bleibt erhalten)
+    """
+    kennung = re.compile(CONFIG.CSV_BERICHT['KENNUNG_SPALTEN'])
+    return [s for s in numerisch if not kennung.search(s)]
+
+
+def _abschnitt_korrelationen(k: BerichtsKontext):
+    numerisch = messgroessen(k.profil['numerisch'])
+    if len(numerisch) < 2:
+        return [], {}
+    korrelation = k.profil.get('korrelation')
+    werte = (k.df[numerisch].corr() if korrelation is None
+             else korrelation.loc[numerisch, numerisch]).to_numpy()
+    schwelle = getattr(CONFIG, 'KORRELATIONSSCHWELLE_HOCH', 0.7)
+    i, j = np.triu_indices(len(numerisch), k=1)
+    treffer = np.abs(werte[i, j]) > schwelle
+    zeilen = ["\n🔗 9. KORRELATIONEN (NUMERISCHE SPALTEN)", "-" * 40]
+    if treffer.any():
+        zeilen.append("🔥 Hohe Korrelationen (|r| > 0.7):")
+        zeilen += [f"  {numerisch[a]} ↔ {numerisch[b]}: {werte[a, b]:.3f}"
+                   for a, b in zip(i[treffer], j[treffer])]
+    else:
+        zeilen.append("✅ Keine sehr hohen Korrelationen gefunden")
+    return zeilen, {}
+
+
+def _erweitert(name: str, funktion):
+    """Kapselt eine erweiterte Analyse: Fehler erscheinen als Berichtszeile statt den Bericht abzubrechen."""
+    def abschnitt(k: BerichtsKontext):
+        numerisch = messgroessen(k.profil['numerisch'])
+        if len(numerisch) < 2:
+            return [], None
+        try:
+            return funktion(k, numerisch)
+        except Exception as e:
+            print(f"⚠️ Erweiterte Analyse-Fehler ({name}): {e}")
+            return [f"⚠️ Erweiterte Analyse fehlgeschlagen ({name}): {str(e)}"], {'fehler': str(e)}
+    return abschnitt
+
+
+def _mq_cluster(k: BerichtsKontext, numerisch: List[str]):
+    import mod_020_csv_analyzer as analyse
+    mq_spalten = [s for s in numerisch if 'mq' in s.lower() or 'gas' in s.lower()]
+    if len(mq_spalten) < 2:
+        return [], None
+    info = analyse.mq_sensor_clustering(k.df, mq_spalten, os.path.splitext(k.pfad)[0])
+    zeilen = []
+    if 'sensor_gruppen' in info:
+        zeilen.append("🎯 MQ-Sensor Clustering:")
+        zeilen += [f"   {gruppe}: {', '.join(sensoren)}" for gruppe, sensoren in info['sensor_gruppen'].items()]
+        if info.get('auswahl_methode') == 'silhouette':
+            zeilen.append(f"   k = {info['cluster_anzahl']} per Silhouette "
+                          f"({info['silhouette'][info['cluster_anzahl']]:.2f})")
+        else:
+            zeilen.append(f"   k = {info['cluster_anzahl']} per Ellbogen-Kriterium")
+    return zeilen, {s: info[s] for s in ('cluster_anzahl', 'sensor_gruppen', 'auswahl_methode') if s in info}
+
+
+def _pca(k: BerichtsKontext, numerisch: List[str]):
+    import mod_020_csv_analyzer as analyse
+    if len(numerisch) < 3:
+        return [], None
+    info = analyse.hauptkomponenten_analyse(k.df, numerisch, os.path.splitext(k.pfad)[0])
+    zeilen = []
+    if 'erklaerte_varianz' in info:
+        zeilen.append(f"\n📊 Hauptkomponentenanalyse ({info['quelle']}):")
+        zeilen += [f"   Komponente {i+1}: {varianz:.1%} Varianz" for i, varianz in enumerate(info['erklaerte_varianz'])]
+    return zeilen, {s: info[s] for s in ('erklaerte_varianz',) if s in info}
+
+
+def _zeitreihen(k: BerichtsKontext, numerisch: List[str]):
+    import mod_020_csv_analyzer as analyse
+    info = analyse.zeitreihen_veraenderungs_analyse(k.df, numerisch, os.path.splitext(k.pfad)[0])
+    zeilen = []
+    if 'variable_sensoren' in info:
+        zeilen.append(f"\n⏰ Variable Sensoren: {len(info['variable_sensoren'])}")
+        zeilen += [f"   {sensor} (hoch variabel)" for sensor in info['variable_sensoren'][:3]]
+    return zeilen, {s: info[s] for s in ('variable_sensoren',) if s in info}
+
+
+def _feature_selection(k: BerichtsKontext, numerisch: List[str]):
+    import mod_020_csv_analyzer as analyse
+    if len(numerisch) < 3:
+        return [], None
+    info = analyse.unabhaengige_sensoren_waehlen(k.df, numerisch, os.path.splitext(k.pfad)[0])
+    zeilen = []
+    if 'empfohlene_sensoren' in info:
+        zeilen.append("\n🎯 Empfohlene unabhängige Sensoren:")
+        zeilen += [f"   {sensor}" for sensor in info['empfohlene_sensoren'][:5]]
+    return zeilen, {s: info[s] for s in ('empfohlene_sensoren', 'unabhaengige_sensoren') if s in info}
+
+
+# Reihenfolge = Reihenfolge im Bericht
+ABSCHNITTE = [
+    ('grundlagen', _abschnitt_grundlagen),
+    ('spalten', _abschnitt_spalten),
+    ('kopf', _abschnitt_kopf),
+    ('info', _abschnitt_info),
+    ('nullwerte', _abschnitt_nullwerte),
+    ('numerisch', _abschnitt_numerisch),
+    ('kategorisch', _abschnitt_kategorisch),
+    ('zusatz', _abschnitt_zusatz),
+    ('korrelationen', _abschnitt_korrelationen),
+    ('mq_cluster', _erweitert('mq_cluster', _mq_cluster)),
+    ('pca_analyse', _erweitert('pca_analyse', _pca)),
+    ('zeitreihen_analyse', _erweitert('zeitreihen_analyse', _zeitreihen)),
+    ('feature_selection', _erweitert('feature_selection', _feature_selection)),
+]
+_ERWEITERT = ('mq_cluster', 'pca_analyse', 'zeitreihen_analyse', 'feature_selection')
+# Abschnitte 1-9 ohne die erweiterten Analysen von mod_020 (z.B. für csv_analyzer_10)
+BASISABSCHNITTE = [name for name, _ in ABSCHNITTE if name not in _ERWEITERT]
+
+
+def _aenderungszeit(pfad: str) -> Optional[float]:
+    return os.path.getmtime(pfad) if os.path.exists(pfad) else None
+
+
+def datei_hash(pfad: str, naeherung: bool = False) -> str:
+    """
+    Schlüssel des Berichts-Caches: Dateiinhalt, Abschnittsversion, Modus und
+    die Einstellungen, die in den Bericht eingehen (inkl. Stand der Archiv-PCA).
+    """
+    h = hashlib.sha1()
+    with open(pfad, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    einstellungen = (_VERSION, CONFIG.SEED, CONFIG.CSV_BERICHT['BEISPIELWERTE'],
+                     getattr(CONFIG, 'KORRELATIONSSCHWELLE_HOCH', 0.7),
+                     getattr(CONFIG, 'KORRELATIONSSCHWELLE_SEHR_HOCH', 0.8),
+                     getattr(CONFIG, 'PCA_KOMPONENTEN_ANZAHL', 3),
+                     getattr(CONFIG, 'VARIABILITAETSFAKTOR', 1.5),
+                     sorted(CONFIG.CLUSTERING.items()), CONFIG.ARCHIV_PCA['AUSSCHLUSS'],
+                     _aenderungszeit(CONFIG.ARCHIV_PCA['DATEI']), naeherung)
+    h.update(repr(einstellungen).encode())
+    return h.hexdigest()[:16]
+
+
+def _cache_laden(pfad: str) -> Dict[str, Tuple[List[str], Optional[Dict]]]:
+    try:
+        with open(pfad, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return {}
+
+
+def _cache_speichern(pfad: str, abschnitte: Dict) -> None:
+    os.makedirs(os.path.dirname(pfad), exist_ok=True)
+    tmp = pfad + '.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(abschnitte, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, pfad)
+
+
+def _zusammenfassung(ergebnisse: Dict[str, Optional[Dict]], numerisch: int, kategorisch: int) -> List[str]:
+    grundlagen = ergebnisse['grundlagen']
+    groesse = grundlagen['groesse']
+    vollstaendig = (groesse - ergebnisse['nullwerte']['nullen']) / groesse * 100 if groesse else 100.0
+    eindeutig = (1 - ergebnisse['zusatz']['duplikate'] / grundlagen['zeilen']) * 100 if grundlagen['zeilen'] else 100.0
+    zeilen = ["\n📈 11. ZUSAMMENFASSUNG", "-" * 40,
+              f"✅ Datenqualität: {vollstaendig:.1f}% vollständig",
+              f"📊 Datentypen: {numerisch} numerisch, {kategorisch} kategorisch",
+              f"🔍 Einzigartigkeit: {eindeutig:.1f}% eindeutige Zeilen"]
+
+    erweitert = {n: ergebnisse[n] for n in _ERWEITERT
+                 if ergebnisse.get(n) is not None and 'fehler' not in ergebnisse[n]}
+    if erweitert:
+        zeilen.append(f"🔬 Erweiterte Analysen: {len(erweitert)} Module")
+        empfehlungen = []
+        if 'mq_cluster' in erweitert:
+            empfehlungen.append(f"{erweitert['mq_cluster'].get('cluster_anzahl', 0)} MQ-Sensor-Gruppen identifiziert")
+        if 'feature_selection' in erweitert:
+            empfehlungen.append(f"{len(erweitert['feature_selection'].get('unabhaengige_sensoren', []))} "
+                                f"unabhängige Sensoren empfohlen")
+        if empfehlungen:
+            zeilen.append("💡 Analyse-Empfehlungen:")
+            zeilen += [f"   • {e}" for e in empfehlungen]
+    return zeilen
+
+
+def fuehre_abschnitte_aus(kontext: BerichtsKontext, namen: Optional[List[str]] = None,
+                          worker: Optional[int] = None) -> Dict[str, Tuple[List[str], Optional[Dict]]]:
+    """
+    Berechnet Abschnitte parallel in einem Thread-Pool.
+
+    :param kontext: Profilierte Datei (:func:`profiliere`)
+    :param namen: Abschnitte (Standard: alle aus ABSCHNITTE)
+    :param worker: Anzahl Threads (Standard: CSV_BERICHT['WORKER'])
+    :returns: Name → (Berichtszeilen, Ergebnis)
+    """
+    funktionen = dict(ABSCHNITTE)
+    namen = namen or list(funktionen)
+    with ThreadPoolExecutor(max_workers=worker or CONFIG.CSV_BERICHT['WORKER']) as pool:
+        laufend = {name: pool.submit(funktionen[name], kontext) for name in namen}
+        return {name: future.result() for name, future in laufend.items()}
+
+
+def erstelle_bericht(pfad: str, cache: Optional[bool] = None,
+                     worker: Optional[int] = None,
+                     naeherung: Optional[bool] = None) -> List[str]:
+    """
+    Erstellt die Zeilen des CSV-Analyseberichts.
+
+    Bereits zwischengespeicherte Abschnitte (gleicher Datei-Hash) werden
+    übernommen; nur wenn Abschnitte fehlen, wird die Datei eingelesen,
+    profiliert und die fehlenden Abschnitte parallel berechnet. Große
+    Dateien werden im Näherungsmodus gelesen (Fehlergrenzen im Bericht).
+
+    :param pfad: Pfad zur CSV-Datei
+    :param cache: Cache nutzen (Standard: CSV_BERICHT['CACHE'])
+    :param worker: Anzahl Threads (Standard: CSV_BERICHT['WORKER'])
+    :param naeherung: Näherungsmodus erzwingen/abschalten (Standard: nach Dateigröße)
+    :returns: Berichtszeilen (wie ``info_content`` in mod_020)
+    :raises FileNotFoundError: Datei existiert nicht
+    """
+    einstellungen = CONFIG.CSV_BERICHT
+    cache = einstellungen['CACHE'] if cache is None else cache
+    naeherung = naeherung_aktiv(pfad, naeherung)
+
+    cache_pfad = None
+    abschnitte = {}
+    if cache:
+        cache_pfad = os.path.join(einstellungen['CACHE_ORDNER'], f"{datei_hash(pfad, naeherung)}.pkl")
+        abschnitte = _cache_laden(cache_pfad)
+
+    fehlend = [(name, funktion) for name, funktion in ABSCHNITTE if name not in abschnitte]
+    if fehlend:
+        kontext = profiliere(pfad, naeherung)
+        abschnitte.update(fuehre_abschnitte_aus(kontext, [name for name, _ in fehlend], worker))
+        abschnitte['_typen'] = (len(kontext.profil['numerisch']), len(kontext.profil['kategorisch']))
+        if cache_pfad:
+            _cache_speichern(cache_pfad, abschnitte)
+    print(f"⚡ Bericht: {len(ABSCHNITTE) - len(fehlend)}/{len(ABSCHNITTE)} Abschnitte aus dem Cache")
+
+    zeilen = ["=" * 80,
+              f"CSV ANALYSE REPORT - {os.path.basename(pfad)}",
+              f"Erstellt am: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}",
+              "=" * 80]
+    for name, _ in ABSCHNITTE:
+        if name == _ERWEITERT[0] and abschnitte['_typen'][0] >= 2:
+            zeilen += ["\n🔬 10. ERWEITERTE SENSOR-ANALYSEN", "-" * 40]
+        zeilen += abschnitte[name][0]
+
+    ergebnisse = {name: abschnitte[name][1] for name, _ in ABSCHNITTE}
+    zeilen += _zusammenfassung(ergebnisse, *abschnitte['_typen'])
+    return zeilen
@@ -0,0 +1,203 @@
+"""
+csv_zeilenindex.py
+==================
+
+Zeilenindex über eine per mmap eingeblendete CSV-Datei für die Tabellenansicht.
+
+Die GUI hat bisher ganze CSV-Dateien per ``f.read()`` in ein ``tk.Text``
+geschrieben – bei Fahrten mit 100k Zeilen Hunderte MB und unbenutzbares
+Scrollen. Der Zeilenindex sucht einmal (vektorisiert, blockweise) alle
+Datensatzanfänge – Zeilenumbrüche innerhalb von Anführungszeichen zählen
+nicht; danach wird nur der gerade sichtbare Ausschnitt gelesen und
+geparst. Die Datei selbst bleibt im Betriebssystem-Cache.
+
+Features:
+- CsvZeilenIndex: Datensatzanfänge (quote-bewusst), Kopfzeile, Trennzeichen (, oder ;)
+- zeilen: beliebiger Ausschnitt als Liste von Feldlisten
+- suche_zeit: Binärsuche nach einem Zeitpunkt (sortierte Zeitspalte)
+- filtere_spalten: Spaltenauswahl über Suchbegriffe
+- Kontextmanager: ``with CsvZeilenIndex(pfad) as index:`` schließt mmap und Datei
+
+Abhängigkeiten:
+---------------
+- numpy, pandas (nur Zeitumwandlung)
+- Standardbibliothek: mmap, csv, io
+
+Autor: Frank Albrecht
+"""
+import io
+import csv
+import mmap
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+BLOCK_BYTES = 64 * 1024 * 1024
+
+
+class CsvZeilenIndex:
+    """
+    Einmal erstellter Index der Datensatzanfänge einer CSV-Datei.
+
+    Hält die Datei per mmap offen; mit :meth:`schliesse` bzw. als
+    Kontextmanager wieder freigeben.
+
+    :param pfad: Pfad zur CSV-Datei (UTF-8, erste Zeile ohne '#' = Kopfzeile)
+    :param encoding: Zeichenkodierung der Datei
+    """
+
+    def __init__(self, pfad: str, encoding: str = 'utf-8') -> None:
+        self.pfad = pfad
+        self.encoding = encoding
+        self._datei = open(pfad, 'rb')
+        self._mm = b''
+        try:
+            self._indiziere()
+        except BaseException:
+            self.schliesse()
+            raise
+
+    def _indiziere(self) -> None:
+        groesse = self._datei.seek(0, 2)
+        if groesse:
+            self._mm = mmap.mmap(self._datei.fileno(), 0, access=mmap.ACCESS_READ)
+        self.groesse = groesse
+
+        # Kommentarzeilen (# ...) vor der Kopfzeile überspringen, wie in den Rohlogs
+        kopf_start = 0
+        while kopf_start < groesse and self._mm[kopf_start:kopf_start + 1] == b'#':
+            ende = self._mm.find(b'\n', kopf_start)
+            kopf_start = groesse if ende < 0 else ende + 1
+
+        # Datensatzanfänge: Position nach jedem '\n' außerhalb von Anführungszeichen
+        # (blockweise, ohne die Datei zu kopieren). Ein Umbruch liegt in einem
+        # Feld, wenn davor eine ungerade Anzahl '"' steht; "" zählt doppelt
+        # und ändert die Parität nicht.
+        teile = [np.array([kopf_start], dtype=np.int64)]
+        anfuehrungszeichen = 0
+        for start in range(kopf_start, groesse, BLOCK_BYTES):
+            block = np.frombuffer(self._mm, dtype=np.uint8, count=min(BLOCK_BYTES, groesse - start),
+                                  offset=start)
+            umbrueche = np.flatnonzero(block == 10)
+            quotes = np.flatnonzero(block == 34)
+            if len(quotes) or anfuehrungszeichen % 2:
+                davor = anfuehrungszeichen + np.searchsorted(quotes, umbrueche)
+                umbrueche = umbrueche[davor % 2 == 0]
+                anfuehrungszeichen += len(quotes)
+            teile.append(umbrueche.astype(np.int64) + start + 1)
+        anfaenge = np.concatenate(teile)
+        if len(anfaenge) > 1 and anfaenge[-1] >= groesse:
+            anfaenge = anfaenge[:-1]
+        self._anfaenge = anfaenge
+
+        self._erste = 1
+        kopf = self._roh(0) if groesse else ''
+        self.trennzeichen = ';' if kopf.count(';') > kopf.count(',') else ','
+        self.spalten = next(csv.reader([kopf], delimiter=self.trennzeichen)) if kopf else []
+
+    def __enter__(self) -> 'CsvZeilenIndex':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.schliesse()
+
+    def __len__(self) -> int:
+        """Anzahl der Datensätze (ohne Kopfzeile)."""
+        return max(len(self._anfaenge) - self._erste, 0)
+
+    def _roh(self, zeile: int) -> str:
+        start = self._anfaenge[zeile]
+        ende = self._anfaenge[zeile + 1] if zeile + 1 < len(self._anfaenge) else self.groesse
+        return self._mm[start:ende].decode(self.encoding, errors='replace').rstrip('\r\n')
+
+    def zeilen(self, start: int, anzahl: int,
+               spalten: Optional[Sequence[int]] = None) -> List[List[str]]:
+        """
+        Liest und parst nur die Datenzeilen ``start`` bis ``start + anzahl``.
+
+        :param start: Erste Datenzeile (0 = erste Zeile nach dem Kopf)
+        :param anzahl: Anzahl Zeilen
+        :param spalten: Optionale Spaltenindizes (Standard: alle)
+        :returns: Liste von Feldlisten
+        """
+        start = max(0, min(start, len(self)))
+        ende = min(start + anzahl, len(self))
+        if ende <= start:
+            return []
+        von = self._anfaenge[start + self._erste]
+        bis = self._anfaenge[ende + self._erste] if ende + self._erste < len(self._anfaenge) else self.groesse
+        text = self._mm[von:bis].decode(self.encoding, errors='replace')
+        # StringIO statt splitlines: der Ausschnitt umfasst ganze Datensätze, Zeilenumbrüche
+        # in Anführungszeichen bleiben im Feld
+        zeilen = list(csv.reader(io.StringIO(text, newline=''), delimiter=self.trennzeichen))
+        if spalten is not None:
+            zeilen = [[z[i] if i < len(z) else '' for i in spalten] for z in zeilen]
+        return zeilen
+
+    def zeitspalte(self) -> Optional[int]:
+        """Index der Zeitspalte (DateTime, sonst GPS_DateTime) oder None."""
+        for name in ('DateTime', 'GPS_DateTime'):
+            if name in self.spalten:
+                return self.spalten.index(name)
+        return None
+
+    def _zeit(self, zeile: int, spalte: int) -> pd.Timestamp:
+        felder = self.zeilen(zeile, 1)
+        wert = felder[0][spalte] if felder and spalte < len(felder[0]) else ''
+        return pd.to_datetime(wert.replace(' MESZ', '').replace(' UTC', ''), errors='coerce')
+
+    def suche_zeit(self, zeitpunkt) -> Optional[int]:
+        """
+        Erste Zeile mit Zeit >= ``zeitpunkt`` per Binärsuche (liest nur log2(N) Zeilen).
+
+        Zeilen ohne gültige Zeit werden übersprungen; die Zeitspalte muss
+        aufsteigend sortiert sein. Eine reine Uhrzeit wird auf das Datum der
+        ersten Zeile bezogen.
+
+        :param zeitpunkt: Zeitpunkt (Text oder Timestamp)
+        :returns: Zeilenindex oder None ohne Zeitspalte/ungültige Eingabe
+        """
+        spalte = self.zeitspalte()
+        if spalte is None or not len(self):
+            return None
+        ziel = pd.to_datetime(zeitpunkt, errors='coerce')
+        if pd.isna(ziel):
+            return None
+        if isinstance(zeitpunkt, str) and len(zeitpunkt.strip()) <= 8:
+            erste = next((self._zeit(i, spalte) for i in range(min(len(self), 50))
+                          if pd.notna(self._zeit(i, spalte))), None)
+            if erste is not None:
+                ziel = pd.Timestamp.combine(erste.date(), ziel.time())
+        unten, oben = 0, len(self)
+        while unten < oben:
+            mitte = (unten + oben) // 2
+            probe = mitte
+            wert = self._zeit(probe, spalte)
+            while pd.isna(wert) and probe + 1 < oben:
+                probe += 1
+                wert = self._zeit(probe, spalte)
+            if pd.isna(wert) or wert >= ziel:
+                oben = mitte
+            else:
+                unten = probe + 1
+        return min(unten, len(self) - 1)
+
+    def filtere_spalten(self, filter_text: str) -> List[int]:
+        """
+        Spaltenindizes, deren Name einen der kommagetrennten Begriffe enthält.
+
+        :param filter_text: z.B. ``"MQ, GPS_Lat"`` (leer = alle Spalten)
+        """
+        begriffe = [b.strip().lower() for b in filter_text.split(',') if b.strip()]
+        if not begriffe:
+            return list(range(len(self.spalten)))
+        return [i for i, name in enumerate(self.spalten)
+                if any(b in name.lower() for b in begriffe)]
+
+    def schliesse(self) -> None:
+        """Gibt mmap und Dateihandle frei (mehrfacher Aufruf unschädlich)."""
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._mm = b''
+        self._datei.close()
@@ -0,0 +1,152 @@
+"""
+dashboard_daten.py
+==================
+
+Serverseitige Ausdünnung der Zeitreihen für das Dash-Dashboard (sensor_dashboard.py).
+
+Bisher wurde bei jeder Auswahl ``px.line``/``px.scatter_mapbox`` über den
+gesamten DataFrame gerechnet und jeder Messpunkt an den Browser geschickt.
+Hier liegen Zeit, Sensorwerte und GPS einmal als numpy-Arrays vor; für einen
+Zeitbereich werden je Bucket nur Minimum und Maximum ausgewählt
+(Min/Max-Ausdünnung – Spitzen bleiben sichtbar). Ist der Bereich klein
+genug, werden alle Rohpunkte geliefert (volle Auflösung beim Zoomen).
+Zeitbereiche werden auf ein festes Raster gerundet, damit wiederholte
+Zooms auf ähnliche Bereiche Cache-Treffer ergeben.
+
+Features:
+- minmax_indizes: Min/Max je Bucket (vektorisiert, NaN-fest)
+- SensorReihen: Arrays der Fahrt (auch verzögert geladen), bereich() für Zeitfenster,
+  ausschnitt() mit LRU-Cache
+
+Abhängigkeiten:
+---------------
+- numpy, pandas
+- config.CONFIG (DASHBOARD)
+
+Autor: Frank Albrecht
+"""
+import os
+import sys
+from functools import lru_cache
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import CONFIG
+
+
+def minmax_indizes(werte: np.ndarray, start: int, ende: int, buckets: int) -> np.ndarray:
+    """
+    Indizes von Minimum und Maximum je Bucket im Bereich ``[start, ende)``.
+
+    Enthält der Bereich höchstens ``2 * buckets`` Punkte, werden alle
+    Indizes geliefert. Buckets nur mit NaN fallen weg.
+
+    :param werte: Messwerte (float)
+    :param start: Erster Index
+    :param ende: Index hinter dem letzten Punkt
+    :param buckets: Anzahl Buckets (Ergebnis hat höchstens 2 * buckets Punkte)
+    :returns: Aufsteigend sortierte Indizes
+    """
+    anzahl = ende - start
+    if anzahl <= 2 * buckets:
+        return np.arange(start, ende)
+    groesse = -(-anzahl // buckets)
+    zeilen = -(-anzahl // groesse)
+    block = np.full(zeilen * groesse, np.nan)
+    block[:anzahl] = werte[start:ende]
+    block = block.reshape(zeilen, groesse)
+    gueltig = ~np.isnan(block)
+    belegt = gueltig.any(axis=1)
+    i_min = np.where(gueltig, block, np.inf).argmin(axis=1)
+    i_max = np.where(gueltig, block, -np.inf).argmax(axis=1)
+    basis = start + np.arange(zeilen) * groesse
+    return np.unique(np.concatenate([(basis + i_min)[belegt], (basis + i_max)[belegt]]))
+
+
+class SensorReihen:
+    """
+    Zeitreihen einer Fahrt als Arrays mit gecachten Ausschnitten.
+
+    Die Sensorwerte dürfen eine verzögert ladende Zuordnung sein (z.B.
+    Spalten aus dem Fahrtenkatalog), dann wird eine Spalte erst beim ersten
+    Zugriff gelesen.
+
+    :param zeit: Zeitstempel (datetime64[ns], aufsteigend sortiert)
+    :param werte: Zuordnung Sensorname -> Messwerte (gleiche Länge wie ``zeit``)
+    :param lat: Optionale GPS-Breite
+    :param lon: Optionale GPS-Länge
+    :param einstellungen: Überschreibt CONFIG.DASHBOARD
+    """
+
+    def __init__(self, zeit: np.ndarray, werte: Mapping[str, np.ndarray],
+                 lat: Optional[np.ndarray] = None, lon: Optional[np.ndarray] = None,
+                 einstellungen: Optional[Dict] = None) -> None:
+        self.einstellungen = {**CONFIG.DASHBOARD, **(einstellungen or {})}
+        self.zeit = zeit
+        self.werte = werte
+        self.hat_gps = lat is not None and lon is not None
+        if self.hat_gps:
+            self.lat, self.lon = lat, lon
+            # 0/0 = kein GPS-Fix
+            self.gps_gueltig = np.isfinite(lat) & np.isfinite(lon) & (lat != 0) & (lon != 0)
+        self.ausschnitt = lru_cache(maxsize=self.einstellungen['CACHE_GROESSE'])(self._ausschnitt)
+
+    @classmethod
+    def aus_dataframe(cls, df: pd.DataFrame, sensoren: Sequence[str],
+                      einstellungen: Optional[Dict] = None) -> 'SensorReihen':
+        """
+        Übernimmt ``DateTime``, Sensorspalten und ggf. GPS_Lat/GPS_Lon aus einem DataFrame.
+
+        :param sensoren: Anzuzeigende Sensorspalten (fehlende werden ignoriert)
+        """
+        zeit = pd.to_datetime(df['DateTime'], errors='coerce').to_numpy('datetime64[ns]')
+        ordnung = np.argsort(zeit, kind='stable')
+        ordnung = ordnung[~np.isnat(zeit[ordnung])]
+
+        def spalte(name):
+            return pd.to_numeric(df[name], errors='coerce').to_numpy(float)[ordnung]
+
+        gps = 'GPS_Lat' in df.columns and 'GPS_Lon' in df.columns
+        return cls(zeit[ordnung], {s: spalte(s) for s in sensoren if s in df.columns},
+                   spalte('GPS_Lat') if gps else None, spalte('GPS_Lon') if gps else None,
+                   einstellungen)
+
+    def __len__(self) -> int:
+        return len(self.zeit)
+
+    @property
+    def sensoren(self):
+        return list(self.werte)
+
+    def bereich(self, von=None, bis=None) -> Tuple[int, int]:
+        """
+        Indexbereich für ein Zeitfenster, auf das Cache-Raster gerundet.
+
+        :param von: Beginn (Text/Timestamp, None = Anfang)
+        :param bis: Ende (Text/Timestamp, None = Ende)
+        :returns: (start, ende) mit ``ende`` exklusiv
+        """
+        n = len(self)
+        start = 0 if von is None else int(np.searchsorted(self.zeit, pd.Timestamp(von).to_datetime64()))
+        ende = n if bis is None else int(np.searchsorted(self.zeit, pd.Timestamp(bis).to_datetime64(),
+                                                          side='right'))
+        raster = max(1, n // self.einstellungen['ZIEL_PUNKTE'])
+        start = max(0, (start - 1) // raster * raster)
+        ende = min(n, -(-(ende + 1) // raster) * raster)
+        return start, max(ende, start)
+
+    def _ausschnitt(self, sensor: str, start: int, ende: int) -> Tuple[np.ndarray, np.ndarray]:
+        werte = self.werte[sensor]
+        linie = minmax_indizes(werte, start, ende, self.einstellungen['ZIEL_PUNKTE'] // 2)
+        if not self.hat_gps:
+            return linie, np.array([], dtype=np.int64)
+        karte = minmax_indizes(werte, start, ende, self.einstellungen['KARTE_PUNKTE'] // 2)
+        return linie, karte[self.gps_gueltig[karte]]
+
+    def vorberechnen(self) -> None:
+        """Füllt den Cache mit der Gesamtansicht aller Sensoren."""
+        for sensor in self.werte:
+            self.ausschnitt(sensor, 0, len(self))
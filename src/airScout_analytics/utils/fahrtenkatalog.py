@@ -0,0 +1,315 @@
+"""
+fahrtenkatalog.py
+=================
+
+Katalog aller fertigen Fahrten mit spaltenweiser Ablage für das Dashboard.
+
+Das Dashboard hat bisher eine fest eingetragene CSV beim Import komplett in
+den Speicher gelesen. Hier wird jede Fahrt (nach mod_042) einmal nach
+Zeit sortiert und spaltenweise als ``.npy`` abgelegt; ein SQLite-Katalog
+führt Name, Zeitraum, Zeilenzahl, Spalten und die aktuelle Version. Beim
+Öffnen einer Fahrt wird nichts gelesen – Spalten werden erst beim ersten
+Zugriff per mmap eingeblendet, und ein LRU-Cache begrenzt die Zahl offener
+Fahrten.
+
+Eine erneut abgelegte Fahrt wird nie über die alten Dateien geschrieben: sie
+bekommt einen neuen Versionsordner, erst danach wird die Version im Katalog
+umgestellt. Der Cache ist nach (Fahrt, Version) geschlüsselt und öffnet nach
+einem Neuschreiben die neue Version. Alte Versionen werden gelöscht, sobald
+das möglich ist (unter Windows erst, wenn sie nicht mehr eingeblendet sind).
+
+Ablage:
+- ``<ORDNER>/katalog.sqlite``: Tabelle ``fahrten``
+- ``<ORDNER>/<fahrt>/v<version>/zeit.npy`` (int64, ns) und ``.../<nr>.npy`` je Spalte
+
+Features:
+- FahrtenKatalog: fuege_fahrt_hinzu, einlesen (CSV-Muster), fahrten, spalte, reihen
+- FahrtenCache: begrenzter LRU-Cache geöffneter Fahrten (thread-sicher)
+- fahrt_aus_pfad: Fahrtname aus einem Pipeline-Dateinamen
+- aktualisiere_fahrtenkatalog: Aufruf aus mod_042 (aktualisiert auch die Archiv-PCA)
+- CLI: ``python utils/fahrtenkatalog.py einlesen [muster]``
+
+Abhängigkeiten:
+---------------
+- numpy, pandas, sqlite3
+- config.CONFIG (FAHRTENKATALOG)
+
+Autor: Frank Albrecht
+"""
+import os
+import re
+import sys
+import glob
+import json
+import shutil
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import CONFIG
+from utils.dashboard_daten import SensorReihen
+
+
+def fahrt_aus_pfad(pfad: str) -> str:
+    """
+    Fahrtname aus einem Dateinamen der Pipeline: der Teil zwischen ``feature_``
+    und ``_umgerechnet``, sonst der Dateiname ohne Endung.
+    """
+    name = os.path.splitext(os.path.basename(str(pfad)))[0]
+    treffer = re.match(r'feature_(.+?)_umgerechnet', name)
+    return treffer.group(1) if treffer else name
+
+
+class _Spalten(Mapping):
+    """Verzögert geladene Spalten einer Fahrt (np.load mit mmap)."""
+
+    def __init__(self, ordner: str, namen: List[str]) -> None:
+        self.ordner = ordner
+        self._nummern = {name: i for i, name in enumerate(namen)}
+        self._geladen: Dict[str, np.ndarray] = {}
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in self._geladen:
+            pfad = os.path.join(self.ordner, f"{self._nummern[name]:03d}.npy")
+            self._geladen[name] = np.load(pfad, mmap_mode='r')
+        return self._geladen[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._nummern)
+
+    def __len__(self) -> int:
+        return len(self._nummern)
+
+
+class FahrtenKatalog:
+    """
+    SQLite-Katalog plus spaltenweise Ablage aller Fahrten.
+
+    Jede Methode öffnet eine eigene kurze Verbindung, damit der Katalog aus
+    den Worker-Threads des Dash-Servers genutzt werden kann.
+
+    :param ordner: Ablageordner (Standard aus CONFIG.FAHRTENKATALOG)
+    """
+
+    def __init__(self, ordner: Optional[str] = None) -> None:
+        self.ordner = ordner or CONFIG.FAHRTENKATALOG['ORDNER']
+        os.makedirs(self.ordner, exist_ok=True)
+        self._db_pfad = os.path.join(self.ordner, 'katalog.sqlite')
+        with closing(sqlite3.connect(self._db_pfad)) as db:
+            db.execute("CREATE TABLE IF NOT EXISTS fahrten (fahrt TEXT PRIMARY KEY, quelle TEXT,"
+                       " quelle_mtime REAL, zeilen INTEGER, beginn TEXT, ende TEXT,"
+                       " spalten TEXT, hat_gps INTEGER, version INTEGER DEFAULT 0)")
+            # Kataloge ohne Versionsspalte: Version 0 = Dateien direkt in <fahrt>/
+            if 'version' not in [z[1] for z in db.execute("PRAGMA table_info(fahrten)")]:
+                db.execute("ALTER TABLE fahrten ADD COLUMN version INTEGER DEFAULT 0")
+            db.commit()
+
+    def _zeile(self, fahrt: str) -> Optional[tuple]:
+        with closing(sqlite3.connect(self._db_pfad)) as db:
+            return db.execute("SELECT quelle_mtime, spalten, hat_gps, version FROM fahrten WHERE fahrt=?",
+                              (fahrt,)).fetchone()
+
+    def _versionsordner(self, fahrt: str, version: int) -> str:
+        if not version:
+            return os.path.join(self.ordner, fahrt)
+        return os.path.join(self.ordner, fahrt, f"v{version}")
+
+    def version(self, fahrt: str) -> Optional[int]:
+        """Aktuelle Version einer Fahrt (None, wenn sie nicht im Katalog ist)."""
+        zeile = self._zeile(fahrt)
+        return None if zeile is None else int(zeile[3] or 0)
+
+    def _aufraeumen(self, fahrt: str, version: int) -> None:
+        """
+        Löscht alle älteren Versionen einer Fahrt. Was noch eingeblendet ist
+        (Windows), bleibt liegen und wird beim nächsten Ablegen erneut versucht.
+        """
+        ordner = os.path.join(self.ordner, fahrt)
+        aktuell = f"v{version}"
+        for eintrag in os.listdir(ordner):
+            if eintrag == aktuell:
+                continue
+            pfad = os.path.join(ordner, eintrag)
+            if os.path.isdir(pfad):
+                shutil.rmtree(pfad, ignore_errors=True)
+            elif eintrag.endswith('.npy'):
+                try:
+                    os.remove(pfad)  # Version 0 (Dateien direkt im Fahrtordner)
+                except OSError:
+                    pass
+
+    def fahrten(self) -> pd.DataFrame:
+        """Alle Fahrten (neueste zuerst) – liest nur den Katalog."""
+        with closing(sqlite3.connect(self._db_pfad)) as db:
+            return pd.read_sql_query(
+                "SELECT fahrt, beginn, ende, zeilen, hat_gps FROM fahrten ORDER BY beginn DESC", db)
+
+    def fuege_fahrt_hinzu(self, fahrt: str, df: pd.DataFrame, quelle: Optional[str] = None) -> bool:
+        """
+        Legt eine Fahrt spaltenweise ab; eine vorhandene Fahrt wird ersetzt.
+
+        :param fahrt: Eindeutiger Fahrtname (z.B. context.filename_ohne_ext)
+        :param df: Fahrt mit ``DateTime`` und Messspalten
+        :param quelle: Optionale Quelldatei (für :meth:`einlesen`)
+        :returns: True bei Erfolg
+        """
+        if 'DateTime' not in df.columns:
+            print(f"⚠️ Fahrtenkatalog: Fahrt {fahrt} hat keine Spalte 'DateTime'.")
+            return False
+        zeit = pd.to_datetime(df['DateTime'], errors='coerce').to_numpy('datetime64[ns]')
+        ordnung = np.argsort(zeit, kind='stable')
+        ordnung = ordnung[~np.isnat(zeit[ordnung])]
+        if not len(ordnung):
+            print(f"⚠️ Fahrtenkatalog: Fahrt {fahrt} hat keine gültigen Zeitstempel.")
+            return False
+
+        # Neue Version in einen temporären Ordner schreiben; die bisherige
+        # Version bleibt unberührt, bis der Katalog umgestellt ist
+        vorher = self.version(fahrt)
+        version = (vorher or 0) + 1
+        ziel = self._versionsordner(fahrt, version)
+        temp = f"{ziel}.tmp"
+        for rest in (temp, ziel):  # Reste eines abgebrochenen Laufs
+            shutil.rmtree(rest, ignore_errors=True)
+        os.makedirs(temp)
+        np.save(os.path.join(temp, 'zeit.npy'), zeit[ordnung].view(np.int64))
+        namen = []
+        for spalte in df.columns:
+            if spalte == 'DateTime':
+                continue
+            werte = pd.to_numeric(df[spalte], errors='coerce').to_numpy(float)[ordnung]
+            if np.isnan(werte).all():
+                continue  # Text- oder leere Spalte
+            np.save(os.path.join(temp, f"{len(namen):03d}.npy"), werte)
+            namen.append(spalte)
+        os.replace(temp, ziel)
+
+        beginn, ende = pd.Timestamp(zeit[ordnung[0]]), pd.Timestamp(zeit[ordnung[-1]])
+        mtime = os.path.getmtime(quelle) if quelle and os.path.exists(quelle) else None
+        with closing(sqlite3.connect(self._db_pfad)) as db:
+            db.execute("INSERT OR REPLACE INTO fahrten (fahrt, quelle, quelle_mtime, zeilen, beginn,"
+                       " ende, spalten, hat_gps, version) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                       (fahrt, quelle, mtime, int(len(ordnung)), beginn.isoformat(sep=' '),
+                        ende.isoformat(sep=' '), json.dumps(namen),
+                        int('GPS_Lat' in namen and 'GPS_Lon' in namen), version))
+            db.commit()
+        self._aufraeumen(fahrt, version)
+        print(f"✅ Fahrtenkatalog: Fahrt {fahrt} abgelegt ({len(ordnung)} Zeilen, {len(namen)} Spalten, "
+              f"Version {version})")
+        return True
+
+    def einlesen(self, muster: Optional[str] = None) -> int:
+        """
+        Nimmt alle neuen oder geänderten CSV-Dateien eines Musters auf.
+
+        Der Fahrtname ist der Teil zwischen ``feature_`` und ``_umgerechnet``
+        (wie von mod_042 geschrieben), sonst der Dateiname.
+
+        :param muster: Glob-Muster (Standard aus CONFIG.FAHRTENKATALOG)
+        :returns: Anzahl neu aufgenommener Fahrten
+        """
+        neu = 0
+        for pfad in sorted(glob.glob(muster or CONFIG.FAHRTENKATALOG['EINLESEN_MUSTER'])):
+            fahrt = fahrt_aus_pfad(pfad)
+            zeile = self._zeile(fahrt)
+            if zeile and zeile[0] == os.path.getmtime(pfad):
+                continue
+            try:
+                neu += self.fuege_fahrt_hinzu(fahrt, pd.read_csv(pfad, low_memory=False), quelle=pfad)
+            except Exception as e:
+                print(f"❌ Fahrtenkatalog: {pfad} konnte nicht gelesen werden: {e}")
+        return neu
+
+    def spalten(self, fahrt: str) -> Mapping[str, np.ndarray]:
+        """Alle Messspalten einer Fahrt als verzögert ladende Zuordnung."""
+        zeile = self._zeile(fahrt)
+        if zeile is None:
+            raise KeyError(f"Fahrt {fahrt} ist nicht im Katalog")
+        return _Spalten(self._versionsordner(fahrt, int(zeile[3] or 0)), json.loads(zeile[1]))
+
+    def reihen(self, fahrt: str, sensoren: Optional[List[str]] = None) -> SensorReihen:
+        """
+        Öffnet eine Fahrt für das Dashboard; gelesen wird erst beim Zugriff.
+
+        :param fahrt: Fahrtname aus :meth:`fahrten`
+        :param sensoren: Optionale Auswahl der Sensorspalten (Standard: alle)
+        """
+        spalten = self.spalten(fahrt)
+        zeit = np.load(os.path.join(spalten.ordner, 'zeit.npy'), mmap_mode='r').view('datetime64[ns]')
+        gps = 'GPS_Lat' in spalten and 'GPS_Lon' in spalten
+        if sensoren is not None:
+            werte = {s: spalten[s] for s in sensoren if s in spalten}
+        else:
+            werte = spalten
+        return SensorReihen(zeit, werte, spalten['GPS_Lat'] if gps else None,
+                            spalten['GPS_Lon'] if gps else None)
+
+
+class FahrtenCache:
+    """
+    Begrenzter LRU-Cache geöffneter Fahrten, geschlüsselt nach (Fahrt, Version).
+
+    Jeder Zugriff fragt die aktuelle Version im Katalog ab; wurde die Fahrt
+    inzwischen neu abgelegt, wird die neue Version geöffnet und die alte
+    verworfen.
+
+    :param katalog: Fahrtenkatalog
+    :param max_fahrten: Maximal gleichzeitig offene Fahrten (Standard aus CONFIG)
+    """
+
+    def __init__(self, katalog: FahrtenKatalog, max_fahrten: Optional[int] = None) -> None:
+        self.katalog = katalog
+        self.max_fahrten = max_fahrten or CONFIG.FAHRTENKATALOG['MAX_FAHRTEN']
+        self._offen: 'OrderedDict[Tuple[str, int], SensorReihen]' = OrderedDict()
+        self._sperre = threading.Lock()
+
+    def hole(self, fahrt: str) -> SensorReihen:
+        version = self.katalog.version(fahrt)
+        if version is None:
+            raise KeyError(f"Fahrt {fahrt} ist nicht im Katalog")
+        schluessel = (fahrt, version)
+        with self._sperre:
+            if schluessel in self._offen:
+                self._offen.move_to_end(schluessel)
+                return self._offen[schluessel]
+        reihen = self.katalog.reihen(fahrt)
+        with self._sperre:
+            for veraltet in [s for s in self._offen if s[0] == fahrt and s != schluessel]:
+                del self._offen[veraltet]
+            self._offen[schluessel] = reihen
+            self._offen.move_to_end(schluessel)
+            while len(self._offen) > self.max_fahrten:
+                self._offen.popitem(last=False)
+        return reihen
+
+
+def aktualisiere_fahrtenkatalog(fahrt: str, df: pd.DataFrame, quelle: Optional[str] = None) -> bool:
+    """
+    Legt eine fertige Fahrt (nach mod_042) im Standard-Katalog ab und rechnet
+    sie in die Archiv-PCA ein.
+    """
+    if not CONFIG.FAHRTENKATALOG['AKTIV']:
+        return False
+    if not FahrtenKatalog().fuege_fahrt_hinzu(fahrt, df, quelle=quelle):
+        return False
+    from utils.archiv_pca import ergaenze_archiv_pca  # verzögert: archiv_pca importiert dieses Modul
+    try:
+        ergaenze_archiv_pca(fahrt, df)
+    except Exception as e:
+        print(f"⚠️ Archiv-PCA konnte nicht aktualisiert werden: {e}")
+    return True
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == 'einlesen':
+        katalog = FahrtenKatalog()
+        anzahl = katalog.einlesen(sys.argv[2] if len(sys.argv) > 2 else None)
+        print(f"✅ {anzahl} Fahrten neu aufgenommen, {len(katalog.fahrten())} im Katalog ({katalog.ordner})")
+    else:
+        print("Aufruf: python utils/fahrtenkatalog.py einlesen [muster]")
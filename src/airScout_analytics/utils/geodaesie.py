@@ -0,0 +1,184 @@
+"""
+geodaesie.py
+============
+
+Vektorisierte Geodäsie für GPS-Tracks (ganze NumPy-Arrays statt Zeilenschleifen).
+
+gps_analysis und mod_040 hatten jeweils eine eigene skalare Haversine-Funktion,
+die in Python-Schleifen für jedes Punktpaar aufgerufen wurde. Dieses Modul
+bündelt alle Track-Berechnungen; eine Fahrt mit 100k Punkten ist damit in
+wenigen Millisekunden ausgewertet.
+
+Features:
+- haversine_m: Großkreisdistanz mit Broadcasting (Punkt↔Punkt, Punkt↔Liste)
+- schrittdistanzen_m: Distanzen entlang des Tracks
+- geschwindigkeit_kmh: Segmentgeschwindigkeit
+- erkenne_stopps: Standphasen über Geschwindigkeit und Mindestdauer
+- lokale_meter: lokale Meter-Ebene für Karten/Interpolation
+- streckenmetriken: alle Kennzahlen einer Fahrt in einem Aufruf
+
+Abhängigkeiten:
+---------------
+- numpy, pandas
+- config.CONFIG (GEODAESIE)
+
+Autor: Frank Albrecht
+"""
+import os
+import sys
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import CONFIG
+
+ERDRADIUS_M = 6371000.0
+METER_PRO_GRAD_LAT = 110540.0
+METER_PRO_GRAD_LON = 111320.0
+
+
+def haversine_m(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """
+    Großkreisdistanz in Metern, elementweise mit NumPy-Broadcasting.
+
+    :param lat1: Breite(n) Punkt 1 in Grad
+    :param lon1: Länge(n) Punkt 1 in Grad
+    :param lat2: Breite(n) Punkt 2 in Grad
+    :param lon2: Länge(n) Punkt 2 in Grad
+    :returns: Distanzen in Metern (NaN, wenn eine Koordinate fehlt)
+    :example:
+
+        >>> float(haversine_m(49.35, 8.14, 49.36, 8.14))
+        1111.95...
+
+    """
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = np.radians(np.asarray(lon2, dtype=float) - np.asarray(lon1, dtype=float))
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return 2 * ERDRADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def schrittdistanzen_m(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """
+    Distanz jedes Punktes zu seinem Vorgänger in Metern.
+
+    :param lat: Breiten in Grad
+    :param lon: Längen in Grad
+    :returns: Array gleicher Länge; erster Wert 0, NaN bei fehlender Koordinate
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    schritte = np.zeros(len(lat))
+    if len(lat) > 1:
+        schritte[1:] = haversine_m(lat[:-1], lon[:-1], lat[1:], lon[1:])
+    return schritte
+
+
+def geschwindigkeit_kmh(lat: np.ndarray, lon: np.ndarray, zeit_s: np.ndarray) -> np.ndarray:
+    """
+    Segmentgeschwindigkeit zum Vorgänger in km/h.
+
+    :param lat: Breiten in Grad
+    :param lon: Längen in Grad
+    :param zeit_s: Zeitstempel in Sekunden (monoton, z.B. seit Fahrtbeginn)
+    :returns: Array gleicher Länge; NaN für den ersten Punkt und Zeitsprünge ≤ 0
+    """
+    zeit_s = np.asarray(zeit_s, dtype=float)
+    dt = np.full(len(zeit_s), np.nan)
+    if len(zeit_s) > 1:
+        dt[1:] = np.diff(zeit_s)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(dt > 0, schrittdistanzen_m(lat, lon) / dt * 3.6, np.nan)
+
+
+def erkenne_stopps(geschwindigkeit: np.ndarray, zeit_s: np.ndarray,
+                   max_kmh: Optional[float] = None,
+                   min_dauer_s: Optional[float] = None) -> np.ndarray:
+    """
+    Markiert Standphasen: zusammenhängende Punkte unterhalb ``max_kmh``,
+    die mindestens ``min_dauer_s`` andauern.
+
+    :param geschwindigkeit: Geschwindigkeit je Punkt in km/h (NaN zählt als Stand)
+    :param zeit_s: Zeitstempel in Sekunden
+    :param max_kmh: Geschwindigkeitsgrenze (Standard aus CONFIG.GEODAESIE)
+    :param min_dauer_s: Mindestdauer einer Standphase (Standard aus CONFIG)
+    :returns: Bool-Array (True = Punkt liegt in einer Standphase)
+    """
+    einstellungen = CONFIG.GEODAESIE
+    max_kmh = einstellungen['STOPP_MAX_KMH'] if max_kmh is None else max_kmh
+    min_dauer_s = einstellungen['STOPP_MIN_DAUER_S'] if min_dauer_s is None else min_dauer_s
+    zeit_s = np.asarray(zeit_s, dtype=float)
+    langsam = ~(np.asarray(geschwindigkeit, dtype=float) >= max_kmh)
+    if not len(langsam):
+        return langsam
+
+    # Läufe gleicher Werte über Wechselstellen bestimmen (Run-Length-Encoding)
+    wechsel = np.flatnonzero(np.diff(langsam.astype(np.int8))) + 1
+    starts = np.concatenate([[0], wechsel])
+    enden = np.concatenate([wechsel, [len(langsam)]]) - 1
+    dauer = zeit_s[enden] - zeit_s[starts]
+    lauf_ist_stopp = langsam[starts] & (dauer >= min_dauer_s)
+    return np.repeat(lauf_ist_stopp, enden - starts + 1)
+
+
+def lokale_meter(lons: np.ndarray, lats: np.ndarray, lat0: float) -> np.ndarray:
+    """
+    Projiziert Grad-Koordinaten auf eine lokale Meter-Ebene (N x 2).
+
+    Für Ausschnitte von wenigen Kilometern ausreichend genau und deutlich
+    schneller als eine echte Kartenprojektion.
+
+    :param lons: Längen in Grad
+    :param lats: Breiten in Grad
+    :param lat0: Bezugsbreite (z.B. Mittelwert des Tracks)
+    :returns: Array (N x 2) mit x/y in Metern
+    """
+    x = np.asarray(lons, dtype=float) * METER_PRO_GRAD_LON * np.cos(np.radians(lat0))
+    y = np.asarray(lats, dtype=float) * METER_PRO_GRAD_LAT
+    return np.column_stack([x, y])
+
+
+def streckenmetriken(lat: np.ndarray, lon: np.ndarray,
+                     zeit_s: Optional[np.ndarray] = None) -> Dict[str, float]:
+    """
+    Berechnet alle Track-Kennzahlen einer Fahrt in einem Durchlauf.
+
+    :param lat: Breiten in Grad
+    :param lon: Längen in Grad
+    :param zeit_s: Optionale Zeitstempel in Sekunden
+    :returns: Dict mit 'strecke_km' und – falls Zeiten vorhanden – 'dauer_h',
+        'v_mittel_kmh', 'v_max_kmh', 'stopps', 'stoppdauer_s'
+    """
+    schritte = np.nan_to_num(schrittdistanzen_m(lat, lon))
+    metriken = {'strecke_km': float(schritte.sum() / 1000.0)}
+    if zeit_s is None:
+        return metriken
+
+    zeit_s = np.asarray(zeit_s, dtype=float)
+    gueltig = ~np.isnan(zeit_s)
+    dauer_h = (np.nanmax(zeit_s) - np.nanmin(zeit_s)) / 3600.0 if gueltig.sum() > 1 else 0.0
+    metriken['dauer_h'] = float(dauer_h)
+    metriken['v_mittel_kmh'] = float(metriken['strecke_km'] / dauer_h) if dauer_h > 0 else float('nan')
+
+    v = geschwindigkeit_kmh(lat, lon, zeit_s)
+    metriken['v_max_kmh'] = float(np.nanmax(v)) if np.isfinite(v).any() else float('nan')
+    stopp = erkenne_stopps(v, zeit_s)
+    beginn = np.flatnonzero(stopp & ~np.concatenate([[False], stopp[:-1]]))
+    metriken['stopps'] = int(len(beginn))
+    dt = np.concatenate([[0.0], np.nan_to_num(np.diff(zeit_s))])
+    metriken['stoppdauer_s'] = float(dt[stopp & np.concatenate([[False], stopp[:-1]])].sum())
+    return metriken
+
+
+def zeit_in_sekunden(zeit: pd.Series) -> np.ndarray:
+    """
+    Wandelt eine Zeitspalte in Sekunden seit dem ersten Zeitstempel um.
+
+    :param zeit: Zeitstempel (Text oder datetime), fehlerhafte Werte → NaN
+    :returns: float-Array in Sekunden
+    """
+    zeit = pd.to_datetime(zeit, errors='coerce')
+    return (zeit - zeit.min()).dt.total_seconds().to_numpy(dtype=float)
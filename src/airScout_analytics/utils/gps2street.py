@@ -1,25 +1,370 @@
-from geopy.geocoders import Nominatim
+"""
+gps2street.py
+=============
+
+Reverse-Geocoding (GPS → Straßenname) für GPS2Street mit austauschbarem Backend.
+
+Früher wurde Nominatim synchron mit einer Anfrage pro Sekunde abgefragt und
+nach 290 s abgebrochen – GPS2Street.csv zu erstellen dauerte Tage und ging
+nur mit Netz. Jetzt:
+
+- Punkte werden auf ein Raster (RASTER_GRAD) gelegt und je Zelle nur einmal
+  abgefragt (Deduplizierung, vektorisiert mit ``np.unique``)
+- Ergebnisse landen in einem persistenten SQLite-Cache (Schlüssel = Zelle);
+  ein abgebrochener Lauf setzt beim nächsten Start einfach fort
+- Anfragen laufen asynchron in Batches mit begrenzter Parallelität
+- Backend 'lokal': ein HTTP-Dienst (``python utils/gps2street.py dienst``),
+  der einen Offline-Straßendatensatz ausliefert (Nominatim-kompatibles JSON
+  plus Batch-Endpunkt); 'nominatim' bleibt optional nutzbar
+
+Features:
+- GeocodingCache: SQLite-Cache je Rasterzelle
+- OfflineStrassen: KD-Baum über einen lokalen Straßendatensatz
+- starte_strassen_dienst: lokaler HTTP-Stand-in (/reverse, /reverse_batch)
+- HttpBackend: asynchrone Batch-Anfragen (lokal oder Nominatim)
+- geocodiere_punkte / reverse_geocode_gpsdatei: Raster-Dedup + Cache + Backend
+
+Abhängigkeiten:
+---------------
+- numpy, pandas, scipy (nur Offline-Dienst)
+- Standardbibliothek: asyncio, sqlite3, urllib, http.server
+- config.CONFIG (GEOCODING)
+
+Autor: Frank Albrecht
+"""
+import os
+import sys
+import json
 import time
-import csv
+import sqlite3
+import asyncio
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import CONFIG
+from utils.geodaesie import lokale_meter
+
+UNBEKANNT = 'Unbekannt'
+
+
+def rasterzellen(lats: np.ndarray, lons: np.ndarray,
+                 raster_grad: Optional[float] = None) -> np.ndarray:
+    """
+    Ordnet Koordinaten ganzzahligen Rasterzellen zu (N x 2, int64).
+
+    :param lats: Breiten in Grad
+    :param lons: Längen in Grad
+    :param raster_grad: Zellgröße in Grad (Standard aus CONFIG.GEOCODING)
+    :returns: Zellindizes (Breite, Länge) je Punkt
+    """
+    raster_grad = raster_grad or CONFIG.GEOCODING['RASTER_GRAD']
+    return np.column_stack([np.round(np.asarray(lats, dtype=float) / raster_grad),
+                            np.round(np.asarray(lons, dtype=float) / raster_grad)]).astype(np.int64)
+
+
+class GeocodingCache:
+    """
+    Persistenter Cache Rasterzelle → Straßenname (SQLite).
+
+    :param pfad: Pfad der SQLite-Datei (Standard aus CONFIG.GEOCODING)
+    :param raster_grad: Zellgröße; Teil des Schlüssels, damit Caches mit
+        unterschiedlichem Raster sich nicht vermischen
+    """
+
+    def __init__(self, pfad: Optional[str] = None, raster_grad: Optional[float] = None) -> None:
+        self.pfad = pfad or CONFIG.GEOCODING['CACHE_DATEI']
+        self.raster_grad = raster_grad or CONFIG.GEOCODING['RASTER_GRAD']
+        os.makedirs(os.path.dirname(os.path.abspath(self.pfad)), exist_ok=True)
+        self._db = sqlite3.connect(self.pfad)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS strassen ("
+            " raster REAL, zelle_lat INTEGER, zelle_lon INTEGER, strasse TEXT,"
+            " PRIMARY KEY (raster, zelle_lat, zelle_lon))")
+
+    def lese(self, zellen: np.ndarray) -> Dict[Tuple[int, int], str]:
+        """
+        Liest vorhandene Einträge für die angegebenen Zellen (N x 2).
+        """
+        gefunden = {}
+        zeilen = [(self.raster_grad, int(a), int(b)) for a, b in zellen]
+        for start in range(0, len(zeilen), 500):
+            block = zeilen[start:start + 500]
+            bedingung = " OR ".join(["(raster=? AND zelle_lat=? AND zelle_lon=?)"] * len(block))
+            werte = [w for zeile in block for w in zeile]
+            for _, a, b, strasse in self._db.execute(
+                    f"SELECT raster, zelle_lat, zelle_lon, strasse FROM strassen WHERE {bedingung}", werte):
+                gefunden[(a, b)] = strasse
+        return gefunden
+
+    def schreibe(self, ergebnisse: Dict[Tuple[int, int], str]) -> None:
+        """
+        Speichert neue Ergebnisse und schreibt sie sofort fest (Fortsetzen nach Abbruch).
+        """
+        self._db.executemany(
+            "INSERT OR REPLACE INTO strassen VALUES (?, ?, ?, ?)",
+            [(self.raster_grad, int(a), int(b), s) for (a, b), s in ergebnisse.items()])
+        self._db.commit()
+
+    def schliesse(self) -> None:
+        self._db.close()
+
+
+class OfflineStrassen:
+    """
+    Offline-Straßendatensatz mit KD-Baum für die Nächster-Punkt-Suche.
+
+    :param pfad: CSV mit GPS_Lat, GPS_Lon, street (Standard: CONFIG.GEOCODING['STRASSEN_DATEI'])
+    :param max_distanz_m: Maximaler Abstand für einen Treffer
+    """
+
+    def __init__(self, pfad: Optional[str] = None, max_distanz_m: Optional[float] = None) -> None:
+        from scipy.spatial import cKDTree
+
+        einstellungen = CONFIG.GEOCODING
+        strassen = pd.read_csv(pfad or einstellungen['STRASSEN_DATEI'])
+        strassen = strassen.dropna(subset=['GPS_Lat', 'GPS_Lon', 'street'])
+        self.lat0 = float(strassen['GPS_Lat'].mean())
+        self.namen = strassen['street'].to_numpy(dtype=object)
+        self.max_distanz_m = max_distanz_m or einstellungen['MAX_DISTANZ_M']
+        self.baum = cKDTree(lokale_meter(strassen['GPS_Lon'], strassen['GPS_Lat'], self.lat0))
+
+    def suche(self, lats: Sequence[float], lons: Sequence[float]) -> List[str]:
+        """
+        Straßenname je Punkt (UNBEKANNT außerhalb von ``max_distanz_m``).
+        """
+        _, index = self.baum.query(lokale_meter(lons, lats, self.lat0),
+                                   distance_upper_bound=self.max_distanz_m)
+        treffer = index < len(self.namen)
+        ergebnis = np.full(len(index), UNBEKANNT, dtype=object)
+        ergebnis[treffer] = self.namen[index[treffer]]
+        return ergebnis.tolist()
+
+
+def starte_strassen_dienst(port: Optional[int] = None, strassen: Optional[OfflineStrassen] = None,
+                           im_hintergrund: bool = False) -> ThreadingHTTPServer:
+    """
+    Startet den lokalen HTTP-Stand-in für den Geocoding-Dienst.
+
+    Endpunkte:
+    - ``GET /reverse?lat=..&lon=..`` → ``{"address": {"road": "..."}}`` (wie Nominatim)
+    - ``POST /reverse_batch`` mit ``[[lat, lon], ...]`` → ``["Straße", ...]``
+
+    :param port: TCP-Port (Standard aus CONFIG.GEOCODING)
+    :param strassen: Vorgeladener Offline-Datensatz
+    :param im_hintergrund: True = in einem Daemon-Thread starten und zurückkehren
+    :returns: Laufender Server (``shutdown()`` zum Beenden)
+    """
+    strassen = strassen or OfflineStrassen()
+
+    class _Handler(BaseHTTPRequestHandler):
+        def _antwort(self, daten) -> None:
+            inhalt = json.dumps(daten, ensure_ascii=False).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(inhalt)))
+            self.end_headers()
+            self.wfile.write(inhalt)
+
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            if url.path != '/reverse':
+                self.send_error(404)
+                return
+            parameter = urllib.parse.parse_qs(url.query)
+            try:
+                lat, lon = float(parameter['lat'][0]), float(parameter['lon'][0])
+            except (KeyError, ValueError):
+                self.send_error(400, 'lat/lon fehlen')
+                return
+            self._antwort({'address': {'road': strassen.suche([lat], [lon])[0]}})
+
+        def do_POST(self):
+            if self.path != '/reverse_batch':
+                self.send_error(404)
+                return
+            laenge = int(self.headers.get('Content-Length', 0))
+            punkte = np.asarray(json.loads(self.rfile.read(laenge) or b'[]'), dtype=float).reshape(-1, 2)
+            self._antwort(strassen.suche(punkte[:, 0], punkte[:, 1]))
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port or CONFIG.GEOCODING['LOKAL_PORT']), _Handler)
+    if im_hintergrund:
+        import threading
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    else:
+        print(f"🛰️ Offline-Geocoding-Dienst läuft auf http://127.0.0.1:{server.server_port}")
+        server.serve_forever()
+    return server
+
+
+class HttpBackend:
+    """
+    Asynchroner Client für den lokalen Dienst oder Nominatim.
+
+    :param basis_url: Basis-URL des Dienstes
+    :param batch: True = ``/reverse_batch`` nutzen (nur lokaler Dienst)
+    :param max_parallel: Maximal gleichzeitige Anfragen
+    :param pause_sek: Mindestabstand zwischen zwei Anfragen (Rate-Limit)
+    """
+
+    def __init__(self, basis_url: str, batch: bool = False, max_parallel: int = 1,
+                 pause_sek: float = 0.0) -> None:
+        self.basis_url = basis_url.rstrip('/')
+        self.batch = batch
+        self.max_parallel = max_parallel
+        self.pause_sek = pause_sek
+        self.timeout = CONFIG.GEOCODING['TIMEOUT_S']
+        self._letzte_anfrage = 0.0
+
+    @classmethod
+    def aus_config(cls, name: Optional[str] = None) -> 'HttpBackend':
+        """
+        Erstellt das in CONFIG.GEOCODING['BACKEND'] gewählte Backend.
+        """
+        e = CONFIG.GEOCODING
+        name = name or e['BACKEND']
+        if name == 'nominatim':
+            return cls(e['NOMINATIM_URL'], batch=False, max_parallel=e['NOMINATIM_PARALLEL'],
+                       pause_sek=e['NOMINATIM_PAUSE_SEK'])
+        if name == 'lokal':
+            return cls(e['LOKAL_URL'], batch=True, max_parallel=e['MAX_PARALLEL'])
+        raise ValueError(f"Unbekanntes Geocoding-Backend: {name}")
+
+    def _hole(self, url: str, daten: Optional[bytes] = None):
+        anfrage = urllib.request.Request(url, data=daten, headers={
+            'User-Agent': CONFIG.GEOCODING['USER_AGENT'], 'Content-Type': 'application/json'})
+        with urllib.request.urlopen(anfrage, timeout=self.timeout) as antwort:
+            return json.loads(antwort.read().decode('utf-8'))
+
+    async def _warte_rate_limit(self, sperre: asyncio.Lock) -> None:
+        if self.pause_sek <= 0:
+            return
+        async with sperre:
+            warten = self._letzte_anfrage + self.pause_sek - time.monotonic()
+            if warten > 0:
+                await asyncio.sleep(warten)
+            self._letzte_anfrage = time.monotonic()
+
+    async def _einzeln(self, lat: float, lon: float, semaphore, sperre) -> str:
+        async with semaphore:
+            await self._warte_rate_limit(sperre)
+            abfrage = urllib.parse.urlencode({'lat': lat, 'lon': lon, 'format': 'json'})
+            try:
+                antwort = await asyncio.to_thread(self._hole, f"{self.basis_url}/reverse?{abfrage}")
+                return (antwort or {}).get('address', {}).get('road', UNBEKANNT)
+            except Exception as e:
+                print(f"⚠️ Geocoding fehlgeschlagen für {lat}, {lon}: {e}")
+                return None
+
+    async def _batch(self, punkte: List[Tuple[float, float]], semaphore) -> List[str]:
+        async with semaphore:
+            try:
+                daten = json.dumps(punkte).encode('utf-8')
+                return await asyncio.to_thread(self._hole, f"{self.basis_url}/reverse_batch", daten)
+            except Exception as e:
+                print(f"⚠️ Batch-Anfrage fehlgeschlagen ({len(punkte)} Punkte): {e}")
+                return [None] * len(punkte)
+
+    async def frage_ab(self, punkte: List[Tuple[float, float]]) -> List[Optional[str]]:
+        """
+        Fragt eine Liste von Punkten ab (None = Fehler, wird nicht gecacht).
+        """
+        semaphore = asyncio.Semaphore(self.max_parallel)
+        if self.batch:
+            groesse = max(1, -(-len(punkte) // self.max_parallel))
+            teile = [punkte[i:i + groesse] for i in range(0, len(punkte), groesse)]
+            antworten = await asyncio.gather(*(self._batch(t, semaphore) for t in teile))
+            return [s for teil in antworten for s in teil]
+        sperre = asyncio.Lock()
+        return list(await asyncio.gather(*(self._einzeln(lat, lon, semaphore, sperre)
+                                            for lat, lon in punkte)))
+
+
+def geocodiere_punkte(lats: Iterable[float], lons: Iterable[float],
+                      backend: Optional[HttpBackend] = None,
+                      cache: Optional[GeocodingCache] = None,
+                      max_dauer_sek: Optional[float] = None) -> np.ndarray:
+    """
+    Bestimmt Straßennamen für viele Punkte mit Raster-Dedup und Cache.
+
+    Je Rasterzelle wird höchstens einmal (mit der Zellmitte) gefragt. Neue
+    Ergebnisse werden batchweise in den Cache geschrieben; wird
+    ``max_dauer_sek`` überschritten, endet der Lauf und kann später
+    fortgesetzt werden (noch offene Punkte bleiben None).
+
+    :param lats: Breiten in Grad
+    :param lons: Längen in Grad
+    :param backend: Geocoding-Backend (Standard: CONFIG.GEOCODING['BACKEND'])
+    :param cache: Persistenter Cache (Standard: CONFIG.GEOCODING['CACHE_DATEI'])
+    :param max_dauer_sek: Optionale maximale Laufzeit
+    :returns: Straßenname je Punkt (None = noch nicht abgefragt/fehlgeschlagen)
+    """
+    einstellungen = CONFIG.GEOCODING
+    backend = backend or HttpBackend.aus_config()
+    eigener_cache = cache is None
+    cache = cache or GeocodingCache()
+    lats = np.asarray(list(lats), dtype=float)
+    lons = np.asarray(list(lons), dtype=float)
+    gueltig = ~(np.isnan(lats) | np.isnan(lons))
+    ergebnis = np.full(len(lats), None, dtype=object)
+    if not gueltig.any():
+        return ergebnis
+
+    zellen, rueck = np.unique(rasterzellen(lats[gueltig], lons[gueltig], cache.raster_grad),
+                              axis=0, return_inverse=True)
+    bekannt = cache.lese(zellen)
+    offen = [(int(a), int(b)) for a, b in zellen if (int(a), int(b)) not in bekannt]
+    print(f"Geocoding: {gueltig.sum()} Punkte → {len(zellen)} Rasterzellen, "
+          f"{len(zellen) - len(offen)} aus dem Cache, {len(offen)} offen")
+
+    start = time.time()
+    for i in range(0, len(offen), einstellungen['BATCH_GROESSE']):
+        if max_dauer_sek is not None and time.time() - start > max_dauer_sek:
+            print("Maximale Laufzeit erreicht – Fortsetzung beim nächsten Aufruf.")
+            break
+        block = offen[i:i + einstellungen['BATCH_GROESSE']]
+        mitten = [(a * cache.raster_grad, b * cache.raster_grad) for a, b in block]
+        antworten = asyncio.run(backend.frage_ab(mitten))
+        neu = {zelle: s for zelle, s in zip(block, antworten) if s is not None}
+        cache.schreibe(neu)
+        bekannt.update(neu)
+        print(f"  {min(i + len(block), len(offen))}/{len(offen)} Zellen abgefragt")
+
+    strassen = np.array([bekannt.get((int(a), int(b))) for a, b in zellen], dtype=object)
+    ergebnis[gueltig] = strassen[rueck.ravel()]
+    if eigener_cache:
+        cache.schliesse()
+    return ergebnis
+
 
 def reverse_geocode_gpsdatei(
     eingabedatei: str,
     ausgabedatei: str,
-    max_dauer_sek: int = 290,
-    pause_sek: float = 1.0
+    max_dauer_sek: Optional[int] = None,
+    backend: Optional[HttpBackend] = None
 ) -> None:
     """
-    Liest GPS-Koordinaten aus einer CSV-Datei, führt für maximal 4:30 Minuten (270 Sekunden) jede Sekunde eine Reverse-Geocoding-Abfrage durch
-    und speichert das Ergebnis (Koordinaten und Straßenname) in einer Ausgabedatei.
+    Liest GPS-Koordinaten aus einer Log-CSV (Spalten 6/7 = Breite/Länge),
+    bestimmt die Straßennamen je Rasterzelle und schreibt eine Zeile je Zelle.
+
+    Bereits bekannte Zellen kommen aus dem Cache; nach einem Abbruch (z.B.
+    ``max_dauer_sek``) setzt ein erneuter Aufruf dort fort.
 
     :param eingabedatei: Pfad zur Eingabedatei mit GPS-Daten (CSV)
     :type eingabedatei: str
     :param ausgabedatei: Pfad zur Ausgabedatei für Ergebnisse (CSV)
     :type ausgabedatei: str
-    :param max_dauer_sek: Maximale Laufzeit in Sekunden (Standard: 270 = 4:30 min)
+    :param max_dauer_sek: Optionale maximale Laufzeit in Sekunden
     :type max_dauer_sek: int
-    :param pause_sek: Pause zwischen den Abfragen in Sekunden (Standard: 1.0)
-    :type pause_sek: float
+    :param backend: Geocoding-Backend (Standard aus CONFIG.GEOCODING)
     :returns: None
     :rtype: None
     :raises FileNotFoundError: Wenn die Eingabedatei nicht existiert
@@ -27,51 +372,36 @@ def reverse_geocode_gpsdatei(
 
         >>> reverse_geocode_gpsdatei('GPS2Street.CSV', 'GPS2Street_mit_Strasse.csv')
     """
-    geolocator = Nominatim(user_agent="airscout-analytics/1.6 (airscout6@watchkido.de)", timeout=10)
-    start_time = time.time()
-    anzahl = 0
-    with open(eingabedatei, newline='', encoding='utf-8') as csvfile_in, \
-         open(ausgabedatei, 'w', newline='', encoding='utf-8') as csvfile_out:
-        reader = csv.reader(csvfile_in)
-        writer = csv.writer(csvfile_out)
-        writer.writerow(['Breite', 'Laenge', 'Strasse'])
-        letzter_lat, letzter_lon = None, None
-        for row in reader:
-            if time.time() - start_time > max_dauer_sek:
-                print("Maximale Laufzeit erreicht. Vorgang wird beendet.")
-                break
-            try:
-                lat = float(row[5].strip())
-                lon = float(row[6].strip())
-            except (IndexError, ValueError):
-                # IT-Witz: "GPS-Koordinate nicht gefunden – vielleicht ist sie im Bermuda-Dreieck verschwunden!"
-                writer.writerow(['Fehler', 'Fehler', 'Ungültige Zeile'])
-                continue
-            # Nur abfragen, wenn Koordinate sich geändert hat
-            if letzter_lat is not None and letzter_lon is not None:
-                if abs(lat - letzter_lat) < 1e-7 and abs(lon - letzter_lon) < 1e-7:
-                    # Überspringe doppelte Koordinaten
-                    continue
-            try:
-                # language-Parameter entfernt, da einige geopy-Versionen dies nicht unterstützen
-                location = geolocator.reverse((lat, lon), exactly_one=True)
-                if location is not None and hasattr(location, 'raw'):
-                    street = location.raw.get('address', {}).get('road', 'Unbekannt')
-                else:
-                    street = 'Unbekannt'
-            except Exception as e:
-                street = f"Fehler: {e}"
-            writer.writerow([lat, lon, street])
-            letzter_lat, letzter_lon = lat, lon
-            anzahl += 1
-            print(f"{anzahl}: {lat}, {lon} -> {street}")
-            time.sleep(pause_sek)
+    with open(eingabedatei, encoding='utf-8') as f:
+        zeilen = pd.Series(f.read().splitlines())
+    # Log-Dateien nutzen ';' oder ',' als Trenner; Header- und Kommentarzeilen
+    # ergeben keine Zahl und fallen unten als ungültig heraus
+    spalten = zeilen.str.replace(';', ',', regex=False).str.split(',', n=7, expand=True)
+    if spalten.shape[1] < 7:
+        spalten = spalten.reindex(columns=range(7))
+    lats = pd.to_numeric(spalten[5], errors='coerce').to_numpy(dtype=float)
+    lons = pd.to_numeric(spalten[6], errors='coerce').to_numpy(dtype=float)
+    gueltig = ~(np.isnan(lats) | np.isnan(lons))
+    print(f"{(~gueltig).sum()} ungültige Zeilen übersprungen.")
+
+    strassen = geocodiere_punkte(lats[gueltig], lons[gueltig], backend, max_dauer_sek=max_dauer_sek)
+    raster = CONFIG.GEOCODING['RASTER_GRAD']
+    ergebnis = pd.DataFrame({'zelle': list(map(tuple, rasterzellen(lats[gueltig], lons[gueltig], raster))),
+                             'Strasse': strassen})
+    ergebnis = ergebnis.dropna().drop_duplicates('zelle')
+    ergebnis.insert(0, 'Breite', [z[0] * raster for z in ergebnis['zelle']])
+    ergebnis.insert(1, 'Laenge', [z[1] * raster for z in ergebnis['zelle']])
+    ergebnis.drop(columns='zelle').round(7).to_csv(ausgabedatei, index=False, encoding='utf-8')
+    print(f"✅ {len(ergebnis)} Zellen mit Straßennamen gespeichert: {ausgabedatei}")
+
 
 if __name__ == "__main__":
-    # Starte das Reverse-Geocoding für die Datei GPS2Street.CSV
-    reverse_geocode_gpsdatei(
-        eingabedatei="e:/dev/projekt_python_venv/airscout-analytics/data/roh/GPS2Street.CSV",
-        ausgabedatei="e:/dev/projekt_python_venv/airscout-analytics/data/roh/GPS2Street_mit_Strasse_test.csv",
-        max_dauer_sek=270,
-        pause_sek=1.0
-    )
+    # python utils/gps2street.py dienst            → lokalen Offline-Dienst starten
+    # python utils/gps2street.py <eingabe> <ausgabe> [lokal|nominatim]
+    if len(sys.argv) > 1 and sys.argv[1] == 'dienst':
+        starte_strassen_dienst()
+    elif len(sys.argv) > 2:
+        reverse_geocode_gpsdatei(sys.argv[1], sys.argv[2],
+                                 backend=HttpBackend.aus_config(sys.argv[3] if len(sys.argv) > 3 else None))
+    else:
+        print(__doc__)
@@ -0,0 +1,315 @@
+"""
+interpolation.py
+================
+
+Räumliche Interpolation von Sensorwerten entlang eines GPS-Tracks auf ein
+regelmäßiges Gitter.
+
+Die teure Geometrie (KD-Baum, Nachbarsuche, Gewichte) hängt nur von den
+GPS-Koordinaten einer Fahrt ab, nicht von den Messwerten. Sie wird daher
+einmal pro Fahrt berechnet und zwischengespeichert. Jede weitere Spalte
+(MQ-Sensoren, ppm-/µg-Spalten, Temperatur …) kostet danach nur noch eine
+gewichtete Summe.
+
+Features:
+- Inverse-Distanz-Gewichtung (IDW) über die k nächsten Trackpunkte
+- Optional lokales Ordinary Kriging (Exponential-Variogramm)
+- Konfigurierbare Gitterauflösung und maximaler Abstand zum Track
+- Gewichtsmatrix (scipy.sparse) für alle Spalten in einer Multiplikation
+- Cache pro Fahrt im Speicher und als .npz in data/zwischenspeicher
+
+Abhängigkeiten:
+---------------
+- numpy, pandas
+- scipy.spatial.cKDTree, scipy.sparse
+- config.CONFIG (INTERPOLATION)
+- utils.geodaesie (lokale Meter-Projektion)
+
+Autor: Frank Albrecht
+"""
+import os
+import sys
+import hashlib
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.spatial import cKDTree
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import CONFIG
+from utils.geodaesie import lokale_meter
+
+# Nur diese Einstellungen beeinflussen die Geometrie (und damit den Cache-Schlüssel)
+_GEOMETRIE_PARAMETER = ('METHODE', 'AUFLOESUNG', 'NACHBARN', 'IDW_POTENZ', 'MAX_DISTANZ_M',
+                        'KRIGING_REICHWEITE_M', 'KRIGING_NUGGET')
+
+_CACHE: Dict[str, "RaeumlicheInterpolation"] = {}
+
+
+def _idw_gewichte(distanzen: np.ndarray, potenz: float) -> np.ndarray:
+    """IDW-Gewichte je Zeile; Nachbarn außerhalb der Reichweite (inf) zählen 0."""
+    with np.errstate(divide='ignore'):
+        gewichte = 1.0 / np.maximum(distanzen, 1e-6) ** potenz
+    gewichte[~np.isfinite(distanzen)] = 0.0
+    summe = gewichte.sum(axis=1, keepdims=True)
+    summe[summe == 0] = 1.0
+    return gewichte / summe
+
+
+def _kriging_gewichte(punkte: np.ndarray, ziele: np.ndarray, nachbarn: np.ndarray,
+                      reichweite: float, nugget: float) -> np.ndarray:
+    """
+    Gewichte für lokales Ordinary Kriging.
+
+    Es wird ein normiertes Exponential-Variogramm (Schwelle 1) verwendet. Die
+    Kriging-Gewichte sind unabhängig von der Schwelle, daher gelten sie für
+    alle Messgrößen einer Fahrt gleichermaßen.
+    """
+    def variogramm(h):
+        return nugget + (1.0 - nugget) * (1.0 - np.exp(-3.0 * h / reichweite))
+
+    nachbar_xy = punkte[nachbarn]                                  # (G, k, 2)
+    k = nachbarn.shape[1]
+    d_ij = np.linalg.norm(nachbar_xy[:, :, None, :] - nachbar_xy[:, None, :, :], axis=-1)
+    d_0 = np.linalg.norm(nachbar_xy - ziele[:, None, :], axis=-1)
+
+    a = np.ones((len(ziele), k + 1, k + 1))
+    a[:, :k, :k] = variogramm(d_ij)
+    a[:, np.arange(k), np.arange(k)] = 0.0
+    a[:, k, k] = 0.0
+    b = np.ones((len(ziele), k + 1))
+    b[:, :k] = variogramm(d_0)
+    try:
+        loesung = np.linalg.solve(a, b[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        # Degenerierte Nachbarschaften (z.B. identische Punkte) über Pseudoinverse
+        loesung = np.einsum('gij,gj->gi', np.linalg.pinv(a), b)
+    return loesung[:, :k]
+
+
+class RaeumlicheInterpolation:
+    """
+    Vorberechnete Interpolation eines GPS-Tracks auf ein Gitter.
+
+    :param lon_achse: Längengrade der Gitterspalten (nx)
+    :param lat_achse: Breitengrade der Gitterzeilen (ny)
+    :param nachbarn: Indizes der Trackpunkte je Gitterzelle (G, k)
+    :param gewichte: Gewichte je Gitterzelle (G, k)
+    :param maske: True für Zellen innerhalb MAX_DISTANZ_M zum Track (G,)
+    :param methode: 'idw' oder 'kriging'
+    """
+
+    def __init__(self, lon_achse: np.ndarray, lat_achse: np.ndarray,
+                 nachbarn: np.ndarray, gewichte: np.ndarray, maske: np.ndarray,
+                 methode: str = 'idw') -> None:
+        self.lon_achse = lon_achse
+        self.lat_achse = lat_achse
+        self.nachbarn = nachbarn
+        self.gewichte = gewichte
+        self.maske = maske
+        self.methode = methode
+        self._gewichtsmatrix: Optional[sparse.csr_matrix] = None
+
+    @property
+    def form(self) -> Tuple[int, int]:
+        """Gitterform (ny, nx)."""
+        return len(self.lat_achse), len(self.lon_achse)
+
+    @property
+    def ausdehnung(self) -> Tuple[float, float, float, float]:
+        """Ausdehnung (lon_min, lon_max, lat_min, lat_max) des Gitters."""
+        return (float(self.lon_achse[0]), float(self.lon_achse[-1]),
+                float(self.lat_achse[0]), float(self.lat_achse[-1]))
+
+    @classmethod
+    def erstelle(cls, lons: np.ndarray, lats: np.ndarray, methode: Optional[str] = None,
+                 aufloesung: Optional[int] = None, max_distanz_m: Optional[float] = None,
+                 anzahl_nachbarn: Optional[int] = None) -> "RaeumlicheInterpolation":
+        """
+        Baut KD-Baum, Nachbarschaften und Gewichte für einen Track.
+
+        :param lons: Längengrade der Messpunkte
+        :param lats: Breitengrade der Messpunkte
+        :param methode: 'idw' oder 'kriging' (Standard aus CONFIG)
+        :param aufloesung: Gitterzellen je Achse (Standard aus CONFIG)
+        :param max_distanz_m: Zellen weiter entfernt vom Track bleiben leer
+        :param anzahl_nachbarn: Nachbarpunkte je Gitterzelle
+        :returns: Fertige Interpolation
+        """
+        einstellungen = CONFIG.INTERPOLATION
+        methode = methode or einstellungen['METHODE']
+        aufloesung = aufloesung or einstellungen['AUFLOESUNG']
+        max_distanz_m = max_distanz_m or einstellungen['MAX_DISTANZ_M']
+        k = min(anzahl_nachbarn or einstellungen['NACHBARN'], len(lons))
+
+        lons = np.asarray(lons, dtype=float)
+        lats = np.asarray(lats, dtype=float)
+        lat0 = float(np.mean(lats))
+        punkte = lokale_meter(lons, lats, lat0)
+        baum = cKDTree(punkte)
+
+        lon_achse = np.linspace(lons.min(), lons.max(), aufloesung)
+        lat_achse = np.linspace(lats.min(), lats.max(), aufloesung)
+        lon_mesh, lat_mesh = np.meshgrid(lon_achse, lat_achse)
+        ziele = lokale_meter(lon_mesh.ravel(), lat_mesh.ravel(), lat0)
+
+        # Erst mit Abstandsgrenze die Zellen nahe am Track bestimmen (schnell,
+        # da weit entfernte Zellen früh abbrechen), dann nur dort k Nachbarn suchen
+        naechster, _ = baum.query(ziele, k=1, distance_upper_bound=max_distanz_m)
+        maske = np.isfinite(naechster)
+        distanzen = np.full((len(ziele), k), np.inf)
+        nachbarn = np.zeros((len(ziele), k), dtype=np.int64)
+        if maske.any():
+            d, i = baum.query(ziele[maske], k=k)
+            distanzen[maske] = d.reshape(-1, k)
+            nachbarn[maske] = i.reshape(-1, k)
+
+        if methode == 'kriging':
+            gewichte = np.zeros(distanzen.shape)
+            gewichte[maske] = _kriging_gewichte(
+                punkte, ziele[maske], nachbarn[maske],
+                einstellungen['KRIGING_REICHWEITE_M'], einstellungen['KRIGING_NUGGET'])
+        else:
+            distanzen[distanzen > max_distanz_m] = np.inf
+            gewichte = _idw_gewichte(distanzen, einstellungen['IDW_POTENZ'])
+
+        return cls(lon_achse, lat_achse, nachbarn.astype(np.int32),
+                   gewichte.astype(np.float32), maske, methode)
+
+    def interpoliere(self, werte: Iterable[float]) -> np.ndarray:
+        """
+        Interpoliert eine Messgröße auf das Gitter.
+
+        Fehlende Werte (NaN) werden übergangen, indem die Gewichte der übrigen
+        Nachbarn renormiert werden.
+
+        :param werte: Messwerte in derselben Reihenfolge wie die Trackpunkte
+        :returns: Gitter (ny, nx), NaN außerhalb der Track-Reichweite
+        """
+        werte = np.asarray(werte, dtype=float)
+        nachbar_werte = werte[self.nachbarn]
+        gueltig = np.isfinite(nachbar_werte)
+        gewichte = np.where(gueltig, self.gewichte, 0.0)
+        summe = gewichte.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            gitter = (gewichte * np.where(gueltig, nachbar_werte, 0.0)).sum(axis=1) / summe
+        gitter[~self.maske | (summe == 0)] = np.nan
+        return gitter.reshape(self.form)
+
+    @property
+    def gewichtsmatrix(self) -> sparse.csr_matrix:
+        """
+        Dünnbesetzte Gewichtsmatrix W (Gitterzellen x Trackpunkte).
+
+        Wird beim ersten Zugriff aus Nachbarn und Gewichten aufgebaut und
+        danach wiederverwendet. Zellen außerhalb der Maske haben leere Zeilen.
+        """
+        if self._gewichtsmatrix is None:
+            g, k = self.nachbarn.shape
+            zeilen = np.repeat(np.arange(g), k)
+            gewichte = np.where(self.maske[:, None], self.gewichte, 0.0).ravel()
+            anzahl_punkte = int(self.nachbarn.max()) + 1 if self.nachbarn.size else 0
+            self._gewichtsmatrix = sparse.csr_matrix(
+                (gewichte, (zeilen, self.nachbarn.ravel())), shape=(g, anzahl_punkte))
+            self._gewichtsmatrix.eliminate_zeros()
+        return self._gewichtsmatrix
+
+    def interpoliere_matrix(self, werte: np.ndarray) -> np.ndarray:
+        """
+        Interpoliert viele Messgrößen mit einer einzigen Matrixmultiplikation.
+
+        NaN-Werte werden wie bei :meth:`interpoliere` über eine zweite
+        Multiplikation mit der Gültigkeitsmaske herausgerechnet.
+
+        :param werte: Matrix (Trackpunkte x Spalten)
+        :returns: Gitter-Stapel (Spalten, ny, nx)
+        """
+        werte = np.asarray(werte, dtype=float)
+        w = self.gewichtsmatrix
+        werte = werte[:w.shape[1]]
+        gueltig = np.isfinite(werte)
+        zaehler = w @ np.where(gueltig, werte, 0.0)
+        nenner = w @ gueltig.astype(float)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            gitter = zaehler / nenner
+        gitter[(nenner == 0) | ~self.maske[:, None]] = np.nan
+        return gitter.T.reshape((werte.shape[1],) + self.form)
+
+    def interpoliere_spalten(self, df: pd.DataFrame,
+                             spalten: Iterable[str]) -> Dict[str, np.ndarray]:
+        """
+        Interpoliert mehrere Spalten mit derselben Vorberechnung.
+
+        Alle Spalten werden zu einer Matrix gestapelt und gemeinsam mit der
+        Gewichtsmatrix multipliziert.
+
+        :param df: DataFrame mit den Trackpunkten (gleiche Reihenfolge wie beim Erstellen)
+        :param spalten: Zu interpolierende Spalten
+        :returns: Dict Spaltenname → Gitter
+        """
+        spalten = [s for s in spalten if s in df.columns]
+        if not spalten:
+            return {}
+        werte = df[spalten].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        return dict(zip(spalten, self.interpoliere_matrix(werte)))
+
+    def speichere(self, pfad: str) -> None:
+        """Speichert die Vorberechnung als komprimierte .npz-Datei."""
+        os.makedirs(os.path.dirname(pfad), exist_ok=True)
+        np.savez_compressed(pfad, lon_achse=self.lon_achse, lat_achse=self.lat_achse,
+                            nachbarn=self.nachbarn, gewichte=self.gewichte,
+                            maske=self.maske, methode=np.array(self.methode))
+
+    @classmethod
+    def lade(cls, pfad: str) -> "RaeumlicheInterpolation":
+        """Lädt eine mit :meth:`speichere` geschriebene Vorberechnung."""
+        with np.load(pfad) as daten:
+            return cls(daten['lon_achse'], daten['lat_achse'], daten['nachbarn'],
+                       daten['gewichte'], daten['maske'], str(daten['methode']))
+
+
+def lade_oder_erstelle_interpolation(lons: np.ndarray, lats: np.ndarray,
+                                     fahrt_id: Optional[str] = None,
+                                     **parameter) -> RaeumlicheInterpolation:
+    """
+    Liefert die Interpolation einer Fahrt aus dem Cache oder berechnet sie neu.
+
+    Der Schlüssel ergibt sich aus den Koordinaten und Parametern, ein
+    veränderter Track führt also automatisch zu einer Neuberechnung.
+
+    :param lons: Längengrade der Messpunkte
+    :param lats: Breitengrade der Messpunkte
+    :param fahrt_id: Name der Fahrt (z.B. context.filename_ohne_ext) für den Dateinamen
+    :param parameter: Weitergereicht an :meth:`RaeumlicheInterpolation.erstelle`
+    :returns: Interpolation der Fahrt
+    :example:
+
+        >>> interp = lade_oder_erstelle_interpolation(df['GPS_Lon'], df['GPS_Lat'], '2025_07_21_04_50')
+        >>> gitter = interp.interpoliere_spalten(df, ['MQ135', 'MQ7'])
+
+    """
+    lons = np.ascontiguousarray(lons, dtype=float)
+    lats = np.ascontiguousarray(lats, dtype=float)
+    einstellungen = {k: CONFIG.INTERPOLATION[k] for k in _GEOMETRIE_PARAMETER}
+    einstellungen.update(parameter)
+    schluessel = hashlib.sha1(
+        lons.tobytes() + lats.tobytes() + repr(sorted(einstellungen.items())).encode()
+    ).hexdigest()[:16]
+
+    if schluessel in _CACHE:
+        return _CACHE[schluessel]
+
+    pfad = os.path.join(CONFIG.INTERPOLATION['CACHE_ORDNER'],
+                        f"{fahrt_id or 'fahrt'}_{schluessel}.npz")
+    if os.path.isfile(pfad):
+        interpolation = RaeumlicheInterpolation.lade(pfad)
+    else:
+        interpolation = RaeumlicheInterpolation.erstelle(lons, lats, **parameter)
+        try:
+            interpolation.speichere(pfad)
+        except OSError as e:
+            print(f"⚠️ Interpolations-Cache konnte nicht gespeichert werden: {e}")
+    _CACHE[schluessel] = interpolation
+    return interpolation
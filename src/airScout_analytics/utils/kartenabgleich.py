@@ -0,0 +1,305 @@
+"""
+kartenabgleich.py
+=================
+
+Map-Matching: ordnet Trackpunkte Straßensegmenten zu statt dem nächsten
+Einzelpunkt aus GPS2Street.csv.
+
+Bisher wurde jeder Trackpunkt mit dem nächsten Stützpunkt im Umkreis von
+10 m verglichen. Das braucht eine riesige Punkttabelle und liefert an
+Kreuzungen springende Straßennamen. Jetzt:
+
+- Aus GPS2Street.csv entsteht einmalig ein Segmentindex: benachbarte Punkte
+  derselben Straße werden verbunden, die Linienzüge mit Douglas-Peucker
+  vereinfacht und als GPS2Street_segmente.csv gespeichert
+- Kandidaten je Trackpunkt über einen KD-Baum der Segmentmitten, danach
+  vektorisierte Projektion Punkt → Segment für alle Kandidaten auf einmal
+- Ein Hidden-Markov-Modell (Viterbi) wählt entlang des Tracks die
+  wahrscheinlichste Folge: Nähe zum Segment (Emission) gegen Straßenwechsel
+  und unplausible Sprünge (Übergang); die Übergangskosten entstehen
+  blockweise (KARTENABGLEICH['BLOCK_SCHRITTE']), der Speicherbedarf bleibt
+  auch bei 200-Hz-Fahrten begrenzt
+
+Features:
+- StrassenSegmente: Segmentindex mit KD-Baum (laden/erstellen/speichern)
+- baue_segmente: Linienzüge je Straße aus einer Punkttabelle
+- projiziere_auf_segmente: Punkt-Segment-Abstand, vektorisiert
+- ordne_strassen_zu: Viterbi-Map-Matching eines Tracks
+
+Abhängigkeiten:
+---------------
+- numpy, pandas, scipy
+- utils.geodaesie
+- config.CONFIG (KARTENABGLEICH)
+
+Autor: Frank Albrecht
+"""
+import os
+import sys
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import CONFIG
+from utils.geodaesie import lokale_meter
+
+UNBEKANNT = 'Unbekannt'
+
+
+def _vereinfache(punkte: np.ndarray, toleranz: float) -> np.ndarray:
+    """Douglas-Peucker (iterativ) – Indizes der beibehaltenen Punkte."""
+    behalten = np.zeros(len(punkte), dtype=bool)
+    behalten[[0, -1]] = True
+    stapel = [(0, len(punkte) - 1)]
+    while stapel:
+        a, b = stapel.pop()
+        if b - a < 2:
+            continue
+        richtung = punkte[b] - punkte[a]
+        laenge = np.hypot(*richtung)
+        relativ = punkte[a + 1:b] - punkte[a]
+        if laenge > 0:
+            abstand = np.abs(relativ[:, 0] * richtung[1] - relativ[:, 1] * richtung[0]) / laenge
+        else:
+            abstand = np.hypot(relativ[:, 0], relativ[:, 1])
+        i = int(abstand.argmax())
+        if abstand[i] > toleranz:
+            behalten[a + 1 + i] = True
+            stapel += [(a, a + 1 + i), (a + 1 + i, b)]
+    return np.flatnonzero(behalten)
+
+
+def _linienzuege(xy: np.ndarray, max_glied_m: float) -> List[np.ndarray]:
+    """
+    Verbindet die Punkte einer Straße zu Linienzügen (Indexfolgen).
+
+    Jeder Punkt wird mit seinen zwei nächsten Nachbarn innerhalb
+    ``max_glied_m`` verbunden; an Knoten mit Grad != 2 (Enden, Abzweige)
+    beginnt bzw. endet ein Linienzug.
+    """
+    from scipy.spatial import cKDTree
+
+    if len(xy) < 2:
+        return []
+    _, nachbarn = cKDTree(xy).query(xy, k=min(3, len(xy)), distance_upper_bound=max_glied_m)
+    kanten = {(min(i, int(j)), max(i, int(j))) for i, zeile in enumerate(nachbarn)
+              for j in zeile[1:] if j < len(xy)}
+    adjazenz = [[] for _ in range(len(xy))]
+    for a, b in kanten:
+        adjazenz[a].append(b)
+        adjazenz[b].append(a)
+
+    besucht = set()
+    zuege = []
+
+    def folge(start: int, naechster: int) -> np.ndarray:
+        zug = [start]
+        vorher, aktuell = start, naechster
+        while True:
+            besucht.add((min(vorher, aktuell), max(vorher, aktuell)))
+            zug.append(aktuell)
+            weiter = [n for n in adjazenz[aktuell]
+                      if (min(aktuell, n), max(aktuell, n)) not in besucht]
+            if len(adjazenz[aktuell]) != 2 or not weiter:
+                return np.array(zug)
+            vorher, aktuell = aktuell, weiter[0]
+
+    # Erst von Enden/Abzweigen aus, danach verbleibende Ringe
+    reihenfolge = sorted(range(len(xy)), key=lambda i: len(adjazenz[i]) == 2)
+    for start in reihenfolge:
+        for n in adjazenz[start]:
+            if (min(start, n), max(start, n)) not in besucht:
+                zuege.append(folge(start, n))
+    return zuege
+
+
+def baue_segmente(strassen: pd.DataFrame, einstellungen: Optional[dict] = None) -> pd.DataFrame:
+    """
+    Erstellt Straßensegmente aus einer Punkttabelle (GPS_Lat, GPS_Lon, street).
+
+    :param strassen: Stützpunkte je Straße
+    :param einstellungen: Überschreibt Einträge aus CONFIG.KARTENABGLEICH
+    :returns: DataFrame mit Lat1, Lon1, Lat2, Lon2, street (ein Segment je Zeile)
+    """
+    e = dict(CONFIG.KARTENABGLEICH, **(einstellungen or {}))
+    strassen = strassen.dropna(subset=['GPS_Lat', 'GPS_Lon', 'street'])
+    strassen = strassen.drop_duplicates(subset=['GPS_Lat', 'GPS_Lon', 'street'])
+    lat0 = float(strassen['GPS_Lat'].mean()) if len(strassen) else 0.0
+    teile = []
+    for name, gruppe in strassen.groupby('street', sort=False):
+        lats = gruppe['GPS_Lat'].to_numpy(dtype=float)
+        lons = gruppe['GPS_Lon'].to_numpy(dtype=float)
+        xy = lokale_meter(lons, lats, lat0)
+        for zug in _linienzuege(xy, e['MAX_GLIED_M']):
+            zug = zug[_vereinfache(xy[zug], e['VEREINFACHUNG_M'])]
+            a, b = zug[:-1], zug[1:]
+            # Lange Segmente teilen, damit die Kandidatensuche über Mitten greift
+            teilung = np.maximum(1, np.ceil(np.hypot(*(xy[b] - xy[a]).T) / e['MAX_SEGMENT_M'])).astype(int)
+            anteil_a = np.concatenate([np.arange(t) / t for t in teilung])
+            anteil_b = np.concatenate([np.arange(1, t + 1) / t for t in teilung])
+            a, b = np.repeat(a, teilung), np.repeat(b, teilung)
+            teile.append(pd.DataFrame({
+                'Lat1': lats[a] + (lats[b] - lats[a]) * anteil_a,
+                'Lon1': lons[a] + (lons[b] - lons[a]) * anteil_a,
+                'Lat2': lats[a] + (lats[b] - lats[a]) * anteil_b,
+                'Lon2': lons[a] + (lons[b] - lons[a]) * anteil_b,
+                'street': name,
+            }))
+    if not teile:
+        return pd.DataFrame(columns=['Lat1', 'Lon1', 'Lat2', 'Lon2', 'street'])
+    return pd.concat(teile, ignore_index=True)
+
+
+def projiziere_auf_segmente(px: np.ndarray, py: np.ndarray, ax: np.ndarray, ay: np.ndarray,
+                            bx: np.ndarray, by: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Projiziert Punkte auf Strecken A→B (beliebig broadcastbare Arrays, Meter).
+
+    :returns: Tuple (Abstand in m, projizierte x, projizierte y)
+    """
+    dx, dy = bx - ax, by - ay
+    laenge2 = dx * dx + dy * dy
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = np.where(laenge2 > 0, ((px - ax) * dx + (py - ay) * dy) / laenge2, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    qx, qy = ax + t * dx, ay + t * dy
+    return np.hypot(px - qx, py - qy), qx, qy
+
+
+class StrassenSegmente:
+    """
+    Segmentindex für das Map-Matching.
+
+    :param segmente: DataFrame aus :func:`baue_segmente`
+    """
+
+    def __init__(self, segmente: pd.DataFrame) -> None:
+        from scipy.spatial import cKDTree
+
+        self.segmente = segmente.reset_index(drop=True)
+        self.namen, self.strasse_id = np.unique(self.segmente['street'].astype(str).to_numpy(),
+                                                return_inverse=True)
+        lats = self.segmente[['Lat1', 'Lat2']].to_numpy(dtype=float)
+        self.lat0 = float(lats.mean()) if len(lats) else 0.0
+        a = lokale_meter(self.segmente['Lon1'], self.segmente['Lat1'], self.lat0)
+        b = lokale_meter(self.segmente['Lon2'], self.segmente['Lat2'], self.lat0)
+        self.ax, self.ay, self.bx, self.by = a[:, 0], a[:, 1], b[:, 0], b[:, 1]
+        self.halbe_laenge = np.hypot(self.bx - self.ax, self.by - self.ay) / 2.0
+        self.baum = cKDTree((a + b) / 2.0) if len(a) else None
+
+    @classmethod
+    def laden(cls, strassen_datei: Optional[str] = None,
+              segment_datei: Optional[str] = None) -> 'StrassenSegmente':
+        """
+        Lädt den gespeicherten Segmentindex oder erstellt ihn neu, wenn die
+        Punkttabelle neuer ist.
+
+        :param strassen_datei: GPS2Street.csv (Standard aus CONFIG.GEOCODING)
+        :param segment_datei: Zieldatei (Standard aus CONFIG.KARTENABGLEICH)
+        """
+        strassen_datei = strassen_datei or CONFIG.GEOCODING['STRASSEN_DATEI']
+        segment_datei = segment_datei or CONFIG.KARTENABGLEICH['SEGMENT_DATEI']
+        if (os.path.exists(segment_datei)
+                and os.path.getmtime(segment_datei) >= os.path.getmtime(strassen_datei)):
+            return cls(pd.read_csv(segment_datei))
+        punkte = pd.read_csv(strassen_datei)
+        segmente = baue_segmente(punkte)
+        segmente.round(7).to_csv(segment_datei, index=False, encoding='utf-8')
+        print(f"Segmentindex erstellt: {len(punkte)} Punkte → {len(segmente)} Segmente ({segment_datei})")
+        return cls(segmente)
+
+    def kandidaten(self, x: np.ndarray, y: np.ndarray, anzahl: int,
+                   radius_m: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Kandidatensegmente je Punkt mit Abstand und Projektionspunkt.
+
+        :returns: Tuple (Segmentindex, Abstand, proj. x, proj. y), je (N x anzahl);
+            Index -1 / Abstand inf, wo kein Segment im Radius liegt
+        """
+        n = len(x)
+        if self.baum is None or n == 0:
+            leer = np.full((n, anzahl), np.inf)
+            return np.full((n, anzahl), -1), leer, leer, leer
+        anzahl = min(anzahl, len(self.ax))
+        gueltig = ~(np.isnan(x) | np.isnan(y))
+        index = np.full((n, anzahl), len(self.ax))
+        if gueltig.any():
+            _, idx = self.baum.query(np.column_stack([x[gueltig], y[gueltig]]), k=anzahl,
+                                     distance_upper_bound=radius_m + self.halbe_laenge.max())
+            index[gueltig] = idx.reshape(-1, anzahl)
+        vorhanden = index < len(self.ax)
+        i = np.where(vorhanden, index, 0)
+        d, qx, qy = projiziere_auf_segmente(x[:, None], y[:, None], self.ax[i], self.ay[i],
+                                            self.bx[i], self.by[i])
+        treffer = vorhanden & (d <= radius_m)
+        return np.where(treffer, i, -1), np.where(treffer, d, np.inf), qx, qy
+
+
+def ordne_strassen_zu(lat: np.ndarray, lon: np.ndarray, segmente: StrassenSegmente,
+                      einstellungen: Optional[dict] = None) -> np.ndarray:
+    """
+    Ordnet jedem Trackpunkt per Viterbi die wahrscheinlichste Straße zu.
+
+    Zustände je Punkt: bis zu KANDIDATEN Segmente plus "keine Straße".
+    Kosten (negativer Log der Wahrscheinlichkeit):
+
+    - Emission: 0.5 * (Abstand / GPS_SIGMA_M)²; "keine Straße" kostet so viel
+      wie ein Segment am Rand des Suchradius
+    - Übergang: |Abstand der Projektionen − GPS-Sprungweite| / BETA_M, plus
+      WECHSEL_STRAFE bei Straßenwechsel (auch von/zu "keine Straße")
+
+    :param lat: Breiten des Tracks (zeitlich sortiert)
+    :param lon: Längen des Tracks
+    :param segmente: Segmentindex
+    :param einstellungen: Überschreibt Einträge aus CONFIG.KARTENABGLEICH
+    :returns: Straßenname je Punkt ('Unbekannt' ohne Zuordnung)
+    """
+    e = dict(CONFIG.KARTENABGLEICH, **(einstellungen or {}))
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    n = len(lat)
+    if n == 0:
+        return np.array([], dtype=object)
+
+    xy = lokale_meter(lon, lat, segmente.lat0)
+    seg, dist, qx, qy = segmente.kandidaten(xy[:, 0], xy[:, 1], e['KANDIDATEN'], e['SUCHRADIUS_M'])
+    k = seg.shape[1]
+    # Zustand k = "keine Straße"
+    strasse = np.concatenate([np.where(seg >= 0, segmente.strasse_id[np.maximum(seg, 0)], -1),
+                              np.full((n, 1), -1)], axis=1)
+    emission = np.concatenate([0.5 * (dist / e['GPS_SIGMA_M']) ** 2,
+                               np.full((n, 1), 0.5 * (e['SUCHRADIUS_M'] / e['GPS_SIGMA_M']) ** 2)],
+                              axis=1).astype(np.float32)
+    qx = np.concatenate([qx, xy[:, :1]], axis=1)
+    qy = np.concatenate([qy, xy[:, 1:]], axis=1)
+    sprung = np.nan_to_num(np.hypot(*np.diff(xy, axis=0).T))
+
+    kosten = emission[0].copy()
+    zurueck = np.zeros((n, k + 1), dtype=np.int16)
+    spalten = np.arange(k + 1)
+    # Übergangskosten blockweise: (Block x (k+1) x (k+1)) statt für alle N-1 Schritte
+    for start in range(1, n, e['BLOCK_SCHRITTE']):
+        t = slice(start, min(start + e['BLOCK_SCHRITTE'], n))
+        v = slice(start - 1, t.stop - 1)
+        weg = np.hypot(qx[t, None, :] - qx[v, :, None], qy[t, None, :] - qy[v, :, None])
+        uebergang = np.abs(np.nan_to_num(weg) - sprung[v, None, None]) / e['BETA_M']
+        uebergang += e['WECHSEL_STRAFE'] * (strasse[t, None, :] != strasse[v, :, None])
+        uebergang = uebergang.astype(np.float32)
+        # "keine Straße" → "keine Straße" ohne Sprungkosten
+        uebergang[:, k, k] = 0.0
+        for i, schritt in enumerate(range(t.start, t.stop)):
+            summe = kosten[:, None] + uebergang[i]
+            zurueck[schritt] = summe.argmin(axis=0)
+            kosten = summe[zurueck[schritt], spalten] + emission[schritt]
+
+    pfad = np.empty(n, dtype=np.int64)
+    pfad[-1] = int(kosten.argmin())
+    for t in range(n - 1, 0, -1):
+        pfad[t - 1] = zurueck[t, pfad[t]]
+
+    gewaehlt = strasse[np.arange(n), pfad]
+    ergebnis = np.full(n, UNBEKANNT, dtype=object)
+    ergebnis[gewaehlt >= 0] = segmente.namen[gewaehlt[gewaehlt >= 0]]
+    return ergebnis
@@ -0,0 +1,205 @@
+"""
+kartengrundlage.py
+==================
+
+Offline-Cache für die Basiskarten-Ebenen (Grenzen, Küsten, Land) der
+Luftqualitätskarten.
+
+cartopy lädt für ``cfeature.BORDERS``, ``COASTLINE`` und ``LAND`` bei jeder
+Karte die globalen Natural-Earth-Shapefiles, schneidet sie zu und lädt sie
+aus dem Netz nach, falls sie fehlen. Dieses Modul schneidet die benötigten
+Ebenen einmalig auf den Ausschnitt Neustadt/Pfälzerwald zu, vereinfacht sie
+und speichert sie als kompakte Koordinaten-Arrays (.npz). Gezeichnet wird
+anschließend direkt aus dem Speicher – ohne Netzwerk und ohne Shapefiles.
+
+Features:
+- erstelle_basiskarten_cache: Shapefiles → zugeschnittene, vereinfachte Arrays
+- zeichne_basiskarte: zeichnet alle Ebenen als Line-/PathCollection
+- Cache wird pro Prozess nur einmal geladen (neu bei geänderter Datei; ein fehlender Cache wird nicht gemerkt)
+
+Abhängigkeiten:
+---------------
+- numpy, matplotlib
+- shapely, cartopy (nur zum Erstellen des Caches)
+- config.CONFIG (BASISKARTE)
+
+Verwendung:
+-----------
+    python utils/kartengrundlage.py <ordner_mit_natural_earth_shapefiles>
+
+Autor: Frank Albrecht
+"""
+import os
+import sys
+import glob
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+from matplotlib.collections import LineCollection, PathCollection
+from matplotlib.path import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import CONFIG
+
+# Darstellung wie zuvor über cfeature.BORDERS / COASTLINE / LAND
+EBENEN_STIL = {
+    'borders': dict(linestyle=':', alpha=0.5, edgecolor='black', facecolor='none'),
+    'coastline': dict(alpha=0.3, edgecolor='black', facecolor='none'),
+    'land': dict(edgecolor='black', facecolor='#efefdb', alpha=0.1),
+}
+
+
+def _finde_shapefile(kategorie: str, name: str, aufloesung: str,
+                     ordner: Optional[str]) -> Optional[str]:
+    """
+    Sucht ein Natural-Earth-Shapefile lokal (eigener Ordner, dann cartopy-Datenordner).
+    Lädt nur herunter, wenn CONFIG.BASISKARTE['ERLAUBE_DOWNLOAD'] gesetzt ist.
+    """
+    dateiname = f"ne_{aufloesung}_{name}.shp"
+    suchorte = []
+    if ordner:
+        suchorte.append(os.path.join(ordner, '**', dateiname))
+    try:
+        import cartopy
+        suchorte.append(os.path.join(cartopy.config['data_dir'], '**', dateiname))
+    except ImportError:
+        pass
+    for muster in suchorte:
+        treffer = glob.glob(muster, recursive=True)
+        if treffer:
+            return treffer[0]
+    if CONFIG.BASISKARTE['ERLAUBE_DOWNLOAD']:
+        from cartopy.io import shapereader
+        return shapereader.natural_earth(resolution=aufloesung, category=kategorie, name=name)
+    return None
+
+
+def _ringe(geometrie) -> List[np.ndarray]:
+    """Zerlegt eine (Multi-)Linie oder ein (Multi-)Polygon in Koordinatenringe."""
+    from shapely.geometry.polygon import orient
+
+    if geometrie.is_empty:
+        return []
+    if hasattr(geometrie, 'geoms'):
+        return [r for teil in geometrie.geoms for r in _ringe(teil)]
+    if geometrie.geom_type == 'Polygon':
+        # Außenring gegen, Löcher im Uhrzeigersinn – dann füllt matplotlib korrekt
+        polygon = orient(geometrie, 1.0)
+        return [np.asarray(polygon.exterior.coords)] + \
+               [np.asarray(ring.coords) for ring in polygon.interiors]
+    return [np.asarray(geometrie.coords)]
+
+
+def erstelle_basiskarten_cache(shapefile_ordner: Optional[str] = None,
+                               ziel: Optional[str] = None) -> str:
+    """
+    Schneidet die Natural-Earth-Ebenen auf den Kartenausschnitt zu und speichert sie.
+
+    Je Ebene werden alle Ringe/Linien zu einem Array ``<ebene>_koords`` (N x 2,
+    float32) zusammengefügt; ``<ebene>_offsets`` enthält die Startindizes.
+
+    :param shapefile_ordner: Ordner mit ``ne_<auflösung>_<name>.shp``-Dateien
+    :param ziel: Zielpfad der .npz-Datei (Standard: CONFIG.BASISKARTE['CACHE_DATEI'])
+    :returns: Pfad der geschriebenen Cache-Datei
+    :raises FileNotFoundError: Wenn ein benötigtes Shapefile fehlt
+    """
+    from shapely.geometry import box
+    from cartopy.io import shapereader
+
+    einstellungen = CONFIG.BASISKARTE
+    ziel = ziel or einstellungen['CACHE_DATEI']
+    lon_min, lon_max, lat_min, lat_max = einstellungen['AUSDEHNUNG']
+    ausschnitt = box(lon_min, lat_min, lon_max, lat_max)
+
+    arrays: Dict[str, np.ndarray] = {
+        'ausdehnung': np.array(einstellungen['AUSDEHNUNG'], dtype=float)
+    }
+    for ebene, (kategorie, name) in einstellungen['EBENEN'].items():
+        pfad = _finde_shapefile(kategorie, name, einstellungen['AUFLOESUNG'], shapefile_ordner)
+        if pfad is None:
+            raise FileNotFoundError(
+                f"Shapefile ne_{einstellungen['AUFLOESUNG']}_{name}.shp nicht gefunden")
+        ringe: List[np.ndarray] = []
+        for geometrie in shapereader.Reader(pfad).geometries():
+            if not geometrie.intersects(ausschnitt):
+                continue
+            teil = geometrie.intersection(ausschnitt).simplify(
+                einstellungen['VEREINFACHUNG_GRAD'], preserve_topology=True)
+            ringe.extend(r for r in _ringe(teil) if len(r) >= 2)
+        laengen = [len(r) for r in ringe]
+        arrays[f'{ebene}_koords'] = (np.concatenate(ringe)[:, :2].astype(np.float32)
+                                     if ringe else np.empty((0, 2), dtype=np.float32))
+        arrays[f'{ebene}_offsets'] = np.concatenate([[0], np.cumsum(laengen)]).astype(np.int64)
+        print(f"✅ Ebene '{ebene}': {len(ringe)} Ringe, {sum(laengen)} Punkte")
+
+    os.makedirs(os.path.dirname(ziel), exist_ok=True)
+    np.savez_compressed(ziel, **arrays)
+    print(f"💾 Basiskarten-Cache gespeichert: {ziel}")
+    return ziel
+
+
+def lade_basiskarte(pfad: Optional[str] = None) -> Dict[str, List[np.ndarray]]:
+    """
+    Lädt den Basiskarten-Cache als Ringlisten je Ebene.
+
+    Gemerkt wird je Pfad und Änderungszeit: ein später erstellter oder neu
+    gebauter Cache wird ohne Neustart gefunden, ein fehlender nicht gemerkt.
+
+    :param pfad: Pfad der .npz-Datei (Standard aus CONFIG)
+    :returns: Dict Ebene → Liste von (N x 2)-Arrays; leer, wenn kein Cache existiert
+    """
+    pfad = pfad or CONFIG.BASISKARTE['CACHE_DATEI']
+    if not os.path.isfile(pfad):
+        print(f"⚠️ Kein Basiskarten-Cache unter {pfad} – Karte ohne Grenzen/Land. "
+              f"Erstellen mit: python utils/kartengrundlage.py <shapefile-ordner>")
+        return {}
+    return _lade_basiskarte(os.path.abspath(pfad), os.stat(pfad).st_mtime_ns)
+
+
+@lru_cache(maxsize=4)
+def _lade_basiskarte(pfad: str, mtime_ns: int) -> Dict[str, List[np.ndarray]]:
+    ebenen = {}
+    with np.load(pfad) as daten:
+        for ebene in CONFIG.BASISKARTE['EBENEN']:
+            if f'{ebene}_koords' not in daten:
+                continue
+            koords, offsets = daten[f'{ebene}_koords'], daten[f'{ebene}_offsets']
+            ebenen[ebene] = np.split(koords, offsets[1:-1])
+    return ebenen
+
+
+def zeichne_basiskarte(ax, pfad: Optional[str] = None) -> None:
+    """
+    Zeichnet Grenzen, Küsten und Land aus dem Offline-Cache in eine Karte.
+
+    Ersetzt ``ax.add_feature(cfeature.BORDERS/COASTLINE/LAND)`` ohne Zugriff
+    auf Netzwerk oder globale Shapefiles.
+
+    :param ax: matplotlib- bzw. cartopy-GeoAxes (PlateCarree)
+    :param pfad: Optionaler Pfad der Cache-Datei
+    """
+    transform = {}
+    try:
+        import cartopy.crs as ccrs
+        transform = {'transform': ccrs.PlateCarree()}
+    except ImportError:
+        pass
+
+    for ebene, ringe in lade_basiskarte(pfad).items():
+        if not ringe:
+            continue
+        stil = EBENEN_STIL.get(ebene, {})
+        if ebene == 'land':
+            # Alle Polygone als ein zusammengesetzter Pfad (Löcher bleiben erhalten)
+            pfad_land = Path.make_compound_path(*[Path(r, closed=True) for r in ringe if len(r) >= 3])
+            ax.add_collection(PathCollection([pfad_land], zorder=0, **stil, **transform))
+        else:
+            linien_stil = {k: v for k, v in stil.items() if k not in ('edgecolor', 'facecolor')}
+            ax.add_collection(LineCollection(ringe, colors=stil.get('edgecolor', 'black'),
+                                             zorder=1, **linien_stil, **transform))
+
+
+if __name__ == "__main__":
+    # Code hier drunter wird nur ausgeführt wenn das Skript direkt aufgerufen wird
+    erstelle_basiskarten_cache(sys.argv[1] if len(sys.argv) > 1 else None)
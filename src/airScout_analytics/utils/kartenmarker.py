@@ -0,0 +1,186 @@
+"""
+kartenmarker.py
+===============
+
+Kompakte Marker-Ebenen für Folium-Karten mit Erzeugung im Browser.
+
+Statt für jede Zeile ein ``folium.Marker``/``CircleMarker`` samt HTML-Popup in
+Python zu erzeugen (und damit riesige HTML-Dateien), werden Koordinaten und
+Werte als kompaktes Array übertragen. Marker, Farben und Popups entstehen erst
+im Browser per JavaScript (``FastMarkerCluster``); Popups werden sogar erst
+beim Anklicken zusammengesetzt.
+
+Features:
+- marker_daten: vektorisierte Umwandlung DataFrame → gerundete Zeilenliste
+- luftwert_ebene: farbige Kreise nach MQ135 mit Popup (plot_luftkarte)
+- sensor_top_ebene: Icon-Marker je Sensor/Radioaktivität (Top-10%-Karte)
+- strassen_ebene: Straßen eingefärbt nach der Statistik über alle Fahrten
+
+Abhängigkeiten:
+---------------
+- numpy, pandas
+- folium (folium.plugins.FastMarkerCluster, PolyLine)
+
+Autor: Frank Albrecht
+"""
+import json
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import folium
+from folium.plugins import FastMarkerCluster
+
+# Popup-HTML wird erst beim Klick gebaut; fehlende Werte erscheinen als '?'
+_JS_WERT = "function wert(v) { return (v === null || v === undefined) ? '?' : v; }"
+
+_LUFTWERT_CALLBACK = """
+(function () {
+    %(js_wert)s
+    return function (row) {
+        var mq = row[4];
+        var farbe = (mq === null || mq < %(grenze_gut)s) ? 'green'
+                  : (mq < %(grenze_mittel)s ? 'orange' : 'red');
+        var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {
+            radius: 5, color: farbe, fill: true, fillColor: farbe, fillOpacity: 0.7
+        });
+        marker.bindPopup(function () {
+            return '<b>Datum:</b> ' + wert(row[2]) + '<br>' +
+                   '<b>Temperatur:</b> ' + wert(row[5]) + ' °C<br>' +
+                   '<b>Luftfeuchte:</b> ' + wert(row[6]) + ' %%<br>' +
+                   '<b>MQ135 Luftqualität:</b> ' + wert(mq) + ' µg/m³<br>' +
+                   '<b>Radioaktivität:</b> ' + wert(row[3]) + ' CPS';
+        }, {maxWidth: 300});
+        return marker;
+    };
+})()
+"""
+
+_SENSOR_TOP_CALLBACK = """
+(function () {
+    // Sensor-Tabelle einmal anlegen, Zeilen enthalten nur den Index
+    var sensoren = %(sensoren)s;
+    %(js_wert)s
+    return function (row) {
+        var s = sensoren[row[2]];
+        var icon = L.AwesomeMarkers.icon({
+            markerColor: s.farbe, icon: s.icon, prefix: s.prefix
+        });
+        var marker = L.marker(new L.LatLng(row[0], row[1]), {icon: icon});
+        marker.bindPopup(function () {
+            if (s.name === null) {
+                return 'Radioaktivität: ' + wert(row[3]) + '<br>Datum/Zeit: ' + wert(row[4]);
+            }
+            return 'Sensor: ' + s.name + '<br>Gas: ' + s.gas + '<br>Wert: ' + wert(row[3]) +
+                   '<br>Datum/Zeit: ' + wert(row[4]);
+        });
+        return marker;
+    };
+})()
+"""
+
+
+def marker_daten(df: pd.DataFrame, spalten: Sequence[Optional[str]],
+                 dezimalstellen: int = 6) -> List[list]:
+    """
+    Wandelt DataFrame-Spalten vektorisiert in eine kompakte Zeilenliste um.
+
+    Numerische Spalten werden gerundet, Zeitstempel als Text übertragen,
+    fehlende Spalten bzw. Werte als ``None`` (im Browser: '?').
+
+    :param df: Quelldaten
+    :param spalten: Spaltennamen in der gewünschten Reihenfolge (None = leer)
+    :param dezimalstellen: Nachkommastellen für numerische Werte
+    :returns: Liste von Zeilen ``[[lat, lon, ...], ...]``
+    """
+    teile = []
+    for spalte in spalten:
+        if spalte is None or spalte not in df.columns:
+            teile.append(np.full(len(df), None, dtype=object))
+            continue
+        serie = df[spalte]
+        if pd.api.types.is_numeric_dtype(serie):
+            werte = serie.round(dezimalstellen).astype(object)
+        else:
+            werte = serie.astype(str).astype(object)
+        teile.append(werte.where(serie.notna(), None).to_numpy())
+    if not teile:
+        return []
+    return np.column_stack(teile).tolist()
+
+
+def luftwert_ebene(df: pd.DataFrame, name: Optional[str] = None,
+                   grenze_gut: float = 100, grenze_mittel: float = 200) -> FastMarkerCluster:
+    """
+    Erstellt die Punktwert-Ebene für plot_luftkarte (Farbe nach MQ135).
+
+    :param df: DataFrame mit GPS_Lat, GPS_Lon und optional DateTime,
+        Radiation_CPS, MQ135, Temperature_DHT_C, Humidity_RH
+    :param name: Name der Ebene in der Layer-Kontrolle
+    :param grenze_gut: MQ135 unterhalb dieser Grenze → grün
+    :param grenze_mittel: MQ135 unterhalb dieser Grenze → orange, sonst rot
+    :returns: FastMarkerCluster, der per ``add_to(map)`` eingefügt wird
+    """
+    daten = marker_daten(df, ['GPS_Lat', 'GPS_Lon', 'DateTime', 'Radiation_CPS',
+                              'MQ135', 'Temperature_DHT_C', 'Humidity_RH'])
+    callback = _LUFTWERT_CALLBACK % {
+        'js_wert': _JS_WERT, 'grenze_gut': grenze_gut, 'grenze_mittel': grenze_mittel}
+    return FastMarkerCluster(daten, callback=callback, name=name)
+
+
+def sensor_top_ebene(punkte: pd.DataFrame, sensoren: Dict[str, dict],
+                     name: Optional[str] = None) -> FastMarkerCluster:
+    """
+    Erstellt die Marker-Ebene der Top-Werte aller Sensoren.
+
+    :param punkte: DataFrame mit den Spalten GPS_Lat, GPS_Lon, sensor (Schlüssel
+        aus ``sensoren``), wert und DateTime
+    :param sensoren: Sensor-Schlüssel → {'name', 'gas', 'farbe', 'icon', 'prefix'};
+        ``name`` None kennzeichnet Radioaktivitäts-Marker
+    :param name: Name der Ebene in der Layer-Kontrolle
+    :returns: FastMarkerCluster, der per ``add_to(map)`` eingefügt wird
+    """
+    schluessel = list(sensoren)
+    punkte = punkte.assign(sensor=punkte['sensor'].map({s: i for i, s in enumerate(schluessel)}))
+    daten = marker_daten(punkte, ['GPS_Lat', 'GPS_Lon', 'sensor', 'wert', 'DateTime'])
+    callback = _SENSOR_TOP_CALLBACK % {
+        'js_wert': _JS_WERT,
+        'sensoren': json.dumps([sensoren[s] for s in schluessel], ensure_ascii=False)}
+    return FastMarkerCluster(daten, callback=callback, name=name)
+
+
+def strassen_ebene(tabelle: pd.DataFrame, segmente: pd.DataFrame, sensor: str = 'MQ135',
+                   name: Optional[str] = None, grenze_gut: float = 100,
+                   grenze_mittel: float = 200) -> folium.FeatureGroup:
+    """
+    Erstellt eine Ebene mit Straßen, eingefärbt nach dem Mittelwert über alle Fahrten.
+
+    Je Straße entsteht eine einzige (Multi-)Linie aus ihren Segmenten.
+
+    :param tabelle: Ausgabe von ``StrassenStatistik.tabelle`` (street, fahrten,
+        dauer_min, ``{sensor}_mittel``, ``{sensor}_max``)
+    :param segmente: Segmente mit Lat1, Lon1, Lat2, Lon2, street (utils.kartenabgleich)
+    :param sensor: Sensor für die Farbe
+    :param name: Name der Ebene in der Layer-Kontrolle
+    :param grenze_gut: Mittelwert unterhalb dieser Grenze → grün
+    :param grenze_mittel: Mittelwert unterhalb dieser Grenze → orange, sonst rot
+    :returns: FeatureGroup, die per ``add_to(map)`` eingefügt wird
+    """
+    ebene = folium.FeatureGroup(name=name or f"Straßen – {sensor} (alle Fahrten)")
+    spalte = f'{sensor}_mittel'
+    if spalte not in tabelle.columns:
+        return ebene
+    werte = tabelle.dropna(subset=[spalte]).set_index('street')
+    segmente = segmente[segmente['street'].isin(werte.index)]
+    linien = segmente[['Lat1', 'Lon1', 'Lat2', 'Lon2']].round(6).to_numpy().reshape(-1, 2, 2)
+    for strasse, index in segmente.groupby('street').indices.items():
+        z = werte.loc[strasse]
+        mittel = z[spalte]
+        farbe = 'green' if mittel < grenze_gut else ('orange' if mittel < grenze_mittel else 'red')
+        folium.PolyLine(
+            linien[index].tolist(), color=farbe, weight=5, opacity=0.8,
+            tooltip=(f"<b>{strasse}</b><br>{sensor} Mittel: {mittel:.1f}, "
+                     f"Max: {z.get(f'{sensor}_max', float('nan')):.1f}<br>"
+                     f"{int(z['fahrten'])} Fahrten, {z['dauer_min']:.1f} min")
+        ).add_to(ebene)
+    return ebene
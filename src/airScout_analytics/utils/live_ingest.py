@@ -0,0 +1,437 @@
+"""
+live_ingest.py
+==============
+
+Live-Erfassung einer laufenden Fahrt aus einer wachsenden Logdatei oder einem TCP-Socket.
+
+Bisher konnte eine Fahrt erst nach Fahrtende ausgewertet werden. Hier wird
+der Datenstrom des Loggers (``#``-Kommentarblock, Kopfzeile, Messzeilen)
+fortlaufend gelesen und blockweise mit denselben Regeln wie
+``laden_und_reinigen`` bereinigt (utils/rohformat.py). Jeder Block läuft
+durch die Streaming-Detektoren (Zustand O(1) je Sensor) und landet in einem
+Ringpuffer fester Größe, aus dem das Dashboard liest. Weitere Verbraucher
+(z.B. Alarme) können sich auf neue Blöcke anmelden.
+
+Ohne Hardware dient die Wiedergabe als Ersatz: eine aufgezeichnete Datei
+aus ``data/roh`` wird im Takt ihrer Zeitstempel (optional beschleunigt) in
+eine Datei geschrieben oder über einen lokalen TCP-Port gesendet.
+
+Features:
+- ZeilenParser: inkrementelles Zerlegen (unvollständige Zeilen, Kopfzeile, Neustart)
+- DateiQuelle / SocketQuelle / oeffne_quelle: Datei verfolgen bzw. TCP lesen
+- EmaZDetektor: EMA und z-Score je Sensor (CONFIG.EMA_ANALYSE)
+- RingPuffer: feste Kapazität, Schnappschuss als SensorReihen fürs Dashboard
+- LiveErfassung: Hintergrund-Thread Quelle -> Parser -> Detektoren -> Puffer
+- wiedergabe: Aufzeichnung als Live-Strom abspielen
+- CLI: ``python utils/live_ingest.py wiedergabe <rohdatei> <ziel> [tempo]``
+       ``python utils/live_ingest.py erfassen <quelle>``
+
+Abhängigkeiten:
+---------------
+- numpy, pandas
+- Standardbibliothek: socket, threading, codecs
+- config.CONFIG (LIVE, EMA_ANALYSE)
+
+Autor: Frank Albrecht
+"""
+import io
+import os
+import re
+import sys
+import time
+import codecs
+import socket
+import threading
+from typing import Callable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import CONFIG
+from utils.rohformat import SPALTEN, normalisiere_zeile, bereinige_messdaten
+from utils.dashboard_daten import SensorReihen
+
+# Spalten, die nicht als Messwert in den Ringpuffer gehen
+_NICHT_NUMERISCH = ('SecSinceMidnight-MS', 'DateTime', 'GPS_DateTime')
+_ZEIT_MUSTER = re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}')
+_TCP_MUSTER = re.compile(r'tcp://([^:/]*)(?::(\d+))?$')
+
+
+class ZeilenParser:
+    """
+    Zerlegt einen Textstrom des Loggers inkrementell in bereinigte Blöcke.
+
+    Eine unvollständige letzte Zeile wird bis zum nächsten Aufruf behalten.
+    Kommentarzeilen werden übersprungen, die erste übrige Zeile ist die
+    Kopfzeile; eine erneute Kopfzeile (Neustart des Loggers) wird ignoriert.
+    """
+
+    def __init__(self) -> None:
+        self._rest = ''
+        self.spalten: Optional[List[str]] = None
+        self.beginn: Optional[pd.Timestamp] = None
+
+    def fuettere(self, text: str) -> pd.DataFrame:
+        """
+        Verarbeitet neuen Text und liefert die darin vollständigen Messzeilen.
+
+        :param text: Neu gelesener Text (beliebig abgeschnitten)
+        :returns: Bereinigter DataFrame (ggf. leer)
+        """
+        zeilen = (self._rest + text).split('\n')
+        self._rest = zeilen.pop()
+        daten = []
+        for zeile in zeilen:
+            zeile = zeile.strip()
+            if not zeile or zeile.startswith('#'):
+                continue
+            zeile = normalisiere_zeile(zeile)
+            if zeile.startswith('SecSinceMidnight'):
+                if self.spalten is None:
+                    self.spalten = zeile.split(',')
+                continue
+            if self.spalten is None:
+                self.spalten = list(SPALTEN)  # Strom ohne Kopfzeile
+            daten.append(zeile)
+        if not daten:
+            return pd.DataFrame(columns=self.spalten or SPALTEN)
+        # Manche Logger-Versionen schreiben GPS_DateTime ohne Eintrag in der Kopfzeile
+        if daten[0].count(',') == len(self.spalten) and 'GPS_DateTime' not in self.spalten:
+            self.spalten.append('GPS_DateTime')
+        df = pd.read_csv(io.StringIO('\n'.join(daten)), header=None, names=self.spalten,
+                         index_col=False, on_bad_lines='skip')
+        if self.beginn is None and 'DateTime' in df.columns:
+            erste = pd.to_datetime(df['DateTime'], errors='coerce').min()
+            if pd.notna(erste):
+                self.beginn = erste
+        if self.beginn is None:
+            return df.iloc[0:0]
+        return bereinige_messdaten(df, beginn=self.beginn, protokoll=False)
+
+
+class DateiQuelle:
+    """
+    Verfolgt eine wachsende Logdatei (wie ``tail -f``).
+
+    :param pfad: Logdatei (darf noch nicht existieren)
+    :param intervall: Wartezeit in Sekunden, wenn nichts Neues da ist
+    """
+
+    def __init__(self, pfad: str, intervall: Optional[float] = None) -> None:
+        self.pfad = pfad
+        self.intervall = intervall or CONFIG.LIVE['INTERVALL_S']
+
+    def __str__(self) -> str:
+        return self.pfad
+
+    def texte(self, stopp: threading.Event) -> Iterator[str]:
+        while not os.path.exists(self.pfad):
+            if stopp.wait(self.intervall):
+                return
+        with open(self.pfad, encoding='utf-8', errors='replace', newline='') as f:
+            while not stopp.is_set():
+                text = f.read()
+                if text:
+                    yield text
+                    continue
+                # Datei neu angelegt/gekürzt (Logger-Neustart) -> von vorn lesen
+                if os.path.getsize(self.pfad) < f.tell():
+                    f.seek(0)
+                    continue
+                stopp.wait(self.intervall)
+
+
+class SocketQuelle:
+    """
+    Liest den Strom von einem TCP-Port; bei Verbindungsabbruch wird neu verbunden.
+
+    :param host: Rechnername oder IP
+    :param port: TCP-Port
+    :param intervall: Timeout bzw. Wartezeit vor erneutem Verbinden (Sekunden)
+    """
+
+    def __init__(self, host: str, port: int, intervall: Optional[float] = None) -> None:
+        self.host = host
+        self.port = port
+        self.intervall = intervall or CONFIG.LIVE['INTERVALL_S']
+
+    def __str__(self) -> str:
+        return f"tcp://{self.host}:{self.port}"
+
+    def texte(self, stopp: threading.Event) -> Iterator[str]:
+        while not stopp.is_set():
+            try:
+                with socket.create_connection((self.host, self.port), timeout=self.intervall) as s:
+                    s.settimeout(self.intervall)
+                    dekodierer = codecs.getincrementaldecoder('utf-8')('replace')
+                    while not stopp.is_set():
+                        try:
+                            daten = s.recv(65536)
+                        except socket.timeout:
+                            continue
+                        if not daten:
+                            break
+                        yield dekodierer.decode(daten)
+            except OSError:
+                pass
+            stopp.wait(self.intervall)
+
+
+def oeffne_quelle(adresse: str):
+    """
+    Quelle aus einer Adresse: ``tcp://host[:port]`` (Standardport CONFIG.LIVE['PORT'])
+    oder Dateipfad.
+    """
+    treffer = _TCP_MUSTER.match(adresse)
+    if treffer:
+        return SocketQuelle(treffer.group(1) or 'localhost',
+                            int(treffer.group(2) or CONFIG.LIVE['PORT']))
+    return DateiQuelle(adresse)
+
+
+class EmaZDetektor:
+    """
+    Streaming-Detektor: EMA und exponentiell gewichteter z-Score je Sensor.
+
+    Der Zustand (EMA, Varianz) bleibt zwischen den Blöcken erhalten; die
+    Ergebnisse entsprechen also einer Auswertung über die ganze Fahrt.
+    Fügt ``<sensor>_ema`` und ``<sensor>_z`` hinzu.
+
+    :param spalten: Sensorspalten (Standard: CONFIG.LIVE['DETEKTOR_SPALTEN'])
+    :param span: EMA-Span (Standard: CONFIG.EMA_ANALYSE['EMA_SPAN'])
+    """
+
+    def __init__(self, spalten: Optional[Sequence[str]] = None, span: Optional[int] = None) -> None:
+        self.spalten = list(spalten or CONFIG.LIVE['DETEKTOR_SPALTEN'])
+        self.alpha = 2.0 / ((span or CONFIG.EMA_ANALYSE['EMA_SPAN']) + 1.0)
+        self._ema = np.full(len(self.spalten), np.nan)
+        self._var = np.zeros(len(self.spalten))
+
+    @property
+    def neue_spalten(self) -> List[str]:
+        return [f"{s}_{t}" for s in self.spalten for t in ('ema', 'z')]
+
+    def verarbeite(self, df: pd.DataFrame) -> pd.DataFrame:
+        werte = np.column_stack([pd.to_numeric(df[s], errors='coerce').to_numpy(float)
+                                 if s in df.columns else np.full(len(df), np.nan)
+                                 for s in self.spalten])
+        ema = np.empty_like(werte)
+        z = np.full_like(werte, np.nan)
+        a = self.alpha
+        for i, x in enumerate(werte):
+            gueltig = ~np.isnan(x)
+            neu = gueltig & np.isnan(self._ema)
+            self._ema[neu] = x[neu]
+            alt = gueltig & ~neu
+            abw = x[alt] - self._ema[alt]
+            std = np.sqrt(self._var[alt])
+            z[i, alt] = np.divide(abw, std, out=np.zeros_like(abw), where=std > 0)
+            self._ema[alt] += a * abw
+            self._var[alt] = (1 - a) * (self._var[alt] + a * abw * abw)
+            ema[i] = self._ema
+        neu = {}
+        for j, s in enumerate(self.spalten):
+            neu[f"{s}_ema"] = ema[:, j]
+            neu[f"{s}_z"] = z[:, j]
+        return df.assign(**neu)
+
+
+class RingPuffer:
+    """
+    Ringpuffer fester Kapazität für die zuletzt erfassten Zeilen (thread-sicher).
+
+    :param spalten: Numerische Spalten
+    :param kapazitaet: Maximale Zeilenzahl (Standard: CONFIG.LIVE['PUFFER_ZEILEN'])
+    """
+
+    def __init__(self, spalten: Sequence[str], kapazitaet: Optional[int] = None) -> None:
+        self.spalten = list(spalten)
+        self.kapazitaet = kapazitaet or CONFIG.LIVE['PUFFER_ZEILEN']
+        self._zeit = np.full(self.kapazitaet, np.datetime64('NaT'), dtype='datetime64[ns]')
+        self._werte = np.full((self.kapazitaet, len(self.spalten)), np.nan)
+        self._schreibpos = 0
+        self.anzahl = 0
+        self.version = 0
+        self._sperre = threading.Lock()
+        self._reihen = (-1, None)
+
+    def anhaengen(self, df: pd.DataFrame) -> None:
+        """Hängt einen Block an; die ältesten Zeilen werden überschrieben."""
+        if df.empty:
+            return
+        zeit = pd.to_datetime(df['DateTime'], errors='coerce').to_numpy('datetime64[ns]')
+        werte = np.column_stack([pd.to_numeric(df[s], errors='coerce').to_numpy(float)
+                                 if s in df.columns else np.full(len(df), np.nan)
+                                 for s in self.spalten])
+        zeit, werte = zeit[-self.kapazitaet:], werte[-self.kapazitaet:]
+        with self._sperre:
+            pos = (self._schreibpos + np.arange(len(zeit))) % self.kapazitaet
+            self._zeit[pos] = zeit
+            self._werte[pos] = werte
+            self._schreibpos = int((self._schreibpos + len(zeit)) % self.kapazitaet)
+            self.anzahl = min(self.kapazitaet, self.anzahl + len(zeit))
+            self.version += 1
+
+    def schnappschuss(self):
+        """Kopie des Inhalts in Schreibreihenfolge: (zeit, werte, version)."""
+        with self._sperre:
+            if self.anzahl < self.kapazitaet:
+                auswahl = np.arange(self.anzahl)
+            else:
+                auswahl = (self._schreibpos + np.arange(self.kapazitaet)) % self.kapazitaet
+            return self._zeit[auswahl], self._werte[auswahl], self.version
+
+    def als_dataframe(self) -> pd.DataFrame:
+        zeit, werte, _ = self.schnappschuss()
+        df = pd.DataFrame(werte, columns=self.spalten)
+        df.insert(0, 'DateTime', zeit)
+        return df
+
+    def reihen(self) -> SensorReihen:
+        """
+        Inhalt als SensorReihen fürs Dashboard (je Pufferstand nur einmal erstellt).
+        """
+        version, reihen = self._reihen
+        if version == self.version and reihen is not None:
+            return reihen
+        zeit, werte, version = self.schnappschuss()
+        gueltig = ~np.isnat(zeit)
+        ordnung = np.flatnonzero(gueltig)[np.argsort(zeit[gueltig], kind='stable')]
+        spalten = {s: werte[ordnung, j] for j, s in enumerate(self.spalten)}
+        reihen = SensorReihen(zeit[ordnung], spalten, spalten.get('GPS_Lat'), spalten.get('GPS_Lon'))
+        self._reihen = (version, reihen)
+        return reihen
+
+
+class LiveErfassung:
+    """
+    Hintergrund-Thread: Quelle -> ZeilenParser -> Detektoren -> RingPuffer.
+
+    :param quelle: DateiQuelle oder SocketQuelle
+    :param detektoren: Streaming-Detektoren mit ``verarbeite(df)`` und ``neue_spalten``
+        (Standard: ein EmaZDetektor)
+    :param kapazitaet: Größe des Ringpuffers
+    """
+
+    def __init__(self, quelle, detektoren: Optional[list] = None,
+                 kapazitaet: Optional[int] = None) -> None:
+        self.quelle = quelle
+        self.parser = ZeilenParser()
+        self.detektoren = [EmaZDetektor()] if detektoren is None else list(detektoren)
+        spalten = [s for s in SPALTEN if s not in _NICHT_NUMERISCH]
+        spalten += [s for d in self.detektoren for s in d.neue_spalten]
+        self.puffer = RingPuffer(spalten, kapazitaet)
+        self.abonnenten: List[Callable[[pd.DataFrame], None]] = []
+        self.bloecke = 0
+        self.zeilen = 0
+        self._stopp = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def verarbeite_text(self, text: str) -> pd.DataFrame:
+        """Ein Stück Text durch Parser, Detektoren und Puffer schicken."""
+        block = self.parser.fuettere(text)
+        if block.empty:
+            return block
+        for detektor in self.detektoren:
+            block = detektor.verarbeite(block)
+        self.puffer.anhaengen(block)
+        self.bloecke += 1
+        self.zeilen += len(block)
+        for abonnent in self.abonnenten:
+            try:
+                abonnent(block)
+            except Exception as e:
+                print(f"❌ Live-Erfassung: Verbraucher fehlgeschlagen: {e}")
+        return block
+
+    def _lauf(self) -> None:
+        for text in self.quelle.texte(self._stopp):
+            try:
+                self.verarbeite_text(text)
+            except Exception as e:
+                print(f"❌ Live-Erfassung: Block verworfen: {e}")
+
+    def starte(self) -> 'LiveErfassung':
+        self._thread = threading.Thread(target=self._lauf, name="live-erfassung", daemon=True)
+        self._thread.start()
+        print(f"🔴 Live-Erfassung gestartet: {self.quelle}")
+        return self
+
+    def stoppe(self) -> None:
+        self._stopp.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+def wiedergabe(rohdatei: str, ziel: str, tempo: Optional[float] = None) -> int:
+    """
+    Spielt eine Aufzeichnung als Live-Strom ab (Ersatz für die Hardware).
+
+    Kommentarblock und Kopfzeile werden sofort geschrieben, Messzeilen im
+    Abstand ihrer DateTime-Stempel geteilt durch ``tempo``.
+
+    :param rohdatei: Rohdatei (z.B. aus data/roh)
+    :param ziel: Zieldatei oder ``tcp://host[:port]`` (wartet auf einen Client)
+    :param tempo: Beschleunigung (Standard: CONFIG.LIVE['WIEDERGABE_TEMPO'], <= 0 = ohne Pause)
+    :returns: Anzahl gesendeter Zeilen
+    """
+    tempo = CONFIG.LIVE['WIEDERGABE_TEMPO'] if tempo is None else tempo
+    with open(rohdatei, encoding='utf-8', errors='replace') as f:
+        zeilen = f.readlines()
+
+    treffer = _TCP_MUSTER.match(ziel)
+    if treffer:
+        server = socket.create_server((treffer.group(1) or '0.0.0.0',
+                                       int(treffer.group(2) or CONFIG.LIVE['PORT'])))
+        print(f"▶️ Wiedergabe wartet auf Verbindung an {ziel} …")
+        verbindung, _ = server.accept()
+        senden = lambda text: verbindung.sendall(text.encode('utf-8'))  # noqa: E731
+        schliessen = lambda: (verbindung.close(), server.close())  # noqa: E731
+    else:
+        ausgabe = open(ziel, 'w', encoding='utf-8', newline='')
+        senden = lambda text: (ausgabe.write(text), ausgabe.flush())  # noqa: E731
+        schliessen = ausgabe.close
+
+    start_wand, start_daten, gesendet = time.monotonic(), None, 0
+    try:
+        kopf = 0
+        while kopf < len(zeilen) and (zeilen[kopf].startswith('#') or zeilen[kopf].startswith('SecSince')):
+            kopf += 1
+        senden(''.join(zeilen[:kopf]))
+        for zeile in zeilen[kopf:]:
+            stempel = _ZEIT_MUSTER.search(zeile)
+            if stempel and tempo > 0:
+                t = pd.Timestamp(stempel.group(0))
+                if start_daten is None:
+                    start_daten = t
+                warten = start_wand + (t - start_daten).total_seconds() / tempo - time.monotonic()
+                if warten > 0:
+                    time.sleep(warten)
+            senden(zeile)
+            gesendet += 1
+    except (BrokenPipeError, ConnectionResetError):
+        print("⚠️ Wiedergabe: Verbindung vom Client getrennt.")
+    finally:
+        schliessen()
+    print(f"✅ Wiedergabe beendet: {gesendet} Zeilen aus {os.path.basename(rohdatei)}")
+    return gesendet
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 4 and sys.argv[1] == 'wiedergabe':
+        wiedergabe(sys.argv[2], sys.argv[3], float(sys.argv[4]) if len(sys.argv) > 4 else None)
+    elif len(sys.argv) >= 3 and sys.argv[1] == 'erfassen':
+        erfassung = LiveErfassung(oeffne_quelle(sys.argv[2]))
+        erfassung.abonnenten.append(
+            lambda b: print(f"  Block: {len(b)} Zeilen bis {b['DateTime'].max()} "
+                            f"(Puffer {erfassung.puffer.anzahl})"))
+        erfassung.starte()
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            erfassung.stoppe()
+    else:
+        print("Aufruf: python utils/live_ingest.py wiedergabe <rohdatei> <datei|tcp://host:port> [tempo]\n"
+              "       python utils/live_ingest.py erfassen <datei|tcp://host:port>")
@@ -0,0 +1,246 @@
+"""
+pdf_bericht.py
+==============
+
+Schnelle PDF-Berichte für Sensorverläufe und Diagramm-Raster.
+
+Statt für jeden Sensor eine neue Figure zu erzeugen und wieder zu zerstören,
+wird eine einzige Figure samt Achsen wiederverwendet. Pro Seite werden nur die
+Liniendaten ausgetauscht (``set_data``), dichte Reihen werden gerastert, damit
+die PDF-Seiten klein bleiben und schnell geschrieben werden.
+
+Features:
+- SensorverlaufSeite: eine Figure/Linie für beliebig viele Sensorseiten
+- Min/Max-Verdichtung sehr dichter Reihen (Hüllkurve bleibt erhalten)
+- AchsenRaster: wiederverwendbares Subplot-Raster (z.B. 2x4 DIN A4)
+- schreibe_sensor_pdf: PDF + PNGs in einem Durchlauf, optional parallel
+- Zusammenführen von Teil-PDFs über pypdf (optional)
+
+Abhängigkeiten:
+---------------
+- numpy, pandas, matplotlib
+- pypdf (optional, nur für paralleles Rendern)
+- config.CONFIG (PDF_BERICHT)
+
+Autor: Frank Albrecht
+"""
+import os
+import sys
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_pdf import PdfPages
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import CONFIG
+
+try:
+    from pypdf import PdfWriter
+except ImportError:
+    PdfWriter = None
+
+
+def verdichte_minmax(x: np.ndarray, y: np.ndarray,
+                     max_punkte: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduziert eine dichte Reihe auf Minimum und Maximum je Bucket.
+
+    Die Hüllkurve (Spitzen, Einbrüche) bleibt pixelgenau erhalten, es werden
+    aber höchstens ``max_punkte`` Punkte gezeichnet.
+
+    :param x: X-Werte
+    :param y: Y-Werte
+    :param max_punkte: Maximale Anzahl Punkte nach der Verdichtung
+    :returns: Tuple (x_neu, y_neu)
+    """
+    n = len(y)
+    buckets = max_punkte // 2
+    if n <= max_punkte or buckets < 1:
+        return x, y
+    breite = n // buckets
+    n_voll = breite * buckets
+    bloecke = y[:n_voll].reshape(buckets, breite)
+    # NaN-Blöcke liefern NaN (Lücke in der Linie), daher nan-Varianten
+    gueltig = ~np.isnan(bloecke).all(axis=1)
+    i_min = np.zeros(buckets, dtype=int)
+    i_max = np.zeros(buckets, dtype=int)
+    i_min[gueltig] = np.nanargmin(bloecke[gueltig], axis=1)
+    i_max[gueltig] = np.nanargmax(bloecke[gueltig], axis=1)
+    basis = np.arange(buckets) * breite
+    # Reihenfolge innerhalb des Buckets beibehalten, damit die Linie nicht springt
+    idx = np.sort(np.stack([basis + i_min, basis + i_max], axis=1), axis=1).ravel()
+    idx = np.concatenate([idx, np.arange(n_voll, n)])
+    return x[idx], y[idx]
+
+
+class SensorverlaufSeite:
+    """
+    Eine wiederverwendbare Figure für Sensorverlaufs-Seiten.
+
+    Die Linie wird einmal angelegt und für jeden Sensor nur mit neuen Daten
+    gefüllt. Achsen werden anschließend neu skaliert.
+
+    :param figsize: Größe der Figure in Zoll
+    :param raster_schwelle: Ab dieser Punktzahl wird die Linie gerastert
+    """
+
+    def __init__(self, figsize: Tuple[float, float] = None,
+                 raster_schwelle: int = None) -> None:
+        einstellungen = CONFIG.PDF_BERICHT
+        self.raster_schwelle = raster_schwelle or einstellungen['RASTER_SCHWELLE']
+        self.fig = Figure(figsize=figsize or einstellungen['FIGSIZE_VERLAUF'])
+        self.ax = self.fig.add_subplot(111)
+        (self.linie,) = self.ax.plot([], [])
+        self.ax.set_xlabel('Index')
+        self.ax.grid(True)
+
+    def zeichne(self, x: np.ndarray, y: np.ndarray, sensor: str) -> Figure:
+        """
+        Tauscht die Liniendaten aus und passt Titel und Achsen an.
+
+        :param x: X-Werte (z.B. Index)
+        :param y: Sensorwerte
+        :param sensor: Name des Sensors für Titel und Y-Achse
+        :returns: Die (wiederverwendete) Figure
+        """
+        x, y = verdichte_minmax(x, y, CONFIG.PDF_BERICHT['MAX_PUNKTE'])
+        self.linie.set_data(x, y)
+        self.linie.set_rasterized(len(y) > self.raster_schwelle)
+        self.ax.set_title(f'{sensor} Verlauf')
+        self.ax.set_ylabel(sensor)
+        self.ax.relim()
+        self.ax.autoscale_view()
+        return self.fig
+
+
+class AchsenRaster:
+    """
+    Wiederverwendbares Subplot-Raster für mehrseitige Diagramm-Gitter.
+
+    Pro Seite werden die Achsen nur geleert (``cla``) statt eine neue Figure
+    anzulegen.
+
+    :param zeilen: Anzahl Zeilen im Raster
+    :param spalten: Anzahl Spalten im Raster
+    :param figsize: Größe der Figure in Zoll
+    """
+
+    def __init__(self, zeilen: int = 2, spalten: int = 4,
+                 figsize: Tuple[float, float] = None) -> None:
+        self.fig = Figure(figsize=figsize or CONFIG.PDF_BERICHT['FIGSIZE_RASTER'])
+        self.axes = list(self.fig.subplots(zeilen, spalten).flatten())
+
+    def neue_seite(self) -> List:
+        """
+        Leert alle Achsen und gibt sie für die nächste Seite zurück.
+        """
+        for ax in self.axes:
+            ax.cla()
+            ax.axis('on')
+        return self.axes
+
+
+def _schreibe_seiten(x: np.ndarray, reihen: Dict[str, np.ndarray],
+                     pdf_path: str,
+                     png_pfade: Optional[Dict[str, Sequence[str]]] = None) -> List[str]:
+    """
+    Schreibt alle Sensorseiten sequentiell mit einer einzigen Figure.
+    Jedes PNG wird einmal gerendert und für weitere Zielpfade kopiert.
+    """
+    dpi = CONFIG.PDF_BERICHT['DPI']
+    seite = SensorverlaufSeite()
+    geschrieben = []
+    with PdfPages(pdf_path) as pdf:
+        for sensor, y in reihen.items():
+            try:
+                fig = seite.zeichne(x, y, sensor)
+                pfade = list((png_pfade or {}).get(sensor, []))
+                if pfade:
+                    fig.savefig(pfade[0], dpi=dpi)
+                    for pfad in pfade[1:]:
+                        shutil.copyfile(pfade[0], pfad)
+                pdf.savefig(fig, dpi=dpi)
+                geschrieben.append(sensor)
+                print(f"✅ Diagramm gespeichert: {sensor}")
+            except Exception as e:
+                print(f"❌ Fehler bei {sensor}: {e}")
+    return geschrieben
+
+
+def _rendere_teil(args) -> Tuple[str, List[str]]:
+    """Worker: rendert einen Block Sensoren in ein Teil-PDF."""
+    x, reihen, teil_pfad, png_pfade = args
+    return teil_pfad, _schreibe_seiten(x, reihen, teil_pfad, png_pfade)
+
+
+def _fuege_pdfs_zusammen(teil_pfade: List[str], pdf_path: str) -> None:
+    """Hängt die Teil-PDFs in Reihenfolge zu einem Dokument zusammen."""
+    writer = PdfWriter()
+    for teil in teil_pfade:
+        writer.append(teil)
+    with open(pdf_path, 'wb') as f:
+        writer.write(f)
+
+
+def schreibe_sensor_pdf(df: pd.DataFrame, sensoren: Sequence[str], pdf_path: str,
+                        png_pfade: Optional[Dict[str, Sequence[str]]] = None,
+                        parallel: Optional[bool] = None) -> List[str]:
+    """
+    Erstellt ein PDF mit einer Verlaufsseite je Sensor (und optional PNGs).
+
+    Die Daten werden einmal als NumPy-Arrays extrahiert. Im parallelen Modus
+    werden die Sensoren auf Worker-Prozesse verteilt, die jeweils ein Teil-PDF
+    schreiben; diese werden anschließend zusammengeführt. Ohne pypdf wird
+    automatisch sequentiell gerendert.
+
+    :param df: DataFrame mit den Sensorspalten
+    :param sensoren: Gewünschte Sensorspalten (fehlende werden übersprungen)
+    :param pdf_path: Zielpfad des PDFs
+    :param png_pfade: Optional je Sensor eine Liste von PNG-Zielpfaden
+    :param parallel: Überschreibt CONFIG.PDF_BERICHT['PARALLEL']
+    :returns: Liste der geschriebenen Sensoren
+    :example:
+
+        >>> schreibe_sensor_pdf(df, ['MQ2', 'MQ135'], 'plots.pdf')
+        ['MQ2', 'MQ135']
+
+    """
+    einstellungen = CONFIG.PDF_BERICHT
+    if parallel is None:
+        parallel = einstellungen['PARALLEL']
+
+    vorhandene = []
+    for sensor in sensoren:
+        if sensor in df.columns:
+            vorhandene.append(sensor)
+        else:
+            print(f"⚠️ Spalte '{sensor}' nicht gefunden – übersprungen.")
+
+    x = df.index.to_numpy()
+    reihen = {s: pd.to_numeric(df[s], errors='coerce').to_numpy(dtype=float)
+              for s in vorhandene}
+
+    worker = min(einstellungen['MAX_WORKERS'], len(reihen))
+    if parallel and PdfWriter is None:
+        print("⚠️ pypdf nicht installiert – PDF wird sequentiell erstellt.")
+    if not parallel or PdfWriter is None or worker < 2:
+        return _schreibe_seiten(x, reihen, pdf_path, png_pfade)
+
+    # Sensoren blockweise (Reihenfolge bleibt erhalten) auf Worker verteilen
+    bloecke = np.array_split(np.array(vorhandene, dtype=object), worker)
+    with tempfile.TemporaryDirectory() as tmp:
+        auftraege = []
+        for nr, block in enumerate(bloecke):
+            teil_reihen = {s: reihen[s] for s in block}
+            teil_png = {s: (png_pfade or {}).get(s, []) for s in block}
+            teil_pfad = os.path.join(tmp, f"teil_{nr:03d}.pdf")
+            auftraege.append((x, teil_reihen, teil_pfad, teil_png))
+        with ProcessPoolExecutor(max_workers=worker) as pool:
+            ergebnisse = list(pool.map(_rendere_teil, auftraege))
+        _fuege_pdfs_zusammen([pfad for pfad, _ in ergebnisse], pdf_path)
+    return [s for _, teil in ergebnisse for s in teil]
@@ -0,0 +1,359 @@
+"""
+rasterkarte.py
+==============
+
+Stadtweite Heatmap über das gesamte Fahrtenarchiv mit einem Raster-Akkumulator.
+
+Jede Karte zeigte bisher nur eine Fahrt. Hier werden die Messwerte jeder
+fertigen Fahrt auf ein festes Gitter (RASTER_GRAD, Geohash-artig) gelegt
+und je Zelle als laufende Statistik gespeichert: Anzahl, Mittelwert, M2 und
+Maximum. Gesamtstand und Fahrtbeiträge liegen als ``.npz`` im Archivordner:
+
+- Hinzufügen einer Fahrt: vektorisiertes Zusammenführen (Chan et al.)
+- Entfernen einer Fahrt: Anzahl/Mittel/M2 werden exakt abgezogen, das
+  Maximum nur für betroffene Zellen aus den übrigen Fahrtbeiträgen erneuert
+- Zeichnen: nur aus dem Gesamtstand – Laufzeit unabhängig von der Anzahl
+  der Fahrten
+
+Features:
+- RasterAkkumulator: Zellstatistik (aus_fahrt, merge, subtrahiere, speichern/laden)
+- RasterArchiv: Gesamtstand + Fahrtbeiträge (fuege_fahrt_hinzu, ergaenze_fahrt, entferne_fahrt)
+- heatmap_karte: Folium-Karte mit Bildüberlagerung aus dem Gesamtstand
+
+Abhängigkeiten:
+---------------
+- numpy, pandas, matplotlib (Farbskala), folium
+- config.CONFIG (RASTERKARTE)
+
+Autor: Frank Albrecht
+"""
+import os
+import sys
+import glob
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import CONFIG
+
+
+def zellen_fuer(lats: np.ndarray, lons: np.ndarray, raster_grad: float) -> np.ndarray:
+    """
+    Gitterzellen (Zeile = Breite, Spalte = Länge) als int64-Array (N x 2).
+    """
+    return np.column_stack([np.floor(np.asarray(lats, dtype=float) / raster_grad),
+                            np.floor(np.asarray(lons, dtype=float) / raster_grad)]).astype(np.int64)
+
+
+class RasterAkkumulator:
+    """
+    Laufende Statistik je Gitterzelle und Sensor.
+
+    Alle Kennzahlen sind Arrays (Zellen x Sensoren); Zellen sind
+    lexikographisch sortiert, damit das Zusammenführen vektorisiert geht.
+
+    :param raster_grad: Zellgröße in Grad
+    :param sensoren: Spaltennamen der Sensoren
+    :param zellen: Gitterzellen (N x 2)
+    :param anzahl: Anzahl gültiger Werte
+    :param mittelwert: Mittelwerte
+    :param m2: Summe der quadrierten Abweichungen
+    :param maximum: Maxima
+    """
+
+    def __init__(self, raster_grad: float, sensoren: Sequence[str], zellen: np.ndarray,
+                 anzahl: np.ndarray, mittelwert: np.ndarray, m2: np.ndarray,
+                 maximum: np.ndarray) -> None:
+        self.raster_grad = float(raster_grad)
+        self.sensoren = list(sensoren)
+        self.zellen = zellen
+        self.anzahl = anzahl
+        self.mittelwert = mittelwert
+        self.m2 = m2
+        self.maximum = maximum
+
+    @classmethod
+    def leer(cls, raster_grad: float, sensoren: Sequence[str]) -> 'RasterAkkumulator':
+        s = len(sensoren)
+        return cls(raster_grad, sensoren, np.zeros((0, 2), dtype=np.int64),
+                   np.zeros((0, s)), np.zeros((0, s)), np.zeros((0, s)), np.full((0, s), -np.inf))
+
+    @classmethod
+    def aus_fahrt(cls, df: pd.DataFrame, sensoren: Sequence[str],
+                  raster_grad: Optional[float] = None) -> 'RasterAkkumulator':
+        """
+        Erstellt den Beitrag einer Fahrt (GPS_Lat, GPS_Lon und Sensorspalten).
+        """
+        raster_grad = raster_grad or CONFIG.RASTERKARTE['RASTER_GRAD']
+        lat = pd.to_numeric(df['GPS_Lat'], errors='coerce').to_numpy(dtype=float)
+        lon = pd.to_numeric(df['GPS_Lon'], errors='coerce').to_numpy(dtype=float)
+        ok = ~(np.isnan(lat) | np.isnan(lon))
+        zellen, code = np.unique(zellen_fuer(lat[ok], lon[ok], raster_grad), axis=0, return_inverse=True)
+        code = code.ravel()
+        n_zellen = len(zellen)
+        form = (n_zellen, len(sensoren))
+        anzahl, mittel, m2 = np.zeros(form), np.zeros(form), np.zeros(form)
+        maximum = np.full(form, -np.inf)
+        for j, sensor in enumerate(sensoren):
+            x = pd.to_numeric(df[sensor], errors='coerce').to_numpy(dtype=float)[ok]
+            gueltig = ~np.isnan(x)
+            c, x = code[gueltig], x[gueltig]
+            anzahl[:, j] = np.bincount(c, minlength=n_zellen)
+            summe = np.bincount(c, weights=x, minlength=n_zellen)
+            mittel[:, j] = np.divide(summe, anzahl[:, j], out=np.zeros(n_zellen), where=anzahl[:, j] > 0)
+            m2[:, j] = np.bincount(c, weights=(x - mittel[c, j]) ** 2, minlength=n_zellen)
+            np.maximum.at(maximum[:, j], c, x)
+        return cls(raster_grad, sensoren, zellen, anzahl, mittel, m2, maximum)
+
+    def _ausgerichtet(self, andere: 'RasterAkkumulator'):
+        """Gemeinsame Zellliste und beide Statistiken darauf ausgerichtet."""
+        if andere.raster_grad != self.raster_grad or andere.sensoren != self.sensoren:
+            raise ValueError("Raster oder Sensoren der Akkumulatoren passen nicht zusammen.")
+        zellen, rueck = np.unique(np.vstack([self.zellen, andere.zellen]), axis=0, return_inverse=True)
+        rueck = rueck.ravel()
+        ia, ib = rueck[:len(self.zellen)], rueck[len(self.zellen):]
+
+        def auf(akku: 'RasterAkkumulator', index: np.ndarray):
+            form = (len(zellen), len(self.sensoren))
+            n, m, q = np.zeros(form), np.zeros(form), np.zeros(form)
+            x = np.full(form, -np.inf)
+            n[index], m[index], q[index], x[index] = akku.anzahl, akku.mittelwert, akku.m2, akku.maximum
+            return n, m, q, x
+        return zellen, auf(self, ia), auf(andere, ib)
+
+    def merge(self, andere: 'RasterAkkumulator') -> 'RasterAkkumulator':
+        """
+        Führt zwei Akkumulatoren zusammen (Chan et al.), vollständig vektorisiert.
+        """
+        zellen, (n_a, m_a, q_a, x_a), (n_b, m_b, q_b, x_b) = self._ausgerichtet(andere)
+        n = n_a + n_b
+        delta = m_b - m_a
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mittel = np.where(n > 0, m_a + delta * n_b / n, 0.0)
+            m2 = np.where(n > 0, q_a + q_b + delta ** 2 * n_a * n_b / n, 0.0)
+        return RasterAkkumulator(self.raster_grad, self.sensoren, zellen, n, mittel, m2,
+                                 np.maximum(x_a, x_b))
+
+    def subtrahiere(self, andere: 'RasterAkkumulator') -> 'RasterAkkumulator':
+        """
+        Zieht einen enthaltenen Beitrag wieder ab (Umkehrung von :meth:`merge`).
+
+        Das Maximum lässt sich nicht abziehen und bleibt eine obere Schranke;
+        :class:`RasterArchiv` erneuert es aus den übrigen Fahrtbeiträgen.
+        Leere Zellen werden entfernt.
+        """
+        zellen, (n, m, q, x), (n_b, m_b, q_b, _) = self._ausgerichtet(andere)
+        n_a = np.maximum(n - n_b, 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            m_a = np.where(n_a > 0, (n * m - n_b * m_b) / n_a, 0.0)
+            delta = m_b - m_a
+            q_a = np.where(n_a > 0, np.maximum(q - q_b - delta ** 2 * n_a * n_b / n, 0.0), 0.0)
+        x = np.where(n_a > 0, x, -np.inf)
+        behalten = (n_a > 0).any(axis=1)
+        return RasterAkkumulator(self.raster_grad, self.sensoren, zellen[behalten], n_a[behalten],
+                                 m_a[behalten], q_a[behalten], x[behalten])
+
+    def kennzahl(self, sensor: str, kennzahl: str = 'mittel') -> np.ndarray:
+        """
+        Werte je Zelle: 'mittel', 'std', 'max' oder 'anzahl' (NaN ohne Werte).
+        """
+        j = self.sensoren.index(sensor)
+        n = self.anzahl[:, j]
+        if kennzahl == 'anzahl':
+            return n
+        werte = {'mittel': self.mittelwert[:, j], 'max': self.maximum[:, j],
+                 'std': np.sqrt(self.m2[:, j] / np.maximum(n - 1, 1))}[kennzahl]
+        return np.where(n > 0, werte, np.nan)
+
+    def speichern(self, pfad: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(pfad)), exist_ok=True)
+        np.savez_compressed(pfad, raster_grad=self.raster_grad, sensoren=np.array(self.sensoren),
+                            zellen=self.zellen, anzahl=self.anzahl, mittelwert=self.mittelwert,
+                            m2=self.m2, maximum=self.maximum)
+
+    @classmethod
+    def laden(cls, pfad: str) -> 'RasterAkkumulator':
+        with np.load(pfad) as d:
+            return cls(float(d['raster_grad']), [str(s) for s in d['sensoren']], d['zellen'],
+                       d['anzahl'], d['mittelwert'], d['m2'], d['maximum'])
+
+
+class RasterArchiv:
+    """
+    Persistenter Gesamtstand plus Beitrag je Fahrt (für exaktes Entfernen).
+
+    :param ordner: Archivordner (Standard aus CONFIG.RASTERKARTE)
+    """
+
+    def __init__(self, ordner: Optional[str] = None) -> None:
+        e = CONFIG.RASTERKARTE
+        self.ordner = ordner or e['ORDNER']
+        self.raster_grad = e['RASTER_GRAD']
+        self.sensoren = list(e['SENSOREN'])
+        self._gesamt_pfad = os.path.join(self.ordner, 'gesamt.npz')
+        self._fahrten_ordner = os.path.join(self.ordner, 'fahrten')
+        os.makedirs(self._fahrten_ordner, exist_ok=True)
+
+    def _fahrt_pfad(self, fahrt: str) -> str:
+        return os.path.join(self._fahrten_ordner, f"{fahrt}.npz")
+
+    def fahrten(self) -> List[str]:
+        return sorted(os.path.splitext(os.path.basename(p))[0]
+                      for p in glob.glob(os.path.join(self._fahrten_ordner, '*.npz')))
+
+    def gesamt(self) -> RasterAkkumulator:
+        """Gesamtstand über alle Fahrten (leer, falls noch nichts gespeichert)."""
+        if os.path.exists(self._gesamt_pfad):
+            return RasterAkkumulator.laden(self._gesamt_pfad)
+        return RasterAkkumulator.leer(self.raster_grad, self.sensoren)
+
+    def fuege_fahrt_hinzu(self, fahrt: str, df: pd.DataFrame) -> bool:
+        """
+        Rechnet eine Fahrt ein; eine bereits enthaltene Fahrt wird ersetzt.
+
+        :param fahrt: Eindeutiger Fahrtname
+        :param df: Fahrt mit GPS_Lat, GPS_Lon und Sensorspalten
+        :returns: True bei Erfolg
+        """
+        if 'GPS_Lat' not in df.columns or 'GPS_Lon' not in df.columns:
+            print(f"⚠️ Rasterkarte: Fahrt {fahrt} hat keine GPS-Spalten.")
+            return False
+        if fahrt in self.fahrten():
+            self.entferne_fahrt(fahrt)
+        fehlend = [s for s in self.sensoren if s not in df.columns]
+        if fehlend:
+            df = df.assign(**{s: np.nan for s in fehlend})
+        beitrag = RasterAkkumulator.aus_fahrt(df, self.sensoren, self.raster_grad)
+        beitrag.speichern(self._fahrt_pfad(fahrt))
+        self.gesamt().merge(beitrag).speichern(self._gesamt_pfad)
+        print(f"✅ Rasterkarte: Fahrt {fahrt} eingerechnet ({len(beitrag.zellen)} Zellen)")
+        return True
+
+    def ergaenze_fahrt(self, fahrt: str, df: pd.DataFrame) -> bool:
+        """
+        Rechnet neue Zeilen einer bereits enthaltenen Fahrt ein (Anhängemodus);
+        Aufwand nur proportional zu ``df``. Unbekannte Fahrten werden neu angelegt.
+
+        :param fahrt: Eindeutiger Fahrtname
+        :param df: Nur die neuen Zeilen der Fahrt
+        :returns: True bei Erfolg
+        """
+        if 'GPS_Lat' not in df.columns or 'GPS_Lon' not in df.columns:
+            print(f"⚠️ Rasterkarte: Fahrt {fahrt} hat keine GPS-Spalten.")
+            return False
+        fehlend = [s for s in self.sensoren if s not in df.columns]
+        if fehlend:
+            df = df.assign(**{s: np.nan for s in fehlend})
+        beitrag = RasterAkkumulator.aus_fahrt(df, self.sensoren, self.raster_grad)
+        pfad = self._fahrt_pfad(fahrt)
+        bisher = RasterAkkumulator.laden(pfad) if os.path.exists(pfad) else None
+        (beitrag if bisher is None else bisher.merge(beitrag)).speichern(pfad)
+        self.gesamt().merge(beitrag).speichern(self._gesamt_pfad)
+        print(f"✅ Rasterkarte: Fahrt {fahrt} um {len(df)} Zeilen ergänzt")
+        return True
+
+    def entferne_fahrt(self, fahrt: str) -> bool:
+        """
+        Nimmt eine Fahrt wieder heraus. Maxima betroffener Zellen werden aus
+        den übrigen Fahrtbeiträgen neu bestimmt.
+        """
+        pfad = self._fahrt_pfad(fahrt)
+        if not os.path.exists(pfad):
+            return False
+        beitrag = RasterAkkumulator.laden(pfad)
+        os.remove(pfad)
+        gesamt = self.gesamt().subtrahiere(beitrag)
+
+        # Maximum der betroffenen Zellen erneuern
+        betroffen = np.isin(_zellschluessel(gesamt.zellen), _zellschluessel(beitrag.zellen))
+        if betroffen.any():
+            ziel = _zellschluessel(gesamt.zellen[betroffen])
+            maximum = np.full((len(ziel), len(gesamt.sensoren)), -np.inf)
+            for andere in self.fahrten():
+                quelle = RasterAkkumulator.laden(self._fahrt_pfad(andere))
+                _max_uebernehmen(maximum, ziel, _zellschluessel(quelle.zellen), quelle.maximum)
+            gesamt.maximum[betroffen] = np.where(gesamt.anzahl[betroffen] > 0, maximum, -np.inf)
+        gesamt.speichern(self._gesamt_pfad)
+        print(f"Rasterkarte: Fahrt {fahrt} entfernt.")
+        return True
+
+
+def _zellschluessel(zellen: np.ndarray) -> np.ndarray:
+    """Eine int64-Zahl je Zelle (für Suchen/Vergleichen)."""
+    return zellen[:, 0].astype(np.int64) * (1 << 32) + (zellen[:, 1] & 0xFFFFFFFF)
+
+
+def _max_uebernehmen(maximum: np.ndarray, ziel: np.ndarray, quelle: np.ndarray,
+                     quelle_maximum: np.ndarray) -> None:
+    """Erhöht ``maximum`` (Zellen ``ziel``) um die Maxima der Zellen ``quelle``."""
+    if not len(quelle):
+        return
+    reihenfolge = np.argsort(quelle)
+    pos = np.minimum(np.searchsorted(quelle, ziel, sorter=reihenfolge), len(quelle) - 1)
+    treffer = quelle[reihenfolge[pos]] == ziel
+    maximum[treffer] = np.maximum(maximum[treffer], quelle_maximum[reihenfolge[pos[treffer]]])
+
+
+def aktualisiere_rasterkarte(fahrt: str, df: pd.DataFrame) -> bool:
+    """
+    Rechnet eine fertige Fahrt (nach mod_042) in das Standard-Archiv ein.
+    """
+    if not CONFIG.RASTERKARTE['AKTIV']:
+        return False
+    return RasterArchiv().fuege_fahrt_hinzu(fahrt, df)
+
+
+def heatmap_karte(akku: RasterAkkumulator, sensor: str = 'MQ135', kennzahl: str = 'mittel',
+                  ausgabe_html: Optional[str] = None, min_anzahl: Optional[int] = None):
+    """
+    Zeichnet die stadtweite Heatmap als Bildüberlagerung auf einer Folium-Karte.
+
+    Es wird nur der Gesamtstand gelesen; die Laufzeit hängt von der Zahl der
+    belegten Zellen ab, nicht von der Zahl der Fahrten.
+
+    :param akku: Gesamtstand (z.B. ``RasterArchiv().gesamt()``)
+    :param sensor: Sensorspalte
+    :param kennzahl: 'mittel', 'std', 'max' oder 'anzahl'
+    :param ausgabe_html: Optionaler Speicherpfad
+    :param min_anzahl: Zellen mit weniger Werten bleiben leer (Standard aus CONFIG)
+    :returns: folium.Map oder None, wenn keine Zelle belegt ist
+    """
+    import folium
+    from matplotlib import colormaps
+
+    min_anzahl = CONFIG.RASTERKARTE['MIN_ANZAHL'] if min_anzahl is None else min_anzahl
+    werte = akku.kennzahl(sensor, kennzahl)
+    belegt = (akku.kennzahl(sensor, 'anzahl') >= min_anzahl) & ~np.isnan(werte)
+    if not belegt.any():
+        print(f"Rasterkarte: keine belegten Zellen für {sensor}.")
+        return None
+    zellen, werte = akku.zellen[belegt], werte[belegt]
+    zeile0, spalte0 = zellen.min(axis=0)
+    zeilen, spalten = zellen.max(axis=0) - (zeile0, spalte0) + 1
+
+    # Gitter füllen (Norden oben) und über robuste Grenzen einfärben
+    gitter = np.full((zeilen, spalten), np.nan)
+    gitter[zeilen - 1 - (zellen[:, 0] - zeile0), zellen[:, 1] - spalte0] = werte
+    unten, oben = np.nanpercentile(werte, [2, 98])
+    normiert = np.clip((gitter - unten) / max(oben - unten, 1e-9), 0.0, 1.0)
+    rgba = colormaps[CONFIG.RASTERKARTE['FARBSKALA']](np.nan_to_num(normiert))
+    rgba[..., 3] = np.where(np.isnan(gitter), 0.0, 0.75)
+
+    g = akku.raster_grad
+    grenzen = [[zeile0 * g, spalte0 * g], [(zeile0 + zeilen) * g, (spalte0 + spalten) * g]]
+    karte = folium.Map(location=[(grenzen[0][0] + grenzen[1][0]) / 2, (grenzen[0][1] + grenzen[1][1]) / 2],
+                       zoom_start=13, control_scale=True)
+    folium.raster_layers.ImageOverlay(rgba, bounds=grenzen, mercator_project=True,
+                                      name=f"{sensor} ({kennzahl})").add_to(karte)
+    legende = (f'<div style="position: fixed; bottom: 40px; left: 40px; z-index:9999; background:white;'
+               f' padding:6px; border:1px solid #bbb; border-radius:6px; font-size:13px;">'
+               f'<b>{sensor} – {kennzahl} je Zelle (alle Fahrten)</b><br>'
+               f'{unten:.1f} (hell) … {oben:.1f} (dunkel), {int(belegt.sum())} Zellen</div>')
+    karte.get_root().html.add_child(folium.Element(legende))
+    if ausgabe_html:
+        os.makedirs(os.path.dirname(os.path.abspath(ausgabe_html)), exist_ok=True)
+        karte.save(ausgabe_html)
+        print(f"✅ Stadtweite Heatmap gespeichert: {ausgabe_html}")
+    return karte
@@ -0,0 +1,126 @@
+"""
+rohformat.py
+============
+
+Regeln für das rohe AirScout-Logformat, gemeinsam genutzt von mod_010 und der Live-Erfassung.
+
+Der Logger schreibt einen Kommentarblock (``# ...``), eine Kopfzeile mit 25
+Spalten und danach Messzeilen, getrennt durch ``,`` oder ``;`` und mit
+Zeitzonen-Suffix (`` MESZ``/`` UTC``). Die Bereinigungsregeln standen bisher
+nur in ``laden_und_reinigen``; hier liegen sie zeilen- bzw. blockweise, damit
+eine wachsende Datei oder ein Socket-Strom genauso bereinigt wird wie eine
+fertige Fahrt.
+
+Features:
+- KOPFZEILE / SPALTEN: erwartete Kopfzeile des Loggers
+- normalisiere_zeile: Trennzeichen und Zeitzonen-Suffixe vereinheitlichen
+- bereinige_messdaten: Zeitumwandlung, Warmlauffilter, GPS-Filter, Kurskorrektur
+- fahrtname: Fahrtname (``JJJJ_MM_TT_hh_mm``) aus dem Namen der Logdatei
+
+Abhängigkeiten:
+---------------
+- pandas
+- config.CONFIG (SEGMENTIERUNG, FILTER_MINUTEN_ERSTER_BLOCK)
+
+Autor: Frank Albrecht
+"""
+import os
+import re
+import sys
+import warnings
+from typing import Optional
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import CONFIG
+
+KOPFZEILE = ("SecSinceMidnight-MS,Temperature_DHT_C,Humidity_RH,Light_Level,Light_Percent,GPS_Lat,"
+             "GPS_Lon,GPS_Alt,GPS_Speed,GPS_Course,GPS_Sats,MQ2,MQ3,MQ4,MQ5,MQ6,MQ7,MQ8,MQ9,MQ135,"
+             "Mic1,Mic2,Radiation_CPS,DateTime,GPS_DateTime")
+SPALTEN = KOPFZEILE.split(',')
+
+
+def normalisiere_zeile(zeile: str) -> str:
+    """
+    Ersetzt ``;`` durch ``,`` und entfernt `` MESZ``/`` UTC`` (wie mod_010).
+    """
+    return zeile.replace(';', ',').replace(' MESZ', '').replace(' UTC', '')
+
+
+def fahrtname(dateiname: str) -> str:
+    """
+    Leitet den Fahrtnamen aus dem Namen der Logdatei ab (wie mod_010).
+
+    :param dateiname: Dateiname oder Pfad, z.B. ``..._2025_07150547.CSV``
+    :returns: z.B. ``2025_07_15_05_47``; ohne Zeitstempel alles nach dem letzten ``_``
+    """
+    basename = os.path.basename(dateiname)
+    match = re.search(r'(\d{4})_(\d{2})(\d{2})(\d{2})(\d{2})', basename)
+    if match:
+        return '_'.join(match.groups())
+    # Fallback: nimm alles nach dem letzten Unterstrich
+    return basename.split('_')[-1].replace('.csv', '')
+
+
+def _kurs_korrigieren(x):
+    try:
+        # Prüfe, ob Wert eine Zahl ist und mehr als 3 Ziffern hat
+        if pd.notna(x) and str(x).isdigit() and len(str(int(float(x)))) > 3:
+            return 0
+        return x
+    except Exception:
+        return x
+
+
+def bereinige_messdaten(df: pd.DataFrame, beginn: Optional[pd.Timestamp] = None,
+                        protokoll: bool = True) -> pd.DataFrame:
+    """
+    Wendet die Bereinigungsregeln von ``laden_und_reinigen`` auf einen Block an.
+
+    - DateTime/GPS_DateTime in datetime umwandeln
+    - ohne Segmentierung: die ersten FILTER_MINUTEN_ERSTER_BLOCK Minuten verwerfen
+    - Zeilen ohne GPS (``--``/leer) entfernen
+    - GPS_Course mit mehr als 3 Ziffern auf 0 setzen
+    - Zeilen mit GPS_Lon < 8 entfernen
+
+    :param df: Rohzeilen mit den Spalten der Kopfzeile
+    :param beginn: Fahrtbeginn für den Warmlauffilter (Standard: frühester Zeitpunkt im Block;
+        im Live-Betrieb der erste Zeitpunkt der Fahrt)
+    :param protokoll: Anzahl der GPS_Lon-Filterungen ausgeben
+    :returns: Bereinigter DataFrame
+    """
+    # Spalten DateTime und GPS_DateTime in datetime konvertieren (früh, damit Filter funktionieren)
+    for spalte in ['DateTime', 'GPS_DateTime']:
+        if spalte in df.columns:
+            with warnings.catch_warnings():
+                # '----/--/-- --:--:--' (kein GPS-Fix) verhindert die Formaterkennung
+                warnings.simplefilter('ignore', UserWarning)
+                df[spalte] = pd.to_datetime(df[spalte], errors='coerce')
+
+    # Filtere die ersten X Minuten (aus config) direkt aus dem DataFrame –
+    # nur ohne Segmentierung, sonst entfernt mod_011 den Warmlauf datenbasiert
+    if 'DateTime' in df.columns and not CONFIG.SEGMENTIERUNG['AKTIV']:
+        min_zeit = df['DateTime'].min() if beginn is None else beginn
+        grenze = min_zeit + pd.Timedelta(minutes=CONFIG.FILTER_MINUTEN_ERSTER_BLOCK)
+        df = df[df['DateTime'] > grenze]
+
+    # Entferne Zeilen ohne GPS-Daten (GPS_Lat, GPS_Lon, GPS_Alt == '--' oder leer)
+    gps_spalten = ['GPS_Lat', 'GPS_Lon', 'GPS_Alt']
+    for spalte in gps_spalten:
+        if spalte in df.columns:
+            df = df[~df[spalte].astype(str).isin(['--', '', 'nan', 'NaN'])]
+
+    # Werte in der Spalte 'GPS_Course' mit mehr als 3 Ziffern auf 0 setzen
+    if 'GPS_Course' in df.columns:
+        df['GPS_Course'] = df['GPS_Course'].apply(_kurs_korrigieren)
+
+    # Entferne alle Zeilen, in denen GPS_Lon < 8 ist
+    if 'GPS_Lon' in df.columns:
+        df['GPS_Lon'] = pd.to_numeric(df['GPS_Lon'], errors='coerce')
+        vorher = len(df)
+        df = df[df['GPS_Lon'] >= 8]
+        nachher = len(df)
+        if protokoll:
+            print(f"Gefiltert: {vorher - nachher} Zeilen mit GPS_Lon < 8 entfernt.")
+    return df
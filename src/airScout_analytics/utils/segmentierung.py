@@ -0,0 +1,214 @@
+"""
+segmentierung.py
+================
+
+Zerlegt eine Messfahrt in Warmlauf-, Stand- und Fahrtsegmente.
+
+Bisher wurde jede Aufzeichnung als ein Block ausgewertet und der Warmlauf der
+MQ-Sensoren pauschal über ``FILTER_MINUTEN_ERSTER_BLOCK`` abgeschnitten.
+Garagenstopps, Balkon-Messungen oder Regenpausen verfälschen so die
+Auswertung. Die Segmentierung arbeitet vollständig vektorisiert über
+Zeitlücken, Geschwindigkeit, GPS-Fix (``GPS_Sats``) und die Drift der
+MQ-Sensoren.
+
+Regeln:
+- Zeitlücke > LUECKE_S → neuer Abschnitt (Gerät war aus, Sensoren heizen neu)
+- Warmlauf je Abschnitt: bis GPS-Fix vorhanden und MQ-Drift unter der
+  Schwelle liegt (mindestens WARMLAUF_MIN_MIN, höchstens WARMLAUF_MAX_MIN)
+- Danach Stand, wenn die geglättete Geschwindigkeit mindestens
+  STAND_MIN_DAUER_S unter FAHRT_MIN_KMH bleibt, sonst Fahrt; Fahrten
+  kürzer als FAHRT_MIN_DAUER_S (GPS-Sprünge) zählen zum Stand
+
+Features:
+- segmentiere_fahrt: ergänzt Segment_ID und Segment_Typ
+- segment_uebersicht: eine Zeile je Segment (Zeiten, Dauer, Punkte, Strecke)
+
+Abhängigkeiten:
+---------------
+- numpy, pandas
+- utils.geodaesie
+- config.CONFIG (SEGMENTIERUNG)
+
+Autor: Frank Albrecht
+"""
+import os
+import sys
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import CONFIG
+from utils.geodaesie import erkenne_stopps, geschwindigkeit_kmh, schrittdistanzen_m
+
+WARMLAUF = 'warmlauf'
+STAND = 'stand'
+FAHRT = 'fahrt'
+
+
+def _zeit_s(df: pd.DataFrame) -> np.ndarray:
+    """Sekunden seit Aufzeichnungsbeginn aus DateTime (Fallback: SecSinceMidnight-MS)."""
+    if 'DateTime' in df.columns:
+        zeit = pd.to_datetime(df['DateTime'], errors='coerce')
+        if zeit.notna().any():
+            return (zeit - zeit.min()).dt.total_seconds().to_numpy(dtype=float)
+    if 'SecSinceMidnight-MS' in df.columns:
+        teile = df['SecSinceMidnight-MS'].astype(str).str.split('-', n=1, expand=True)
+        sek = pd.to_numeric(teile[0], errors='coerce')
+        ms = pd.to_numeric(teile[1], errors='coerce').fillna(0) if teile.shape[1] > 1 else 0
+        zeit = (sek + ms / 1000.0).to_numpy(dtype=float)
+        return zeit - np.nanmin(zeit)
+    return np.arange(len(df), dtype=float)
+
+
+def _geglaettet(werte: np.ndarray, punkte: int) -> np.ndarray:
+    """Zentrierter gleitender Median (robust gegen Ausreißer einzelner Messungen)."""
+    return pd.Series(werte).rolling(punkte, center=True, min_periods=1).median().to_numpy()
+
+
+def _geschwindigkeit(df: pd.DataFrame, zeit_s: np.ndarray) -> np.ndarray:
+    """GPS_Speed (km/h), falls vorhanden, sonst aus den Koordinaten berechnet."""
+    if 'GPS_Speed' in df.columns:
+        v = pd.to_numeric(df['GPS_Speed'], errors='coerce').to_numpy(dtype=float)
+        if np.isfinite(v).any():
+            return v
+    if 'GPS_Lat' in df.columns and 'GPS_Lon' in df.columns:
+        lat = pd.to_numeric(df['GPS_Lat'], errors='coerce').to_numpy(dtype=float)
+        lon = pd.to_numeric(df['GPS_Lon'], errors='coerce').to_numpy(dtype=float)
+        return geschwindigkeit_kmh(lat, lon, zeit_s)
+    return np.full(len(df), np.nan)
+
+
+def _mq_drift(df: pd.DataFrame, zeit_s: np.ndarray, fenster_s: float,
+              glaettung: int) -> np.ndarray:
+    """
+    Relative Änderung je Minute des normierten MQ-Mittels über ``fenster_s``.
+    Ohne MQ-Spalten 0 (gilt als eingeschwungen).
+    """
+    mq = [s for s in df.columns if s.startswith('MQ')]
+    if not mq:
+        return np.zeros(len(df))
+    matrix = df[mq].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    median = np.nanmedian(matrix, axis=0)
+    median[~(median > 0)] = 1.0
+    signal = _geglaettet(np.nanmean(matrix / median, axis=1), glaettung)
+    # Wert vor fenster_s Sekunden per binärer Suche (Zeit ist aufsteigend)
+    vorher = np.searchsorted(zeit_s, zeit_s - fenster_s, side='left')
+    dt = zeit_s - zeit_s[vorher]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        drift = np.abs(signal - signal[vorher]) / np.maximum(np.abs(signal[vorher]), 1e-9) / dt * 60.0
+    return np.where(dt > 0, drift, np.inf)
+
+
+def segmentiere_fahrt(df: pd.DataFrame, einstellungen: Optional[dict] = None,
+                      fortsetzung: Optional[dict] = None) -> pd.DataFrame:
+    """
+    Ergänzt die Spalten ``Segment_ID`` (fortlaufend ab 0) und ``Segment_Typ``
+    ('warmlauf', 'stand', 'fahrt').
+
+    :param df: Bereinigte Fahrt (zeitlich sortiert) mit DateTime, GPS_Speed
+        bzw. GPS_Lat/GPS_Lon, optional GPS_Sats und MQ-Spalten
+    :param einstellungen: Überschreibt Einträge aus CONFIG.SEGMENTIERUNG
+    :param fortsetzung: ``df`` setzt einen laufenden Abschnitt fort (Anhängemodus):
+        ``seit_abschnittsbeginn_s`` = Sekunden vom Abschnittsbeginn bis zur ersten
+        Zeile, ``warm`` = Warmlauf dieses Abschnitts ist bereits beendet
+    :returns: Kopie von ``df`` mit den beiden neuen Spalten
+    :example:
+
+        >>> df = segmentiere_fahrt(df)
+        >>> df.groupby('Segment_Typ').size()
+
+    """
+    e = dict(CONFIG.SEGMENTIERUNG, **(einstellungen or {}))
+    df = df.copy()
+    n = len(df)
+    if n == 0:
+        df['Segment_ID'] = pd.Series(dtype='int64')
+        df['Segment_Typ'] = pd.Series(dtype=object)
+        return df
+
+    zeit_s = _zeit_s(df)
+    zeit_s = np.fmax.accumulate(np.nan_to_num(zeit_s, nan=0.0))
+
+    # 1. Abschnitte über Zeitlücken (Neustart des Geräts)
+    luecke = np.concatenate([[True], np.diff(zeit_s) > e['LUECKE_S']])
+    abschnitt = np.cumsum(luecke) - 1
+    start_s = zeit_s[np.flatnonzero(luecke)][abschnitt]
+    seit_start_s = zeit_s - start_s
+    if fortsetzung:
+        seit_start_s[abschnitt == 0] += fortsetzung['seit_abschnittsbeginn_s']
+
+    # 2. Warmlauf: bis GPS-Fix und MQ eingeschwungen, begrenzt durch Min/Max
+    if 'GPS_Sats' in df.columns:
+        fix = pd.to_numeric(df['GPS_Sats'], errors='coerce').fillna(0).to_numpy() >= e['MIN_SATS']
+    else:
+        fix = np.ones(n, dtype=bool)
+    bereit = fix & (_mq_drift(df, zeit_s, e['DRIFT_FENSTER_S'], e['GLAETTUNG_PUNKTE']) < e['DRIFT_SCHWELLE'])
+    bereit &= seit_start_s >= e['WARMLAUF_MIN_MIN'] * 60
+    bereit |= seit_start_s >= e['WARMLAUF_MAX_MIN'] * 60
+    # Erster "bereit"-Zeitpunkt je Abschnitt; alles davor ist Warmlauf
+    erster = pd.Series(np.where(bereit, np.arange(n), n)).groupby(abschnitt).transform('min').to_numpy()
+    warmlauf = np.arange(n) < erster
+    if fortsetzung and fortsetzung['warm']:
+        warmlauf &= abschnitt != 0
+
+    # 3. Stand/Fahrt über geglättete Geschwindigkeit mit Mindestdauer
+    v = _geglaettet(_geschwindigkeit(df, zeit_s), e['GLAETTUNG_PUNKTE'])
+    stand = np.zeros(n, dtype=bool)
+    for a in np.unique(abschnitt):
+        maske = abschnitt == a
+        stand_a = erkenne_stopps(v[maske], zeit_s[maske],
+                                 e['FAHRT_MIN_KMH'], e['STAND_MIN_DAUER_S'])
+        # Kurze "Fahrten" (GPS-Sprünge im Stand) zählen zum Stand: gleiche
+        # Lauflängenregel, angewendet auf die Fahrt-Maske
+        fahrt_a = erkenne_stopps(stand_a.astype(float), zeit_s[maske], 0.5, e['FAHRT_MIN_DAUER_S'])
+        stand[maske] = ~fahrt_a
+
+    typ = np.where(warmlauf, WARMLAUF, np.where(stand, STAND, FAHRT))
+    # Neues Segment bei Typwechsel oder neuem Abschnitt
+    wechsel = luecke | np.concatenate([[True], typ[1:] != typ[:-1]])
+    df['Segment_ID'] = np.cumsum(wechsel) - 1
+    df['Segment_Typ'] = typ
+    return df
+
+
+def segment_uebersicht(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Fasst eine segmentierte Fahrt zusammen (eine Zeile je Segment).
+
+    :param df: Ausgabe von :func:`segmentiere_fahrt`
+    :returns: DataFrame mit Segment_ID, Segment_Typ, Start, Ende, Dauer_s,
+        Punkte und Strecke_km
+    """
+    zeit_s = _zeit_s(df)
+    if 'GPS_Lat' in df.columns and 'GPS_Lon' in df.columns:
+        schritte = schrittdistanzen_m(pd.to_numeric(df['GPS_Lat'], errors='coerce').to_numpy(dtype=float),
+                                      pd.to_numeric(df['GPS_Lon'], errors='coerce').to_numpy(dtype=float))
+    else:
+        schritte = np.zeros(len(df))
+    if 'GPS_Sats' in df.columns:
+        # Ohne Fix springen die Koordinaten – diese Schritte zählen nicht
+        fix = pd.to_numeric(df['GPS_Sats'], errors='coerce').fillna(0).to_numpy() >= CONFIG.SEGMENTIERUNG['MIN_SATS']
+        schritte = np.where(fix & np.concatenate([[False], fix[:-1]]), schritte, 0.0)
+    # Der Schritt zum ersten Punkt eines Segments gehört nicht zum Segment
+    erster = np.concatenate([[True], df['Segment_ID'].to_numpy()[1:] != df['Segment_ID'].to_numpy()[:-1]])
+    hilfs = pd.DataFrame({
+        'Segment_ID': df['Segment_ID'].to_numpy(),
+        'Segment_Typ': df['Segment_Typ'].to_numpy(),
+        'zeit_s': zeit_s,
+        'strecke_m': np.where(erster, 0.0, np.nan_to_num(schritte)),
+    })
+    if 'DateTime' in df.columns:
+        hilfs['DateTime'] = pd.to_datetime(df['DateTime'], errors='coerce').to_numpy()
+    gruppen = hilfs.groupby('Segment_ID', sort=True)
+    uebersicht = pd.DataFrame({
+        'Segment_Typ': gruppen['Segment_Typ'].first(),
+        'Dauer_s': gruppen['zeit_s'].max() - gruppen['zeit_s'].min(),
+        'Punkte': gruppen.size(),
+        'Strecke_km': (gruppen['strecke_m'].sum() / 1000.0).round(3),
+    })
+    if 'DateTime' in hilfs.columns:
+        uebersicht.insert(1, 'Start', gruppen['DateTime'].min())
+        uebersicht.insert(2, 'Ende', gruppen['DateTime'].max())
+    return uebersicht.reset_index()
@@ -1,13 +1,41 @@
+import os
+import sys
+from itertools import islice
+import numpy as np
 import pandas as pd
-import plotly.express as px
-from dash import Dash, dcc, html, Input, Output
+import plotly.graph_objects as go
+from dash import Dash, dcc, html, Input, Output, ctx
+from dash.exceptions import PreventUpdate
 
-# Lade die CSV-Datei
-csv_path = r"E:\dev\projekt_python_venv\data\data\ergebnisse\2025_07_21_04_50\bearbeitet3\feature_2025_07_21_04_50_umgerechnet_ema.csv"
-df = pd.read_csv(csv_path)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import CONFIG
+from utils.fahrtenkatalog import FahrtenKatalog, FahrtenCache
+from utils.live_ingest import LiveErfassung, oeffne_quelle
+from utils.alarme import AlarmMaschine
 
-# Zeitformatierung (optional)
-df['DateTime'] = pd.to_datetime(df['DateTime'])
+# Fahrten kommen aus dem Katalog (python utils/fahrtenkatalog.py einlesen);
+# beim Start wird nur der Katalog gelesen, Spalten erst bei Auswahl
+katalog = FahrtenKatalog()
+offene_fahrten = FahrtenCache(katalog)
+
+# Live-Fahrt: python utils/sensor_dashboard.py --live <datei|tcp://host:port>
+LIVE = '__live__'
+live = None
+alarme = None
+
+
+def starte_live(quelle):
+    """
+    Startet die Live-Erfassung (und ggf. die Alarme) für das Dashboard.
+
+    :param quelle: Logdatei oder ``tcp://host:port``
+    """
+    global live, alarme
+    live = LiveErfassung(oeffne_quelle(quelle))
+    if CONFIG.ALARME['AKTIV']:
+        alarme = AlarmMaschine()
+        live.abonnenten.append(alarme.verarbeite)
+    live.starte()
 
 # App-Start
 app = Dash(__name__)
@@ -36,32 +64,139 @@ sensor_options = [
     'MQ2', 'MQ3', 'MQ4', 'MQ5', 'MQ6', 'MQ7', 'MQ8', 'MQ9', 'MQ135'
 ]
 
-app.layout = html.Div([
-    html.H1("📈 Sensor Dashboard"),
-    html.Label("Wähle Sensor:"),
-    dcc.Dropdown(
-        id='sensor-dropdown',
-        options=[{'label': s, 'value': s} for s in sensor_options],
-        value='Temperature_DHT_C'
-    ),
-    html.Div([
+# Vergleich zweier Fahrten: x-Werte werden auf einen gemeinsamen Bezugstag gelegt
+VERGLEICH_MODI = {
+    'absolut': "Datum/Uhrzeit",
+    'fahrtzeit': "Zeit seit Fahrtbeginn",
+    'tageszeit': "Tageszeit",
+}
+BEZUGSTAG = np.datetime64('2000-01-01', 'ns')
+
+
+def layout():
+    """
+    Seitenaufbau; die Fahrtenliste wird bei jedem Neuladen aus dem Katalog gelesen.
+    """
+    fahrten = katalog.fahrten()
+    optionen = [{'label': f"{z.fahrt} ({z.beginn[:16]}, {z.zeilen} Zeilen)", 'value': z.fahrt}
+                for z in fahrten.itertuples()]
+    if live is not None:
+        optionen.insert(0, {'label': f"🔴 Live ({live.quelle})", 'value': LIVE})
+    return html.Div([
+        html.H1("📈 Sensor Dashboard"),
         html.Div([
-            dcc.Graph(id='sensor-graph')
-        ], style={"flex": "1", "margin-right": "10px"}),
+            html.Div([
+                html.Label("Fahrt:"),
+                dcc.Dropdown(id='fahrt-dropdown', options=optionen,
+                             value=optionen[0]['value'] if optionen else None, clearable=False),
+            ], style={"flex": "2"}),
+            html.Div([
+                html.Label("Vergleichsfahrt (optional):"),
+                dcc.Dropdown(id='vergleich-dropdown', options=optionen, value=None),
+            ], style={"flex": "2"}),
+            html.Div([
+                html.Label("Wähle Sensor:"),
+                dcc.Dropdown(
+                    id='sensor-dropdown',
+                    options=[{'label': s, 'value': s} for s in sensor_options],
+                    value='Temperature_DHT_C', clearable=False
+                ),
+            ], style={"flex": "1"}),
+            html.Div([
+                html.Label("Zeitachse:"),
+                dcc.RadioItems(id='modus', value='absolut',
+                               options=[{'label': t, 'value': m} for m, t in VERGLEICH_MODI.items()]),
+            ], style={"flex": "1"}),
+        ], style={"display": "flex", "flex-direction": "row", "gap": "20px"}),
         html.Div([
-            dcc.Graph(id='gps-map')
-        ], style={"flex": "1", "margin-left": "10px"})
-    ], style={"display": "flex", "flex-direction": "row", "gap": "20px"}),
-    html.Hr(),
-])
+            html.Div([
+                dcc.Graph(id='sensor-graph')
+            ], style={"flex": "1", "margin-right": "10px"}),
+            html.Div([
+                dcc.Graph(id='gps-map')
+            ], style={"flex": "1", "margin-left": "10px"})
+        ], style={"display": "flex", "flex-direction": "row", "gap": "20px"}),
+        html.Hr(),
+        html.Div(id='alarm-liste'),
+        dcc.Interval(id='live-intervall', interval=CONFIG.LIVE['DASHBOARD_INTERVALL_MS'],
+                     disabled=live is None),
+    ])
+
+
+app.layout = layout
+
+
+def _reihen(name):
+    """Live-Puffer oder Fahrt aus dem LRU-Cache."""
+    if name == LIVE:
+        return live.puffer.reihen() if live is not None else None
+    return offene_fahrten.hole(name)
+
+
+def _versatz(reihen, modus):
+    """
+    Verschiebung, die eine Fahrt auf die gemeinsame x-Achse legt (x = Zeit - Versatz).
+    """
+    if modus == 'fahrtzeit':
+        return reihen.zeit[0] - BEZUGSTAG
+    if modus == 'tageszeit':
+        return reihen.zeit[0].astype('datetime64[D]').astype('datetime64[ns]') - BEZUGSTAG
+    return np.timedelta64(0, 'ns')
+
+
+def _zeitfenster(relayout):
+    """
+    Liest den sichtbaren Zeitbereich aus ``relayoutData`` des Liniendiagramms.
+
+    :returns: (von, bis) – (None, None) für die Gesamtansicht
+    :raises PreventUpdate: bei Ereignissen ohne Änderung der Zeitachse
+    """
+    if not relayout:
+        raise PreventUpdate
+    if 'xaxis.range[0]' in relayout:
+        return relayout['xaxis.range[0]'], relayout['xaxis.range[1]']
+    if 'xaxis.range' in relayout:
+        return tuple(relayout['xaxis.range'])
+    if relayout.get('xaxis.autorange'):
+        return None, None
+    raise PreventUpdate
+
+
+def _sichtbares_zeitfenster(relayout):
+    """
+    Wie :func:`_zeitfenster`, aber ohne Abbruch: (None, None), wenn das letzte
+    Ereignis keinen Zeitbereich enthält.
+    """
+    try:
+        return _zeitfenster(relayout)
+    except PreventUpdate:
+        return None, None
 
 
 @app.callback(
     Output('sensor-graph', 'figure'),
     Output('gps-map', 'figure'),
-    Input('sensor-dropdown', 'value')
+    Input('fahrt-dropdown', 'value'),
+    Input('vergleich-dropdown', 'value'),
+    Input('sensor-dropdown', 'value'),
+    Input('modus', 'value'),
+    Input('sensor-graph', 'relayoutData'),
+    Input('live-intervall', 'n_intervals')
 )
-def update_graph(sensor):
+def update_graph(fahrt, vergleich, sensor, modus, relayout, _intervalle):
+    if not fahrt:
+        raise PreventUpdate
+    # Der Takt aktualisiert nur, wenn die Live-Fahrt angezeigt wird
+    if ctx.triggered_id == 'live-intervall' and LIVE not in (fahrt, vergleich):
+        raise PreventUpdate
+    # Zoom im Liniendiagramm: nur den sichtbaren Bereich (ggf. in voller Auflösung) nachladen
+    if ctx.triggered_id == 'sensor-graph':
+        von, bis = _zeitfenster(relayout)
+    elif ctx.triggered_id == 'live-intervall':
+        von, bis = _sichtbares_zeitfenster(relayout)  # Zoom beim Nachladen beibehalten
+    else:
+        von, bis = None, None
+
     # Gas-Info für Titel
     gas_info = sensor_gas_info.get(sensor, "")
     if gas_info:
@@ -71,21 +206,70 @@ def update_graph(sensor):
         title_line = f"{sensor} über Zeit"
         title_map = f"{sensor} auf Karte"
 
-    fig_line = px.line(df, x='DateTime', y=sensor, title=title_line, height=1000)
+    fig_line = go.Figure()
+    fig_map = go.Figure()
+    punkte, mitte = [], []
+    for name in dict.fromkeys(f for f in (fahrt, vergleich) if f):
+        reihen = _reihen(name)
+        if reihen is None or not len(reihen) or sensor not in reihen.werte:
+            continue
+        versatz = _versatz(reihen, modus)
+        if von is None:
+            start, ende = reihen.bereich()
+        else:
+            start, ende = reihen.bereich(pd.Timestamp(von) + versatz, pd.Timestamp(bis) + versatz)
+        linie, karte = reihen.ausschnitt(sensor, start, ende)
+        werte = reihen.werte[sensor]
+        punkte.append(f"{len(linie):,}/{ende - start:,}".replace(',', '.'))
+        fig_line.add_trace(go.Scattergl(x=reihen.zeit[linie] - versatz, y=werte[linie],
+                                        mode='lines', name=name))
+        # GPS Map mit Sensorfarbe (gemeinsame Farbskala beider Fahrten)
+        if reihen.hat_gps and len(karte):
+            fig_map.add_trace(go.Scattermapbox(
+                lat=reihen.lat[karte], lon=reihen.lon[karte], mode='markers', name=name,
+                marker=dict(color=werte[karte], coloraxis='coloraxis'),
+                text=pd.DatetimeIndex(reihen.zeit[karte]).strftime('%Y-%m-%d %H:%M:%S'),
+                hovertemplate=name + "<br>%{text}<br>" + sensor + ": %{marker.color}<extra></extra>"
+            ))
+            mitte.append((float(reihen.lat[karte].mean()), float(reihen.lon[karte].mean())))
+    if not fig_line.data:
+        raise PreventUpdate
+
+    # uirevision: Zoom bleibt beim Nachladen erhalten
+    fig_line.update_layout(title=f"{title_line} ({' | '.join(punkte)} Punkte)", height=1000,
+                           uirevision=f"{fahrt}|{vergleich}|{sensor}|{modus}",
+                           xaxis_title=VERGLEICH_MODI.get(modus, 'DateTime'), yaxis_title=sensor)
+    if modus in ('fahrtzeit', 'tageszeit'):
+        fig_line.update_xaxes(tickformat='%H:%M:%S')
+    if von is not None:
+        fig_line.update_xaxes(range=[von, bis])
 
-    # GPS Map mit Sensorfarbe
-    if 'GPS_Lat' in df.columns and 'GPS_Lon' in df.columns:
-        fig_map = px.scatter_mapbox(
-            df, lat="GPS_Lat", lon="GPS_Lon", color=sensor,
-            hover_data=["DateTime"],
-            zoom=12, height=800, title=title_map
+    if mitte:
+        fig_map.update_layout(
+            mapbox_style="open-street-map", height=800, title=title_map,
+            uirevision=f"{fahrt}|{vergleich}|{sensor}", coloraxis=dict(colorscale='Plasma'),
+            mapbox=dict(zoom=12, center=dict(lat=mitte[0][0], lon=mitte[0][1]))
         )
-        fig_map.update_layout(mapbox_style="open-street-map")
     else:
         fig_map = {}
 
     return fig_line, fig_map
 
 
+@app.callback(
+    Output('alarm-liste', 'children'),
+    Input('live-intervall', 'n_intervals')
+)
+def update_alarme(_intervalle):
+    if alarme is None:
+        raise PreventUpdate
+    return [html.H3("Alarme")] + [html.Div(str(a)) for a in islice(reversed(alarme.alarme), 10)]
+
+
 if __name__ == '__main__':
-    app.run(debug=True)
+    live_modus = '--live' in sys.argv[:-1]
+    if live_modus:
+        starte_live(sys.argv[sys.argv.index('--live') + 1])
+    # Der Reloader importiert das Modul in zwei Prozessen – im Live-Modus würden
+    # Erfassung und Alarme doppelt laufen und der Elternprozess die TCP-Quelle belegen
+    app.run(debug=True, use_reloader=not live_modus)
@@ -0,0 +1,439 @@
+"""
+sensorstatistik.py
+==================
+
+Gemeinsame Kennzahlen für alle Sensorspalten in einem Durchlauf.
+
+mod_020, mod_042 und mod_053 berechneten Mittelwert, Standardabweichung und
+Quantile bisher Spalte für Spalte und jeweils für sich. Dieses Modul rechnet
+alle Kennzahlen einmal vektorisiert über die gesamte Sensormatrix und legt
+das Ergebnis im Laufkontext (``context``) ab, sodass weitere Verbraucher im
+selben Pipeline-Lauf es nur noch auslesen.
+
+Für Archive, die nicht in den Speicher passen, gibt es eine Streaming-Variante
+mit mergebaren Momenten (Chan et al.) und einer Quantil-Skizze (KLL-artige
+Kompaktoren mit fester Kapazität je Stufe).
+
+Features:
+- berechne_sensorstatistik: Anzahl, Mittel, Varianz, Min/Max, Quantile, Top-k
+- berechne_momente: nur Anzahl, Mittel, Varianz, Min/Max (ohne Sortieren)
+- sensorstatistik_fuer_lauf: wie oben, aber im Laufkontext zwischengespeichert
+- QuantilSkizze / StreamingSensorStatistik: blockweise, speicherbegrenzt
+- berechne_sensorstatistik_csv: Streaming direkt aus einer (großen) CSV
+
+Abhängigkeiten:
+---------------
+- numpy, pandas
+- config.CONFIG (SENSORSTATISTIK)
+
+Autor: Frank Albrecht
+"""
+import os
+import sys
+import hashlib
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import CONFIG
+
+
+class SensorStatistik:
+    """
+    Kennzahlen je Sensorspalte als parallele NumPy-Arrays.
+
+    :param spalten: Spaltennamen (Reihenfolge aller Arrays)
+    :param anzahl: Anzahl gültiger Werte je Spalte
+    :param mittelwert: Mittelwert je Spalte
+    :param varianz: Stichprobenvarianz (ddof=1) je Spalte
+    :param minimum: Minimum je Spalte
+    :param maximum: Maximum je Spalte
+    :param quantile: Quantil → Array der Quantilwerte je Spalte
+    :param top_k: Spalte → Zeilenindizes der größten Werte (absteigend)
+    :param exakt: False, wenn die Quantile aus einer Skizze stammen
+    """
+
+    def __init__(self, spalten: Sequence[str], anzahl: np.ndarray, mittelwert: np.ndarray,
+                 varianz: np.ndarray, minimum: np.ndarray, maximum: np.ndarray,
+                 quantile: Dict[float, np.ndarray], top_k: Dict[str, np.ndarray],
+                 exakt: bool = True) -> None:
+        self.spalten = list(spalten)
+        self.anzahl = anzahl
+        self.mittelwert = mittelwert
+        self.varianz = varianz
+        self.minimum = minimum
+        self.maximum = maximum
+        self.quantile = quantile
+        self.top_k = top_k
+        self.exakt = exakt
+        self._position = {s: i for i, s in enumerate(self.spalten)}
+
+    @property
+    def std(self) -> np.ndarray:
+        """Standardabweichung (ddof=1) je Spalte."""
+        return np.sqrt(self.varianz)
+
+    def wert(self, kennzahl: str, spalte: str) -> float:
+        """
+        Liest eine einzelne Kennzahl einer Spalte.
+
+        :param kennzahl: 'anzahl', 'mittelwert', 'varianz', 'std', 'minimum', 'maximum'
+        :param spalte: Spaltenname
+        :returns: Kennzahl als float
+        """
+        return float(getattr(self, kennzahl)[self._position[spalte]])
+
+    def quantil(self, q: float, spalte: str) -> float:
+        """
+        Liest ein (vorberechnetes) Quantil einer Spalte.
+
+        :param q: Quantil, muss bei der Berechnung angefordert worden sein
+        :param spalte: Spaltenname
+        :returns: Quantilwert
+        :raises KeyError: Wenn das Quantil nicht berechnet wurde
+        """
+        return float(self.quantile[q][self._position[spalte]])
+
+    def beschreibung(self, quantile: Sequence[float] = (0.25, 0.5, 0.75)) -> pd.DataFrame:
+        """
+        Kennzahlen im Format von ``DataFrame.describe()`` (Spalten = Sensoren).
+
+        :param quantile: Auszugebende Quantile (müssen berechnet worden sein)
+        """
+        zeilen = {'count': self.anzahl, 'mean': self.mittelwert, 'std': self.std,
+                  'min': self.minimum}
+        for q in sorted(quantile):
+            zeilen[f"{q * 100:g}%"] = self.quantile[q]
+        zeilen['max'] = self.maximum
+        return pd.DataFrame(zeilen, index=self.spalten).T
+
+
+def _quantil_liste(quantile: Optional[Sequence[float]]) -> List[float]:
+    """Vereinigt angeforderte Quantile mit den Standardquantilen aus CONFIG."""
+    return sorted(set(CONFIG.SENSORSTATISTIK['QUANTILE']) | set(quantile or ()))
+
+
+def _momente(matrix: np.ndarray, gueltig: np.ndarray):
+    """Anzahl, Mittel, Varianz (ddof=1), Minimum und Maximum je Spalte, NaN-fest."""
+    anzahl = gueltig.sum(axis=0)
+    leer = anzahl == 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mittelwert = np.where(leer, np.nan,
+                              np.where(gueltig, matrix, 0.0).sum(axis=0) / np.maximum(anzahl, 1))
+        abweichung = np.where(gueltig, matrix - mittelwert, 0.0)
+        varianz = np.where(anzahl > 1, (abweichung ** 2).sum(axis=0) / (anzahl - 1), np.nan)
+    minimum = np.where(leer, np.nan, np.where(gueltig, matrix, np.inf).min(axis=0, initial=np.inf))
+    maximum = np.where(leer, np.nan, np.where(gueltig, matrix, -np.inf).max(axis=0, initial=-np.inf))
+    return anzahl, mittelwert, varianz, minimum, maximum
+
+
+def _matrix(df: pd.DataFrame, spalten: Optional[Sequence[str]]):
+    """Vorhandene Sensorspalten und ihre Werte als float-Matrix (nicht Numerisches → NaN)."""
+    if spalten is None:
+        spalten = df.select_dtypes(include=[np.number]).columns.tolist()
+    spalten = [s for s in spalten if s in df.columns]
+    return spalten, df[spalten].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+
+
+def berechne_momente(df: pd.DataFrame, spalten: Optional[Sequence[str]] = None) -> SensorStatistik:
+    """
+    Nur Anzahl, Mittel, Varianz, Minimum und Maximum – ein linearer Durchlauf.
+
+    Für Verbraucher, die lediglich Mittelwert/Standardabweichung brauchen
+    (z-Score, Auffüllen fehlender Werte): kein Sortieren, keine Top-k, kein
+    Inhaltshash für den Laufkontext. ``quantile`` und ``top_k`` bleiben leer.
+
+    :param df: Quelldaten
+    :param spalten: Sensorspalten (Standard: alle numerischen Spalten)
+    :returns: SensorStatistik ohne Quantile
+    """
+    spalten, matrix = _matrix(df, spalten)
+    anzahl, mittelwert, varianz, minimum, maximum = _momente(matrix, ~np.isnan(matrix))
+    return SensorStatistik(spalten, anzahl, mittelwert, varianz, minimum, maximum, {}, {})
+
+
+def berechne_sensorstatistik(df: pd.DataFrame, spalten: Optional[Sequence[str]] = None,
+                             quantile: Optional[Sequence[float]] = None,
+                             top_k: Optional[int] = None) -> SensorStatistik:
+    """
+    Berechnet alle Kennzahlen für alle Spalten in einem vektorisierten Durchlauf.
+
+    NaN-Werte werden ignoriert; Quantile werden linear interpoliert wie bei
+    ``Series.quantile``.
+
+    :param df: Quelldaten
+    :param spalten: Sensorspalten (Standard: alle numerischen Spalten)
+    :param quantile: Zusätzliche Quantile (CONFIG-Quantile sind immer enthalten)
+    :param top_k: Anzahl größter Werte je Spalte (Standard aus CONFIG)
+    :returns: SensorStatistik
+    :example:
+
+        >>> stat = berechne_sensorstatistik(df, ['MQ2', 'MQ135'])
+        >>> stat.quantil(0.9, 'MQ135')
+
+    """
+    top_k = CONFIG.SENSORSTATISTIK['TOP_K'] if top_k is None else top_k
+    qs = _quantil_liste(quantile)
+
+    spalten, matrix = _matrix(df, spalten)
+    gueltig = ~np.isnan(matrix)
+    anzahl, mittelwert, varianz, minimum, maximum = _momente(matrix, gueltig)
+    leer = anzahl == 0
+
+    # Quantile aller Spalten auf einmal: NaN ans Ende sortieren, dann je Spalte interpolieren
+    sortiert = np.sort(matrix, axis=0)
+    quantil_werte = {}
+    for q in qs:
+        pos = q * np.maximum(anzahl - 1, 0)
+        unten = np.floor(pos).astype(int)
+        oben = np.minimum(unten + 1, np.maximum(anzahl - 1, 0))
+        idx = np.arange(len(spalten))
+        if len(matrix):
+            wert = sortiert[unten, idx] + (pos - unten) * (sortiert[oben, idx] - sortiert[unten, idx])
+        else:
+            wert = np.full(len(spalten), np.nan)
+        quantil_werte[q] = np.where(leer, np.nan, wert)
+
+    # Top-k: argpartition statt vollständiger Sortierung
+    beste = {}
+    if top_k > 0 and len(matrix):
+        k = min(top_k, len(matrix))
+        gefuellt = np.where(gueltig, matrix, -np.inf)
+        kandidaten = np.argpartition(-gefuellt, k - 1, axis=0)[:k]
+        for i, spalte in enumerate(spalten):
+            kand = kandidaten[:, i]
+            kand = kand[np.argsort(-gefuellt[kand, i], kind='stable')]
+            kand = kand[np.isfinite(gefuellt[kand, i])]
+            beste[spalte] = df.index.to_numpy()[kand]
+
+    return SensorStatistik(spalten, anzahl, mittelwert, varianz, minimum, maximum,
+                           quantil_werte, beste)
+
+
+def _inhalt_hash(df: pd.DataFrame, spalten: Sequence[str]) -> str:
+    """BLAKE2b über die zeilenweisen pandas-Hashes von Index und Spalten."""
+    zeilen = pd.util.hash_pandas_object(df[list(spalten)], index=True).to_numpy()
+    return hashlib.blake2b(zeilen.tobytes(), digest_size=16).hexdigest()
+
+
+def sensorstatistik_fuer_lauf(df: pd.DataFrame, stufe: str,
+                              spalten: Optional[Sequence[str]] = None,
+                              quantile: Optional[Sequence[float]] = None) -> SensorStatistik:
+    """
+    Liefert die Sensorstatistik eines Verarbeitungsstands aus dem Laufkontext.
+
+    Das Ergebnis wird am Modul ``context`` unter ``sensorstatistik`` abgelegt,
+    Schlüssel sind Fahrt (``filename_ohne_ext``), Stufe, Spalten und ein Hash
+    über Index und Werte der Spalten – geänderte Daten gleicher Länge liefern
+    also keine veraltete Statistik. Alle Module eines Pipeline-Laufs teilen
+    sich damit dieselbe Berechnung. Fehlen angeforderte Quantile, wird neu
+    berechnet. Wer nur Mittelwert/Streuung braucht, nimmt ``berechne_momente``:
+    Sortieren und Hash kosten hier mehr als die Momente selbst.
+
+    :param df: Daten des Verarbeitungsstands
+    :param stufe: Name des Stands, z.B. 'roh', 'ema', 'bereinigt'
+    :param spalten: Sensorspalten (Standard: alle numerischen Spalten)
+    :param quantile: Zusätzlich benötigte Quantile
+    :returns: SensorStatistik
+    """
+    import context
+
+    if spalten is None:
+        spalten = df.select_dtypes(include=[np.number]).columns.tolist()
+    spalten = tuple(s for s in spalten if s in df.columns)
+    cache = getattr(context, 'sensorstatistik', None)
+    if cache is None:
+        cache = context.sensorstatistik = {}
+    schluessel = (getattr(context, 'filename_ohne_ext', None), stufe, spalten,
+                  _inhalt_hash(df, spalten))
+    stat = cache.get(schluessel)
+    if stat is None or not set(_quantil_liste(quantile)) <= set(stat.quantile):
+        stat = berechne_sensorstatistik(df, spalten, quantile)
+        cache[schluessel] = stat
+    return stat
+
+
+class QuantilSkizze:
+    """
+    Mergebare Quantil-Skizze für viele Spalten gleichzeitig.
+
+    Jede Stufe ``h`` hält Werte mit Gewicht ``2**h``. Läuft eine Stufe über,
+    wird sie sortiert und jeder zweite Wert (zufälliger Versatz) in die nächste
+    Stufe übernommen. Der Speicher wächst nur logarithmisch mit der Datenmenge;
+    der Rangfehler liegt bei etwa ``log2(n / kapazitaet) / kapazitaet``.
+
+    :param spalten_anzahl: Anzahl überwachter Spalten
+    :param kapazitaet: Werte je Stufe und Spalte bevor kompaktiert wird
+    :param seed: Startwert für den Zufallsversatz
+    """
+
+    def __init__(self, spalten_anzahl: int, kapazitaet: Optional[int] = None,
+                 seed: Optional[int] = None) -> None:
+        self.spalten_anzahl = spalten_anzahl
+        self.kapazitaet = kapazitaet or CONFIG.SENSORSTATISTIK['SKIZZE_KAPAZITAET']
+        self._rng = np.random.default_rng(seed)
+        # stufen[h][spalte] → 1D-Array der Werte mit Gewicht 2**h
+        self.stufen: List[List[np.ndarray]] = []
+
+    def _stufe(self, h: int) -> List[np.ndarray]:
+        while len(self.stufen) <= h:
+            self.stufen.append([np.empty(0) for _ in range(self.spalten_anzahl)])
+        return self.stufen[h]
+
+    def _kompaktiere(self, h: int, spalte: int) -> None:
+        while len(self._stufe(h)[spalte]) > self.kapazitaet:
+            werte = np.sort(self.stufen[h][spalte])
+            gerade = len(werte) - len(werte) % 2
+            uebrig = werte[gerade:]
+            hoch = werte[self._rng.integers(2):gerade:2]
+            self.stufen[h][spalte] = uebrig
+            naechste = self._stufe(h + 1)
+            naechste[spalte] = np.concatenate([naechste[spalte], hoch])
+            h += 1
+
+    def aktualisiere(self, matrix: np.ndarray) -> None:
+        """
+        Fügt einen Block Werte hinzu (Zeilen x Spalten, NaN wird ignoriert).
+        """
+        stufe0 = self._stufe(0)
+        for spalte in range(self.spalten_anzahl):
+            werte = matrix[:, spalte]
+            werte = werte[~np.isnan(werte)]
+            if len(werte):
+                stufe0[spalte] = np.concatenate([stufe0[spalte], werte])
+                self._kompaktiere(0, spalte)
+
+    def merge(self, andere: 'QuantilSkizze') -> 'QuantilSkizze':
+        """
+        Übernimmt eine zweite Skizze gleicher Spaltenzahl (z.B. andere Fahrt).
+        """
+        for h, stufe in enumerate(andere.stufen):
+            eigene = self._stufe(h)
+            for spalte in range(self.spalten_anzahl):
+                eigene[spalte] = np.concatenate([eigene[spalte], stufe[spalte]])
+        for h in range(len(self.stufen)):
+            for spalte in range(self.spalten_anzahl):
+                self._kompaktiere(h, spalte)
+        return self
+
+    def quantile(self, qs: Sequence[float]) -> Dict[float, np.ndarray]:
+        """
+        Schätzt Quantile aller Spalten.
+
+        :param qs: Quantile zwischen 0 und 1
+        :returns: Quantil → Array der Schätzwerte je Spalte
+        """
+        ergebnis = {q: np.full(self.spalten_anzahl, np.nan) for q in qs}
+        for spalte in range(self.spalten_anzahl):
+            werte = [stufe[spalte] for stufe in self.stufen]
+            gewichte = [np.full(len(w), 2.0 ** h) for h, w in enumerate(werte)]
+            werte, gewichte = np.concatenate(werte or [np.empty(0)]), np.concatenate(gewichte or [np.empty(0)])
+            if not len(werte):
+                continue
+            reihenfolge = np.argsort(werte, kind='stable')
+            werte, kumuliert = werte[reihenfolge], np.cumsum(gewichte[reihenfolge])
+            for q in qs:
+                rang = q * kumuliert[-1]
+                i = min(np.searchsorted(kumuliert, rang, side='left'), len(werte) - 1)
+                ergebnis[q][spalte] = werte[i]
+        return ergebnis
+
+
+class StreamingSensorStatistik:
+    """
+    Blockweise Sensorstatistik für Archive, die nicht in den Speicher passen.
+
+    Momente (Anzahl, Mittel, M2) werden nach Chan et al. zusammengeführt,
+    Quantile über eine :class:`QuantilSkizze`, Top-k über die jeweils
+    besten Kandidaten aus bisherigem Ergebnis und neuem Block.
+
+    :param spalten: Sensorspalten
+    :param quantile: Zusätzliche Quantile (CONFIG-Quantile sind immer enthalten)
+    :param top_k: Anzahl größter Werte je Spalte (Standard aus CONFIG)
+    :param kapazitaet: Kapazität der Quantil-Skizze
+    """
+
+    def __init__(self, spalten: Sequence[str], quantile: Optional[Sequence[float]] = None,
+                 top_k: Optional[int] = None, kapazitaet: Optional[int] = None) -> None:
+        self.spalten = list(spalten)
+        self.qs = _quantil_liste(quantile)
+        self.top_k = CONFIG.SENSORSTATISTIK['TOP_K'] if top_k is None else top_k
+        n = len(self.spalten)
+        self.anzahl = np.zeros(n)
+        self.mittelwert = np.zeros(n)
+        self.m2 = np.zeros(n)
+        self.minimum = np.full(n, np.inf)
+        self.maximum = np.full(n, -np.inf)
+        self.skizze = QuantilSkizze(n, kapazitaet)
+        self._top_werte = np.full((0, n), -np.inf)
+        self._top_index = np.zeros((0, n), dtype=np.int64)
+
+    def aktualisiere(self, df: pd.DataFrame) -> None:
+        """
+        Verarbeitet einen Datenblock (Index = globale Zeilennummer).
+        """
+        matrix = df.reindex(columns=self.spalten).apply(
+            pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        anzahl_b, mittel_b, varianz_b, minimum_b, maximum_b = _momente(matrix, ~np.isnan(matrix))
+        n_a, n_b = self.anzahl, anzahl_b.astype(float)
+        n = n_a + n_b
+        mittel_b = np.nan_to_num(mittel_b)
+        m2_b = np.nan_to_num(varianz_b) * np.maximum(n_b - 1, 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = mittel_b - self.mittelwert
+            self.mittelwert = np.where(n > 0, self.mittelwert + delta * n_b / np.maximum(n, 1), 0.0)
+            self.m2 = self.m2 + m2_b + delta ** 2 * n_a * n_b / np.maximum(n, 1)
+        self.anzahl = n
+        self.minimum = np.fmin(self.minimum, minimum_b)
+        self.maximum = np.fmax(self.maximum, maximum_b)
+        self.skizze.aktualisiere(matrix)
+
+        if self.top_k > 0 and len(matrix):
+            werte = np.vstack([self._top_werte, np.where(np.isnan(matrix), -np.inf, matrix)])
+            index = np.vstack([self._top_index,
+                               np.repeat(df.index.to_numpy()[:, None], len(self.spalten), axis=1)])
+            k = min(self.top_k, len(werte))
+            auswahl = np.argpartition(-werte, k - 1, axis=0)[:k]
+            self._top_werte = np.take_along_axis(werte, auswahl, axis=0)
+            self._top_index = np.take_along_axis(index, auswahl, axis=0)
+
+    def ergebnis(self) -> SensorStatistik:
+        """
+        Fasst den bisherigen Stand als SensorStatistik zusammen (Quantile geschätzt).
+        """
+        leer = self.anzahl == 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            varianz = np.where(self.anzahl > 1, self.m2 / (self.anzahl - 1), np.nan)
+        beste = {}
+        for i, spalte in enumerate(self.spalten):
+            reihenfolge = np.argsort(-self._top_werte[:, i], kind='stable')
+            gueltig = np.isfinite(self._top_werte[reihenfolge, i])
+            beste[spalte] = self._top_index[reihenfolge[gueltig], i]
+        return SensorStatistik(
+            self.spalten, self.anzahl.astype(int),
+            np.where(leer, np.nan, self.mittelwert), varianz,
+            np.where(leer, np.nan, self.minimum), np.where(leer, np.nan, self.maximum),
+            self.skizze.quantile(self.qs), beste, exakt=False)
+
+
+def berechne_sensorstatistik_csv(pfad: str, spalten: Sequence[str],
+                                 quantile: Optional[Sequence[float]] = None,
+                                 chunk_zeilen: Optional[int] = None,
+                                 **read_csv_args) -> SensorStatistik:
+    """
+    Streamt eine CSV blockweise durch die Sensorstatistik.
+
+    :param pfad: Pfad zur CSV-Datei
+    :param spalten: Sensorspalten
+    :param quantile: Zusätzliche Quantile
+    :param chunk_zeilen: Zeilen je Block (Standard aus CONFIG)
+    :param read_csv_args: Weitere Argumente für ``pd.read_csv`` (z.B. comment='#')
+    :returns: SensorStatistik mit geschätzten Quantilen
+    """
+    chunk_zeilen = chunk_zeilen or CONFIG.SENSORSTATISTIK['CHUNK_ZEILEN']
+    stat = StreamingSensorStatistik(spalten, quantile)
+    for block in pd.read_csv(pfad, usecols=lambda spalte: spalte in spalten, chunksize=chunk_zeilen, **read_csv_args):
+        stat.aktualisiere(block)
+    return stat.ergebnis()
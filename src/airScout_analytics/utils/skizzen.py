@@ -0,0 +1,219 @@
+"""
+skizzen.py
+==========
+
+Streaming-Skizzen mit konstantem Speicher für den Näherungsmodus der
+CSV-Analyse (mod_020, csv_analyzer_10).
+
+Zusammengeführte Archive mit mehreren GB passen nicht in den Speicher.
+Statt eindeutige Werte, Duplikate und Beispielzeilen exakt über alle Zeilen
+zu bestimmen, werden die Blöcke einer Datei nacheinander in Skizzen fester
+Größe eingerechnet. Jede Skizze liefert neben dem Schätzwert auch ihre
+Fehlergrenze, damit der Bericht sie ausweisen kann. Quantile übernimmt die
+vorhandene QuantilSkizze aus utils.sensorstatistik.
+
+Features:
+- HyperLogLog: Anzahl eindeutiger Werte je Spalte (relativer Fehler 1.04/sqrt(m))
+- BloomFilter: Duplikat-Schätzung über Zeilen-Hashes (nur Fehlalarme, keine Auslassungen)
+- Reservoir: gleichverteilte Stichprobe fester Größe (Algorithmus R, blockweise)
+
+Abhängigkeiten:
+---------------
+- numpy, pandas
+- config.CONFIG (CSV_BERICHT)
+
+Autor: Frank Albrecht
+"""
+import os
+import sys
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import CONFIG
+
+
+def werte_hash(werte) -> np.ndarray:
+    """
+    64-Bit-Hash je Wert, über Blöcke hinweg stabil. Zahlen werden vorher auf
+    float64 gebracht, damit 5 und 5.0 (Block mit/ohne NaN) gleich hashen.
+
+    :param werte: Series, Index oder Array (ohne fehlende Werte)
+    :returns: uint64-Array
+    """
+    werte = np.asarray(werte)
+    if werte.dtype.kind in 'biuf':
+        werte = werte.astype(np.float64)
+    elif werte.dtype.kind not in 'mM':
+        werte = werte.astype(object)
+    return pd.util.hash_array(werte)
+
+
+class HyperLogLog:
+    """
+    Schätzt die Anzahl eindeutiger Werte mit ``2**praezision`` Registern.
+
+    Die oberen ``praezision`` Bits eines Hashes wählen das Register, die Zahl
+    führender Nullen im Rest (+1) wird als Maximum festgehalten. Der
+    Standardfehler beträgt ``1.04 / sqrt(2**praezision)``; für kleine Mengen
+    wird auf Linear Counting umgeschaltet.
+
+    :param praezision: Bits für die Registerwahl (Standard: CSV_BERICHT['HLL_PRAEZISION'])
+    """
+
+    def __init__(self, praezision: Optional[int] = None) -> None:
+        self.praezision = praezision or CONFIG.CSV_BERICHT['HLL_PRAEZISION']
+        self.m = 1 << self.praezision
+        self.register = np.zeros(self.m, dtype=np.uint8)
+
+    @property
+    def fehler(self) -> float:
+        """Relativer Standardfehler der Schätzung."""
+        return 1.04 / np.sqrt(self.m)
+
+    def aktualisiere(self, hashes: np.ndarray) -> None:
+        """
+        Rechnet einen Block Hashes ein.
+
+        :param hashes: uint64-Hashes (z.B. aus :func:`werte_hash`)
+        """
+        if not len(hashes):
+            return
+        rest_bits = 64 - self.praezision
+        index = (hashes >> np.uint64(rest_bits)).astype(np.intp)
+        rest = hashes & np.uint64((1 << rest_bits) - 1)
+        # Bitlänge des Rests; über float genügt die Genauigkeit für die Schätzung
+        bitlaenge = np.zeros(len(rest), dtype=np.int64)
+        positiv = rest > 0
+        bitlaenge[positiv] = np.floor(np.log2(rest[positiv].astype(float))).astype(np.int64) + 1
+        rang = (rest_bits - bitlaenge + 1).astype(np.uint8)
+        np.maximum.at(self.register, index, rang)
+
+    def merge(self, andere: 'HyperLogLog') -> 'HyperLogLog':
+        """Übernimmt eine Skizze gleicher Präzision."""
+        np.maximum(self.register, andere.register, out=self.register)
+        return self
+
+    def schaetzung(self) -> int:
+        """
+        :returns: Geschätzte Anzahl eindeutiger Werte
+        """
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        roh = alpha * self.m ** 2 / np.sum(2.0 ** -self.register.astype(float))
+        leer = int(np.count_nonzero(self.register == 0))
+        if roh <= 2.5 * self.m and leer:
+            return int(round(self.m * np.log(self.m / leer)))
+        return int(round(roh))
+
+
+class BloomFilter:
+    """
+    Bloom-Filter über 64-Bit-Zeilen-Hashes zur Duplikat-Schätzung.
+
+    Eine Zeile gilt als Duplikat, wenn alle ``k`` Bits ihres Hashes bereits
+    gesetzt sind. Echte Duplikate werden immer erkannt; zusätzlich können
+    Fehlalarme auftreten, deren erwartete Anzahl :meth:`erwartete_fehlalarme`
+    nach oben abschätzt.
+
+    :param bits: Größe des Bitfelds (Standard: CSV_BERICHT['BLOOM_BITS'])
+    :param erwartete_zeilen: Erwartete Zeilenzahl zur Wahl von k
+    """
+
+    def __init__(self, bits: Optional[int] = None, erwartete_zeilen: Optional[int] = None) -> None:
+        self.bits = bits or CONFIG.CSV_BERICHT['BLOOM_BITS']
+        if erwartete_zeilen:
+            self.k = int(np.clip(round(self.bits / erwartete_zeilen * np.log(2)), 1, 8))
+        else:
+            self.k = 4
+        self.feld = np.zeros((self.bits + 7) // 8, dtype=np.uint8)
+        self.eingefuegt = 0
+
+    def _positionen(self, hashes: np.ndarray) -> np.ndarray:
+        # Doppeltes Hashing: h1 + i*h2 aus den beiden 32-Bit-Hälften
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        i = np.arange(self.k, dtype=np.uint64)
+        return ((h1[:, None] + i[None, :] * h2[:, None]) % np.uint64(self.bits)).astype(np.int64)
+
+    def pruefe_und_fuege_ein(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Markiert bereits (vermutlich) gesehene Hashes und fügt alle ein.
+        Wiederholungen innerhalb des Blocks werden exakt erkannt.
+
+        :param hashes: uint64-Zeilen-Hashes in Dateireihenfolge
+        :returns: Boolesche Maske "Duplikat"
+        """
+        if not len(hashes):
+            return np.zeros(0, dtype=bool)
+        im_block = pd.Series(hashes).duplicated().to_numpy()
+        positionen = self._positionen(hashes)
+        gesetzt = (self.feld[positionen >> 3] >> (positionen & 7).astype(np.uint8)) & 1
+        duplikat = im_block | gesetzt.all(axis=1)
+        flach = positionen.ravel()
+        np.bitwise_or.at(self.feld, flach >> 3, (1 << (flach & 7)).astype(np.uint8))
+        self.eingefuegt += len(hashes)
+        return duplikat
+
+    def fehlalarmrate(self) -> float:
+        """Aktuelle Fehlalarmrate (1 - e^(-k*n/m))^k."""
+        return float((1 - np.exp(-self.k * self.eingefuegt / self.bits)) ** self.k)
+
+    def erwartete_fehlalarme(self) -> float:
+        """Obere Schranke der erwarteten Fehlalarme über alle eingefügten Zeilen."""
+        return self.eingefuegt * self.fehlalarmrate()
+
+
+class Reservoir:
+    """
+    Gleichverteilte Stichprobe fester Größe aus einem Zeilenstrom (Algorithmus R).
+
+    Die Stichprobe behält die globalen Zeilennummern als Index und wird in
+    Dateireihenfolge zurückgegeben, damit Zeitreihen-Auswertungen sinnvoll
+    bleiben.
+
+    :param groesse: Anzahl Zeilen (Standard: CSV_BERICHT['STICHPROBE'])
+    :param seed: Startwert des Zufallsgenerators
+    """
+
+    def __init__(self, groesse: Optional[int] = None, seed: Optional[int] = None) -> None:
+        self.groesse = groesse or CONFIG.CSV_BERICHT['STICHPROBE']
+        self._rng = np.random.default_rng(CONFIG.SEED if seed is None else seed)
+        self._slots = np.full(self.groesse, -1, dtype=np.int64)  # Slot → Zeilennummer
+        self._zeilen: Optional[pd.DataFrame] = None
+        self.gesehen = 0
+
+    def aktualisiere(self, block: pd.DataFrame) -> None:
+        """
+        Rechnet einen Block ein (Index = globale Zeilennummer).
+        """
+        n = len(block)
+        if not n:
+            return
+        t = self.gesehen + np.arange(n)
+        slot = np.where(t < self.groesse, t,
+                        np.floor(self._rng.random(n) * (t + 1)).astype(np.int64))
+        treffer = np.flatnonzero(slot < self.groesse)
+        # Wird ein Slot im Block mehrfach getroffen, gewinnt die späteste Zeile
+        slot_treffer = slot[treffer]
+        _, letzte = np.unique(slot_treffer[::-1], return_index=True)
+        auswahl = treffer[::-1][letzte]
+        slots = slot[auswahl]
+
+        ersetzt = self._slots[slots]
+        ersetzt = ersetzt[ersetzt >= 0]
+        if self._zeilen is not None and len(ersetzt):
+            self._zeilen = self._zeilen.drop(index=ersetzt)
+        neu = block.iloc[auswahl]
+        self._zeilen = neu if self._zeilen is None else pd.concat([self._zeilen, neu])
+        self._slots[slots] = neu.index.to_numpy()
+        self.gesehen += n
+
+    def stichprobe(self) -> pd.DataFrame:
+        """
+        :returns: Stichprobe in Dateireihenfolge
+        """
+        if self._zeilen is None:
+            return pd.DataFrame()
+        return self._zeilen.sort_index()
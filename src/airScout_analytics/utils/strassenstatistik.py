@@ -0,0 +1,381 @@
+"""
+strassenstatistik.py
+====================
+
+Persistente Straßenstatistik über alle Fahrten, inkrementell aktualisiert.
+
+Nach mod_042 hat jede Fahrt eine Spalte ``street``. Statt für Auswertungen
+über alle Fahrten jedes Mal ``data/ergebnisse`` neu einzulesen, wird jede
+fertige Fahrt einmal in einen Aggregatspeicher (SQLite) eingerechnet. Je
+Straße und Sensor liegen nur zusammenführbare Kennzahlen vor:
+
+- Anzahl, Mittelwert und M2 (Chan et al.), Minimum, Maximum
+- ein logarithmisches Histogramm für Perzentile (exakt addierbar)
+- je Straße die Aufenthaltsdauer und die Anzahl der Fahrten
+
+Neben dem Gesamtstand wird der Beitrag jeder Fahrt gespeichert (wie beim
+RasterArchiv). Wird eine Fahrt erneut eingerechnet (Schlüssel = Fahrtname,
+z.B. nach erneuter Verarbeitung oder einer längeren Aufzeichnung), wird ihr
+alter Beitrag in derselben Transaktion herausgerechnet und der neue
+eingerechnet; Minimum und Maximum kommen dabei aus den übrigen
+Fahrtbeiträgen. Fahrten aus einem Speicher ohne Fahrtbeiträge (Altbestand)
+lassen sich nicht herausrechnen und werden nicht ersetzt.
+
+Features:
+- StrassenStatistik.fuege_fahrt_hinzu: eine Fahrt einrechnen oder ersetzen
+- StrassenStatistik.entferne_fahrt: Beitrag einer Fahrt herausrechnen
+- StrassenStatistik.tabelle: Kennzahlen je Straße als DataFrame
+- StrassenStatistik.top_strassen: am stärksten belastete Straßen
+
+Abhängigkeiten:
+---------------
+- numpy, pandas, sqlite3
+- config.CONFIG (STRASSENSTATISTIK)
+
+Autor: Frank Albrecht
+"""
+import os
+import sys
+import sqlite3
+import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import CONFIG
+
+UNBEKANNT = 'Unbekannt'
+
+
+def histogramm_grenzen() -> np.ndarray:
+    """
+    Logarithmische Klassengrenzen aus CONFIG.STRASSENSTATISTIK.
+    Klasse 0 = unter HISTOGRAMM_MIN (auch <= 0), letzte Klasse = ab HISTOGRAMM_MAX.
+    """
+    e = CONFIG.STRASSENSTATISTIK
+    return np.geomspace(e['HISTOGRAMM_MIN'], e['HISTOGRAMM_MAX'], e['HISTOGRAMM_KLASSEN'] + 1)
+
+
+def histogramm_quantil(histogramm: np.ndarray, q: float, minimum: float, maximum: float) -> float:
+    """
+    Schätzt ein Quantil aus einem Histogramm (log-lineare Interpolation in der Klasse).
+
+    :param histogramm: Häufigkeiten je Klasse (siehe :func:`histogramm_grenzen`)
+    :param q: Quantil zwischen 0 und 1
+    :param minimum: Exaktes Minimum (begrenzt die Schätzung)
+    :param maximum: Exaktes Maximum (begrenzt die Schätzung)
+    :returns: Geschätztes Quantil (NaN ohne Werte)
+    """
+    gesamt = histogramm.sum()
+    if gesamt <= 0:
+        return float('nan')
+    grenzen = histogramm_grenzen()
+    kumuliert = np.cumsum(histogramm)
+    ziel = q * gesamt
+    klasse = int(np.searchsorted(kumuliert, ziel, side='left'))
+    klasse = min(klasse, len(histogramm) - 1)
+    if klasse == 0:
+        return float(minimum)
+    if klasse == len(histogramm) - 1:
+        return float(maximum)
+    vorher = kumuliert[klasse - 1]
+    anteil = (ziel - vorher) / max(histogramm[klasse], 1)
+    unten, oben = np.log(grenzen[klasse - 1]), np.log(grenzen[klasse])
+    return float(np.clip(np.exp(unten + anteil * (oben - unten)), minimum, maximum))
+
+
+def _fahrt_aggregat(df: pd.DataFrame, sensoren: Sequence[str]) -> Dict[str, object]:
+    """
+    Kennzahlen einer Fahrt je Straße, vollständig vektorisiert (groupby + bincount).
+    """
+    e = CONFIG.STRASSENSTATISTIK
+    strassen = df['street'].astype(str).to_numpy()
+    gueltig = strassen != UNBEKANNT
+    namen, code = np.unique(strassen[gueltig], return_inverse=True)
+
+    # Aufenthaltsdauer: Zeit bis zum nächsten Punkt, begrenzt (Lücken zählen nicht)
+    if 'DateTime' in df.columns:
+        zeit = pd.to_datetime(df['DateTime'], errors='coerce')
+        dt = zeit.diff().shift(-1).dt.total_seconds().to_numpy(dtype=float)
+        dt = np.clip(np.nan_to_num(dt), 0.0, e['MAX_SCHRITT_S'])
+    else:
+        dt = np.zeros(len(df))
+    dauer_s = np.bincount(code, weights=dt[gueltig], minlength=len(namen))
+    punkte = np.bincount(code, minlength=len(namen))
+
+    grenzen = histogramm_grenzen()
+    klassen = len(grenzen) + 1
+    werte = {}
+    for sensor in sensoren:
+        x = pd.to_numeric(df[sensor], errors='coerce').to_numpy(dtype=float)[gueltig]
+        ok = ~np.isnan(x)
+        c, x = code[ok], x[ok]
+        n = np.bincount(c, minlength=len(namen)).astype(float)
+        summe = np.bincount(c, weights=x, minlength=len(namen))
+        mittel = np.divide(summe, n, out=np.zeros_like(summe), where=n > 0)
+        m2 = np.bincount(c, weights=(x - mittel[c]) ** 2, minlength=len(namen))
+        minimum = np.full(len(namen), np.inf)
+        maximum = np.full(len(namen), -np.inf)
+        np.minimum.at(minimum, c, x)
+        np.maximum.at(maximum, c, x)
+        klasse = np.searchsorted(grenzen, x, side='right')
+        histogramm = np.bincount(c * klassen + klasse, minlength=len(namen) * klassen)
+        werte[sensor] = (n, mittel, m2, minimum, maximum, histogramm.reshape(len(namen), klassen))
+    return {'namen': namen, 'dauer_s': dauer_s, 'punkte': punkte, 'werte': werte}
+
+
+class StrassenStatistik:
+    """
+    Aggregatspeicher für Kennzahlen je Straße über alle Fahrten.
+
+    :param pfad: SQLite-Datei (Standard aus CONFIG.STRASSENSTATISTIK)
+    """
+
+    def __init__(self, pfad: Optional[str] = None) -> None:
+        self.pfad = pfad or CONFIG.STRASSENSTATISTIK['DATEI']
+        os.makedirs(os.path.dirname(os.path.abspath(self.pfad)), exist_ok=True)
+        self._db = sqlite3.connect(self.pfad)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS fahrten (fahrt TEXT PRIMARY KEY, punkte INTEGER, hinzugefuegt TEXT,"
+            " altbestand INTEGER DEFAULT 0);"
+            "CREATE TABLE IF NOT EXISTS strassen (street TEXT PRIMARY KEY, fahrten INTEGER,"
+            " dauer_s REAL, punkte INTEGER);"
+            "CREATE TABLE IF NOT EXISTS werte (street TEXT, sensor TEXT, anzahl REAL, mittelwert REAL,"
+            " m2 REAL, minimum REAL, maximum REAL, histogramm BLOB, PRIMARY KEY (street, sensor));"
+            # Beitrag je Fahrt (zum Herausrechnen beim Ersetzen)
+            "CREATE TABLE IF NOT EXISTS fahrt_strassen (fahrt TEXT, street TEXT, dauer_s REAL,"
+            " punkte INTEGER, PRIMARY KEY (fahrt, street));"
+            "CREATE TABLE IF NOT EXISTS fahrt_werte (fahrt TEXT, street TEXT, sensor TEXT, anzahl REAL,"
+            " mittelwert REAL, m2 REAL, minimum REAL, maximum REAL, histogramm BLOB,"
+            " PRIMARY KEY (fahrt, street, sensor));")
+        # Speicher ohne Fahrtbeiträge: bisherige Fahrten sind Altbestand
+        if 'altbestand' not in [z[1] for z in self._db.execute("PRAGMA table_info(fahrten)")]:
+            with self._db:
+                self._db.execute("ALTER TABLE fahrten ADD COLUMN altbestand INTEGER DEFAULT 1")
+
+    def schliesse(self) -> None:
+        self._db.close()
+
+    def fahrten(self) -> List[str]:
+        """Namen aller bereits eingerechneten Fahrten."""
+        return [z[0] for z in self._db.execute("SELECT fahrt FROM fahrten ORDER BY fahrt")]
+
+    def fuege_fahrt_hinzu(self, fahrt: str, df: pd.DataFrame,
+                          sensoren: Optional[Sequence[str]] = None) -> bool:
+        """
+        Rechnet eine Fahrt in den Speicher ein (eine Transaktion). Ist die Fahrt
+        bereits enthalten, wird ihr alter Beitrag herausgerechnet und durch den
+        neuen ersetzt.
+
+        :param fahrt: Eindeutiger Fahrtname (z.B. context.filename_ohne_ext)
+        :param df: Fahrt mit Spalte ``street`` und Sensorspalten
+        :param sensoren: Zu aggregierende Spalten (Standard aus CONFIG, sonst alle MQ-Spalten)
+        :returns: True, wenn eingerechnet oder ersetzt; False ohne Straßen oder bei Altbestand
+        """
+        if 'street' not in df.columns:
+            print(f"⚠️ Straßenstatistik: Fahrt {fahrt} hat keine Spalte 'street'.")
+            return False
+        vorhanden = self._db.execute("SELECT altbestand FROM fahrten WHERE fahrt=?", (fahrt,)).fetchone()
+        if vorhanden and vorhanden[0]:
+            print(f"⚠️ Straßenstatistik: Fahrt {fahrt} stammt aus dem Altbestand ohne Fahrtbeitrag "
+                  f"und kann nicht ersetzt werden – Speicher neu aufbauen.")
+            return False
+        sensoren = [s for s in (sensoren or CONFIG.STRASSENSTATISTIK['SENSOREN']
+                                or [c for c in df.columns if c.startswith('MQ') and '_' not in c])
+                    if s in df.columns]
+        neu = _fahrt_aggregat(df, sensoren)
+
+        with self._db:
+            if vorhanden:
+                self._beitrag_entfernen(fahrt)
+            self._beitrag_hinzufuegen(fahrt, len(df), neu)
+        aktion = "ersetzt" if vorhanden else "eingerechnet"
+        print(f"✅ Straßenstatistik: Fahrt {fahrt} {aktion} ({len(neu['namen'])} Straßen, "
+              f"{len(sensoren)} Sensoren)")
+        return True
+
+    def entferne_fahrt(self, fahrt: str) -> bool:
+        """
+        Rechnet den Beitrag einer Fahrt wieder heraus (eine Transaktion).
+
+        :returns: True, wenn entfernt; False, wenn nicht enthalten oder Altbestand
+        """
+        vorhanden = self._db.execute("SELECT altbestand FROM fahrten WHERE fahrt=?", (fahrt,)).fetchone()
+        if not vorhanden or vorhanden[0]:
+            return False
+        with self._db:
+            self._beitrag_entfernen(fahrt)
+        print(f"Straßenstatistik: Fahrt {fahrt} entfernt.")
+        return True
+
+    def _beitrag_hinzufuegen(self, fahrt: str, zeilen: int, neu: Dict[str, object]) -> None:
+        """Fügt den Beitrag einer Fahrt zum Gesamtstand hinzu und speichert ihn (ohne Commit)."""
+        namen = neu['namen']
+        self._db.execute("INSERT INTO fahrten (fahrt, punkte, hinzugefuegt, altbestand) VALUES (?, ?, ?, 0)",
+                         (fahrt, int(zeilen), datetime.datetime.now().isoformat(timespec='seconds')))
+        strassen = [(str(s), float(d), int(p)) for s, d, p in zip(namen, neu['dauer_s'], neu['punkte'])]
+        self._db.executemany(
+            "INSERT INTO strassen VALUES (?, 1, ?, ?) ON CONFLICT(street) DO UPDATE SET"
+            " fahrten = fahrten + 1, dauer_s = dauer_s + excluded.dauer_s,"
+            " punkte = punkte + excluded.punkte", strassen)
+        self._db.executemany("INSERT INTO fahrt_strassen VALUES (?, ?, ?, ?)",
+                             [(fahrt,) + z for z in strassen])
+
+        for sensor, (n_b, mittel_b, m2_b, min_b, max_b, hist_b) in neu['werte'].items():
+            alt = {z[0]: z[1:] for z in self._db.execute(
+                "SELECT street, anzahl, mittelwert, m2, minimum, maximum, histogramm"
+                " FROM werte WHERE sensor=?", (sensor,))}
+            zeilen, beitrag = [], []
+            for i, strasse in enumerate(namen):
+                if n_b[i] == 0:
+                    continue
+                n, mittel, m2 = n_b[i], mittel_b[i], m2_b[i]
+                minimum, maximum, hist = min_b[i], max_b[i], hist_b[i]
+                beitrag.append((fahrt, str(strasse), sensor, float(n), float(mittel), float(m2),
+                                float(minimum), float(maximum), hist.astype(np.int64).tobytes()))
+                if strasse in alt:
+                    n_a, mittel_a, m2_a, min_a, max_a, hist_a = alt[strasse]
+                    # Zusammenführen nach Chan et al.
+                    n = n_a + n_b[i]
+                    delta = mittel_b[i] - mittel_a
+                    mittel = mittel_a + delta * n_b[i] / n
+                    m2 = m2_a + m2_b[i] + delta ** 2 * n_a * n_b[i] / n
+                    minimum, maximum = min(min_a, minimum), max(max_a, maximum)
+                    hist = np.frombuffer(hist_a, dtype=np.int64) + hist
+                zeilen.append((str(strasse), sensor, float(n), float(mittel), float(m2),
+                               float(minimum), float(maximum), hist.astype(np.int64).tobytes()))
+            self._db.executemany("INSERT OR REPLACE INTO werte VALUES (?, ?, ?, ?, ?, ?, ?, ?)", zeilen)
+            self._db.executemany("INSERT INTO fahrt_werte VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", beitrag)
+
+    def _beitrag_entfernen(self, fahrt: str) -> None:
+        """
+        Rechnet den gespeicherten Beitrag einer Fahrt aus dem Gesamtstand heraus
+        (ohne Commit). Minimum und Maximum betroffener Straßen werden aus den
+        übrigen Fahrtbeiträgen neu bestimmt; solange Altbestand vorhanden ist,
+        bleiben sie als Schranke stehen.
+        """
+        altbestand = self._db.execute("SELECT 1 FROM fahrten WHERE altbestand LIMIT 1").fetchone()
+        strassen = self._db.execute("SELECT street, dauer_s, punkte FROM fahrt_strassen WHERE fahrt=?",
+                                    (fahrt,)).fetchall()
+        self._db.executemany(
+            "UPDATE strassen SET fahrten = fahrten - 1, dauer_s = dauer_s - ?, punkte = punkte - ?"
+            " WHERE street=?", [(d, p, s) for s, d, p in strassen])
+        self._db.execute("DELETE FROM strassen WHERE fahrten <= 0")
+
+        beitraege = self._db.execute(
+            "SELECT street, sensor, anzahl, mittelwert, m2, histogramm FROM fahrt_werte WHERE fahrt=?",
+            (fahrt,)).fetchall()
+        self._db.execute("DELETE FROM fahrt_werte WHERE fahrt=?", (fahrt,))
+        for strasse, sensor, n_b, mittel_b, m2_b, hist_b in beitraege:
+            gesamt = self._db.execute(
+                "SELECT anzahl, mittelwert, m2, minimum, maximum, histogramm FROM werte"
+                " WHERE street=? AND sensor=?", (strasse, sensor)).fetchone()
+            if gesamt is None:
+                continue
+            n, mittel, m2, minimum, maximum, hist = gesamt
+            n_a = n - n_b
+            if n_a <= 0:
+                self._db.execute("DELETE FROM werte WHERE street=? AND sensor=?", (strasse, sensor))
+                continue
+            # Umkehrung der Zusammenführung nach Chan et al.
+            mittel_a = (n * mittel - n_b * mittel_b) / n_a
+            delta = mittel_b - mittel_a
+            m2_a = max(m2 - m2_b - delta ** 2 * n_a * n_b / n, 0.0)
+            hist_a = np.frombuffer(hist, dtype=np.int64) - np.frombuffer(hist_b, dtype=np.int64)
+            if not altbestand:
+                minimum, maximum = self._db.execute(
+                    "SELECT MIN(minimum), MAX(maximum) FROM fahrt_werte WHERE street=? AND sensor=?",
+                    (strasse, sensor)).fetchone()
+            self._db.execute(
+                "UPDATE werte SET anzahl=?, mittelwert=?, m2=?, minimum=?, maximum=?, histogramm=?"
+                " WHERE street=? AND sensor=?",
+                (float(n_a), float(mittel_a), float(m2_a), float(minimum), float(maximum),
+                 np.clip(hist_a, 0, None).tobytes(), strasse, sensor))
+
+        self._db.execute("DELETE FROM fahrt_strassen WHERE fahrt=?", (fahrt,))
+        self._db.execute("DELETE FROM fahrten WHERE fahrt=?", (fahrt,))
+
+    def tabelle(self, sensoren: Optional[Sequence[str]] = None,
+                perzentile: Optional[Sequence[float]] = None) -> pd.DataFrame:
+        """
+        Kennzahlen je Straße über alle Fahrten.
+
+        :param sensoren: Nur diese Sensoren (Standard: alle gespeicherten)
+        :param perzentile: Zusätzliche Perzentile (Standard aus CONFIG)
+        :returns: DataFrame mit street, fahrten, dauer_min, punkte und je Sensor
+            ``{sensor}_mittel``, ``{sensor}_std``, ``{sensor}_max``, ``{sensor}_p{..}``
+        """
+        perzentile = CONFIG.STRASSENSTATISTIK['PERZENTILE'] if perzentile is None else perzentile
+        tabelle = pd.read_sql_query("SELECT street, fahrten, dauer_s, punkte FROM strassen", self._db)
+        tabelle['dauer_min'] = (tabelle.pop('dauer_s') / 60.0).round(1)
+        tabelle = tabelle.set_index('street')
+        werte = pd.read_sql_query("SELECT * FROM werte", self._db)
+        if sensoren is not None:
+            werte = werte[werte['sensor'].isin(sensoren)]
+        for sensor, gruppe in werte.groupby('sensor', sort=False):
+            gruppe = gruppe.set_index('street')
+            tabelle[f'{sensor}_mittel'] = gruppe['mittelwert']
+            tabelle[f'{sensor}_std'] = np.sqrt(gruppe['m2'] / (gruppe['anzahl'] - 1).clip(lower=1))
+            tabelle[f'{sensor}_max'] = gruppe['maximum']
+            for q in perzentile:
+                tabelle[f'{sensor}_p{int(round(q * 100))}'] = pd.Series(
+                    [histogramm_quantil(np.frombuffer(h, dtype=np.int64), q, lo, hi)
+                     for h, lo, hi in zip(gruppe['histogramm'], gruppe['minimum'], gruppe['maximum'])],
+                    index=gruppe.index)
+        return tabelle.reset_index()
+
+    def top_strassen(self, sensor: str = 'MQ135', anzahl: int = 10,
+                     kennzahl: str = 'mittel', min_punkte: int = 1) -> pd.DataFrame:
+        """
+        Die am stärksten belasteten Straßen für einen Sensor.
+
+        :param sensor: Sensorspalte
+        :param anzahl: Anzahl Straßen
+        :param kennzahl: 'mittel', 'max' oder ein Perzentil wie 'p90'
+        :param min_punkte: Straßen mit weniger Messpunkten werden ignoriert
+        :returns: Ausschnitt aus :meth:`tabelle`, absteigend sortiert
+        """
+        perzentil = [int(kennzahl[1:]) / 100.0] if kennzahl.startswith('p') else []
+        tabelle = self.tabelle([sensor], perzentil)
+        spalte = f'{sensor}_{kennzahl}'
+        if spalte not in tabelle.columns:
+            return tabelle.iloc[0:0]
+        tabelle = tabelle[tabelle['punkte'] >= min_punkte]
+        return tabelle.nlargest(anzahl, spalte)
+
+
+def aktualisiere_strassenstatistik(fahrt: str, df: pd.DataFrame) -> bool:
+    """
+    Rechnet eine fertige Fahrt (nach mod_042) in den Standard-Speicher ein.
+    """
+    if not CONFIG.STRASSENSTATISTIK['AKTIV']:
+        return False
+    speicher = StrassenStatistik()
+    try:
+        return speicher.fuege_fahrt_hinzu(fahrt, df)
+    finally:
+        speicher.schliesse()
+
+
+def strassenstatistik_text(sensor: str = 'MQ135', anzahl: int = 10) -> str:
+    """
+    Kurzer Textblock mit den belastetsten Straßen (für Berichte/Prompts).
+    """
+    if not os.path.exists(CONFIG.STRASSENSTATISTIK['DATEI']):
+        return ""
+    speicher = StrassenStatistik()
+    try:
+        top = speicher.top_strassen(sensor, anzahl, min_punkte=CONFIG.STRASSENSTATISTIK['MIN_PUNKTE'])
+        fahrten = len(speicher.fahrten())
+    finally:
+        speicher.schliesse()
+    if top.empty:
+        return ""
+    zeilen = [f"Straßen mit der höchsten mittleren {sensor}-Belastung über {fahrten} Fahrten:"]
+    for _, z in top.iterrows():
+        zeilen.append(f"- {z['street']}: Mittel {z[f'{sensor}_mittel']:.1f}, "
+                      f"Max {z[f'{sensor}_max']:.1f}, {int(z['fahrten'])} Fahrten, "
+                      f"{z['dauer_min']:.1f} min Aufenthalt")
+    return "\n".join(zeilen)
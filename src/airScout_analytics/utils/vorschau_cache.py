@@ -0,0 +1,287 @@
+"""
+vorschau_cache.py
+=================
+
+Vorschaubilder für Bilder und PDF-Seiten der GUI, auf der Platte zwischengespeichert.
+
+Die GUI hat jedes Diagramm (300-dpi-PNGs) bzw. ``_sensorplots.pdf`` beim
+Öffnen eines Tabs vollständig dekodiert bzw. gerastert und erst danach
+verkleinert. Hier wird jede Datei genau einmal verkleinert bzw. mit
+niedriger Auflösung gerastert und als PNG im Cache-Ordner abgelegt.
+Schlüssel ist ein Hash über Inhalt und Größe der Datei – eine neu erzeugte
+Grafik mit gleichem Namen bekommt also automatisch eine neue Vorschau.
+Die volle Auflösung wird nur beim Zoomen geladen (PDF-Seiten ebenfalls
+gecacht, da das Rastern teuer ist). Jeder Treffer frischt die Änderungszeit
+der Cache-Datei auf; ``aufraeumen`` entfernt länger ungenutzte Dateien und
+hält den Ordner unter ``MAX_MB``.
+
+Features:
+- datei_schluessel: Inhaltshash + Dateigröße (im Prozess je mtime gemerkt)
+- VorschauCache.vorschau: verkleinerte Ansicht (Bild oder PDF-Seite)
+- VorschauCache.vollbild: volle Auflösung für die Zoom-Ansicht
+- VorschauCache.erzeuge_im_hintergrund: Vorschauen im Thread-Pool vorbereiten
+- VorschauCache.aufraeumen: Verdrängung nach Alter und Gesamtgröße
+- CLI: ``python utils/vorschau_cache.py <ordner>`` erzeugt alle Vorschauen
+
+Abhängigkeiten:
+---------------
+- Pillow
+- pdf2image + Poppler (optional, nur für PDFs)
+- config.CONFIG (VORSCHAU)
+
+Autor: Frank Albrecht
+"""
+import os
+import sys
+import glob
+import time
+import hashlib
+import threading
+import contextlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from PIL import Image
+
+try:
+    from pdf2image import convert_from_path
+    PDF_SUPPORT = True
+except ImportError:
+    PDF_SUPPORT = False
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import CONFIG
+
+BILD_ENDUNGEN = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
+PDF_ENDUNGEN = ('.pdf',)
+
+_schluessel_memo: Dict[Tuple[str, int, int], str] = {}
+_memo_sperre = threading.Lock()
+
+
+def datei_schluessel(pfad: str) -> str:
+    """
+    Cache-Schlüssel aus Inhaltshash (BLAKE2b) und Dateigröße.
+
+    Innerhalb eines Prozesses wird der Hash je (Pfad, mtime, Größe) gemerkt,
+    damit eine unveränderte Datei nur einmal gelesen wird.
+
+    :param pfad: Bild- oder PDF-Datei
+    :returns: z.B. ``"3f9a…c2_482113"``
+    """
+    info = os.stat(pfad)
+    memo = (os.path.abspath(pfad), info.st_mtime_ns, info.st_size)
+    with _memo_sperre:
+        if memo in _schluessel_memo:
+            return _schluessel_memo[memo]
+    h = hashlib.blake2b(digest_size=12)
+    with open(pfad, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    schluessel = f"{h.hexdigest()}_{info.st_size}"
+    with _memo_sperre:
+        _schluessel_memo[memo] = schluessel
+    return schluessel
+
+
+def _rastere_pdf(pfad: str, seite: int, dpi: int) -> Image.Image:
+    if not PDF_SUPPORT:
+        raise RuntimeError("PDF-Anzeige benötigt das Paket 'pdf2image' und ein installiertes Poppler.")
+    seiten = convert_from_path(pfad, dpi=dpi, first_page=seite, last_page=seite, fmt='png')
+    if not seiten:
+        raise RuntimeError(f"Seite {seite} nicht im PDF gefunden")
+    return seiten[0]
+
+
+class VorschauCache:
+    """
+    Festplatten-Cache für verkleinerte Bilder und gerasterte PDF-Seiten.
+
+    :param ordner: Cache-Ordner (Standard: CONFIG.VORSCHAU['ORDNER'])
+    :param groesse: Maximale Vorschaugröße (Breite, Höhe)
+    """
+
+    def __init__(self, ordner: Optional[str] = None,
+                 groesse: Optional[Tuple[int, int]] = None) -> None:
+        einstellungen = CONFIG.VORSCHAU
+        self.ordner = ordner or einstellungen['ORDNER']
+        self.groesse = tuple(groesse or einstellungen['GROESSE'])
+        self.dpi_vorschau = einstellungen['PDF_DPI_VORSCHAU']
+        self.dpi_voll = einstellungen['PDF_DPI_VOLL']
+        # Sperre je Cache-Datei mit Anzahl Nutzer; wird mit dem letzten Nutzer entfernt
+        self._sperren: Dict[str, Tuple[threading.Lock, int]] = {}
+        self._sperre = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def _cache_pfad(self, pfad: str, stufe: str, seite: int) -> str:
+        # Größe/DPI gehören zum Namen: geänderte Einstellungen erzeugen neue Dateien
+        if stufe == 'vorschau':
+            variante = f"{self.groesse[0]}x{self.groesse[1]}"
+        else:
+            variante = f"{self.dpi_voll}dpi"
+        name = f"{datei_schluessel(pfad)}_s{seite}_{stufe}_{variante}.png"
+        return os.path.join(self.ordner, name)
+
+    @contextlib.contextmanager
+    def _gesperrt(self, cache_pfad: str) -> Iterator[None]:
+        """Sperrt eine Cache-Datei; der Eintrag in ``_sperren`` lebt nur, solange er gebraucht wird."""
+        with self._sperre:
+            sperre, nutzer = self._sperren.get(cache_pfad, (None, 0))
+            sperre = sperre or threading.Lock()
+            self._sperren[cache_pfad] = (sperre, nutzer + 1)
+        try:
+            with sperre:
+                yield
+        finally:
+            with self._sperre:
+                sperre, nutzer = self._sperren[cache_pfad]
+                if nutzer == 1:
+                    del self._sperren[cache_pfad]
+                else:
+                    self._sperren[cache_pfad] = (sperre, nutzer - 1)
+
+    def _aus_cache(self, cache_pfad: str, erzeugen) -> Image.Image:
+        # Gleichzeitige Anfragen für dieselbe Datei erzeugen nur einmal
+        with self._gesperrt(cache_pfad):
+            if os.path.exists(cache_pfad):
+                try:
+                    with Image.open(cache_pfad) as img:
+                        img.load()
+                        bild = img.copy()
+                    os.utime(cache_pfad)  # zuletzt genutzt, für aufraeumen()
+                    return bild
+                except OSError:
+                    pass  # beschädigte oder gerade verdrängte Cache-Datei -> neu erzeugen
+            img = erzeugen()
+            os.makedirs(self.ordner, exist_ok=True)
+            temp = f"{cache_pfad}.{threading.get_ident()}.tmp"
+            img.save(temp, format='PNG')
+            os.replace(temp, cache_pfad)
+            return img
+
+    def vorschau(self, pfad: str, seite: int = 1) -> Image.Image:
+        """
+        Verkleinerte Ansicht eines Bildes oder einer PDF-Seite.
+
+        :param pfad: Bild- oder PDF-Datei
+        :param seite: PDF-Seite (1-basiert, bei Bildern ignoriert)
+        :returns: PIL-Bild, höchstens ``groesse`` groß
+        """
+        def erzeugen():
+            if pfad.lower().endswith(PDF_ENDUNGEN):
+                img = _rastere_pdf(pfad, seite, self.dpi_vorschau)
+            else:
+                img = Image.open(pfad)
+                img.draft('RGB', self.groesse)  # JPEG: direkt verkleinert dekodieren
+            img.thumbnail(self.groesse)
+            return img
+
+        return self._aus_cache(self._cache_pfad(pfad, 'vorschau', seite), erzeugen)
+
+    def vollbild(self, pfad: str, seite: int = 1) -> Image.Image:
+        """
+        Volle Auflösung für die Zoom-Ansicht.
+
+        Bilder werden direkt gelesen; PDF-Seiten mit ``PDF_DPI_VOLL`` gerastert
+        und ebenfalls im Cache abgelegt.
+        """
+        if pfad.lower().endswith(PDF_ENDUNGEN):
+            return self._aus_cache(self._cache_pfad(pfad, 'voll', seite),
+                                   lambda: _rastere_pdf(pfad, seite, self.dpi_voll))
+        img = Image.open(pfad)
+        img.load()
+        return img
+
+    def aufraeumen(self, max_mb: Optional[float] = None,
+                   max_alter_tage: Optional[float] = None) -> int:
+        """
+        Verdrängt Cache-Dateien nach Alter und Gesamtgröße.
+
+        Zuerst fallen Dateien, die länger als ``max_alter_tage`` nicht genutzt
+        wurden, danach die am längsten ungenutzten, bis der Ordner höchstens
+        ``max_mb`` groß ist. Gerade gesperrte Dateien bleiben stehen.
+
+        :param max_mb: Obergrenze (Standard: CONFIG.VORSCHAU['MAX_MB'])
+        :param max_alter_tage: Höchstalter (Standard: CONFIG.VORSCHAU['MAX_ALTER_TAGE'])
+        :returns: Anzahl entfernter Dateien
+        """
+        einstellungen = CONFIG.VORSCHAU
+        max_mb = einstellungen['MAX_MB'] if max_mb is None else max_mb
+        max_alter_tage = einstellungen['MAX_ALTER_TAGE'] if max_alter_tage is None else max_alter_tage
+        try:
+            namen = os.listdir(self.ordner)
+        except FileNotFoundError:
+            return 0
+        dateien = []
+        for name in namen:
+            pfad = os.path.join(self.ordner, name)
+            try:
+                info = os.stat(pfad)
+            except OSError:
+                continue
+            dateien.append((info.st_mtime, info.st_size, pfad))
+        dateien.sort()  # älteste zuerst
+
+        grenze_zeit = time.time() - max_alter_tage * 86400
+        rest = sum(groesse for _, groesse, _ in dateien)
+        entfernt = 0
+        for mtime, groesse, pfad in dateien:
+            if mtime >= grenze_zeit and rest <= max_mb * 1024 * 1024:
+                break
+            # Unter der Sperre: _gesperrt() kann die Datei nicht gleichzeitig belegen
+            with self._sperre:
+                if pfad in self._sperren:
+                    continue
+                try:
+                    os.remove(pfad)
+                except OSError:
+                    continue  # z.B. unter Windows noch geöffnet
+            rest -= groesse
+            entfernt += 1
+        return entfernt
+
+    def erzeuge_im_hintergrund(self, pfade: Iterable[str]) -> List[Future]:
+        """
+        Erzeugt fehlende Vorschauen im Thread-Pool (CONFIG.VORSCHAU['WORKER']).
+
+        Vorab wird der Cache im selben Pool aufgeräumt (``aufraeumen``).
+
+        :param pfade: Bild-/PDF-Dateien (Platzhalter * und ? erlaubt)
+        :returns: Futures (Ergebnis: PIL-Bild bzw. Ausnahme)
+        """
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=CONFIG.VORSCHAU['WORKER'],
+                                            thread_name_prefix="vorschau")
+        self._pool.submit(self.aufraeumen)
+        auftraege = []
+        for muster in pfade:
+            for pfad in (glob.glob(muster) if any(z in muster for z in '*?') else [muster]):
+                if pfad.lower().endswith(BILD_ENDUNGEN + PDF_ENDUNGEN) and os.path.exists(pfad):
+                    if pfad.lower().endswith(PDF_ENDUNGEN) and not PDF_SUPPORT:
+                        continue
+                    auftraege.append(self._pool.submit(self.vorschau, pfad))
+        return auftraege
+
+    def beende(self) -> None:
+        """Bricht ausstehende Hintergrundaufträge ab."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+if __name__ == "__main__":
+    ordner = sys.argv[1:] or [os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data')]
+    dateien = [p for o in ordner for p in glob.glob(os.path.join(o, '**', '*'), recursive=True)]
+    cache = VorschauCache()
+    start = time.perf_counter()
+    auftraege = cache.erzeuge_im_hintergrund(dateien)
+    fehler = 0
+    for auftrag in auftraege:
+        try:
+            auftrag.result()
+        except Exception as e:
+            fehler += 1
+            print(f"❌ Vorschau fehlgeschlagen: {e}")
+    cache.beende()
+    print(f"✅ {len(auftraege) - fehler} Vorschauen in {time.perf_counter() - start:.1f} s "
+          f"({cache.ordner})")
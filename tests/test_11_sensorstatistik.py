@@ -0,0 +1,91 @@
+"""
+test_11_sensorstatistik.py
+Unittests für utils/sensorstatistik.py.
+Prüft das blockweise Zusammenführen der Momente (Chan et al.) gegen die
+direkte Berechnung, die reine Momentberechnung und den Cache im Laufkontext.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'airScout_analytics')))
+from utils.sensorstatistik import (StreamingSensorStatistik, berechne_momente,
+                                   berechne_sensorstatistik, sensorstatistik_fuer_lauf)
+
+
+def _bloecke(df, anzahl):
+    grenzen = np.linspace(0, len(df), anzahl + 1).astype(int)
+    return [df.iloc[a:b] for a, b in zip(grenzen[:-1], grenzen[1:])]
+
+
+def _daten(zeilen=5000, seed=1):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'MQ2': rng.normal(300, 40, zeilen),
+        'MQ7': rng.lognormal(5, 0.5, zeilen),
+        'Temperature_DHT_C': rng.normal(1e6, 0.01, zeilen),  # großer Mittelwert, kleine Streuung
+    })
+    df.loc[rng.choice(zeilen, zeilen // 10, replace=False), 'MQ7'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize("bloecke", [1, 2, 7, 500])
+def test_chan_zusammenfuehrung_wie_direkt(bloecke):
+    df = _daten()
+    streaming = StreamingSensorStatistik(df.columns, top_k=0)
+    for teil in _bloecke(df, bloecke):
+        streaming.aktualisiere(teil)
+    ergebnis = streaming.ergebnis()
+
+    np.testing.assert_array_equal(ergebnis.anzahl, df.notna().sum().to_numpy())
+    np.testing.assert_allclose(ergebnis.mittelwert, df.mean().to_numpy(), rtol=1e-12)
+    np.testing.assert_allclose(ergebnis.varianz, df.var(ddof=1).to_numpy(), rtol=1e-8)
+    np.testing.assert_allclose(ergebnis.minimum, df.min().to_numpy())
+    np.testing.assert_allclose(ergebnis.maximum, df.max().to_numpy())
+
+
+def test_chan_leere_und_nan_bloecke():
+    df = _daten(1000)
+    streaming = StreamingSensorStatistik(df.columns, top_k=0)
+    streaming.aktualisiere(df.iloc[0:0])
+    streaming.aktualisiere(df.iloc[:500])
+    streaming.aktualisiere(pd.DataFrame(np.nan, index=range(500, 520), columns=df.columns))
+    streaming.aktualisiere(df.iloc[500:])
+    ergebnis = streaming.ergebnis()
+    np.testing.assert_allclose(ergebnis.varianz, df.var(ddof=1).to_numpy(), rtol=1e-8)
+
+
+def test_streaming_passt_zur_direkten_berechnung():
+    df = _daten()
+    direkt = berechne_sensorstatistik(df)
+    streaming = StreamingSensorStatistik(df.columns, top_k=0)
+    for teil in _bloecke(df, 3):
+        streaming.aktualisiere(teil)
+    np.testing.assert_allclose(streaming.ergebnis().std, direkt.std, rtol=1e-8)
+
+
+def test_momente_wie_volle_statistik():
+    df = _daten()
+    df['Text'] = 'x'
+    momente = berechne_momente(df, ['MQ2', 'MQ7', 'Temperature_DHT_C', 'fehlt'])
+    direkt = berechne_sensorstatistik(df)
+    assert momente.spalten == direkt.spalten
+    for kennzahl in ('anzahl', 'mittelwert', 'varianz', 'minimum', 'maximum'):
+        np.testing.assert_array_equal(getattr(momente, kennzahl), getattr(direkt, kennzahl))
+    assert momente.quantile == {} and momente.top_k == {}
+    leer = berechne_momente(df.iloc[:0], ['MQ2'])
+    assert leer.anzahl.tolist() == [0] and np.isnan(leer.mittelwert).all()
+
+
+def test_laufcache_erkennt_geaenderte_werte():
+    df = _daten(200)
+    erste = sensorstatistik_fuer_lauf(df, 'test')
+    assert sensorstatistik_fuer_lauf(df, 'test') is erste
+    df.loc[3, 'MQ2'] = 1e9  # gleiche Länge, anderer Inhalt
+    zweite = sensorstatistik_fuer_lauf(df, 'test')
+    assert zweite is not erste
+    assert zweite.wert('maximum', 'MQ2') == 1e9
@@ -0,0 +1,85 @@
+"""
+test_12_rasterkarte.py
+Unittests für utils/rasterkarte.py.
+Prüft, dass merge und subtrahiere des RasterAkkumulators zueinander invers
+sind und mit einer direkt über alle Fahrten berechneten Statistik übereinstimmen.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'airScout_analytics')))
+from utils.rasterkarte import RasterAkkumulator
+
+SENSOREN = ['MQ135', 'MQ7']
+RASTER = 0.001
+
+
+def _fahrt(seed, zeilen=2000, versatz=0.0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'GPS_Lat': 49.35 + versatz + rng.uniform(0, 0.01, zeilen),
+        'GPS_Lon': 8.14 + rng.uniform(0, 0.01, zeilen),
+        'MQ135': rng.normal(200, 30, zeilen),
+        'MQ7': rng.normal(400, 50, zeilen),
+    })
+    df.loc[rng.choice(zeilen, zeilen // 20, replace=False), 'MQ7'] = np.nan
+    df.loc[rng.choice(zeilen, zeilen // 50, replace=False), 'GPS_Lat'] = np.nan
+    return df
+
+
+def _nach_zelle(akku):
+    return {tuple(z): i for i, z in enumerate(akku.zellen)}
+
+
+def _gleich(a, b):
+    assert a.zellen.tolist() == b.zellen.tolist()
+    np.testing.assert_allclose(a.anzahl, b.anzahl)
+    for sensor in SENSOREN:
+        for kennzahl in ('mittel', 'std'):
+            np.testing.assert_allclose(a.kennzahl(sensor, kennzahl), b.kennzahl(sensor, kennzahl),
+                                       rtol=1e-9, atol=1e-9)
+
+
+def test_merge_wie_gemeinsame_fahrt():
+    a, b = _fahrt(1), _fahrt(2, versatz=0.005)
+    zusammen = RasterAkkumulator.aus_fahrt(a, SENSOREN, RASTER).merge(
+        RasterAkkumulator.aus_fahrt(b, SENSOREN, RASTER))
+    direkt = RasterAkkumulator.aus_fahrt(pd.concat([a, b], ignore_index=True), SENSOREN, RASTER)
+    _gleich(zusammen, direkt)
+    np.testing.assert_array_equal(zusammen.maximum, direkt.maximum)
+
+
+def test_merge_ist_kommutativ_und_leer_ist_neutral():
+    a = RasterAkkumulator.aus_fahrt(_fahrt(1), SENSOREN, RASTER)
+    b = RasterAkkumulator.aus_fahrt(_fahrt(2, versatz=0.005), SENSOREN, RASTER)
+    _gleich(a.merge(b), b.merge(a))
+    _gleich(RasterAkkumulator.leer(RASTER, SENSOREN).merge(a), a)
+
+
+@pytest.mark.parametrize("versatz", [0.0, 0.005, 1.0])
+def test_subtrahiere_kehrt_merge_um(versatz):
+    a = RasterAkkumulator.aus_fahrt(_fahrt(1), SENSOREN, RASTER)
+    b = RasterAkkumulator.aus_fahrt(_fahrt(2, versatz=versatz), SENSOREN, RASTER)
+    zurueck = a.merge(b).subtrahiere(b)
+    _gleich(zurueck, a)
+    # Maximum bleibt eine obere Schranke
+    assert (zurueck.maximum >= a.maximum).all()
+
+
+def test_subtrahiere_entfernt_leere_zellen():
+    a = RasterAkkumulator.aus_fahrt(_fahrt(1), SENSOREN, RASTER)
+    b = RasterAkkumulator.aus_fahrt(_fahrt(2, versatz=1.0), SENSOREN, RASTER)
+    rest = a.merge(b).subtrahiere(a)
+    assert set(_nach_zelle(rest)) == set(_nach_zelle(b))
+    assert len(a.subtrahiere(a).zellen) == 0
+
+
+def test_unpassende_akkumulatoren():
+    a = RasterAkkumulator.aus_fahrt(_fahrt(1), SENSOREN, RASTER)
+    with pytest.raises(ValueError):
+        a.merge(RasterAkkumulator.aus_fahrt(_fahrt(1), SENSOREN, RASTER * 2))
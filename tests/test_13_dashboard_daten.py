@@ -0,0 +1,58 @@
+"""
+test_13_dashboard_daten.py
+Unittests für utils/dashboard_daten.py.
+Prüft die Min/Max-Ausdünnung: Extremwerte bleiben erhalten, die Punktzahl
+ist begrenzt und NaN-Abschnitte fallen weg.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'airScout_analytics')))
+from utils.dashboard_daten import minmax_indizes
+
+
+def test_kleiner_bereich_vollstaendig():
+    werte = np.arange(100, dtype=float)
+    np.testing.assert_array_equal(minmax_indizes(werte, 10, 50, 20), np.arange(10, 50))
+    assert len(minmax_indizes(werte, 5, 5, 20)) == 0
+
+
+@pytest.mark.parametrize("anzahl, buckets", [(10_000, 100), (10_001, 100), (997, 13), (300, 149)])
+def test_hoechstens_zwei_punkte_je_bucket(anzahl, buckets):
+    werte = np.random.default_rng(0).normal(size=anzahl)
+    indizes = minmax_indizes(werte, 0, anzahl, buckets)
+    assert len(indizes) <= 2 * buckets
+    assert (np.diff(indizes) > 0).all()
+    assert indizes[0] >= 0 and indizes[-1] < anzahl
+
+
+def test_extremwerte_bleiben_erhalten():
+    rng = np.random.default_rng(1)
+    werte = rng.normal(size=50_000)
+    werte[12_345] = 100.0
+    werte[40_001] = -100.0
+    start, ende, buckets = 1_000, 45_000, 200
+    indizes = minmax_indizes(werte, start, ende, buckets)
+    assert 12_345 in indizes and 40_001 in indizes
+    # Min und Max jedes Buckets sind enthalten: gleiche Hüllkurve wie das Original
+    assert werte[indizes].max() == werte[start:ende].max()
+    assert werte[indizes].min() == werte[start:ende].min()
+    groesse = -(-(ende - start) // buckets)
+    for b in range(0, ende - start, groesse):
+        stueck = werte[start + b:min(start + b + groesse, ende)]
+        im_bucket = indizes[(indizes >= start + b) & (indizes < start + b + groesse)]
+        assert werte[im_bucket].max() == stueck.max()
+        assert werte[im_bucket].min() == stueck.min()
+
+
+def test_nan_buckets_fallen_weg():
+    werte = np.random.default_rng(2).normal(size=1_000)
+    werte[200:400] = np.nan
+    indizes = minmax_indizes(werte, 0, 1_000, 50)
+    assert not np.isnan(werte[indizes]).any()
+    assert not ((indizes >= 200) & (indizes < 400)).any()
+    assert len(minmax_indizes(np.full(1_000, np.nan), 0, 1_000, 50)) == 0
@@ -0,0 +1,88 @@
+"""
+test_14_live_ingest.py
+Unittests für utils/live_ingest.py.
+Prüft, dass der ZeilenParser unabhängig von den Blockgrenzen dasselbe
+Ergebnis liefert wie ein Durchlauf über den ganzen Text.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'airScout_analytics')))
+from utils.live_ingest import ZeilenParser
+
+ROHDATEI = os.path.join(os.path.dirname(__file__), '..', 'data', 'roh', 'GPS_Sicherheit',
+                        'airscout_full-spectrum_neustadt_weinstrasse_2025_07150547.CSV')
+
+
+@pytest.fixture(scope='module')
+def rohtext():
+    if not os.path.exists(ROHDATEI):
+        pytest.skip("Beispiel-Rohdatei fehlt")
+    with open(ROHDATEI, encoding='utf-8', errors='replace') as f:
+        zeilen = f.readlines()[:800]
+    return ''.join(zeilen)
+
+
+def _einheitlich(df):
+    """Zahlen als Text (GPS_Lat/GPS_Alt bleiben in Blöcken mit '--' Text) in float umwandeln."""
+    df = df.reset_index(drop=True)
+    for spalte in df.columns:
+        if pd.api.types.is_numeric_dtype(df[spalte]) or pd.api.types.is_datetime64_any_dtype(df[spalte]):
+            continue
+        zahl = pd.to_numeric(df[spalte], errors='coerce')
+        if zahl.notna().sum() == df[spalte].notna().sum():
+            df[spalte] = zahl
+    return df
+
+
+def _in_bloecken(text, grenzen):
+    parser = ZeilenParser()
+    teile = [parser.fuettere(text[a:b]) for a, b in zip([0] + grenzen, grenzen + [len(text)])]
+    return _einheitlich(pd.concat(teile, ignore_index=True))
+
+
+def test_ganzer_text_liefert_zeilen(rohtext):
+    df = ZeilenParser().fuettere(rohtext)
+    assert len(df) > 100
+    assert df['DateTime'].is_monotonic_increasing
+    assert 'DateTime' in df.columns and 'MQ135' in df.columns
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_blockgrenzen_aendern_nichts(rohtext, seed):
+    ganz = _einheitlich(ZeilenParser().fuettere(rohtext))
+    rng = np.random.default_rng(seed)
+    grenzen = sorted(rng.choice(np.arange(1, len(rohtext)), 60, replace=False).tolist())
+    pd.testing.assert_frame_equal(_in_bloecken(rohtext, grenzen), ganz, check_dtype=False)
+
+
+def test_schnitt_direkt_am_zeilenumbruch(rohtext):
+    ganz = _einheitlich(ZeilenParser().fuettere(rohtext))
+    zeilenenden = [i + 1 for i, z in enumerate(rohtext) if z == '\n'][:-1]
+    # abwechselnd direkt vor und direkt nach dem Zeilenumbruch schneiden
+    grenzen = sorted(set([i - 1 for i in zeilenenden[::6]] + zeilenenden[3::6]))
+    pd.testing.assert_frame_equal(_in_bloecken(rohtext, grenzen), ganz, check_dtype=False)
+
+
+def test_unvollstaendige_zeile_wird_behalten(rohtext):
+    parser = ZeilenParser()
+    ende = rohtext.rindex('\n', 0, len(rohtext) - 1)
+    vorher = parser.fuettere(rohtext[:ende - 5])
+    rest = parser.fuettere(rohtext[ende - 5:])
+    ganz = ZeilenParser().fuettere(rohtext)
+    assert len(vorher) + len(rest) == len(ganz)
+    assert len(ZeilenParser().fuettere(rohtext.rstrip('\n'))) == len(ganz) - 1
+
+
+def test_erneute_kopfzeile_wird_ignoriert(rohtext):
+    kopf = next(z for z in rohtext.splitlines() if z.startswith('SecSinceMidnight'))
+    parser = ZeilenParser()
+    ganz = parser.fuettere(rohtext)
+    danach = parser.fuettere(kopf + '\n')
+    assert len(danach) == 0
+    assert parser.spalten == list(ganz.columns) or set(ganz.columns) <= set(parser.spalten)
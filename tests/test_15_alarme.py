@@ -0,0 +1,114 @@
+"""
+test_15_alarme.py
+Unittests für utils/alarme.py.
+Prüft Hysterese, Mindestdauer, Sperrzeit und Anlaufphase der AlarmMaschine
+sowie die Unabhängigkeit von den Blockgrenzen.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'airScout_analytics')))
+from config import CONFIG
+from utils.alarme import AlarmMaschine, Regel, SchwellenRegel
+
+VORLAUF = int(CONFIG.ALARME['ANLAUF_S']) + 10
+
+
+def _verlauf(*abschnitte):
+    """Messreihe (1 Hz) aus Vorlauf mit 0 und (Wert, Sekunden)-Abschnitten."""
+    werte = np.concatenate([np.zeros(VORLAUF)] + [np.full(n, w, dtype=float) for w, n in abschnitte])
+    zeit = pd.Timestamp('2025-07-15 06:00:00') + pd.to_timedelta(np.arange(len(werte)), unit='s')
+    return pd.DataFrame({'DateTime': zeit, 'MQ7': werte})
+
+
+def _alarme(df, bloecke=1, **regel):
+    einstellungen = dict(name='CO', sensor='MQ7', grenze=450, sperrzeit_s=0)
+    einstellungen.update(regel)
+    maschine = AlarmMaschine(regeln=[SchwellenRegel(**einstellungen)], senken=[])
+    try:
+        grenzen = np.linspace(0, len(df), bloecke + 1).astype(int)
+        for a, b in zip(grenzen[:-1], grenzen[1:]):
+            maschine.verarbeite(df.iloc[a:b])
+    finally:
+        maschine.beende()
+    return [a.zeit for a in maschine.alarme]
+
+
+def test_hysterese_gegen_flattern():
+    # pendelt um die Grenze, bleibt aber über dem Rückstellwert
+    flattern = [(460, 3), (440, 3)] * 10
+    df = _verlauf(*flattern)
+    assert len(_alarme(df)) == 10
+    assert len(_alarme(df, rueckstellung=430)) == 1
+
+
+def test_hysterese_rueckstellung_erlaubt_neuen_alarm():
+    df = _verlauf((460, 5), (440, 5), (420, 5), (460, 5))
+    alarme = _alarme(df, rueckstellung=430)
+    assert len(alarme) == 2
+    assert alarme[1] == df['DateTime'].iloc[VORLAUF + 15]
+
+
+def test_fehlende_werte_aendern_den_zustand_nicht():
+    df = _verlauf((460, 5), (np.nan, 5), (460, 5))
+    assert len(_alarme(df, rueckstellung=430)) == 1
+
+
+def test_mindestdauer():
+    df = _verlauf((460, 5), (0, 5), (460, 15))
+    alarme = _alarme(df, dauer_s=10)
+    assert alarme == [df['DateTime'].iloc[VORLAUF + 10 + 10]]
+
+
+def test_sperrzeit():
+    df = _verlauf(*[(460, 2), (0, 2)] * 10)
+    assert len(_alarme(df, sperrzeit_s=20)) == 2
+
+
+def test_anlauf_unterdrueckt_fruehe_alarme():
+    df = _verlauf((460, 5))
+    df.loc[5:10, 'MQ7'] = 500  # innerhalb von ANLAUF_S
+    assert _alarme(df) == [df['DateTime'].iloc[VORLAUF]]
+
+
+def test_ueberschreitung_aus_dem_anlauf_meldet_sich_danach():
+    anlauf = int(CONFIG.ALARME['ANLAUF_S'])
+    df = _verlauf((460, 5))
+    df.loc[anlauf - 5:, 'MQ7'] = 460  # beginnt in der Anlaufphase und hält an
+    for bloecke in (1, 3, 20):
+        assert _alarme(df, bloecke, sperrzeit_s=60) == [df['DateTime'].iloc[anlauf]]
+    # mit Mindestdauer zählt die Zeit ab Beginn der Überschreitung
+    assert _alarme(df, dauer_s=10) == [df['DateTime'].iloc[anlauf + 5]]
+
+
+def test_anlauf_verbraucht_keine_sperrzeit():
+    anlauf = int(CONFIG.ALARME['ANLAUF_S'])
+    df = _verlauf((460, 5))
+    df.loc[anlauf - 10:anlauf - 6, 'MQ7'] = 460  # unterdrückt
+    assert _alarme(df, sperrzeit_s=60) == [df['DateTime'].iloc[VORLAUF]]
+
+
+@pytest.mark.parametrize("bloecke", [2, 7, 50])
+def test_blockgrenzen_aendern_nichts(bloecke):
+    rng = np.random.default_rng(3)
+    df = _verlauf(*[(w, int(n)) for w, n in zip(rng.choice([0, 420, 440, 460], 40),
+                                               rng.integers(1, 6, 40))])
+    for regel in (dict(rueckstellung=430), dict(rueckstellung=430, dauer_s=2), dict(sperrzeit_s=5)):
+        assert _alarme(df, bloecke, **regel) == _alarme(df, 1, **regel)
+
+
+def test_verlauf_ist_begrenzt():
+    df = _verlauf(*[(460, 1), (0, 1)] * (CONFIG.ALARME['VERLAUF'] + 50))
+    alarme = _alarme(df)
+    assert len(alarme) == CONFIG.ALARME['VERLAUF']
+    assert alarme[-1] == df['DateTime'].iloc[-2]
+
+
+def test_regel_ist_abstrakt():
+    with pytest.raises(TypeError):
+        Regel('ohne_bedingung')
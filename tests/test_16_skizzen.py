@@ -0,0 +1,132 @@
+"""
+test_16_skizzen.py
+Unittests für utils/skizzen.py.
+Prüft die Fehlerschranken von HyperLogLog und Bloom-Filter sowie die
+Gleichverteilung und Blockunabhängigkeit der Reservoir-Stichprobe.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'airScout_analytics')))
+from utils.skizzen import BloomFilter, HyperLogLog, Reservoir, werte_hash
+
+
+def _hashes(start, anzahl):
+    return werte_hash(np.arange(start, start + anzahl))
+
+
+# ------------------------------------------------------------------ HyperLogLog
+
+@pytest.mark.parametrize("anzahl", [10, 1_000, 50_000, 500_000])
+def test_hll_innerhalb_der_fehlerschranke(anzahl):
+    hll = HyperLogLog(12)
+    hll.aktualisiere(_hashes(0, anzahl))
+    # 4 Standardfehler; kleine Mengen laufen über Linear Counting und sind genauer
+    assert abs(hll.schaetzung() - anzahl) <= max(4 * hll.fehler * anzahl, 2)
+
+
+def test_hll_duplikate_und_bloecke_aendern_nichts():
+    ganz = HyperLogLog(10)
+    ganz.aktualisiere(_hashes(0, 20_000))
+    bloecke = HyperLogLog(10)
+    for start in range(0, 20_000, 3_000):
+        bloecke.aktualisiere(_hashes(start, min(3_000, 20_000 - start)))
+    bloecke.aktualisiere(_hashes(0, 20_000))  # alles noch einmal
+    np.testing.assert_array_equal(bloecke.register, ganz.register)
+
+
+def test_hll_merge_ist_vereinigung():
+    a, b, beide = HyperLogLog(12), HyperLogLog(12), HyperLogLog(12)
+    a.aktualisiere(_hashes(0, 30_000))
+    b.aktualisiere(_hashes(20_000, 30_000))
+    beide.aktualisiere(_hashes(0, 50_000))
+    np.testing.assert_array_equal(a.merge(b).register, beide.register)
+    assert abs(a.schaetzung() - 50_000) <= 4 * a.fehler * 50_000
+
+
+def test_werte_hash_int_und_float_gleich():
+    np.testing.assert_array_equal(werte_hash(np.array([1, 5, 7])), werte_hash(np.array([1.0, 5.0, 7.0])))
+
+
+# ------------------------------------------------------------------ Bloom-Filter
+
+def test_bloom_erkennt_jedes_echte_duplikat():
+    bloom = BloomFilter(bits=1 << 16, erwartete_zeilen=5_000)
+    zuerst = bloom.pruefe_und_fuege_ein(_hashes(0, 5_000))
+    wieder = bloom.pruefe_und_fuege_ein(_hashes(2_500, 5_000))
+    assert wieder[:2_500].all()
+    assert zuerst.sum() + wieder[2_500:].sum() <= 3 * bloom.erwartete_fehlalarme() + 5
+
+
+def test_bloom_duplikate_im_block_exakt():
+    hashes = _hashes(0, 100)
+    doppelt = np.concatenate([hashes, hashes[:10]])
+    maske = BloomFilter(bits=1 << 20).pruefe_und_fuege_ein(doppelt)
+    assert maske[100:].all()
+
+
+@pytest.mark.parametrize("bits, zeilen", [(1 << 14, 2_000), (1 << 13, 2_000), (1 << 16, 8_000)])
+def test_bloom_fehlalarme_innerhalb_der_schranke(bits, zeilen):
+    bloom = BloomFilter(bits=bits, erwartete_zeilen=zeilen)
+    fehlalarme = 0
+    for start in range(0, zeilen, 250):
+        fehlalarme += int(bloom.pruefe_und_fuege_ein(_hashes(start, 250)).sum())
+    assert bloom.eingefuegt == zeilen
+    # Schranke gilt für den Endstand; 3-fach + Puffer gegen Streuung
+    assert fehlalarme <= 3 * bloom.erwartete_fehlalarme() + 5
+
+
+# ------------------------------------------------------------------ Reservoir
+
+def _strom(anzahl):
+    return pd.DataFrame({'wert': np.arange(anzahl) * 2}, index=np.arange(anzahl))
+
+
+def test_reservoir_groesse_und_reihenfolge():
+    reservoir = Reservoir(groesse=500, seed=1)
+    strom = _strom(20_000)
+    for start in range(0, 20_000, 1_234):
+        reservoir.aktualisiere(strom.iloc[start:start + 1_234])
+    probe = reservoir.stichprobe()
+    assert len(probe) == 500 and reservoir.gesehen == 20_000
+    assert probe.index.is_unique and probe.index.is_monotonic_increasing
+    assert (probe['wert'] == probe.index * 2).all()
+
+
+def test_reservoir_kurzer_strom_vollstaendig():
+    reservoir = Reservoir(groesse=500, seed=1)
+    reservoir.aktualisiere(_strom(300))
+    pd.testing.assert_frame_equal(reservoir.stichprobe(), _strom(300))
+
+
+@pytest.mark.parametrize("blockgroesse", [1, 7, 1_000])
+def test_reservoir_unabhaengig_von_bloecken(blockgroesse):
+    strom = _strom(3_000)
+    ganz = Reservoir(groesse=100, seed=5)
+    ganz.aktualisiere(strom)
+    bloecke = Reservoir(groesse=100, seed=5)
+    for start in range(0, len(strom), blockgroesse):
+        bloecke.aktualisiere(strom.iloc[start:start + blockgroesse])
+    pd.testing.assert_frame_equal(bloecke.stichprobe(), ganz.stichprobe())
+
+
+def test_reservoir_gleichverteilt():
+    n, groesse, laeufe = 100, 10, 1_500
+    bloecke = [_strom(n).iloc[start:start + 17] for start in range(0, n, 17)]
+    treffer = np.zeros(n)
+    for seed in range(laeufe):
+        reservoir = Reservoir(groesse=groesse, seed=seed)
+        for block in bloecke:
+            reservoir.aktualisiere(block)
+        treffer[reservoir.stichprobe().index] += 1
+    anteil = treffer / laeufe
+    erwartet = groesse / n
+    streuung = np.sqrt(erwartet * (1 - erwartet) / laeufe)
+    assert np.abs(anteil - erwartet).max() < 5 * streuung
+    # frühe und späte Zeilen gleich häufig
+    assert abs(anteil[:50].mean() - anteil[50:].mean()) < 2 * streuung
@@ -0,0 +1,155 @@
+"""
+test_17_clusteranalyse.py
+Unittests für utils/clusteranalyse.py.
+Prüft die Standardisierung und Ausdünnung der Sensormatrix sowie die Wahl
+von k per Silhouette und Ellbogen-Kriterium.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'airScout_analytics')))
+from config import CONFIG
+from utils.clusteranalyse import ellbogen_k, gruppen, sensormatrix, waehle_k
+
+
+def _sensoren(zeilen=1_000):
+    rng = np.random.default_rng(0)
+    basis = rng.normal(size=zeilen)
+    return pd.DataFrame({
+        'MQ2': basis * 10 + 300,
+        'MQ135': basis * 3 + rng.normal(scale=0.1, size=zeilen) + 200,
+        'MQ7': rng.normal(size=zeilen),
+        'Konstant': np.full(zeilen, 5.0),
+    })
+
+
+def _blobs(je_blob=40, zentren=((0, 0), (10, 0), (0, 10))):
+    rng = np.random.default_rng(1)
+    punkte = np.vstack([rng.normal(loc=z, scale=0.5, size=(je_blob, 2)) for z in zentren])
+    return punkte, np.repeat(np.arange(len(zentren)), je_blob)
+
+
+def _gleiche_zerlegung(labels, wahr):
+    # Labels sind nur bis auf Umbenennung bestimmt
+    paare = set(zip(labels.tolist(), wahr.tolist()))
+    return len(paare) == len(set(labels.tolist())) == len(set(wahr.tolist()))
+
+
+# ------------------------------------------------------------------ sensormatrix
+
+def test_sensormatrix_standardisiert():
+    df = _sensoren()
+    matrix = sensormatrix(df, ['MQ2', 'MQ135', 'MQ7'], max_zeilen=10_000)
+    assert matrix.shape == (3, len(df))
+    np.testing.assert_allclose(matrix.mean(axis=1), 0, atol=1e-12)
+    np.testing.assert_allclose(matrix.std(axis=1), 1, atol=1e-12)
+    # Abstand hängt nur von der Korrelation ab: ||a - b||² = 2n(1 - r)
+    r = np.corrcoef(df['MQ2'], df['MQ135'])[0, 1]
+    np.testing.assert_allclose(((matrix[0] - matrix[1]) ** 2).sum(), 2 * len(df) * (1 - r))
+
+
+def test_sensormatrix_konstante_spalte_und_luecken():
+    df = _sensoren()
+    df.loc[[3, 7, 9], 'MQ7'] = np.nan
+    df['MQ135'] = df['MQ135'].astype(object)
+    df.loc[11, 'MQ135'] = '--'
+    matrix = sensormatrix(df, ['MQ135', 'MQ7', 'Konstant'], max_zeilen=10_000)
+    assert matrix.shape == (3, len(df) - 4)
+    assert np.isfinite(matrix).all()
+    np.testing.assert_array_equal(matrix[2], 0)
+
+
+def test_sensormatrix_duennt_gleichmaessig_aus():
+    df = _sensoren()
+    df['Zeile'] = np.arange(len(df), dtype=float)
+    matrix = sensormatrix(df, ['Zeile', 'MQ2'], max_zeilen=100)
+    assert matrix.shape == (2, 100)
+    # erste und letzte Zeile bleiben, Abstände gleichmäßig
+    abstaende = np.diff(matrix[0])
+    assert matrix[0].argmin() == 0 and matrix[0].argmax() == 99
+    np.testing.assert_allclose(abstaende, abstaende.mean(), rtol=0.2)
+
+
+def test_sensormatrix_standard_stichprobe():
+    df = _sensoren(CONFIG.CLUSTERING['STICHPROBE'] + 500)
+    assert sensormatrix(df, ['MQ2', 'MQ7']).shape == (2, CONFIG.CLUSTERING['STICHPROBE'])
+
+
+# ------------------------------------------------------------------ waehle_k
+
+@pytest.mark.parametrize("methode", ['silhouette', 'ellbogen'])
+def test_waehle_k_findet_drei_gruppen(methode):
+    punkte, wahr = _blobs()
+    ergebnis = waehle_k(punkte, k_werte=range(2, 8), methode=methode, worker=2)
+    assert ergebnis['k'] == 3 and ergebnis['methode'] == methode
+    assert _gleiche_zerlegung(ergebnis['labels'], wahr)
+    assert ergebnis['zentren'].shape == (3, 2)
+    assert sorted(ergebnis['inertien']) == list(range(2, 8))
+    if methode == 'silhouette':
+        assert max(ergebnis['silhouette'], key=ergebnis['silhouette'].get) == 3
+
+
+def test_waehle_k_unabhaengig_von_worker():
+    punkte, _ = _blobs()
+    eins = waehle_k(punkte, k_werte=range(2, 6), methode='silhouette', worker=1)
+    vier = waehle_k(punkte, k_werte=range(2, 6), methode='silhouette', worker=4)
+    assert eins['k'] == vier['k']
+    np.testing.assert_array_equal(eins['labels'], vier['labels'])
+    assert eins['inertien'] == vier['inertien']
+
+
+def test_waehle_k_stichprobe_und_minibatch(monkeypatch):
+    monkeypatch.setitem(CONFIG.CLUSTERING, 'STICHPROBE', 50)
+    monkeypatch.setitem(CONFIG.CLUSTERING, 'MINIBATCH_AB', 100)
+    punkte, wahr = _blobs(je_blob=100)
+    ergebnis = waehle_k(punkte, k_werte=range(2, 6), methode='silhouette')
+    assert ergebnis['k'] == 3
+    assert len(ergebnis['labels']) == len(punkte)
+    assert _gleiche_zerlegung(ergebnis['labels'], wahr)
+
+
+def test_waehle_k_ausweichen_auf_ellbogen():
+    punkte, _ = _blobs(je_blob=1)
+    # k = Anzahl Punkte: keine Silhouette bestimmbar
+    ergebnis = waehle_k(punkte, k_werte=[3], methode='silhouette')
+    assert ergebnis['methode'] == 'ellbogen' and ergebnis['silhouette'] == {}
+    assert ergebnis['k'] == 3
+
+
+def test_waehle_k_kandidaten_begrenzt():
+    punkte, _ = _blobs(je_blob=1)
+    ergebnis = waehle_k(punkte, methode='ellbogen')
+    assert set(ergebnis['inertien']) == {2}
+    assert set(waehle_k(punkte, k_werte=[1, 2, 3, 9])['inertien']) == {2, 3}
+
+
+def test_waehle_k_zu_wenige_punkte():
+    with pytest.raises(ValueError):
+        waehle_k(np.zeros((1, 2)))
+    with pytest.raises(ValueError):
+        waehle_k(np.zeros((5, 2)), k_werte=[1, 6])
+
+
+# ------------------------------------------------------------------ ellbogen_k, gruppen
+
+def test_ellbogen_k():
+    k_werte = list(range(1, 11))
+    # scharfer Knick bei k = 4, danach fast flach
+    inertien = [1000, 600, 300, 50, 45, 40, 36, 33, 31, 30]
+    assert ellbogen_k(k_werte, inertien) == 4
+    assert ellbogen_k(k_werte, [100.0] * 10) == 1
+    assert ellbogen_k([2, 3], [10, 5]) == 2
+
+
+def test_gruppen_nach_erstem_auftreten():
+    namen = ['MQ2', 'MQ7', 'MQ135', 'BMP_Temp']
+    assert gruppen(namen, np.array([2, 0, 2, 1])) == {
+        'Gruppe_1': ['MQ2', 'MQ135'],
+        'Gruppe_2': ['MQ7'],
+        'Gruppe_3': ['BMP_Temp'],
+    }
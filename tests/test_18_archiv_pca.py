@@ -0,0 +1,213 @@
+"""
+test_18_archiv_pca.py
+Unittests für utils/archiv_pca.py.
+Prüft, dass ArchivPCA.ergaenze idempotent ist und die Standardisierung
+einfriert, sowie Projektion, Spaltenauswahl und Ablage des Modells.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.decomposition import PCA
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'airScout_analytics')))
+from config import CONFIG
+from utils.archiv_pca import ArchivPCA, ergaenze_archiv_pca, pca_spalten
+from utils.fahrtenkatalog import FahrtenKatalog
+
+SPALTEN = ['MQ2', 'MQ7', 'MQ135', 'BMP_Temp']
+
+
+def _fahrt(seed, zeilen=600):
+    rng = np.random.default_rng(seed)
+    basis = rng.normal(size=zeilen)
+    return pd.DataFrame({
+        'DateTime': pd.Timestamp('2025-07-15 06:00:00') + pd.to_timedelta(np.arange(zeilen), unit='s'),
+        'MQ2': 300 + 20 * basis + rng.normal(size=zeilen),
+        'MQ7': 400 + 10 * basis + rng.normal(size=zeilen),
+        'MQ135': 200 + rng.normal(scale=5, size=zeilen),
+        'BMP_Temp': 20 + rng.normal(scale=0.5, size=zeilen),
+        'GPS_Lat': 49.35 + rng.uniform(0, 0.01, zeilen),
+        'Segment_ID': np.arange(zeilen) // 50,
+    })
+
+
+def _bearbeitet3(seed, zeilen=600):
+    """Fahrt wie in bearbeitet3: Rohsensoren plus abgeleitete Spalten aus mod_040–042."""
+    df = _fahrt(seed, zeilen)
+    for sensor in ('MQ2', 'MQ7', 'MQ135'):
+        df[f"{sensor}_ppm"] = df[sensor] / 10
+        df[f"{sensor}_ugm3"] = df[sensor] * 1.9
+        df[f"{sensor}_zscore"] = (df[sensor] - df[sensor].mean()) / df[sensor].std()
+        df[f"{sensor}_outlier"] = (df[f"{sensor}_zscore"].abs() > 3).astype(int)
+        df[f"{sensor}_event"] = 0
+        df[f"{sensor}_intensity"] = 0.0
+    df['ml_anomaly'] = 1
+    df['ml_anomaly_score'] = 0.1
+    df['Stunde'] = 6
+    df['street'] = 'Hauptstraße'
+    return df
+
+
+def _modell(*seeds):
+    modell = ArchivPCA(SPALTEN, 2)
+    for seed in seeds:
+        modell.scaler.partial_fit(_fahrt(seed)[SPALTEN].to_numpy())
+    for seed in seeds:
+        modell.ergaenze(f"fahrt_{seed}", _fahrt(seed))
+    return modell
+
+
+def _zustand(modell):
+    scaler = modell.scaler
+    return (np.concatenate([scaler.mean_, scaler.var_]), modell.pca.components_.copy(),
+            int(scaler.n_samples_seen_), int(modell.pca.n_samples_seen_),
+            modell.zeilen, list(modell.fahrten))
+
+
+def _gleicher_zustand(a, b):
+    np.testing.assert_array_equal(a[0], b[0])
+    np.testing.assert_array_equal(a[1], b[1])
+    assert a[2:] == b[2:]
+
+
+def test_pca_spalten_ohne_ids_zeit_und_gps():
+    spalten = ['MQ2', 'Jahr', 'millisec', 'GPS_Lat', 'Segment_ID', 'fahrt_id',
+               'MQ7_zscore', 'MQ7_outlier', 'ml_anomaly', 'BMP_Temp']
+    assert pca_spalten(spalten) == ['MQ2', 'BMP_Temp']
+
+
+def test_pca_spalten_ohne_abgeleitete_spalten():
+    spalten = _bearbeitet3(1).select_dtypes(include=[np.number]).columns
+    assert pca_spalten(spalten) == SPALTEN
+
+
+def test_ergaenze_ist_idempotent():
+    modell = _modell(1, 2)
+    vorher = _zustand(modell)
+    assert modell.ergaenze('fahrt_1', _fahrt(1)) is False
+    assert modell.ergaenze('fahrt_2', _fahrt(99)) is False
+    _gleicher_zustand(_zustand(modell), vorher)
+    assert modell.fahrten == ['fahrt_1', 'fahrt_2'] and modell.zeilen == 1_200
+
+
+def test_ergaenze_friert_standardisierung_ein():
+    modell = _modell(1)
+    vorher = _zustand(modell)
+    neu = _fahrt(3)
+    neu[SPALTEN] *= 3  # deutlich andere Verteilung
+    assert modell.ergaenze('fahrt_3', neu) is True
+    nachher = _zustand(modell)
+    np.testing.assert_array_equal(nachher[0], vorher[0])
+    assert nachher[2] == vorher[2]
+    assert not np.array_equal(nachher[1], vorher[1])
+    assert modell.fahrten == ['fahrt_1', 'fahrt_3'] and modell.zeilen == 1_200
+
+
+def test_ergaenze_blockweise(monkeypatch):
+    monkeypatch.setitem(CONFIG.ARCHIV_PCA, 'BATCH_ZEILEN', 101)
+    modell = _modell(1)
+    # Restblock 600 % 101 = 95 ≥ komponenten: alle Zeilen gehen ein
+    assert modell.zeilen == 600 and modell.pca.n_samples_seen_ == 600
+
+
+def test_ergaenze_ueberspringt_unbrauchbare_fahrten():
+    modell = _modell(1)
+    vorher = _zustand(modell)
+    assert modell.ergaenze('ohne_spalte', _fahrt(4).drop(columns='MQ7')) is False
+    assert modell.ergaenze('zu_kurz', _fahrt(5, zeilen=1)) is False
+    luecken = _fahrt(6, zeilen=10)
+    luecken.loc[1:, 'MQ2'] = np.nan
+    assert modell.ergaenze('nur_luecken', luecken) is False
+    _gleicher_zustand(_zustand(modell), vorher)
+
+
+def test_projiziere():
+    modell = _modell(1, 2)
+    df = _fahrt(7, zeilen=20)
+    df.loc[[3, 8], 'MQ135'] = np.nan
+    df['MQ7'] = df['MQ7'].astype(object)
+    df.loc[11, 'MQ7'] = '--'
+    ergebnis = modell.projiziere(df)
+    assert ergebnis.shape == (20, 2)
+    assert np.isnan(ergebnis[[3, 8, 11]]).all()
+    vollstaendig = df.drop(index=[3, 8, 11])[SPALTEN].astype(float).to_numpy()
+    np.testing.assert_allclose(np.delete(ergebnis, [3, 8, 11], axis=0),
+                               modell.pca.transform(modell.scaler.transform(vollstaendig)))
+    with pytest.raises(KeyError):
+        modell.projiziere(df.drop(columns='BMP_Temp'))
+
+
+def test_wichtige_sensoren():
+    modell = _modell(1, 2)
+    assert list(modell.ladungen().columns) == SPALTEN
+    # MQ2 und MQ7 hängen gemeinsam an einer Basis und bilden die erste Komponente
+    assert set(modell.wichtige_sensoren(2)['Komponente_1']) == {'MQ2', 'MQ7'}
+
+
+def test_lerne_aus_katalog_wie_gesamte_pca(tmp_path):
+    katalog = FahrtenKatalog(str(tmp_path / 'katalog'))
+    for seed in (1, 2, 3):
+        assert katalog.fuege_fahrt_hinzu(f"fahrt_{seed}", _fahrt(seed))
+    modell = ArchivPCA.lerne(katalog)
+    assert modell.spalten == SPALTEN and modell.fahrten == ['fahrt_1', 'fahrt_2', 'fahrt_3']
+    assert modell.zeilen == 1_800
+
+    alle = pd.concat([_fahrt(s) for s in (1, 2, 3)])[SPALTEN].to_numpy()
+    np.testing.assert_allclose(modell.scaler.mean_, alle.mean(axis=0))
+    direkt = PCA(n_components=modell.komponenten).fit((alle - alle.mean(axis=0)) / alle.std(axis=0))
+    # Vorzeichen der Komponenten sind beliebig
+    np.testing.assert_allclose(np.abs(modell.pca.components_[0]), np.abs(direkt.components_[0]), atol=1e-6)
+
+    # erneutes Ergänzen einer bereits angelernten Fahrt ändert nichts
+    vorher = _zustand(modell)
+    assert modell.ergaenze('fahrt_2', _fahrt(2)) is False
+    _gleicher_zustand(_zustand(modell), vorher)
+
+
+def test_speichern_und_laden(tmp_path):
+    modell = _modell(1, 2)
+    pfad = str(tmp_path / 'archiv' / 'pca_modell.pkl')
+    modell.speichern(pfad)
+    geladen = ArchivPCA.laden(pfad)
+    _gleicher_zustand(_zustand(geladen), _zustand(modell))
+    assert ArchivPCA.laden(str(tmp_path / 'fehlt.pkl')) is None
+
+
+def test_ergaenze_archiv_pca_nur_einmal(tmp_path, monkeypatch):
+    pfad = str(tmp_path / 'pca_modell.pkl')
+    monkeypatch.setitem(CONFIG.ARCHIV_PCA, 'DATEI', pfad)
+    _modell(1).speichern()
+    assert ergaenze_archiv_pca('fahrt_2', _fahrt(2)) is True
+    gespeichert = _zustand(ArchivPCA.laden())
+    assert ergaenze_archiv_pca('fahrt_2', _fahrt(2)) is False
+    _gleicher_zustand(_zustand(ArchivPCA.laden()), gespeichert)
+    assert gespeichert[5] == ['fahrt_1', 'fahrt_2']
+
+
+def test_archiv_modell_aus_bearbeitet3_gilt_fuer_bearbeitet0(tmp_path, monkeypatch):
+    from mod_020_csv_analyzer import hauptkomponenten_analyse
+
+    katalog = FahrtenKatalog(str(tmp_path / 'katalog'))
+    for seed in (1, 2):
+        assert katalog.fuege_fahrt_hinzu(f"fahrt_{seed}", _bearbeitet3(seed))
+    modell = ArchivPCA.lerne(katalog)
+    assert modell.spalten == SPALTEN
+    monkeypatch.setitem(CONFIG.ARCHIV_PCA, 'DATEI', str(tmp_path / 'pca_modell.pkl'))
+    modell.speichern()
+
+    bearbeitet0 = _fahrt(7)
+    numerisch = bearbeitet0.select_dtypes(include=[np.number]).columns.tolist()
+    ergebnis = hauptkomponenten_analyse(bearbeitet0, numerisch, str(tmp_path))
+    assert ergebnis['quelle'].startswith('Archiv')
+    np.testing.assert_allclose(ergebnis['transformierte_daten'], modell.projiziere(bearbeitet0))
+
+
+def test_laden_verwirft_modell_mit_abgeleiteten_spalten(tmp_path):
+    pfad = str(tmp_path / 'pca_modell.pkl')
+    alt = ArchivPCA(SPALTEN + ['MQ2_ppm'], 2)
+    alt.speichern(pfad)
+    assert ArchivPCA.laden(pfad) is None
@@ -0,0 +1,107 @@
+"""
+test_19_kartenabgleich.py
+Unittests für utils/kartenabgleich.py.
+Prüft das Viterbi-Map-Matching an einer geraden Straße, an zwei parallelen
+Straßen (Wechselstrafe) und bei Lücken im Track.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'airScout_analytics')))
+from utils.kartenabgleich import UNBEKANNT, StrassenSegmente, baue_segmente, ordne_strassen_zu
+
+LAT0, LON0 = 49.35, 8.14
+M_LAT = 1 / 110540.0
+M_LON = 1 / (111320.0 * np.cos(np.radians(LAT0)))
+
+
+def _grad(x_m, y_m):
+    """Lokale Meter (Ost, Nord) → (Breite, Länge)."""
+    return LAT0 + np.asarray(y_m) * M_LAT, LON0 + np.asarray(x_m) * M_LON
+
+
+def _strasse(name, y_m, laenge_m=1_000):
+    x = np.arange(0, laenge_m + 1, 5.0)
+    lat, lon = _grad(x, np.full(len(x), y_m))
+    return pd.DataFrame({'GPS_Lat': lat, 'GPS_Lon': lon, 'street': name})
+
+
+@pytest.fixture(scope='module')
+def segmente():
+    # Hauptstraße bei y = 0, Parallelstraße 20 m nördlich
+    punkte = pd.concat([_strasse('Hauptstraße', 0.0), _strasse('Parallelweg', 20.0)], ignore_index=True)
+    return StrassenSegmente(baue_segmente(punkte))
+
+
+def _track(y_m, x_m=None, rauschen=0.0, seed=0):
+    y_m = np.asarray(y_m, dtype=float)
+    x_m = np.linspace(10, 990, len(y_m)) if x_m is None else np.asarray(x_m, dtype=float)
+    rng = np.random.default_rng(seed)
+    return _grad(x_m + rng.normal(scale=rauschen, size=len(x_m)),
+                 y_m + rng.normal(scale=rauschen, size=len(y_m)))
+
+
+def test_gerade_strasse(segmente):
+    lat, lon = _track(np.zeros(300), rauschen=3.0)
+    assert (ordne_strassen_zu(lat, lon, segmente) == 'Hauptstraße').all()
+
+
+def test_parallele_strasse_kein_springen(segmente):
+    # einzelne Ausreißer liegen näher an der Parallelstraße
+    y = np.zeros(200)
+    y[[40, 41, 42, 120]] = 11.0
+    lat, lon = _track(y)
+    ergebnis = ordne_strassen_zu(lat, lon, segmente)
+    assert (ergebnis == 'Hauptstraße').all()
+    # ohne Wechselstrafe entscheidet allein die Nähe
+    ohne_strafe = ordne_strassen_zu(lat, lon, segmente, {'WECHSEL_STRAFE': 0.0})
+    assert (ohne_strafe[[40, 41, 42, 120]] == 'Parallelweg').all()
+
+
+def test_echter_wechsel_auf_parallelstrasse(segmente):
+    y = np.concatenate([np.zeros(100), np.full(100, 20.0)])
+    lat, lon = _track(y, rauschen=2.0, seed=1)
+    ergebnis = ordne_strassen_zu(lat, lon, segmente)
+    assert (ergebnis[:95] == 'Hauptstraße').all()
+    assert (ergebnis[105:] == 'Parallelweg').all()
+    # genau ein Wechsel
+    assert (ergebnis[1:] != ergebnis[:-1]).sum() == 1
+
+
+def test_luecken_im_track(segmente):
+    lat, lon = _track(np.zeros(200), rauschen=2.0, seed=2)
+    lat[50:60] = np.nan
+    lon[50:60] = np.nan
+    ergebnis = ordne_strassen_zu(lat, lon, segmente)
+    assert (ergebnis[50:60] == UNBEKANNT).all()
+    assert (np.delete(ergebnis, np.arange(50, 60)) == 'Hauptstraße').all()
+
+
+def test_sprung_und_abseits(segmente):
+    # 20 Punkte am Anfang, Funkloch über 600 m, 20 Punkte am Ende, dann abseits
+    x = np.concatenate([np.linspace(10, 100, 20), np.linspace(700, 790, 20), np.linspace(800, 890, 20)])
+    y = np.concatenate([np.zeros(40), np.full(20, 200.0)])
+    lat, lon = _track(y, x_m=x)
+    ergebnis = ordne_strassen_zu(lat, lon, segmente)
+    assert (ergebnis[:40] == 'Hauptstraße').all()
+    assert (ergebnis[40:] == UNBEKANNT).all()
+
+
+def test_leerer_track(segmente):
+    assert len(ordne_strassen_zu(np.array([]), np.array([]), segmente)) == 0
+    assert ordne_strassen_zu(np.array([LAT0]), np.array([LON0 + 100 * M_LON]), segmente).tolist() == ['Hauptstraße']
+
+
+@pytest.mark.parametrize("block", [1, 7, 64])
+def test_blockgroesse_aendert_nichts(segmente, block):
+    y = np.concatenate([np.zeros(150), np.full(150, 20.0)])
+    y[[20, 21, 200]] = 11.0
+    lat, lon = _track(y, rauschen=3.0, seed=3)
+    lat[80:85] = np.nan
+    ganz = ordne_strassen_zu(lat, lon, segmente, {'BLOCK_SCHRITTE': 10_000})
+    np.testing.assert_array_equal(ordne_strassen_zu(lat, lon, segmente, {'BLOCK_SCHRITTE': block}), ganz)
@@ -0,0 +1,87 @@
+"""
+test_20_csv_zeilenindex.py
+Unittests für utils/csv_zeilenindex.py.
+Prüft, dass Zeilenumbrüche in Anführungszeichen den Index nicht verschieben
+– auch über Blockgrenzen – und dass Ausschnitte wie csv.reader parsen.
+"""
+
+import csv
+import io
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'airScout_analytics')))
+from utils import csv_zeilenindex
+from utils.csv_zeilenindex import CsvZeilenIndex
+
+MIT_UMBRUCH = (
+    'DateTime,Notiz,MQ7\n'
+    '2025-07-15 06:00:00,a,1\n'
+    '2025-07-15 06:00:01,"x\ny",2\n'
+    '2025-07-15 06:00:02,c,3\n'
+)
+
+
+def _datei(tmp_path, text, name='fahrt.csv'):
+    pfad = tmp_path / name
+    pfad.write_bytes(text.encode('utf-8'))
+    return str(pfad)
+
+
+def _erwartet(text):
+    zeilen = [z for z in text.splitlines(keepends=True) if not z.startswith('#')]
+    return list(csv.reader(io.StringIO(''.join(zeilen), newline='')))[1:]
+
+
+def test_umbruch_im_feld(tmp_path):
+    with CsvZeilenIndex(_datei(tmp_path, MIT_UMBRUCH)) as index:
+        assert len(index) == 3
+        assert index.spalten == ['DateTime', 'Notiz', 'MQ7']
+        assert index.zeilen(1, 1) == [['2025-07-15 06:00:01', 'x\ny', '2']]
+        assert index.zeilen(2, 1) == [['2025-07-15 06:00:02', 'c', '3']]
+        assert index.zeilen(0, 10) == _erwartet(MIT_UMBRUCH)
+        assert index.suche_zeit('2025-07-15 06:00:02') == 2
+        assert index.suche_zeit('06:00:01') == 1
+
+
+def test_doppelte_anfuehrungszeichen_und_kommentare(tmp_path):
+    text = ('# Rohlog\n# "Kommentar mit Anführungszeichen\n'
+            'DateTime;Notiz\n'
+            '2025-07-15 06:00:00;"sagt ""hallo""\nund mehr"\n'
+            '2025-07-15 06:00:01;"""\n"""\r\n'
+            '2025-07-15 06:00:02;ende')
+    with CsvZeilenIndex(_datei(tmp_path, text)) as index:
+        assert index.trennzeichen == ';' and index.spalten == ['DateTime', 'Notiz']
+        assert len(index) == 3
+        assert [z[1] for z in index.zeilen(0, 3)] == ['sagt "hallo"\nund mehr', '"\n"', 'ende']
+
+
+@pytest.mark.parametrize("block_bytes", [7, 64, 1 << 20])
+def test_blockgrenzen_und_zufaellige_felder(tmp_path, monkeypatch, block_bytes):
+    monkeypatch.setattr(csv_zeilenindex, 'BLOCK_BYTES', block_bytes)
+    rng = np.random.default_rng(block_bytes)
+    puffer = io.StringIO(newline='')
+    schreiber = csv.writer(puffer, lineterminator='\n')
+    schreiber.writerow(['DateTime', 'Notiz', 'Wert'])
+    for i in range(300):
+        notiz = ''.join(rng.choice(list('ab "\n,;'), rng.integers(0, 12)))
+        schreiber.writerow([f'2025-07-15 06:{i // 60:02d}:{i % 60:02d}', notiz, i])
+    text = puffer.getvalue()
+    with CsvZeilenIndex(_datei(tmp_path, text)) as index:
+        erwartet = _erwartet(text)
+        assert len(index) == len(erwartet) == 300
+        assert index.zeilen(0, 300) == erwartet
+        for start in rng.integers(0, 300, 20):
+            assert index.zeilen(int(start), 5) == erwartet[start:start + 5]
+        assert index.suche_zeit('2025-07-15 06:03:20') == 200
+
+
+def test_leere_und_kopf_only_datei(tmp_path):
+    with CsvZeilenIndex(_datei(tmp_path, '', 'leer.csv')) as index:
+        assert len(index) == 0 and index.spalten == [] and index.zeilen(0, 5) == []
+    with CsvZeilenIndex(_datei(tmp_path, 'DateTime,MQ7\n', 'kopf.csv')) as index:
+        assert len(index) == 0 and index.spalten == ['DateTime', 'MQ7']
+        assert index.suche_zeit('2025-07-15') is None
@@ -0,0 +1,110 @@
+"""
+test_21_fahrtenkatalog.py
+Unittests für utils/fahrtenkatalog.py.
+Prüft, dass eine neu abgelegte Fahrt in einen neuen Versionsordner geht,
+der FahrtenCache danach die neue Version liefert und alte Versionen
+(auch Kataloge ohne Versionsspalte) aufgeräumt werden.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'airScout_analytics')))
+from utils import fahrtenkatalog
+from utils.fahrtenkatalog import FahrtenCache, FahrtenKatalog
+
+
+def _fahrt(zeilen, spalten=('MQ2', 'MQ7', 'MQ135'), versatz=0.0):
+    df = pd.DataFrame({'DateTime': pd.Timestamp('2025-07-15 06:00:00')
+                       + pd.to_timedelta(np.arange(zeilen), unit='s')})
+    for i, spalte in enumerate(spalten):
+        df[spalte] = np.arange(zeilen) + 1000.0 * i + versatz
+    return df
+
+
+@pytest.fixture
+def katalog(tmp_path):
+    return FahrtenKatalog(str(tmp_path / 'fahrten'))
+
+
+def test_neu_ablegen_erzeugt_neue_version(katalog):
+    assert katalog.fuege_fahrt_hinzu('fahrt', _fahrt(100))
+    assert katalog.version('fahrt') == 1
+    assert katalog.fuege_fahrt_hinzu('fahrt', _fahrt(150, ('MQ7', 'MQ135')))
+    assert katalog.version('fahrt') == 2
+    assert os.listdir(os.path.join(katalog.ordner, 'fahrt')) == ['v2']
+    assert katalog.version('gibt_es_nicht') is None
+
+
+def test_cache_liefert_neue_version(katalog):
+    cache = FahrtenCache(katalog, max_fahrten=2)
+    katalog.fuege_fahrt_hinzu('fahrt', _fahrt(100))
+    alt = cache.hole('fahrt')
+    assert cache.hole('fahrt') is alt
+    np.testing.assert_array_equal(alt.werte['MQ7'], np.arange(100) + 1000.0)
+
+    # längere Fahrt, MQ2 entfällt: Spaltennummern verschieben sich
+    katalog.fuege_fahrt_hinzu('fahrt', _fahrt(150, ('MQ7', 'MQ135'), versatz=0.5))
+    neu = cache.hole('fahrt')
+    assert neu is not alt
+    assert list(neu.werte) == ['MQ7', 'MQ135'] and len(neu.zeit) == 150
+    np.testing.assert_array_equal(neu.werte['MQ7'], np.arange(150) + 0.5)
+    assert all(len(neu.werte[s]) == len(neu.zeit) for s in neu.werte)
+    # die alte Version ist aus dem Cache entfernt
+    assert list(cache._offen) == [('fahrt', 2)]
+    with pytest.raises(KeyError):
+        cache.hole('gibt_es_nicht')
+
+
+def test_eingeblendete_alte_version_bleibt_bis_zum_naechsten_ablegen(katalog, monkeypatch):
+    katalog.fuege_fahrt_hinzu('fahrt', _fahrt(100))
+    # wie unter Windows: eingeblendete Dateien lassen sich nicht löschen
+    echtes_rmtree = fahrtenkatalog.shutil.rmtree
+    monkeypatch.setattr(fahrtenkatalog.shutil, 'rmtree', lambda pfad, ignore_errors=False: None)
+    assert katalog.fuege_fahrt_hinzu('fahrt', _fahrt(120))
+    assert sorted(os.listdir(os.path.join(katalog.ordner, 'fahrt'))) == ['v1', 'v2']
+    assert len(katalog.reihen('fahrt').zeit) == 120
+
+    monkeypatch.setattr(fahrtenkatalog.shutil, 'rmtree', echtes_rmtree)
+    assert katalog.fuege_fahrt_hinzu('fahrt', _fahrt(130))
+    assert os.listdir(os.path.join(katalog.ordner, 'fahrt')) == ['v3']
+
+
+def test_reste_eines_abgebrochenen_laufs(katalog):
+    katalog.fuege_fahrt_hinzu('fahrt', _fahrt(100))
+    os.makedirs(os.path.join(katalog.ordner, 'fahrt', 'v2.tmp'))
+    os.makedirs(os.path.join(katalog.ordner, 'fahrt', 'v2'))
+    assert katalog.fuege_fahrt_hinzu('fahrt', _fahrt(110))
+    assert os.listdir(os.path.join(katalog.ordner, 'fahrt')) == ['v2']
+    assert len(katalog.reihen('fahrt').zeit) == 110
+
+
+def test_katalog_ohne_versionsspalte(tmp_path):
+    # Ablage im alten Format: Dateien direkt im Fahrtordner, keine Versionsspalte
+    ordner = tmp_path / 'fahrten'
+    (ordner / 'fahrt').mkdir(parents=True)
+    zeit = pd.date_range('2025-07-15 06:00:00', periods=50, freq='s').to_numpy('datetime64[ns]')
+    np.save(ordner / 'fahrt' / 'zeit.npy', zeit.view(np.int64))
+    np.save(ordner / 'fahrt' / '000.npy', np.arange(50.0))
+    with closing(sqlite3.connect(ordner / 'katalog.sqlite')) as db:
+        db.execute("CREATE TABLE fahrten (fahrt TEXT PRIMARY KEY, quelle TEXT, quelle_mtime REAL,"
+                   " zeilen INTEGER, beginn TEXT, ende TEXT, spalten TEXT, hat_gps INTEGER)")
+        db.execute("INSERT INTO fahrten VALUES ('fahrt', NULL, NULL, 50, '', '', ?, 0)",
+                   (json.dumps(['MQ2']),))
+        db.commit()
+
+    katalog = FahrtenKatalog(str(ordner))
+    assert katalog.version('fahrt') == 0
+    np.testing.assert_array_equal(FahrtenCache(katalog).hole('fahrt').werte['MQ2'], np.arange(50.0))
+
+    assert katalog.fuege_fahrt_hinzu('fahrt', _fahrt(60))
+    assert katalog.version('fahrt') == 1
+    assert os.listdir(ordner / 'fahrt') == ['v1']
+    assert len(katalog.reihen('fahrt').zeit) == 60
@@ -0,0 +1,103 @@
+"""
+test_22_strassenstatistik.py
+Unittests für utils/strassenstatistik.py.
+Prüft, dass eine erneut eingerechnete Fahrt ihren alten Beitrag ersetzt:
+der Speicher entspricht danach einem frisch aufgebauten Speicher.
+"""
+
+import os
+import sqlite3
+import sys
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'airScout_analytics')))
+from utils.strassenstatistik import StrassenStatistik
+
+SENSOREN = ['MQ135', 'MQ7']
+
+
+def _fahrt(seed, zeilen=500, strassen=('Hauptstraße', 'Ringstraße', 'Unbekannt'), spitze=None):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'DateTime': pd.Timestamp('2025-07-15 06:00:00') + pd.to_timedelta(np.arange(zeilen), unit='s'),
+        'street': rng.choice(list(strassen), zeilen),
+        'MQ135': rng.lognormal(5, 0.3, zeilen),
+        'MQ7': rng.lognormal(6, 0.2, zeilen),
+    })
+    df.loc[rng.choice(zeilen, zeilen // 20, replace=False), 'MQ7'] = np.nan
+    if spitze is not None:
+        df.loc[df['street'] == 'Hauptstraße', 'MQ135'] = spitze
+    return df
+
+
+def _speicher(tmp_path, name, *fahrten):
+    speicher = StrassenStatistik(str(tmp_path / f"{name}.sqlite"))
+    for fahrt, df in fahrten:
+        speicher.fuege_fahrt_hinzu(fahrt, df, SENSOREN)
+    return speicher
+
+
+def _gleich(a, b):
+    ta = a.tabelle(perzentile=[0.5, 0.9]).sort_values('street').reset_index(drop=True)
+    tb = b.tabelle(perzentile=[0.5, 0.9]).sort_values('street').reset_index(drop=True)
+    pd.testing.assert_frame_equal(ta[sorted(ta.columns)], tb[sorted(tb.columns)], rtol=1e-9)
+
+
+def test_erneutes_einrechnen_ersetzt_beitrag(tmp_path, capsys):
+    ersetzt = _speicher(tmp_path, 'ersetzt', ('a', _fahrt(1)), ('b', _fahrt(2)))
+    assert ersetzt.fuege_fahrt_hinzu('b', _fahrt(3, zeilen=900), SENSOREN)
+    assert 'ersetzt' in capsys.readouterr().out
+    frisch = _speicher(tmp_path, 'frisch', ('a', _fahrt(1)), ('b', _fahrt(3, zeilen=900)))
+    _gleich(ersetzt, frisch)
+    assert ersetzt.fahrten() == ['a', 'b']
+
+
+def test_maximum_aus_uebrigen_fahrten(tmp_path):
+    speicher = _speicher(tmp_path, 'max', ('a', _fahrt(1)), ('b', _fahrt(2, spitze=5_000.0)))
+    tabelle = speicher.tabelle(['MQ135'], []).set_index('street')
+    assert tabelle.loc['Hauptstraße', 'MQ135_max'] == 5_000.0
+    speicher.fuege_fahrt_hinzu('b', _fahrt(2), SENSOREN)
+    _gleich(speicher, _speicher(tmp_path, 'frisch', ('a', _fahrt(1)), ('b', _fahrt(2))))
+
+
+def test_neue_und_entfallene_strassen(tmp_path):
+    speicher = _speicher(tmp_path, 'strassen', ('a', _fahrt(1)),
+                         ('b', _fahrt(2, strassen=('Ringstraße', 'Waldweg'))))
+    speicher.fuege_fahrt_hinzu('b', _fahrt(4, strassen=('Hauptstraße', 'Bahnhofstraße')), SENSOREN)
+    frisch = _speicher(tmp_path, 'frisch', ('a', _fahrt(1)),
+                       ('b', _fahrt(4, strassen=('Hauptstraße', 'Bahnhofstraße'))))
+    _gleich(speicher, frisch)
+    assert 'Waldweg' not in set(speicher.tabelle()['street'])
+
+
+def test_entferne_fahrt(tmp_path):
+    speicher = _speicher(tmp_path, 'entfernen', ('a', _fahrt(1)), ('b', _fahrt(2)), ('c', _fahrt(5)))
+    assert speicher.entferne_fahrt('b')
+    assert not speicher.entferne_fahrt('b')
+    _gleich(speicher, _speicher(tmp_path, 'frisch', ('a', _fahrt(1)), ('c', _fahrt(5))))
+    assert speicher.entferne_fahrt('a') and speicher.entferne_fahrt('c')
+    assert speicher.tabelle().empty and speicher.fahrten() == []
+
+
+def test_altbestand_wird_nicht_ersetzt(tmp_path):
+    pfad = tmp_path / 'alt.sqlite'
+    # Speicher im alten Format: ohne Fahrtbeiträge
+    with closing(sqlite3.connect(pfad)) as db:
+        db.executescript(
+            "CREATE TABLE fahrten (fahrt TEXT PRIMARY KEY, punkte INTEGER, hinzugefuegt TEXT);"
+            "CREATE TABLE strassen (street TEXT PRIMARY KEY, fahrten INTEGER, dauer_s REAL, punkte INTEGER);"
+            "CREATE TABLE werte (street TEXT, sensor TEXT, anzahl REAL, mittelwert REAL, m2 REAL,"
+            " minimum REAL, maximum REAL, histogramm BLOB, PRIMARY KEY (street, sensor));"
+            "INSERT INTO fahrten VALUES ('alt', 10, '2025-07-01T00:00:00');")
+    speicher = StrassenStatistik(str(pfad))
+    assert not speicher.fuege_fahrt_hinzu('alt', _fahrt(1), SENSOREN)
+    assert not speicher.entferne_fahrt('alt')
+    # neue Fahrten lassen sich weiterhin ersetzen
+    assert speicher.fuege_fahrt_hinzu('neu', _fahrt(2), SENSOREN)
+    assert speicher.fuege_fahrt_hinzu('neu', _fahrt(3), SENSOREN)
+    assert speicher.fahrten() == ['alt', 'neu']
+    _gleich(speicher, _speicher(tmp_path, 'frisch', ('neu', _fahrt(3))))
+
@@ -0,0 +1,83 @@
+"""
+test_23_vorschau_cache.py
+Unittests für utils/vorschau_cache.py.
+Prüft die Vorschaugröße, das Auffrischen genutzter Cache-Dateien und die
+Verdrängung nach Alter und Gesamtgröße.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'airScout_analytics')))
+from config import CONFIG
+from utils.vorschau_cache import VorschauCache
+
+TAG_S = 86400
+
+
+def _bild(tmp_path, name, seed=0, groesse=(1200, 900)):
+    pfad = tmp_path / name
+    rng = np.random.default_rng(seed)
+    Image.fromarray(rng.integers(0, 255, (groesse[1], groesse[0], 3), dtype=np.uint8)).save(pfad)
+    return str(pfad)
+
+
+def _alt_machen(pfad, tage):
+    zeit = time.time() - tage * TAG_S
+    os.utime(pfad, (zeit, zeit))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return VorschauCache(str(tmp_path / 'cache'))
+
+
+def test_vorschau_ist_verkleinert(cache, tmp_path):
+    vorschau = cache.vorschau(_bild(tmp_path, 'gross.png'))
+    breite, hoehe = CONFIG.VORSCHAU['GROESSE']
+    assert vorschau.width <= breite and vorschau.height <= hoehe
+    assert vorschau.width < 1200
+    assert len(os.listdir(cache.ordner)) == 1
+
+
+def test_treffer_frischt_alter_auf(cache, tmp_path):
+    bild = _bild(tmp_path, 'a.png')
+    cache.vorschau(bild)
+    (datei,) = [os.path.join(cache.ordner, n) for n in os.listdir(cache.ordner)]
+    _alt_machen(datei, 40)
+    cache.vorschau(bild)
+    assert time.time() - os.path.getmtime(datei) < TAG_S
+    assert cache.aufraeumen(max_alter_tage=30) == 0
+
+
+def test_aufraeumen_nach_alter(cache, tmp_path):
+    alt, neu = _bild(tmp_path, 'alt.png', 1), _bild(tmp_path, 'neu.png', 2)
+    cache.vorschau(alt)
+    (alt_datei,) = os.listdir(cache.ordner)
+    _alt_machen(os.path.join(cache.ordner, alt_datei), 40)
+    cache.vorschau(neu)
+    assert cache.aufraeumen(max_alter_tage=30) == 1
+    assert alt_datei not in os.listdir(cache.ordner) and len(os.listdir(cache.ordner)) == 1
+
+
+def test_aufraeumen_nach_groesse(cache, tmp_path):
+    for i in range(5):
+        cache.vorschau(_bild(tmp_path, f"b{i}.png", i))
+    dateien = sorted(os.listdir(cache.ordner))
+    for alter, name in enumerate(dateien):
+        _alt_machen(os.path.join(cache.ordner, name), len(dateien) - alter)
+    groessen = [os.path.getsize(os.path.join(cache.ordner, n)) for n in dateien]
+    # Platz für genau die zwei jüngsten Dateien
+    max_mb = (sum(groessen[-2:]) + 1) / (1024 * 1024)
+    assert cache.aufraeumen(max_mb=max_mb) == 3
+    assert sorted(os.listdir(cache.ordner)) == dateien[-2:]
+    assert cache.aufraeumen(max_mb=max_mb) == 0
+
+
+def test_aufraeumen_ohne_ordner(tmp_path):
+    assert VorschauCache(str(tmp_path / 'fehlt')).aufraeumen() == 0
@@ -0,0 +1,51 @@
+"""
+test_24_csv_bericht.py
+Unittests für utils/csv_bericht.py.
+Prüft, dass numerische Kennungen wie Segment_ID (mod_011) nicht in
+Korrelationen und erweiterte Analysen eingehen – exakt und im Näherungsmodus.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'airScout_analytics')))
+from utils.csv_bericht import fuehre_abschnitte_aus, messgroessen, profiliere
+
+
+def _bearbeitet0(tmp_path, zeilen=400):
+    rng = np.random.default_rng(1)
+    basis = rng.normal(size=zeilen)
+    df = pd.DataFrame({
+        'DateTime': pd.Timestamp('2025-07-15 06:00:00') + pd.to_timedelta(np.arange(zeilen), unit='s'),
+        'MQ2': 300 + 20 * basis + rng.normal(size=zeilen),
+        'MQ7': 400 + rng.normal(scale=5, size=zeilen),
+        'BMP_Temp': 20 + np.arange(zeilen) * 0.01,   # steigt mit der Zeit wie die Segment_ID
+        'Segment_ID': np.arange(zeilen) // 40,
+        'Segment_Typ': 'fahrt',
+    })
+    pfad = tmp_path / 'fahrt.csv'
+    df.to_csv(pfad, index=False)
+    return str(pfad)
+
+
+def test_messgroessen_ohne_kennungen():
+    assert messgroessen(['MQ2', 'Segment_ID', 'fahrt_id', 'ID', 'Idle', 'MQ135']) == ['MQ2', 'Idle', 'MQ135']
+
+
+@pytest.mark.parametrize("naeherung", [False, True])
+def test_korrelationen_ohne_segment_id(tmp_path, naeherung):
+    kontext = profiliere(_bearbeitet0(tmp_path), naeherung=naeherung)
+    assert 'Segment_ID' in kontext.profil['numerisch']
+    zeilen, _ = fuehre_abschnitte_aus(kontext, ['korrelationen'])['korrelationen']
+    assert not any('Segment_ID' in z for z in zeilen)
+
+
+def test_feature_selection_ohne_segment_id(tmp_path):
+    kontext = profiliere(_bearbeitet0(tmp_path), naeherung=False)
+    zeilen, ergebnis = fuehre_abschnitte_aus(kontext, ['feature_selection'])['feature_selection']
+    assert 'fehler' not in (ergebnis or {})
+    assert not any('Segment_ID' in z for z in zeilen)